@@ -15,7 +15,14 @@ class Command(BaseCommand):
             default=False,
             help="Use cached organizations from organizations.csv.",
         )
+        parser.add_argument(
+            "--bulk",
+            action="store_true",
+            required=False,
+            default=False,
+            help="Write only new and changed organizations using bulk queries.",
+        )
 
     def handle(self, *args, **options):
         indexer = OrganizationIndexer()
-        indexer.index(cached=options.get("cached"))
+        indexer.index(cached=options.get("cached"), bulk=options.get("bulk"))
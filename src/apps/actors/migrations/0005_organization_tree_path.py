@@ -0,0 +1,36 @@
+# Generated by Django 4.2.15 on 2026-10-18 22:10
+
+import django.contrib.postgres.fields
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+
+populate_tree_paths = """
+WITH RECURSIVE "tree" AS (
+    SELECT "id", ARRAY["id"] AS "path" FROM "actors_organization" WHERE "parent_id" IS NULL
+    UNION ALL
+    SELECT "org"."id", "tree"."path" || "org"."id"
+    FROM "actors_organization" AS "org" JOIN "tree" ON "org"."parent_id" = "tree"."id"
+)
+UPDATE "actors_organization" AS "org" SET "tree_path" = "tree"."path" FROM "tree"
+WHERE "org"."id" = "tree"."id"
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('actors', '0004_quote_org_url'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='organization',
+            name='tree_path',
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.UUIDField(), blank=True, default=list, editable=False, size=None),
+        ),
+        migrations.AddIndex(
+            model_name='organization',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['tree_path'], name='actors_org_tree_path_idx'),
+        ),
+        migrations.RunSQL(populate_tree_paths, migrations.RunSQL.noop),
+    ]
@@ -1,10 +1,12 @@
 import logging
 import uuid
-from typing import Dict
+from collections import defaultdict
+from typing import Dict, List
 
-from django.contrib.postgres.fields import HStoreField
-from django.db import models
-from django.db.models import Model
+from django.contrib.postgres.fields import ArrayField, HStoreField
+from django.contrib.postgres.indexes import GinIndex
+from django.db import connections, models
+from django.db.models import Model, Q
 from django.utils.translation import gettext as _
 from simple_history.models import HistoricalRecords
 
@@ -37,12 +39,14 @@ class HomePage(AbstractBaseModel):
 
 
 class OrganizationModelCopier(ModelCopier):
-    def copy(self, original: Model, new_values: dict = None, copied_objects: dict = None) -> Model:
+    def copy(
+        self, original: Model, new_values: dict = None, copied_objects: dict = None, plan=None
+    ) -> Model:
         if original.is_reference_data:
             return (
                 original  # Reference data organizations should be used as-is instead of copying.
             )
-        return super().copy(original, new_values, copied_objects)
+        return super().copy(original, new_values, copied_objects, plan=plan)
 
 
 class Organization(AbstractBaseModel):
@@ -92,11 +96,15 @@ class Organization(AbstractBaseModel):
         null=True,
         help_text=_("If set, organization is not shown in organization list by default."),
     )
+    # Ids of organizations from root organization to this organization, maintained on save.
+    # Subtree of an organization is found with `tree_path__contains=[organization.id]`.
+    tree_path = ArrayField(models.UUIDField(), default=list, blank=True, editable=False)
 
     class Meta:
         indexes = [
             models.Index(fields=["is_reference_data"]),
             models.Index(fields=["url"]),
+            GinIndex(fields=["tree_path"], name="actors_org_tree_path_idx"),
         ]
         get_latest_by = "modified"
         ordering = ["created"]
@@ -132,6 +140,104 @@ class Organization(AbstractBaseModel):
             ),
         ]
 
+    def get_tree_path(self) -> list:
+        """Return ids of organizations from root organization to this organization."""
+        path = [self.id]
+        org = self
+        while org.parent_id is not None:
+            org = org.parent
+            if org.id in path:
+                raise ValueError(f"Organization {self.id} is its own ancestor")
+            path.insert(0, org.id)
+        return path
+
+    def update_descendant_tree_paths(self, old_path: list):
+        """Replace old_path with current tree path of organization in its descendants."""
+        table = self._meta.db_table
+        with connections[self._state.db or "default"].cursor() as cursor:
+            cursor.execute(
+                f'UPDATE "{table}" SET "tree_path" = %s::uuid[] || "tree_path"[%s:] '
+                'WHERE "tree_path" @> %s::uuid[] AND "id" <> %s',
+                [
+                    [str(path_id) for path_id in self.tree_path],
+                    len(old_path) + 1,
+                    [str(self.id)],
+                    self.id,
+                ],
+            )
+
+    @classmethod
+    def refresh_tree_paths(cls) -> int:
+        """Recompute tree paths of all organizations, e.g. after bulk writes.
+
+        Returns number of organizations whose tree path changed."""
+        table = cls._meta.db_table
+        with connections["default"].cursor() as cursor:
+            cursor.execute(
+                f"""
+                WITH RECURSIVE "tree" AS (
+                    SELECT "id", ARRAY["id"] AS "path" FROM "{table}" WHERE "parent_id" IS NULL
+                    UNION ALL
+                    SELECT "org"."id", "tree"."path" || "org"."id"
+                    FROM "{table}" AS "org" JOIN "tree" ON "org"."parent_id" = "tree"."id"
+                )
+                UPDATE "{table}" AS "org" SET "tree_path" = "tree"."path" FROM "tree"
+                WHERE "org"."id" = "tree"."id" AND "org"."tree_path" IS DISTINCT FROM "tree"."path"
+                """
+            )
+            return cursor.rowcount
+
+    @classmethod
+    def prefetch_tree(cls, orgs: List["Organization"], reference_data=False):
+        """Load ancestors and descendants of organizations with a single query.
+
+        Parents of all loaded organizations and children of organizations in
+        the subtrees are stored in relation caches, so serializing the
+        organizations with their parents and children needs no further queries.
+        If reference_data is enabled, only reference data descendants are loaded.
+        """
+        if not orgs:
+            return
+        ids = {org.id for org in orgs}
+        ancestor_ids = {path_id for org in orgs for path_id in org.tree_path}
+        descendants = Q(tree_path__overlap=list(ids))
+        if reference_data:
+            descendants &= Q(is_reference_data=True)
+        loaded = cls.all_objects.filter(descendants | Q(id__in=ancestor_ids)).select_related(
+            "homepage"
+        )
+        by_id = {org.id: org for org in loaded}
+        by_id.update({org.id: org for org in orgs})
+
+        children = defaultdict(list)
+        for org_id in [org.id for org in loaded]:  # ordered by creation
+            org = by_id[org_id]
+            if org.removed is None and org.parent_id is not None:
+                children[org.parent_id].append(org)
+        for org in by_id.values():
+            if (parent := by_id.get(org.parent_id)) is not None:
+                cls.parent.field.set_cached_value(org, parent)
+            if ids.intersection(org.tree_path) or org.id in ids:
+                queryset = org.children.get_queryset()
+                queryset._result_cache = children[org.id]
+                queryset._prefetch_done = True
+                if not hasattr(org, "_prefetched_objects_cache"):
+                    org._prefetched_objects_cache = {}
+                org._prefetched_objects_cache["children"] = queryset
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "parent" not in update_fields:
+            return super().save(*args, **kwargs)
+
+        old_path = None if self._state.adding else [str(path_id) for path_id in self.tree_path]
+        self.tree_path = self.get_tree_path()
+        if update_fields is not None:
+            kwargs["update_fields"] = {*update_fields, "tree_path"}
+        super().save(*args, **kwargs)
+        if old_path and old_path != [str(path_id) for path_id in self.tree_path]:
+            self.update_descendant_tree_paths(old_path)
+
     def get_label(self):
         pref_label = self.pref_label or {}
         return pref_label.get("en") or pref_label.get("fi") or next(iter(pref_label.values()), "")
@@ -44,7 +44,7 @@ class ChildOrganizationSerializer(CommonModelSerializer):
 
     class Meta:
         model = Organization
-        fields = "__all__"
+        exclude = ["tree_path"]
 
     def to_representation(self, instance):
         if not self.context.get("expand_child_organizations"):
@@ -68,7 +68,7 @@ class ParentOrganizationSerializer(CommonModelSerializer):
 
     class Meta:
         model = Organization
-        fields = "__all__"
+        exclude = ["tree_path"]
 
 
 class OrganizationSerializer(CommonModelSerializer):
@@ -88,7 +88,7 @@ class OrganizationSerializer(CommonModelSerializer):
 
     class Meta:
         model = Organization
-        fields = "__all__"
+        exclude = ["tree_path"]
 
 
 class PersonModelSerializer(CommonModelSerializer):
@@ -1,14 +1,18 @@
 import csv
+import hashlib
+import json
 import logging
+from typing import Dict, List, Optional
 from urllib.parse import quote
 
-import requests
 from cachalot.api import cachalot_disabled
 from django.conf import settings
 from django.db import transaction
 from django.utils import timezone
 
 from apps.actors.models import Organization
+from apps.actors.signals import organizations_indexed
+from apps.common.http_client import get_integration_client
 from metax_service.settings.components.actors import ORGANIZATION_SCHEME  # noqa: F401
 
 _logger = logging.getLogger(__name__)
@@ -33,7 +37,7 @@ class OrganizationIndexer:
     def fetch_orgs_from_api(self):
         """Fetch organizations from API and write to csv file."""
         _logger.info(f"Fetching organization data from {settings.ORGANIZATION_FETCH_API_URL}")
-        res = requests.get(settings.ORGANIZATION_FETCH_API_URL)
+        res = get_integration_client("organizations").get(settings.ORGANIZATION_FETCH_API_URL)
         data = res.json()
 
         orgs_json = data["hits"]["hits"]
@@ -157,15 +161,17 @@ class OrganizationIndexer:
         """Sort organizations so main organizations listed first."""
         return sorted(orgs_dict.values(), key=lambda x: x["parent"] is not None)
 
-    @transaction.atomic
-    def update_orgs(self, orgs_dict):
-        all_reference_orgs = Organization.all_objects.filter(
+    def get_reference_orgs(self):
+        return Organization.all_objects.filter(
             is_reference_data=True, in_scheme=settings.ORGANIZATION_SCHEME
         )
 
-        # Deprecate organizations that have been removed from source data
-        new_deprecated = all_reference_orgs.filter(deprecated__isnull=True).exclude(
-            url__in=orgs_dict.keys()
+    def deprecate_removed_orgs(self, orgs_dict):
+        """Deprecate organizations that have been removed from source data."""
+        new_deprecated = (
+            self.get_reference_orgs()
+            .filter(deprecated__isnull=True)
+            .exclude(url__in=orgs_dict.keys())
         )
         if count := new_deprecated.count():
             _logger.info(
@@ -173,7 +179,11 @@ class OrganizationIndexer:
             )
             new_deprecated.update(deprecated=timezone.now())
 
-        existing_orgs = all_reference_orgs.filter(url__in=orgs_dict.keys())
+    @transaction.atomic
+    def update_orgs(self, orgs_dict):
+        self.deprecate_removed_orgs(orgs_dict)
+
+        existing_orgs = self.get_reference_orgs().filter(url__in=orgs_dict.keys())
         orgs_by_url = {org.url: org for org in existing_orgs}
 
         # create parent organizations first so children can refer to them
@@ -200,7 +210,114 @@ class OrganizationIndexer:
             org.save()
         _logger.info("Organizations updated")
 
-    def index(self, cached=False):
+    # Organization values written by the indexer, parent is the url of the parent organization
+    content_fields = ["in_scheme", "code", "pref_label", "parent", "deprecated"]
+    bulk_update_fields = ["in_scheme", "code", "pref_label", "parent", "deprecated", "modified"]
+
+    def get_content_hash(self, org_dict: dict) -> str:
+        """Return hash of the indexed values of an organization."""
+        content = json.dumps(
+            [org_dict.get(field) for field in self.content_fields], sort_keys=True, default=str
+        )
+        return hashlib.sha256(content.encode()).hexdigest()
+
+    def group_by_level(self, orgs_dict) -> List[List[dict]]:
+        """Group organizations by depth, main organizations in first group.
+
+        Organizations whose parent is missing from source data are left out
+        together with their suborganizations.
+        """
+        levels: Dict[str, Optional[int]] = {}
+
+        def get_level(org_dict) -> Optional[int]:
+            url = org_dict["url"]
+            if url not in levels:
+                parent = org_dict.get("parent")
+                if not parent:
+                    levels[url] = 0
+                elif parent_dict := orgs_dict.get(parent):
+                    parent_level = get_level(parent_dict)
+                    levels[url] = parent_level + 1 if parent_level is not None else None
+                else:
+                    _logger.warning(f"Parent organization not found, skipping: {url} {parent}")
+                    levels[url] = None
+            return levels[url]
+
+        groups: List[List[dict]] = []
+        for org_dict in orgs_dict.values():
+            level = get_level(org_dict)
+            if level is None:
+                continue
+            while len(groups) <= level:
+                groups.append([])
+            groups[level].append(org_dict)
+        return groups
+
+    @transaction.atomic
+    def update_orgs_bulk(self, orgs_dict, batch_size=1000):
+        """Write new and changed organizations with bulk queries.
+
+        Existing organizations are compared with source data by content hash
+        and unchanged organizations are skipped. Organizations are written
+        level by level so parents exist before their children. Model save
+        methods and signals are not called, tree paths are refreshed afterwards.
+        """
+        self.deprecate_removed_orgs(orgs_dict)
+
+        existing_rows = (
+            self.get_reference_orgs()
+            .filter(url__in=orgs_dict.keys())
+            .values("id", "url", "in_scheme", "code", "pref_label", "deprecated", "parent__url")
+        )
+        hashes_by_url = {}
+        ids_by_url = {}
+        for row in existing_rows:
+            hashes_by_url[row["url"]] = self.get_content_hash(
+                {**row, "parent": row["parent__url"]}
+            )
+            ids_by_url[row["url"]] = row["id"]
+
+        now = timezone.now()
+        created = updated = 0
+        for level_orgs in self.group_by_level(orgs_dict):
+            new_orgs = []
+            changed_orgs = []
+            for org_dict in level_orgs:
+                url = org_dict["url"]
+                existing_hash = hashes_by_url.get(url)
+                if existing_hash == self.get_content_hash(org_dict):  # deprecated is None
+                    continue
+                org = Organization(
+                    url=url,
+                    is_reference_data=True,
+                    in_scheme=org_dict.get("in_scheme"),
+                    code=org_dict.get("code"),
+                    pref_label=org_dict["pref_label"],
+                    deprecated=None,
+                    modified=now,
+                )
+                if parent := org_dict.get("parent"):
+                    org.parent_id = ids_by_url[parent]
+                if existing_hash is None:
+                    ids_by_url[url] = org.id
+                    new_orgs.append(org)
+                else:
+                    org.id = ids_by_url[url]
+                    changed_orgs.append(org)
+            Organization.all_objects.bulk_create(new_orgs, batch_size=batch_size)
+            Organization.all_objects.bulk_update(
+                changed_orgs, fields=self.bulk_update_fields, batch_size=batch_size
+            )
+            created += len(new_orgs)
+            updated += len(changed_orgs)
+        if created or updated:
+            Organization.refresh_tree_paths()
+        _logger.info(
+            f"Organizations updated: {created} created, {updated} updated, "
+            f"{len(orgs_dict) - created - updated} unchanged"
+        )
+
+    def index(self, cached=False, bulk=False):
         orgs: list
         if cached:
             orgs = self.get_orgs_from_csv()
@@ -209,4 +326,8 @@ class OrganizationIndexer:
 
         orgs_dict = self.orgs_list_to_dict(orgs)
         with cachalot_disabled():
-            self.update_orgs(orgs_dict)
+            if bulk:
+                self.update_orgs_bulk(orgs_dict)
+            else:
+                self.update_orgs(orgs_dict)
+        organizations_indexed.send(sender=self.__class__)
@@ -0,0 +1,4 @@
+from django.dispatch import Signal
+
+# Sent after reference organizations have been updated
+organizations_indexed = Signal()
@@ -1,6 +1,8 @@
 from django.utils.translation import gettext_lazy as _
 from django_filters import rest_framework as filters
 from rest_framework import serializers
+from rest_framework.decorators import action
+from rest_framework.response import Response
 
 from apps.actors.models import Organization
 from apps.actors.serializers import OrganizationSerializer
@@ -58,10 +60,26 @@ class OrganizationViewSet(CommonReadOnlyModelViewSet):
 
     queryset = Organization.available_objects.filter(
         is_reference_data=True,
-    ).prefetch_related("parent", "children", "children__children")
+    ).select_related("homepage")
 
     def get_serializer_context(self):
         ctx = super().get_serializer_context()
         if self.query_params.get("expand_children"):
             ctx["expand_child_organizations"] = True
         return ctx
+
+    def get_serializer(self, *args, **kwargs):
+        if args and self.action in ("list", "retrieve", "subtree"):
+            # Load parents and children of any depth with a single query
+            instance = args[0]
+            orgs = list(instance) if kwargs.get("many") else [instance]
+            Organization.prefetch_tree(orgs, reference_data=True)
+        return super().get_serializer(*args, **kwargs)
+
+    @action(detail=True, methods=["get"])
+    def subtree(self, request, pk=None):
+        """Get organization with all of its suborganizations as objects."""
+        instance = self.get_object()
+        serializer = self.get_serializer(instance)
+        serializer.context["expand_child_organizations"] = True
+        return Response(serializer.data)
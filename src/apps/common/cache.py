@@ -0,0 +1,60 @@
+# This file is part of the Metax API service
+#
+# Copyright 2017-2024 Ministry of Education and Culture, Finland
+#
+# :author: CSC - IT Center for Science Ltd., Espoo Finland <servicedesk@csc.fi>
+# :license: MIT
+
+"""Generation tokens for invalidating cached values shared by all processes.
+
+Cache keys (or process-local caches) are tied to a generation token stored in
+the shared Django cache. Invalidation replaces the token, so outdated entries
+are no longer read by any process and expire on their own. This works also with
+caches like Memcached that don't support deleting keys by prefix.
+
+The token can only be shared by processes that use a shared cache backend, so
+caches using generation tokens should be enabled only when one is configured.
+With DummyCache the token cannot be stored and None is returned instead.
+"""
+
+import uuid
+from typing import Callable, List, Optional
+
+from django.core.cache import BaseCache
+from django.db import transaction
+
+
+def new_generation_token() -> str:
+    return uuid.uuid4().hex[:12]
+
+
+def get_generation_tokens(cache: BaseCache, keys: List[str]) -> List[Optional[str]]:
+    """Return generation tokens of keys, creating missing tokens."""
+    tokens = cache.get_many(keys)
+    for key in keys:
+        if key not in tokens:
+            cache.add(key, new_generation_token(), timeout=None)
+            tokens[key] = cache.get(key)  # token added by a concurrent process wins
+    return [tokens[key] for key in keys]
+
+
+def get_generation_token(cache: BaseCache, key: str) -> Optional[str]:
+    return get_generation_tokens(cache, [key])[0]
+
+
+def invalidate_generation(cache: BaseCache, key: str, on_change: Optional[Callable] = None):
+    """Replace generation token now and when the current transaction is committed.
+
+    A concurrent request may cache data that is not yet committed, so the token
+    is replaced again when changes are visible to other transactions.
+    The optional `on_change` is called after each replacement, e.g. for
+    clearing process-local copies.
+    """
+
+    def replace():
+        cache.set(key, new_generation_token(), timeout=None)
+        if on_change:
+            on_change()
+
+    replace()
+    transaction.on_commit(replace)
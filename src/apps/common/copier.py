@@ -1,9 +1,176 @@
-from typing import Iterable
+from typing import Dict, Iterable, List, Tuple
 
-from django.db.models import Manager, Model
+from django.db import connections, transaction
+from django.db.models import Manager, Model, Prefetch, QuerySet
+from django.db.models.signals import m2m_changed, post_save, pre_save
+from model_utils.models import TimeStampedModel
 
 from apps.common.helpers import prepare_for_copy
 
+# Classes whose save method does nothing that bulk_create would skip
+BULK_SAFE_SAVE_CLASSES = (Model, TimeStampedModel)
+
+
+def supports_bulk_create(model) -> bool:
+    """Return True if copies of model can be written without calling save.
+
+    Models with custom save logic or save signal receivers need to be saved
+    one by one. Multi-table inheritance is supported for a single level of parents.
+    """
+    for klass in [model, *model._meta.parents]:
+        if klass._meta.get_parent_list() != list(klass._meta.parents):
+            return False  # inheritance is more than one level deep
+        if pre_save.has_listeners(klass) or post_save.has_listeners(klass):
+            return False
+        for base in klass.__mro__:
+            if "save" in vars(base) and base not in BULK_SAFE_SAVE_CLASSES:
+                return False
+    return True
+
+
+class CopyPlan:
+    """Copies of a nested model hierarchy waiting to be written to the database.
+
+    Copies are first collected with primary keys assigned in advance, so relations
+    between copies can be set before anything is saved. Calling `write` then
+    inserts copies of each model and rows of each many-to-many table in bulk.
+    """
+
+    def __init__(self, copied_objects: dict = None):
+        self.copied_objects = copied_objects if copied_objects is not None else {}
+        self.copies: Dict[type, List[Model]] = {}  # copies by model in order of appearance
+        self.pending = set()  # ids of copies not written yet
+        self.reverse_one_to_one: List[Tuple[Model, str, Model]] = []
+        self.copied_many_to_many: List[Tuple] = []  # (field, copy, copied related objects)
+        self.shared_many_to_many: Dict = {}  # many to many field -> [(original, copy)]
+
+    def add(self, model, original: Model, copy: Model):
+        """Add new copy to plan and assign its primary key."""
+        if not model._meta.parents:
+            copy.pk = model._meta.pk.get_pk_value_on_save(copy)
+        self.copies.setdefault(type(copy), []).append(copy)
+        self.pending.add(id(copy))
+        self.copied_objects[model.__name__][str(original.id)] = copy
+
+    def is_pending(self, copy: Model) -> bool:
+        return id(copy) in self.pending
+
+    def write(self):
+        """Write all copies and their many-to-many relations."""
+        # Foreign key constraints are deferred until the end of the transaction
+        with transaction.atomic():
+            for model, copies in self.copies.items():
+                if supports_bulk_create(model):
+                    self._bulk_create(model, copies)
+                else:
+                    for copy in copies:
+                        self._save(copy)
+            self.pending.clear()
+
+            for copy, name, value in self.reverse_one_to_one:
+                setattr(copy, name, value)
+
+            self._write_copied_many_to_many()
+            for field, pairs in self.shared_many_to_many.items():
+                self._write_shared_many_to_many(field, pairs)
+
+    def _bulk_create(self, model, copies: List[Model]):
+        if not model._meta.parents:
+            model._base_manager.bulk_create(copies)
+            return
+
+        # Django does not support bulk_create for multi-table inheritance,
+        # so insert parent rows and child rows separately
+        for parent, parent_link in model._meta.parents.items():
+            for copy in copies:
+                parent_pk = parent._meta.pk.get_pk_value_on_save(copy)
+                setattr(copy, parent._meta.pk.attname, parent_pk)
+                setattr(copy, parent_link.attname, parent_pk)
+            parent._base_manager._insert(copies, fields=parent._meta.local_concrete_fields)
+        model._base_manager._insert(copies, fields=model._meta.local_concrete_fields)
+        for copy in copies:
+            copy._state.adding = False
+            copy._state.db = model._base_manager.db
+
+    def _save(self, copy: Model):
+        # Copied models using inheritance don't have the parent one-to-one relation
+        # until save. Make an initial save using the plain Django model save
+        # so any saving logic using fields from parent model will work.
+        if copy._meta.parents:
+            Model.save(copy)
+        copy.save()
+
+    def _write_copied_many_to_many(self):
+        """Add many-to-many relations to copied objects with one insert per table."""
+        rows_by_through = {}
+        for field, copy, values in self.copied_many_to_many:
+            through = field.remote_field.through
+            source = through._meta.get_field(field.m2m_field_name()).attname
+            target = through._meta.get_field(field.m2m_reverse_field_name()).attname
+            rows_by_through.setdefault(through, []).extend(
+                through(**{source: copy.pk, target: value.pk}) for value in values
+            )
+        for through, rows in rows_by_through.items():
+            through._base_manager.bulk_create(rows, ignore_conflicts=True)
+
+        for field, copy, values in self.copied_many_to_many:
+            self._send_m2m_changed(field, copy, pk_set={value.pk for value in values})
+
+    def _write_shared_many_to_many(self, field, pairs: List[Tuple[Model, Model]]):
+        """Add the same many-to-many relations the originals have with INSERT ... SELECT.
+
+        Related ids are not loaded and m2m_changed is not sent, so models that
+        maintain values derived from the relation need to update them after copying.
+        """
+        through = field.remote_field.through
+        source = through._meta.get_field(field.m2m_field_name())
+        target = through._meta.get_field(field.m2m_reverse_field_name())
+        rows = (
+            through._base_manager.filter(
+                **{
+                    f"{source.attname}__in": [original.pk for original, _ in pairs],
+                    # Match the related manager used by the original, e.g. exclude removed files
+                    f"{target.attname}__in": field.related_model._default_manager.values("pk"),
+                }
+            )
+            .order_by()
+            .values(source.attname, target.attname)
+        )
+        connection = connections[rows.db]
+        rows_sql, rows_params = rows.query.sql_with_params()
+        qn = connection.ops.quote_name
+        pk_type = source.target_field.rel_db_type(connection)
+        sql = (
+            f"INSERT INTO {qn(through._meta.db_table)} ({qn(source.column)}, {qn(target.column)}) "
+            f'SELECT "copies"."new_id", "rows".{qn(target.column)} FROM ({rows_sql}) AS "rows" '
+            f'JOIN unnest(%s::{pk_type}[], %s::{pk_type}[]) AS "copies"("old_id", "new_id") '
+            f'ON "rows".{qn(source.column)} = "copies"."old_id"'
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(
+                sql,
+                [
+                    *rows_params,
+                    [original.pk for original, _ in pairs],
+                    [copy.pk for _, copy in pairs],
+                ],
+            )
+
+    def _send_m2m_changed(self, field, copy: Model, pk_set):
+        through = field.remote_field.through
+        if not m2m_changed.has_listeners(through):
+            return
+        for action in ("pre_add", "post_add"):
+            m2m_changed.send(
+                sender=through,
+                action=action,
+                instance=copy,
+                reverse=False,
+                model=field.related_model,
+                pk_set=pk_set,
+                using=copy._state.db,
+            )
+
 
 class ModelCopier:
     """Copier for nested model hierarchies.
@@ -27,6 +194,11 @@ class ModelCopier:
     If the same object (as determined by model name and object id) occurs
     multiple times, it is copied only once. However, the copy may get
     multiple updates if it has multiple parents.
+
+    Copying is done in two phases. First the whole hierarchy is planned
+    in a CopyPlan without saving anything. Then copies of each model are
+    written with bulk_create, and many-to-many relations with one insert per
+    table. Models that have custom save logic are saved one by one.
     """
 
     copied_relations: Iterable[str]
@@ -86,7 +258,49 @@ class ModelCopier:
             if field.concrete and field.many_to_many:
                 self.many_to_many_fields[field.name] = field
 
-    def _create_new_copy(self, original: Model, new_values=None, copied_objects=None) -> Model:
+    def _get_select_related(self, models: tuple, prefix="") -> List[str]:
+        """Return select_related lookups for copied forward relations and their forward relations."""
+        lookups = []
+        for name, field in self.copied_forward_fields.items():
+            related_model = field.related_model
+            lookups.append(f"{prefix}{name}")
+            if related_model not in models:
+                related_model.copier._get_relation_fields()
+                lookups.extend(
+                    related_model.copier._get_select_related(
+                        (*models, related_model), prefix=f"{prefix}{name}__"
+                    )
+                )
+        return lookups
+
+    def get_copy_queryset(self, queryset: QuerySet, models: tuple = ()) -> QuerySet:
+        """Return queryset that also fetches the related objects that will be copied."""
+        self._get_relation_fields()
+        models = (*models, self.model)
+        prefetches = []
+        for name, field in [
+            *self.copied_reverse_fields.items(),
+            *self.copied_many_to_many_fields.items(),
+        ]:
+            related_model = field.related_model
+            if related_model in models:
+                continue  # avoid infinite recursion
+            related_queryset = related_model.copier.get_copy_queryset(
+                related_model._default_manager.all(), models
+            )
+            prefetches.append(Prefetch(name, queryset=related_queryset))
+        return queryset.select_related(*self._get_select_related(models)).prefetch_related(
+            *prefetches
+        )
+
+    def _get_related_objects(self, original: Model, name: str, field) -> Iterable[Model]:
+        """Return many related objects, using prefetched objects if available."""
+        values = getattr(original, name).all()
+        if name not in getattr(original, "_prefetched_objects_cache", {}):
+            values = field.related_model.copier.get_copy_queryset(values)
+        return values
+
+    def _create_new_copy(self, original: Model, new_values: dict, plan: CopyPlan) -> Model:
         self._get_relation_fields()
 
         copy = prepare_for_copy(original)
@@ -104,23 +318,14 @@ class ModelCopier:
             if name in new_values:
                 continue
             if original_value := getattr(original, name, None):
-                copy_value = field.related_model.copier.copy(
-                    original_value, copied_objects=copied_objects
-                )
+                copy_value = field.related_model.copier.copy(original_value, plan=plan)
                 setattr(copy, name, copy_value)
 
         # Assign e.g. reverse parent relations
         for key, value in new_values.items():
             setattr(copy, key, value)
 
-        # Copied models using inheritance don't have the parent one-to-one relation
-        # until save. Make an initial save using the plain Django model save
-        # so any saving logic using fields from parent model will work.
-        if original._meta.parents:
-            Model.save(copy)
-
-        copy.save()
-        copied_objects[self.model.__name__][str(original.id)] = copy
+        plan.add(self.model, original, copy)
 
         # Copy reverse OneToOne and ForeignKey relations
         for name, field in self.copied_reverse_fields.items():
@@ -128,46 +333,51 @@ class ModelCopier:
                 continue
             if original_value := getattr(original, name, None):
                 if isinstance(original_value, Manager):
-                    # One-to-many reverse ForeignKey
+                    # One-to-many reverse ForeignKey, copies get the parent from new_values
                     new_field_values = {field.remote_field.name: copy}
-                    values = [
+                    for value in self._get_related_objects(original, name, field):
                         field.related_model.copier.copy(
-                            value, new_values=new_field_values, copied_objects=copied_objects
+                            value, new_values=new_field_values, plan=plan
                         )
-                        for value in original_value.all()
-                    ]
-                    getattr(copy, name).add(*values)
                 elif original_value is not None:
                     # Reverse OneToOne
                     copy_value = field.related_model.copier.copy(
                         original_value,
                         new_values={field.remote_field.name: copy},
-                        copied_objects=copied_objects,
+                        plan=plan,
                     )
-                    setattr(copy, name, copy_value)
+                    plan.reverse_one_to_one.append((copy, name, copy_value))
 
         # Assign concrete and copied many to many
         for name, field in self.many_to_many_fields.items():
             if name in new_values:
                 continue
-            values = getattr(original, field.name).all()
             if name in self.copied_many_to_many_fields:
                 values = [
-                    field.related_model.copier.copy(value, copied_objects=copied_objects)
-                    for value in values
+                    field.related_model.copier.copy(value, plan=plan)
+                    for value in self._get_related_objects(original, name, field)
                 ]
-            getattr(copy, name).add(*values)
+                plan.copied_many_to_many.append((field, copy, values))
+            else:
+                plan.shared_many_to_many.setdefault(field, []).append((original, copy))
         return copy
 
-    def _update_existing_copy(self, copy: Model, new_values=None) -> Model:
+    def _update_existing_copy(self, copy: Model, new_values: dict, plan: CopyPlan) -> Model:
         if new_values:
             # Update reverse parent relations
             for key, value in new_values.items():
                 setattr(copy, key, value)
-            copy.save()
+            if not plan.is_pending(copy):
+                copy.save()
         return copy
 
-    def copy(self, original: Model, new_values: dict = None, copied_objects: dict = None) -> Model:
+    def copy(
+        self,
+        original: Model,
+        new_values: dict = None,
+        copied_objects: dict = None,
+        plan: CopyPlan = None,
+    ) -> Model:
         """Create new copy or return already copied instance.
 
         Values from `new_values` are assigned to the new copy before saving it.
@@ -178,19 +388,25 @@ class ModelCopier:
         having multiple parent relations.
 
         The `copied_objects` dict is used internally to keep track of
-        object to copy-of-object mappings.
+        object to copy-of-object mappings. The `plan` is used internally
+        to collect copies of related objects, which are written when
+        the outermost copy call returns.
         """
         assert isinstance(original, self.model)
-        copied_objects = copied_objects or {}
+        is_root = plan is None
+        if is_root:
+            plan = CopyPlan(copied_objects)
         new_values = new_values or {}
 
-        model_copies = copied_objects.setdefault(self.model.__name__, {})
+        model_copies = plan.copied_objects.setdefault(self.model.__name__, {})
         copy = model_copies.get(str(original.id))
         if copy is None:
             # Create new copy
-            copy = self._create_new_copy(original, new_values, copied_objects)
+            copy = self._create_new_copy(original, new_values, plan)
         else:
             # Update existing copy
-            copy = self._update_existing_copy(copy, new_values)
+            copy = self._update_existing_copy(copy, new_values, plan)
 
+        if is_root:
+            plan.write()
         return copy
@@ -0,0 +1,311 @@
+import logging
+import threading
+import time
+from collections import Counter
+from typing import Dict, Optional, Tuple
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+
+from apps.common.profiling import prometheus_labels
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+RETRY_STATUS_CODES = {502, 503, 504}
+
+
+class CircuitOpenError(requests.ConnectionError):
+    """Request was not made because the integration has failed repeatedly."""
+
+
+class CircuitBreaker:
+    """Stop calling an integration for a while after consecutive failures.
+
+    After `failure_threshold` consecutive failures the circuit opens and requests
+    fail immediately for `reset_seconds`. After that one trial request is allowed
+    (half-open state). If it succeeds the circuit closes, otherwise it opens again.
+    """
+
+    def __init__(self, failure_threshold: int, reset_seconds: float):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.lock = threading.Lock()
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.trial_in_progress = False
+
+    @property
+    def is_open(self) -> bool:
+        return self.opened_at is not None
+
+    def allow_request(self) -> bool:
+        with self.lock:
+            if self.opened_at is None:
+                return True
+            if self.trial_in_progress or time.monotonic() - self.opened_at < self.reset_seconds:
+                return False
+            self.trial_in_progress = True
+            return True
+
+    def record_success(self):
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+            self.trial_in_progress = False
+
+    def record_failure(self) -> bool:
+        """Record failure. Returns True if circuit was opened."""
+        with self.lock:
+            self.failures += 1
+            was_open = self.opened_at is not None
+            if self.trial_in_progress or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+            self.trial_in_progress = False
+            return not was_open and self.opened_at is not None
+
+
+class RetryBudget:
+    """Limit retries to a fraction of requests.
+
+    Each request deposits `ratio` tokens and each retry withdraws one token,
+    so during an outage retries add at most `ratio` extra load on top of a small
+    reserve of `min_tokens`.
+    """
+
+    def __init__(self, ratio: float, min_tokens: float):
+        self.ratio = ratio
+        self.min_tokens = min_tokens
+        self.max_tokens = min_tokens * 10
+        self.tokens = min_tokens
+        self.lock = threading.Lock()
+
+    def deposit(self):
+        with self.lock:
+            self.tokens = min(self.tokens + self.ratio, self.max_tokens)
+
+    def withdraw(self) -> bool:
+        with self.lock:
+            if self.tokens < 1:
+                return False
+            self.tokens -= 1
+            return True
+
+
+class IntegrationMetrics:
+    """Process-wide metrics of outbound integration requests in Prometheus text format."""
+
+    prefix = "metax_integration"
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requests = Counter()  # (integration, outcome)
+        self.duration = Counter()  # integration
+        self.retries = Counter()  # integration
+        self.circuit_opened = Counter()  # integration
+        self.circuit_open = {}  # integration -> bool
+
+    def record_request(self, integration: str, outcome: str, duration: float):
+        with self.lock:
+            self.requests[(integration, outcome)] += 1
+            self.duration[integration] += duration
+
+    def record_retry(self, integration: str):
+        with self.lock:
+            self.retries[integration] += 1
+
+    def record_circuit(self, integration: str, is_open: bool, opened=False):
+        with self.lock:
+            self.circuit_open[integration] = is_open
+            if opened:
+                self.circuit_opened[integration] += 1
+
+    def clear(self):
+        with self.lock:
+            self.requests.clear()
+            self.duration.clear()
+            self.retries.clear()
+            self.circuit_opened.clear()
+            self.circuit_open.clear()
+
+    def render(self) -> str:
+        """Return metrics in Prometheus text exposition format."""
+        with self.lock:
+            lines = [f"# TYPE {self.prefix}_requests_total counter"]
+            for (integration, outcome), count in sorted(self.requests.items()):
+                labels = prometheus_labels(integration=integration, outcome=outcome)
+                lines.append(f"{self.prefix}_requests_total{labels} {count}")
+            lines.append(f"# TYPE {self.prefix}_request_duration_seconds_sum counter")
+            for integration, duration in sorted(self.duration.items()):
+                labels = prometheus_labels(integration=integration)
+                lines.append(f"{self.prefix}_request_duration_seconds_sum{labels} {duration:g}")
+            for name, counter in [
+                ("retries", self.retries),
+                ("circuit_opened", self.circuit_opened),
+            ]:
+                lines.append(f"# TYPE {self.prefix}_{name}_total counter")
+                for integration, count in sorted(counter.items()):
+                    labels = prometheus_labels(integration=integration)
+                    lines.append(f"{self.prefix}_{name}_total{labels} {count}")
+            lines.append(f"# TYPE {self.prefix}_circuit_open gauge")
+            for integration, is_open in sorted(self.circuit_open.items()):
+                labels = prometheus_labels(integration=integration)
+                lines.append(f"{self.prefix}_circuit_open{labels} {int(is_open)}")
+        return "\n".join(lines) + "\n"
+
+
+integration_metrics = IntegrationMetrics()
+
+
+class IntegrationClient:
+    """HTTP client for an outbound integration.
+
+    Connections are kept alive and pooled per host, separately for each thread.
+    Requests have connect and read timeouts. Idempotent requests that fail
+    with a connection error, timeout or a 502-504 response are retried with
+    exponential backoff while the retry budget allows it. Repeated failures
+    open a circuit breaker, after which requests fail immediately with
+    CircuitOpenError until the integration is tried again.
+
+    Use `get_integration_client(name)` to get the shared client of an integration.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        timeout: Optional[Tuple[float, float]] = None,
+        max_retries: Optional[int] = None,
+        backoff_seconds: Optional[float] = None,
+        pool_maxsize: int = 10,
+    ):
+        self.name = name
+        self.timeout = timeout or (
+            settings.INTEGRATION_CONNECT_TIMEOUT,
+            settings.INTEGRATION_READ_TIMEOUT,
+        )
+        if max_retries is None:
+            max_retries = settings.INTEGRATION_MAX_RETRIES
+        self.max_retries = max_retries
+        if backoff_seconds is None:
+            backoff_seconds = settings.INTEGRATION_RETRY_BACKOFF_SECONDS
+        self.backoff_seconds = backoff_seconds
+        self.pool_maxsize = pool_maxsize
+        self.retry_budget = RetryBudget(
+            ratio=settings.INTEGRATION_RETRY_BUDGET_RATIO,
+            min_tokens=settings.INTEGRATION_RETRY_BUDGET_MIN,
+        )
+        self.circuit_breaker = CircuitBreaker(
+            failure_threshold=settings.INTEGRATION_CIRCUIT_FAILURE_THRESHOLD,
+            reset_seconds=settings.INTEGRATION_CIRCUIT_RESET_SECONDS,
+        )
+        self.local = threading.local()
+
+    @property
+    def session(self) -> requests.Session:
+        """Return session of current thread."""
+        session = getattr(self.local, "session", None)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_maxsize=self.pool_maxsize, max_retries=0)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            self.local.session = session
+        return session
+
+    def is_failure(self, response: requests.Response) -> bool:
+        return response.status_code >= 500
+
+    def request(
+        self, method: str, url: str, idempotent: Optional[bool] = None, **kwargs
+    ) -> requests.Response:
+        """Make request, see `requests.Session.request` for arguments.
+
+        Set `idempotent` to allow retrying a request that would not be
+        retried based on its method, e.g. a POST that only reads data.
+        """
+        method = method.upper()
+        if idempotent is None:
+            idempotent = method in IDEMPOTENT_METHODS
+        kwargs.setdefault("timeout", self.timeout)
+        self.retry_budget.deposit()
+
+        attempt = 0
+        while True:
+            if not self.circuit_breaker.allow_request():
+                integration_metrics.record_request(self.name, "circuit_open", 0)
+                raise CircuitOpenError(f"Integration {self.name} is unavailable")
+
+            response = None
+            error = None
+            start = time.perf_counter()
+            try:
+                response = self.session.request(method, url, **kwargs)
+                outcome = f"{response.status_code // 100}xx"
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error = e
+                outcome = "timeout" if isinstance(e, requests.Timeout) else "error"
+            integration_metrics.record_request(self.name, outcome, time.perf_counter() - start)
+
+            if error or self.is_failure(response):
+                opened = self.circuit_breaker.record_failure()
+                if opened:
+                    logger.warning(f"Circuit opened for integration {self.name}")
+                integration_metrics.record_circuit(
+                    self.name, self.circuit_breaker.is_open, opened=opened
+                )
+            else:
+                self.circuit_breaker.record_success()
+                integration_metrics.record_circuit(self.name, False)
+
+            retryable = error is not None or response.status_code in RETRY_STATUS_CODES
+            if (
+                retryable
+                and idempotent
+                and attempt < self.max_retries
+                and self.retry_budget.withdraw()
+            ):
+                attempt += 1
+                integration_metrics.record_retry(self.name)
+                logger.info(f"Retrying {method} {url} to {self.name} ({attempt})")
+                time.sleep(self.backoff_seconds * 2 ** (attempt - 1))
+                continue
+
+            if error:
+                raise error
+            return response
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, data=None, json=None, **kwargs) -> requests.Response:
+        return self.request("POST", url, data=data, json=json, **kwargs)
+
+    def put(self, url: str, data=None, **kwargs) -> requests.Response:
+        return self.request("PUT", url, data=data, **kwargs)
+
+    def delete(self, url: str, **kwargs) -> requests.Response:
+        return self.request("DELETE", url, **kwargs)
+
+
+_clients: Dict[str, IntegrationClient] = {}
+_clients_lock = threading.Lock()
+
+
+def get_integration_client(name: str, **options) -> IntegrationClient:
+    """Return process-wide client for integration.
+
+    Options are passed to IntegrationClient when the client is created.
+    """
+    with _clients_lock:
+        client = _clients.get(name)
+        if client is None:
+            client = _clients[name] = IntegrationClient(name, **options)
+        return client
+
+
+def reset_integration_clients():
+    """Remove shared clients, e.g. after changing settings in tests."""
+    with _clients_lock:
+        _clients.clear()
+    integration_metrics.clear()
@@ -0,0 +1,92 @@
+import logging
+import time
+from typing import Optional, Tuple
+
+from django.conf import settings
+
+from apps.common.profiling import QueryBudgetExceededError, RequestProfile, request_metrics
+
+logger = logging.getLogger(__name__)
+
+
+class RequestProfilingMiddleware:
+    """Record query count and timings of requests.
+
+    Adds a Server-Timing header to responses and records metrics by view
+    in `request_metrics`. Views may declare query budgets by action
+    (or lowercase HTTP method for views without actions), e.g.
+
+    ```
+    class SomeViewSet(ViewSet):
+        query_budgets = {"list": 10, "retrieve": 8}
+    ```
+
+    A request exceeding its budget is logged as a warning, or
+    QueryBudgetExceededError is raised when QUERY_BUDGETS_ENFORCED is enabled.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.ENABLE_REQUEST_PROFILING:
+            return self.get_response(request)
+
+        profile = RequestProfile()
+        start = time.perf_counter()
+        with profile.activate():
+            response = self.get_response(request)
+        duration = time.perf_counter() - start
+
+        response["Server-Timing"] = self.get_server_timing(profile, duration)
+        view_name, budget = self.get_view_budget(request)
+        request_metrics.record(
+            view=view_name,
+            method=request.method,
+            status=response.status_code,
+            profile=profile,
+            duration=duration,
+        )
+        if budget is not None and profile.query_count > budget:
+            request_metrics.record_budget_exceeded(view=view_name, method=request.method)
+            msg = (
+                f"{request.method} {request.path} ({view_name}) made {profile.query_count} "
+                f"queries, query budget is {budget}"
+            )
+            if settings.QUERY_BUDGETS_ENFORCED:
+                raise QueryBudgetExceededError(msg)
+            logger.warning(msg)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request._profiling_view_func = view_func
+
+    def get_server_timing(self, profile: RequestProfile, duration: float) -> str:
+        def metric(name, seconds, desc=None):
+            value = f"{name};dur={seconds * 1000:.1f}"
+            if desc:
+                value += f';desc="{desc}"'
+            return value
+
+        return ", ".join(
+            [
+                metric("db", profile.timings["db"], desc=f"{profile.query_count} queries"),
+                metric("serializer", profile.timings["serializer"]),
+                metric("render", profile.timings["render"]),
+                metric("total", duration),
+            ]
+        )
+
+    def get_view_budget(self, request) -> Tuple[str, Optional[int]]:
+        """Return view name and query budget for request."""
+        view_func = getattr(request, "_profiling_view_func", None)
+        resolver_match = getattr(request, "resolver_match", None)
+        if not view_func or not resolver_match:
+            return "unknown", None
+
+        view_name = resolver_match.view_name or resolver_match._func_path
+        view_class = getattr(view_func, "cls", None) or getattr(view_func, "view_class", None)
+        budgets = getattr(view_class, "query_budgets", None) or {}
+        method = request.method.lower()
+        action = (getattr(view_func, "actions", None) or {}).get(method, method)
+        return view_name, budgets.get(action)
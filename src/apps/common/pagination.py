@@ -1,12 +1,75 @@
+import base64
+import binascii
+import json
 from collections import OrderedDict
+from typing import List, Optional, Sequence
 
 import coreapi
 import coreschema
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Field, Func, Value
 from django.forms.fields import NullBooleanField
 from django.utils.encoding import force_str
 from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import ValidationError
 from rest_framework.pagination import LimitOffsetPagination
 from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class Row(Func):
+    """PostgreSQL row constructor ROW(value1, value2, ...).
+
+    Rows are compared column by column, so e.g. ROW(a, b) > ROW(1, 2) is
+    equivalent to (a > 1 OR (a = 1 AND b > 2)) but can be resolved
+    with a single index range scan."""
+
+    function = "ROW"
+    output_field = Field()
+
+
+def encode_cursor(values: Sequence) -> str:
+    """Encode list of keyset values into an opaque cursor string."""
+    data = json.dumps(list(values), cls=DjangoJSONEncoder, separators=(",", ":"))
+    return base64.urlsafe_b64encode(data.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> list:
+    """Decode cursor string created with encode_cursor."""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (binascii.Error, ValueError):
+        raise ValidationError({"cursor": _("Invalid cursor.")})
+    if not isinstance(values, list):
+        raise ValidationError({"cursor": _("Invalid cursor.")})
+    return values
+
+
+def filter_after_keyset(queryset, fields: Sequence[str], values: Sequence):
+    """Return rows of queryset that come after values when ordered by fields.
+
+    All fields are assumed to be sorted in ascending order."""
+    if len(fields) != len(values):
+        raise ValidationError({"cursor": _("Invalid cursor.")})
+    value_expressions = []
+    for field_name, value in zip(fields, values):
+        field = queryset.model._meta.get_field(field_name)
+        try:
+            value = field.to_python(value)
+        except DjangoValidationError:
+            raise ValidationError({"cursor": _("Invalid cursor.")})
+        value_expressions.append(Value(value, output_field=field))
+    return queryset.alias(_keyset=Row(*fields)).filter(_keyset__gt=Row(*value_expressions))
+
+
+def estimate_count(queryset) -> int:
+    """Return row count estimate for queryset from the query planner.
+
+    The estimate is based on table statistics and may be inaccurate
+    but it is considerably faster than COUNT for large results."""
+    plan = json.loads(queryset.explain(format="json"))
+    return int(plan[0]["Plan"]["Plan Rows"])
 
 
 class OffsetPagination(LimitOffsetPagination):
@@ -85,3 +148,178 @@ class OffsetPagination(LimitOffsetPagination):
 class DefaultOffsetPagination(OffsetPagination):
     def aggregate_queryset(self, queryset):
         return None
+
+
+class KeysetOffsetPagination(DefaultOffsetPagination):
+    """Offset pagination with optional keyset based cursor pagination.
+
+    Cursor pagination is enabled with cursor_pagination=true. Results are
+    ordered by keyset_fields and the next page is requested using the
+    opaque cursor from the next link. The cost of fetching a page does not
+    depend on how deep in the results the page is. Because counting all
+    results can be slow, count is returned only when requested with
+    count=exact or count=estimate.
+    """
+
+    keyset_fields: List[str] = []
+
+    cursor_pagination_param = "cursor_pagination"
+    cursor_pagination_description = _(
+        "Set true to use cursor pagination ordered by {fields}. Offset is ignored."
+    )
+    cursor_query_param = "cursor"
+    cursor_query_description = _("Cursor value for cursor pagination.")
+    count_query_param = "count"
+    count_query_description = _(
+        "Count mode for cursor pagination. An estimated count is faster but may be inaccurate."
+    )
+    count_choices = ["none", "estimate", "exact"]
+
+    params = DefaultOffsetPagination.params | {
+        cursor_pagination_param,
+        cursor_query_param,
+        count_query_param,
+    }
+
+    def cursor_pagination_enabled(self, request) -> bool:
+        value = request.query_params.get(self.cursor_pagination_param)
+        try:
+            return bool(NullBooleanField().to_python(value))
+        except ValueError:
+            return False
+
+    def get_count_mode(self, request) -> str:
+        value = request.query_params.get(self.count_query_param, "none")
+        if value not in self.count_choices:
+            raise ValidationError(
+                {
+                    self.count_query_param: _("Value should be one of {}.").format(
+                        self.count_choices
+                    )
+                }
+            )
+        return value
+
+    def get_cursor_values(self, request) -> Optional[list]:
+        if cursor := request.query_params.get(self.cursor_query_param):
+            return decode_cursor(cursor)
+        return None
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.use_cursor = self.pagination_enabled(request) and self.cursor_pagination_enabled(
+            request
+        )
+        if not self.use_cursor:
+            return super().paginate_queryset(queryset, request, view)
+
+        self.request = request
+        self.limit = self.get_limit(request)
+        self.count = None
+        queryset = queryset.order_by(*self.keyset_fields)
+
+        count_mode = self.get_count_mode(request)
+        if count_mode == "exact":
+            self.count = self.get_count(queryset)
+        elif count_mode == "estimate":
+            self.count = estimate_count(queryset)
+
+        if values := self.get_cursor_values(request):
+            queryset = filter_after_keyset(queryset, self.keyset_fields, values)
+
+        # Fetch one extra item to determine if there is a next page
+        results = list(queryset[: self.limit + 1])
+        self.next_values = None
+        if len(results) > self.limit:
+            results = results[: self.limit]
+            self.next_values = [getattr(results[-1], field) for field in self.keyset_fields]
+        return results
+
+    def get_next_link(self):
+        if not self.use_cursor:
+            return super().get_next_link()
+        if self.next_values is None:
+            return None
+        url = remove_query_param(self.request.build_absolute_uri(), self.offset_query_param)
+        return replace_query_param(url, self.cursor_query_param, encode_cursor(self.next_values))
+
+    def get_previous_link(self):
+        if not self.use_cursor:
+            return super().get_previous_link()
+        return None  # cursor pagination only goes forward
+
+    def get_paginated_response(self, data):
+        if not self.use_cursor:
+            return super().get_paginated_response(data)
+        response_data = OrderedDict()
+        if self.count is not None:
+            response_data["count"] = self.count
+        response_data["next"] = self.get_next_link()
+        response_data["previous"] = None
+        response_data["results"] = data
+        return Response(response_data)
+
+    def get_schema_fields(self, view):
+        fields = super().get_schema_fields(view)
+        fields += [
+            coreapi.Field(
+                name=self.cursor_pagination_param,
+                required=False,
+                location="query",
+                schema=coreschema.Boolean(
+                    title="Cursor pagination",
+                    description=force_str(self.cursor_pagination_description).format(
+                        fields=", ".join(self.keyset_fields)
+                    ),
+                    default=False,
+                ),
+            ),
+            coreapi.Field(
+                name=self.cursor_query_param,
+                required=False,
+                location="query",
+                schema=coreschema.String(
+                    title="Cursor", description=force_str(self.cursor_query_description)
+                ),
+            ),
+            coreapi.Field(
+                name=self.count_query_param,
+                required=False,
+                location="query",
+                schema=coreschema.Enum(
+                    self.count_choices,
+                    title="Count",
+                    description=force_str(self.count_query_description),
+                    default="none",
+                ),
+            ),
+        ]
+        return fields
+
+    def get_schema_operation_parameters(self, view):
+        parameters = super().get_schema_operation_parameters(view)
+        parameters += [
+            {
+                "name": self.cursor_pagination_param,
+                "required": False,
+                "in": "query",
+                "description": force_str(self.cursor_pagination_description).format(
+                    fields=", ".join(self.keyset_fields)
+                ),
+                "schema": {"type": "boolean"},
+            },
+            {
+                "name": self.cursor_query_param,
+                "required": False,
+                "in": "query",
+                "description": force_str(self.cursor_query_description),
+                "schema": {"type": "string"},
+            },
+            {
+                "name": self.count_query_param,
+                "required": False,
+                "in": "query",
+                "description": force_str(self.count_query_description),
+                "schema": {"type": "string", "enum": self.count_choices},
+            },
+        ]
+        return parameters
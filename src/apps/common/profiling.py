@@ -1,9 +1,13 @@
 import logging
-from collections import Counter
-from contextlib import contextmanager
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import ExitStack, contextmanager
 from inspect import currentframe, getframeinfo
 from os import path
+from typing import Dict, Optional
 
+from django.db import connections
 from django.db.models.sql.compiler import SQLCompiler, SQLInsertCompiler, SQLUpdateCompiler
 
 logger = logging.getLogger(__name__)
@@ -59,3 +63,144 @@ def count_queries(log=False):
         SQLUpdateCompiler.execute_sql = update_exec
         if log:
             logger.info(f"{line}: {counters}")
+
+
+_local = threading.local()
+
+
+class QueryBudgetExceededError(Exception):
+    """Request made more queries than allowed by the query budget of the view."""
+
+
+class RequestProfile:
+    """Query count and timings of a single request.
+
+    Database queries are counted by installing the profile as a database
+    execute wrapper. Other parts of the request are timed using sections, e.g.
+
+    >>> with profile.section("serializer"):
+    >>>     data = serializer.data
+    """
+
+    def __init__(self):
+        self.query_count = 0
+        self.timings = Counter()  # seconds by section name
+        self._open_sections = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.query_count += 1
+            self.timings["db"] += time.perf_counter() - start
+
+    @contextmanager
+    def section(self, name: str):
+        """Time a part of the request. Nested sections with the same name are timed once."""
+        self._open_sections[name] += 1
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._open_sections[name] -= 1
+            if self._open_sections[name] == 0:
+                self.timings[name] += time.perf_counter() - start
+
+    @contextmanager
+    def activate(self):
+        """Profile database queries and sections in the current thread."""
+        previous = getattr(_local, "profile", None)
+        _local.profile = self
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(self))
+                yield self
+        finally:
+            _local.profile = previous
+
+
+def get_request_profile() -> Optional[RequestProfile]:
+    """Return profile of the request being handled in the current thread, if any."""
+    return getattr(_local, "profile", None)
+
+
+@contextmanager
+def profile_section(name: str):
+    """Time a part of the current request if request profiling is enabled."""
+    if profile := get_request_profile():
+        with profile.section(name):
+            yield
+    else:
+        yield
+
+
+def prometheus_labels(**labels) -> str:
+    """Return labels formatted for the Prometheus text format, e.g. {view="x",method="GET"}."""
+    values = ",".join(
+        '{}="{}"'.format(name, str(value).replace("\\", "\\\\").replace('"', '\\"'))
+        for name, value in labels.items()
+    )
+    return f"{{{values}}}"
+
+
+class RequestMetrics:
+    """Process-wide request metrics aggregated by view, method and status.
+
+    Metrics are exported in the Prometheus text format. Each server
+    process has its own metrics.
+    """
+
+    prefix = "metax_http_request"
+    sums = ["duration_seconds", "db_queries", "db_seconds", "serializer_seconds", "render_seconds"]
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counts = Counter()
+        self.totals: Dict[tuple, Counter] = defaultdict(Counter)
+        self.budget_exceeded = Counter()
+
+    def record(
+        self, view: str, method: str, status: int, profile: RequestProfile, duration: float
+    ):
+        key = (view, method, str(status))
+        with self.lock:
+            self.counts[key] += 1
+            totals = self.totals[key]
+            totals["duration_seconds"] += duration
+            totals["db_queries"] += profile.query_count
+            totals["db_seconds"] += profile.timings["db"]
+            totals["serializer_seconds"] += profile.timings["serializer"]
+            totals["render_seconds"] += profile.timings["render"]
+
+    def record_budget_exceeded(self, view: str, method: str):
+        with self.lock:
+            self.budget_exceeded[(view, method)] += 1
+
+    def clear(self):
+        with self.lock:
+            self.counts.clear()
+            self.totals.clear()
+            self.budget_exceeded.clear()
+
+    def render(self) -> str:
+        """Return metrics in Prometheus text exposition format."""
+        with self.lock:
+            lines = [f"# TYPE {self.prefix}s_total counter"]
+            for (view, method, status), count in sorted(self.counts.items()):
+                labels = prometheus_labels(view=view, method=method, status=status)
+                lines.append(f"{self.prefix}s_total{labels} {count}")
+            for name in self.sums:
+                lines.append(f"# TYPE {self.prefix}_{name}_sum counter")
+                for (view, method, status), totals in sorted(self.totals.items()):
+                    labels = prometheus_labels(view=view, method=method, status=status)
+                    lines.append(f"{self.prefix}_{name}_sum{labels} {totals[name]:g}")
+            lines.append(f"# TYPE {self.prefix}_query_budget_exceeded_total counter")
+            for (view, method), count in sorted(self.budget_exceeded.items()):
+                labels = prometheus_labels(view=view, method=method)
+                lines.append(f"{self.prefix}_query_budget_exceeded_total{labels} {count}")
+        return "\n".join(lines) + "\n"
+
+
+request_metrics = RequestMetrics()
@@ -6,6 +6,8 @@ from django.utils import timezone
 from django.utils.dateparse import parse_datetime
 from rest_framework import renderers
 
+from apps.common.profiling import profile_section
+
 logger = logging.getLogger(__name__)
 
 
@@ -17,7 +19,8 @@ class CustomTimeJSONRenderer(renderers.JSONRenderer):
         if t_format := request.META.get("HTTP_TIME_FORMAT"):
             # Change the format of all DateTime fields in the response data
             data = self.adjust_datetime_format(data, t_format)
-        return super().render(data, media_type, renderer_context)
+        with profile_section("render"):
+            return super().render(data, media_type, renderer_context)
 
     def adjust_datetime_format(self, data, time_format):
         datetime_pattern = r"^\d{4}-\d{2}"
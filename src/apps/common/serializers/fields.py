@@ -18,6 +18,7 @@ from rest_framework.fields import empty, to_choices_dict
 from rest_framework.utils import html
 
 from apps.common.models import MediaTypeValidator
+from apps.refdata.cache import concept_cache
 
 logger = logging.getLogger(__name__)
 
@@ -70,10 +71,10 @@ class URLReferencedModelListField(serializers.ListField):
             )
 
         model = self.child.Meta.model
-        entries = list(model.objects.filter(url__in=urls))
+        entries_by_url = concept_cache.get_many(model, urls)
+        entries = list(entries_by_url.values())
 
-        retrieved_urls = set(entry.url for entry in entries)
-        missing_urls = urls - retrieved_urls
+        missing_urls = urls - set(entries_by_url)
 
         if missing_urls:
             model_name = self.child.Meta.model.__name__
@@ -87,7 +88,10 @@ class URLReferencedModelListField(serializers.ListField):
 
 
 class ReferenceDataCache:
-    """Helper class for caching reference data in serializer context."""
+    """Helper class for collecting reference data urls in serializer context.
+
+    Entries are fetched from the process-wide concept cache in a single batch.
+    """
 
     notfound = object()  # Notfound in cache indicates object does not exist
 
@@ -116,10 +120,10 @@ class ReferenceDataCache:
         val = self.entries[url]
         if val is None:
             # Entry not queried yet, query all entries that haven't been queried yet
-            instances = self.model.available_objects.filter(
-                url__in=[_url for _url, entry in self.entries.items() if entry is None]
+            instances = concept_cache.get_many(
+                self.model, [_url for _url, entry in self.entries.items() if entry is None]
             )
-            self.entries.update({entry.url: entry for entry in instances})
+            self.entries.update(instances)
 
             # If entry with url wasn't found, mark it as not found
             for _url, entry in self.entries.items():
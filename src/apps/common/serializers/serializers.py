@@ -22,6 +22,7 @@ from rest_framework.serializers import ValidationError
 from rest_framework.settings import api_settings
 from rest_framework.utils import html, model_meta
 
+from apps.common.profiling import profile_section
 from apps.common.serializers.fields import MultiLanguageField, NullableCharField, PrivateEmailField
 
 logger = logging.getLogger(__name__)
@@ -34,6 +35,10 @@ def parse_html_data_to_list(data):
 
 
 class CommonListSerializer(serializers.ListSerializer):
+    def to_representation(self, data):
+        with profile_section("serializer"):
+            return super().to_representation(data)
+
     def preprocess(self, data):
         """Call preprocess method of child if available."""
         if not isinstance(data, list):  # Ensure data is a list
@@ -723,7 +728,8 @@ class CommonModelSerializer(PatchModelSerializer, LazyableModelSerializer):
     def to_representation(self, instance):
         if isinstance(instance, str):
             instance = literal_eval(instance)
-        rep = super().to_representation(instance)
+        with profile_section("serializer"):
+            rep = super().to_representation(instance)
         if not self.context.get("include_nulls"):
             rep = {k: v for k, v in rep.items() if v is not None}
         return rep
@@ -1,7 +1,10 @@
+import hmac
 from functools import cached_property
 
 from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
 from django.utils.translation import gettext_lazy as _
+from django.views import View
 from rest_access_policy import AccessViewSetMixin
 from rest_framework import serializers, viewsets
 from rest_framework.exceptions import NotAuthenticated
@@ -9,7 +12,9 @@ from rest_framework.generics import get_object_or_404
 from rest_framework.pagination import PageNumberPagination
 from rest_framework.response import Response
 
+from apps.common.http_client import integration_metrics
 from apps.common.permissions import BaseAccessPolicy
+from apps.common.profiling import request_metrics
 
 
 class SystemCreatorViewSet(AccessViewSetMixin, viewsets.ModelViewSet):
@@ -214,3 +219,25 @@ class CommonReadOnlyModelViewSet(
         context["strict"] = self.strict
         context["include_nulls"] = self.include_nulls
         return context
+
+
+class RequestMetricsView(View):
+    """Request and integration metrics of the current process in Prometheus text format.
+
+    Readable by superusers or with REQUEST_METRICS_TOKEN as bearer token.
+    """
+
+    def has_permission(self, request) -> bool:
+        if token := settings.REQUEST_METRICS_TOKEN:
+            expected = f"Bearer {token}"
+            if hmac.compare_digest(request.headers.get("Authorization", ""), expected):
+                return True
+        return request.user.is_superuser
+
+    def get(self, request, *args, **kwargs):
+        if not self.has_permission(request):
+            return HttpResponseForbidden()
+        return HttpResponse(
+            request_metrics.render() + integration_metrics.render(),
+            content_type="text/plain; version=0.0.4; charset=utf-8",
+        )
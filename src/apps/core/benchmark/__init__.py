@@ -0,0 +1,11 @@
+from .compatibility import CompatibilityDiffBenchmark
+from .generator import BenchmarkDataGenerator, BenchmarkScale
+from .runner import BenchmarkRunner, compare_reports
+
+__all__ = [
+    "BenchmarkDataGenerator",
+    "BenchmarkRunner",
+    "BenchmarkScale",
+    "CompatibilityDiffBenchmark",
+    "compare_reports",
+]
@@ -0,0 +1,63 @@
+import logging
+import statistics
+import time
+from typing import Callable, Iterable, Optional
+
+from apps.core.models.legacy import LegacyDataset
+from apps.core.models.legacy_compatibility import LegacyCompatibility, compare_legacy_versions
+
+from .runner import summarize
+
+logger = logging.getLogger(__name__)
+
+
+class CompatibilityDiffBenchmark:
+    """Compare legacy compatibility diff with and without pruning equal values.
+
+    Normalized V2 and V3 versions are computed once for each legacy dataset and
+    both diff variants are timed on them. Diffs and migration errors of the
+    variants are checked to be identical.
+    """
+
+    def __init__(self, iterations=3, log: Optional[Callable] = None):
+        self.iterations = iterations
+        self.log = log or logger.info
+
+    def measure(self, func: Callable) -> float:
+        """Return minimum duration of func in milliseconds."""
+        durations = []
+        for _ in range(self.iterations):
+            start = time.perf_counter()
+            func()
+            durations.append((time.perf_counter() - start) * 1000)
+        return min(durations)
+
+    def run(self, legacy_datasets: Iterable[LegacyDataset]) -> dict:
+        deepdiff_ms = []
+        pruned_ms = []
+        mismatches = []
+        for legacy_dataset in legacy_datasets:
+            compat = LegacyCompatibility(legacy_dataset)
+            v2_version, v3_version = compat.get_diff_versions()
+            diff = compare_legacy_versions(v2_version, v3_version, prune=False)
+            pruned_diff = compare_legacy_versions(v2_version, v3_version)
+            errors = compat.get_migration_errors_from_diff(diff)
+            pruned_errors = compat.get_migration_errors_from_diff(pruned_diff)
+            if diff != pruned_diff or errors != pruned_errors:
+                self.log(f"Diff mismatch for {legacy_dataset.id}")
+                mismatches.append(str(legacy_dataset.id))
+
+            deepdiff_ms.append(
+                self.measure(lambda: compare_legacy_versions(v2_version, v3_version, prune=False))
+            )
+            pruned_ms.append(self.measure(lambda: compare_legacy_versions(v2_version, v3_version)))
+
+        if not deepdiff_ms:
+            return {"datasets": 0, "mismatches": []}
+        return {
+            "datasets": len(deepdiff_ms),
+            "deepdiff_ms": summarize(deepdiff_ms),
+            "pruned_ms": summarize(pruned_ms),
+            "speedup": round(statistics.fmean(deepdiff_ms) / statistics.fmean(pruned_ms), 2),
+            "mismatches": mismatches,
+        }
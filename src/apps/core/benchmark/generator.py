@@ -0,0 +1,322 @@
+import logging
+import random
+import uuid
+from dataclasses import asdict, dataclass
+from typing import Callable, Dict, List, Optional
+
+from django.db import transaction
+from django.utils import timezone
+
+from apps.actors.models import Organization, Person
+from apps.core import factories
+from apps.core.models import (
+    AccessRights,
+    AccessType,
+    Dataset,
+    DatasetActor,
+    DatasetLicense,
+    DatasetSearchIndex,
+    FieldOfScience,
+    FileSet,
+    Language,
+    MetadataProvider,
+    RestrictionGrounds,
+    Theme,
+)
+from apps.core.models.access_rights import AccessTypeChoices
+from apps.core.models.catalog_record.dataset import DatasetVersions
+from apps.core.models.catalog_record.dataset_permissions import DatasetPermissions
+from apps.core.models.catalog_record.file_publication import FilePublicationQueue
+from apps.files.models import Directory, File, FileStorage
+from apps.refdata.models import License
+from apps.users.models import MetaxUser
+
+logger = logging.getLogger(__name__)
+
+WORDS = (
+    "climate forest soil water arctic ocean survey health language history genome protein "
+    "sensor satellite economy education energy migration biodiversity archive interview "
+    "statistics model simulation"
+).split()
+
+
+@dataclass
+class BenchmarkScale:
+    """Amounts of generated benchmark data.
+
+    Files are divided into directories of files_per_directory files and
+    directories form a tree where each directory has directory_branching
+    subdirectories. Each of the file_sets datasets gets file_set_files files.
+    """
+
+    files: int = 1_000_000
+    files_per_directory: int = 100
+    directory_branching: int = 10
+    datasets: int = 50_000
+    actors_per_dataset: int = 2
+    file_sets: int = 5
+    file_set_files: int = 100_000
+    batch_size: int = 5000
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+
+class BenchmarkDataGenerator:
+    """Create a large synthetic storage project and datasets for benchmarks.
+
+    Rows are created with bulk inserts, so model save logic is skipped and
+    derived data (directories, publication state, search index) is built at the end.
+    """
+
+    storage_service = "ida"
+    csc_project = "benchmark"
+    data_catalog_id = "urn:nbn:fi:att:data-catalog-benchmark"
+    username = "benchmark-user"
+
+    def __init__(self, scale: BenchmarkScale, seed=0, log: Optional[Callable] = None):
+        self.scale = scale
+        self.random = random.Random(seed)
+        self.log = log or logger.info
+        self.now = timezone.now()
+
+    def generate(self) -> dict:
+        storage = self.create_files()
+        datasets = self.create_datasets()
+        self.create_file_sets(storage, datasets)
+        self.log("Updating search index")
+        DatasetSearchIndex.objects.update_datasets(datasets)
+        return {
+            "storage_service": storage.storage_service,
+            "csc_project": storage.csc_project,
+            "files": File.all_objects.filter(storage=storage).count(),
+            "datasets": len(datasets),
+        }
+
+    def get_directory_path(self, directory_index: int) -> str:
+        """Return path of nth directory in a tree with directory_branching children per level."""
+        branching = self.scale.directory_branching
+        parts = []
+        index = directory_index + 1
+        while index > 0:
+            index -= 1
+            parts.append(f"dir{index % branching}")
+            index //= branching
+        return "/data/" + "".join(f"{part}/" for part in reversed(parts))
+
+    def get_user(self) -> MetaxUser:
+        user, _ = MetaxUser.objects.get_or_create(
+            username=self.username, defaults={"is_superuser": True}
+        )
+        return user
+
+    def get_storage(self) -> FileStorage:
+        return factories.FileStorageFactory(
+            storage_service=self.storage_service, csc_project=self.csc_project
+        )
+
+    def create_files(self) -> FileStorage:
+        storage = self.get_storage()
+        existing = File.all_objects.filter(storage=storage).count()
+        for start in range(existing, self.scale.files, self.scale.batch_size):
+            end = min(start + self.scale.batch_size, self.scale.files)
+            File.all_objects.bulk_create(
+                [
+                    File(
+                        storage=storage,
+                        storage_identifier=f"benchmark-file-{index}",
+                        directory_path=self.get_directory_path(
+                            index // self.scale.files_per_directory
+                        ),
+                        filename=f"file-{index}.{self.random.choice(['csv', 'txt', 'tif'])}",
+                        size=self.random.randint(1, 10**9),
+                        checksum=f"md5:{uuid.UUID(int=self.random.getrandbits(128)).hex}",
+                        modified=self.now,
+                        frozen=self.now,
+                    )
+                    for index in range(start, end)
+                ]
+            )
+            self.log(f"Created {end}/{self.scale.files} files")
+        self.log("Building directories")
+        Directory.objects.rebuild(storage)
+        return storage
+
+    def get_reference_data(self, model, count=20) -> List:
+        """Return existing reference data or create some if there is none."""
+        instances = list(model.objects.all()[:count])
+        if not instances:
+            factory_class = {
+                AccessType: factories.AccessTypeFactory,
+                FieldOfScience: factories.FieldOfScienceFactory,
+                Language: factories.LanguageFactory,
+                License: factories.LicenseFactory,
+                RestrictionGrounds: factories.RestrictionGroundsFactory,
+                Theme: factories.ThemeFactory,
+            }[model]
+            instances = [
+                factory_class(url=f"https://benchmark.fi/{model.__name__}/{i}") for i in range(3)
+            ]
+        return instances
+
+    def get_organizations(self) -> List[Organization]:
+        organizations = list(Organization.objects.filter(is_reference_data=True)[:100])
+        if not organizations:
+            organizations = [factories.OrganizationFactory() for _ in range(10)]
+        return organizations
+
+    def random_text(self, words=5) -> str:
+        return " ".join(self.random.choices(WORDS, k=words))
+
+    def create_datasets(self) -> List:
+        user = self.get_user()
+        data_catalog = factories.DataCatalogFactory(
+            id=self.data_catalog_id, dataset_versioning_enabled=True
+        )
+        metadata_owner, _ = MetadataProvider.objects.get_or_create(
+            user=user, organization=self.csc_project
+        )
+        refdata: Dict[str, List] = {
+            "access_type": self.get_reference_data(AccessType),
+            "license": self.get_reference_data(License),
+            "restriction_grounds": self.get_reference_data(RestrictionGrounds),
+            "theme": self.get_reference_data(Theme),
+            "field_of_science": self.get_reference_data(FieldOfScience),
+            "language": self.get_reference_data(Language),
+        }
+        organizations = self.get_organizations()
+
+        dataset_ids = list(
+            Dataset.all_objects.filter(data_catalog=data_catalog).values_list("id", flat=True)
+        )
+        for start in range(len(dataset_ids), self.scale.datasets, self.scale.batch_size):
+            end = min(start + self.scale.batch_size, self.scale.datasets)
+            with transaction.atomic():
+                batch = self.create_dataset_batch(
+                    range(start, end), user, data_catalog, metadata_owner, refdata, organizations
+                )
+            dataset_ids.extend(batch)
+            self.log(f"Created {end}/{self.scale.datasets} datasets")
+        return dataset_ids
+
+    def create_dataset_batch(
+        self, indexes, user, data_catalog, metadata_owner, refdata, organizations
+    ) -> List:
+        count = len(indexes)
+        versions = DatasetVersions.objects.bulk_create(
+            [DatasetVersions(system_creator=user) for _ in range(count)]
+        )
+        permissions = DatasetPermissions.objects.bulk_create(
+            [DatasetPermissions(system_creator=user) for _ in range(count)]
+        )
+        access_rights = AccessRights.objects.bulk_create(
+            [
+                AccessRights(
+                    system_creator=user,
+                    access_type=self.random.choice(refdata["access_type"]),
+                    description={"en": self.random_text()},
+                )
+                for _ in range(count)
+            ]
+        )
+        licenses = DatasetLicense.objects.bulk_create(
+            [
+                DatasetLicense(
+                    system_creator=user, reference=self.random.choice(refdata["license"])
+                )
+                for _ in range(count)
+            ]
+        )
+        AccessRights.license.through.objects.bulk_create(
+            [
+                AccessRights.license.through(accessrights_id=rights.id, datasetlicense_id=lic.id)
+                for rights, lic in zip(access_rights, licenses)
+            ]
+        )
+        # Published datasets that are not open require restriction grounds
+        AccessRights.restriction_grounds.through.objects.bulk_create(
+            [
+                AccessRights.restriction_grounds.through(
+                    accessrights_id=rights.id,
+                    restrictiongrounds_id=self.random.choice(refdata["restriction_grounds"]).id,
+                )
+                for rights in access_rights
+                if rights.access_type.url != AccessTypeChoices.OPEN
+            ]
+        )
+
+        datasets = Dataset.objects.bulk_create(
+            [
+                Dataset(
+                    system_creator=user,
+                    data_catalog=data_catalog,
+                    metadata_owner=metadata_owner,
+                    dataset_versions=versions[i],
+                    permissions=permissions[i],
+                    access_rights=access_rights[i],
+                    persistent_identifier=f"urn:nbn:fi:att:benchmark-{index}",
+                    title={"en": f"{self.random_text()} {index}", "fi": self.random_text()},
+                    description={"en": self.random_text(40)},
+                    keyword=self.random.sample(WORDS, 3),
+                    state=Dataset.StateChoices.PUBLISHED,
+                    issued=self.now.date(),
+                    published_revision=1,
+                )
+                for i, index in enumerate(indexes)
+            ]
+        )
+
+        for field_name in ["theme", "field_of_science", "language"]:
+            field = Dataset._meta.get_field(field_name)
+            through = field.remote_field.through
+            target = f"{field.related_model.__name__.lower()}_id"
+            through.objects.bulk_create(
+                [
+                    through(**{"dataset_id": dataset.id, target: value.id})
+                    for dataset in datasets
+                    for value in self.random.sample(
+                        refdata[field_name], min(2, len(refdata[field_name]))
+                    )
+                ]
+            )
+
+        persons = Person.objects.bulk_create(
+            [
+                Person(name=f"Person {self.random_text(2).title()}", system_creator=user)
+                for _ in range(count * self.scale.actors_per_dataset)
+            ]
+        )
+        # DatasetActor uses multi-table inheritance which does not support bulk_create
+        for i, person in enumerate(persons):
+            dataset = datasets[i // self.scale.actors_per_dataset]
+            order = i % self.scale.actors_per_dataset
+            DatasetActor(
+                dataset=dataset,
+                person=person,
+                organization=self.random.choice(organizations),
+                roles=["creator", "publisher"] if order == 0 else ["contributor"],
+                actors_order=order,
+                system_creator=user,
+            ).save()
+        return [dataset.id for dataset in datasets]
+
+    def create_file_sets(self, storage: FileStorage, dataset_ids: List):
+        file_set_datasets = Dataset.objects.filter(id__in=dataset_ids[: self.scale.file_sets])
+        for dataset in file_set_datasets.filter(file_set__isnull=True):
+            file_set = FileSet.objects.create(dataset=dataset, storage=storage)
+            file_set.skip_files_m2m_changed = True
+            offset = self.random.randint(0, max(self.scale.files - self.scale.file_set_files, 0))
+            file_ids = File.all_objects.filter(storage=storage).order_by("storage_identifier")[
+                offset : offset + self.scale.file_set_files
+            ]
+            FileSet.files.through.objects.bulk_create(
+                [
+                    FileSet.files.through(fileset_id=file_set.id, file_id=file_id)
+                    for file_id in file_ids.values_list("id", flat=True)
+                ],
+                batch_size=self.scale.batch_size,
+            )
+            FileSet.refresh_totals([file_set.id])
+            self.log(f"Created fileset for dataset {dataset.id}")
+        self.log("Updating file publication state")
+        FilePublicationQueue.update_files(File.all_objects.filter(storage=storage))
@@ -0,0 +1,215 @@
+import logging
+import math
+import statistics
+import subprocess
+import time
+from typing import Callable, Dict, List, Optional
+
+from django.conf import settings
+from django.db import transaction
+from django.test import Client
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from apps.common.profiling import RequestProfile
+from apps.core.models import Dataset
+from apps.files.models import Directory, FileStorage
+from apps.users.models import MetaxUser
+
+from .generator import BenchmarkDataGenerator
+
+logger = logging.getLogger(__name__)
+
+
+def percentile(values: List[float], percent: float) -> float:
+    """Return nearest-rank percentile of values."""
+    ordered = sorted(values)
+    index = max(math.ceil(percent / 100 * len(ordered)) - 1, 0)
+    return ordered[index]
+
+
+def summarize(values: List[float]) -> dict:
+    return {
+        "p50": percentile(values, 50),
+        "p90": percentile(values, 90),
+        "p95": percentile(values, 95),
+        "p99": percentile(values, 99),
+        "max": max(values),
+        "mean": statistics.fmean(values),
+    }
+
+
+def get_git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare_reports(old: dict, new: dict) -> Dict[str, dict]:
+    """Return ratios new/old of p50 and p95 latency and mean query count by scenario."""
+    comparison = {}
+    for name, result in new["scenarios"].items():
+        if not (previous := old["scenarios"].get(name)):
+            continue
+        comparison[name] = {
+            key: (
+                round(result[group][stat] / previous[group][stat], 3)
+                if previous[group][stat]
+                else None
+            )
+            for key, group, stat in [
+                ("p50", "latency_ms", "p50"),
+                ("p95", "latency_ms", "p95"),
+                ("queries", "queries", "mean"),
+            ]
+        }
+    return comparison
+
+
+class BenchmarkRunner:
+    """Run request scenarios against data created by BenchmarkDataGenerator.
+
+    Requests are made in-process with the Django test client. Each request
+    is made in a transaction that is rolled back, so write scenarios can be
+    repeated on the same data. Latency and query count is recorded per request.
+    """
+
+    def __init__(self, iterations=20, warmup=2, log: Optional[Callable] = None):
+        self.iterations = iterations
+        self.warmup = warmup
+        self.log = log or logger.info
+        self.client = Client()
+        self.storage_params = {
+            "storage_service": BenchmarkDataGenerator.storage_service,
+            "csc_project": BenchmarkDataGenerator.csc_project,
+        }
+
+    @property
+    def scenarios(self) -> Dict[str, Callable]:
+        """Scenarios by name. A scenario is called with the iteration number
+        and returns a function that makes the measured request."""
+        return {
+            "directory_root": self.directory_root,
+            "directory_deep": self.directory_deep,
+            "directory_dataset": self.directory_dataset,
+            "dataset_list": self.dataset_list,
+            "dataset_search": self.dataset_search,
+            "dataset_aggregates": self.dataset_aggregates,
+            "dataset_retrieve": self.dataset_retrieve,
+            "file_bulk_upsert": self.file_bulk_upsert,
+            "dataset_publish": self.dataset_publish,
+            "dataset_new_version": self.dataset_new_version,
+        }
+
+    def setup(self):
+        user = MetaxUser.objects.get(username=BenchmarkDataGenerator.username)
+        self.client.force_login(user)
+        self.storage = FileStorage.objects.get(**self.storage_params)
+        datasets = Dataset.objects.filter(
+            data_catalog_id=BenchmarkDataGenerator.data_catalog_id,
+            state=Dataset.StateChoices.PUBLISHED,
+        )
+        self.file_set_dataset = datasets.filter(file_set__isnull=False).order_by("id").first()
+        self.dataset = datasets.filter(file_set__isnull=True).order_by("id").first()
+        self.deep_directory = (
+            Directory.objects.filter(storage=self.storage).order_by("-pathname").first()
+        )
+
+    def directory_root(self, iteration):
+        return lambda: self.client.get(
+            "/v3/directories", {**self.storage_params, "path": "/data/"}
+        )
+
+    def directory_deep(self, iteration):
+        path = self.deep_directory.pathname
+        return lambda: self.client.get("/v3/directories", {**self.storage_params, "path": path})
+
+    def directory_dataset(self, iteration):
+        params = {**self.storage_params, "path": "/data/", "dataset": self.file_set_dataset.id}
+        return lambda: self.client.get("/v3/directories", params)
+
+    def dataset_list(self, iteration):
+        return lambda: self.client.get("/v3/datasets", {"offset": iteration * 10})
+
+    def dataset_search(self, iteration):
+        return lambda: self.client.get("/v3/datasets", {"search": "climate forest"})
+
+    def dataset_aggregates(self, iteration):
+        return lambda: self.client.get("/v3/datasets/aggregates")
+
+    def dataset_retrieve(self, iteration):
+        return lambda: self.client.get(f"/v3/datasets/{self.dataset.id}")
+
+    def file_bulk_upsert(self, iteration, count=1000):
+        now = timezone.now().isoformat()
+        files = [
+            {
+                **self.storage_params,
+                "pathname": f"/bulk/{iteration}/file-{i}.txt",
+                "storage_identifier": f"benchmark-bulk-{iteration}-{i}",
+                "size": 1024,
+                "checksum": "md5:d41d8cd98f00b204e9800998ecf8427e",
+                "modified": now,
+            }
+            for i in range(count)
+        ]
+        return lambda: self.client.post(
+            "/v3/files/put-many", files, content_type="application/json"
+        )
+
+    def dataset_publish(self, iteration):
+        res = self.client.post(f"/v3/datasets/{self.file_set_dataset.id}/create-draft")
+        draft_id = res.json()["id"]
+        return lambda: self.client.post(f"/v3/datasets/{draft_id}/publish")
+
+    def dataset_new_version(self, iteration):
+        return lambda: self.client.post(f"/v3/datasets/{self.file_set_dataset.id}/new-version")
+
+    def measure(self, request: Callable) -> dict:
+        profile = RequestProfile()
+        start = time.perf_counter()
+        with profile.activate():
+            response = request()
+        duration = time.perf_counter() - start
+        if response.status_code >= 400:
+            raise ValueError(f"Request failed with {response.status_code}: {response.content!r}")
+        return {"latency_ms": duration * 1000, "queries": profile.query_count}
+
+    def run_scenario(self, name: str) -> dict:
+        scenario = self.scenarios[name]
+        latencies = []
+        queries = []
+        for iteration in range(self.warmup + self.iterations):
+            with transaction.atomic():
+                result = self.measure(scenario(iteration))
+                transaction.set_rollback(True)
+            if iteration >= self.warmup:
+                latencies.append(result["latency_ms"])
+                queries.append(result["queries"])
+        return {
+            "iterations": self.iterations,
+            "latency_ms": summarize(latencies),
+            "queries": {
+                "min": min(queries),
+                "max": max(queries),
+                "mean": statistics.fmean(queries),
+            },
+        }
+
+    def run(self, names: Optional[List[str]] = None) -> dict:
+        """Run scenarios and return report."""
+        names = names or list(self.scenarios)
+        report = {
+            "created": timezone.now().isoformat(),
+            "git_commit": get_git_commit(),
+            "scenarios": {},
+        }
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"]):
+            self.setup()
+            for name in names:
+                self.log(f"Running {name}")
+                report["scenarios"][name] = self.run_scenario(name)
+        return report
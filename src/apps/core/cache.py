@@ -0,0 +1,110 @@
+# This file is part of the Metax API service
+#
+# Copyright 2017-2024 Ministry of Education and Culture, Finland
+#
+# :author: CSC - IT Center for Science Ltd., Espoo Finland <servicedesk@csc.fi>
+# :license: MIT
+
+import json
+import logging
+from typing import TYPE_CHECKING, Callable, Iterable, Optional
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.renderers import JSONRenderer
+
+from apps.common.cache import get_generation_tokens, invalidate_generation
+
+if TYPE_CHECKING:
+    from apps.core.models import Dataset
+
+logger = logging.getLogger(__name__)
+
+
+class DatasetResponseCache:
+    """Cache for rendered dataset JSON representations.
+
+    Cache keys contain the dataset id, revision numbers, the visibility class of
+    the user (public or editor), serialization options and generation tokens.
+    There is a generation token for each set of dataset versions because the
+    representation contains data from other versions and drafts, and a global
+    token for changes that may affect any dataset, e.g. reference data indexing.
+
+    Invalidation replaces generation tokens, see apps.common.cache. The cache
+    is enabled by default only when Memcached is used as the shared cache.
+    """
+
+    key_prefix = "dataset-response"
+    global_generation_key = f"{key_prefix}:generation"
+
+    @property
+    def cache(self):
+        return caches[settings.DATASET_RESPONSE_CACHE_ALIAS]
+
+    @property
+    def enabled(self) -> bool:
+        return settings.DATASET_RESPONSE_CACHE_ENABLED
+
+    def _get_versions_generation_key(self, dataset: "Dataset") -> str:
+        # Drafts and versions of a dataset share dataset_versions
+        versions_id = dataset.dataset_versions_id or dataset.id
+        return f"{self.key_prefix}:generation:{versions_id}"
+
+    def get_visibility(self, dataset: "Dataset", user) -> str:
+        """Return which variant of the representation the user is allowed to see."""
+        if dataset.has_permission_to_edit(user):
+            return "editor"  # includes drafts and emails
+        return "public"
+
+    def get_key(self, dataset: "Dataset", user, variant: str = "") -> str:
+        global_generation, versions_generation = get_generation_tokens(
+            self.cache, [self.global_generation_key, self._get_versions_generation_key(dataset)]
+        )
+        return ":".join(
+            [
+                self.key_prefix,
+                str(dataset.id),
+                f"{dataset.published_revision}.{dataset.draft_revision}",
+                f"{global_generation}.{versions_generation}",
+                self.get_visibility(dataset, user),
+                variant,
+            ]
+        )
+
+    def get_or_render(
+        self, dataset: "Dataset", user, render: Callable[[], dict], variant: str = ""
+    ) -> dict:
+        """Return cached representation or render it with `render` and store it in cache."""
+        key = self.get_key(dataset, user, variant)
+        cached: Optional[bytes] = self.cache.get(key)
+        if cached is not None:
+            return json.loads(cached)
+
+        data = render()
+        self.cache.set(
+            key, JSONRenderer().render(data), timeout=settings.DATASET_RESPONSE_CACHE_TIMEOUT
+        )
+        return data
+
+    def _invalidate(self, key: str):
+        if not self.enabled:
+            return
+        invalidate_generation(self.cache, key)
+
+    def invalidate_dataset(self, dataset: "Dataset"):
+        """Invalidate cached representations of dataset and its versions."""
+        self._invalidate(self._get_versions_generation_key(dataset))
+
+    def invalidate_datasets(self, datasets: Iterable["Dataset"]):
+        """Invalidate cached representations of multiple datasets and their versions."""
+        if not self.enabled:
+            return  # avoid evaluating datasets
+        for key in {self._get_versions_generation_key(dataset) for dataset in datasets}:
+            self._invalidate(key)
+
+    def invalidate_all(self):
+        """Invalidate all cached dataset representations."""
+        self._invalidate(self.global_generation_key)
+
+
+dataset_response_cache = DatasetResponseCache()
@@ -9,6 +9,7 @@ from apps.refdata import models as refdata
 from apps.users.factories import MetaxUserFactory
 
 from . import models
+from .models.catalog_record.file_publication import FilePublicationQueue
 
 
 class ContractFactory(factory.django.DjangoModelFactory):
@@ -409,6 +410,7 @@ class FileSetFactory(factory.django.DjangoModelFactory):
             return
         if extracted:
             self.files.set(extracted)
+            FilePublicationQueue.flush()
 
 
 class LocationFactory(factory.django.DjangoModelFactory):
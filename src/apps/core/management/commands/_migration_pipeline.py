@@ -0,0 +1,110 @@
+import json
+import logging
+import os
+import time
+from collections import Counter
+from concurrent.futures import Executor, Future
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, Optional, Set, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+_end = object()
+
+
+def prefetch(iterable: Iterable[T], executor: Executor) -> Iterator[T]:
+    """Iterate while fetching the next item in the background.
+
+    Useful for e.g. requesting the next page of results while the current page is processed.
+    """
+    iterator = iter(iterable)
+    future: Future = executor.submit(next, iterator, _end)
+    while True:
+        item = future.result()
+        if item is _end:
+            return
+        future = executor.submit(next, iterator, _end)
+        yield item
+
+
+class MigrationCheckpoint:
+    """Persistent progress of a migration, used for resuming an interrupted migration.
+
+    Progress is stored as JSON containing the listing offset of each query,
+    completed queries and identifiers of items that failed to migrate.
+    The file is replaced atomically, so a crash can't leave it half-written.
+    Without a path, progress is only kept in memory.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self.offsets: Dict[str, int] = {}
+        self.completed: Set[str] = set()
+        self.failed: Set[str] = set()
+        if path and os.path.exists(path):
+            with open(path) as f:
+                data = json.load(f)
+            self.offsets = data.get("offsets", {})
+            self.completed = set(data.get("completed", []))
+            self.failed = set(data.get("failed", []))
+
+    @property
+    def is_resumed(self) -> bool:
+        return bool(self.offsets or self.completed or self.failed)
+
+    def get_offset(self, key: str) -> int:
+        return self.offsets.get(key, 0)
+
+    def advance(self, key: str, count: int, failed: Iterable[str]):
+        """Mark count items of query as processed."""
+        self.offsets[key] = self.get_offset(key) + count
+        self.failed = set(failed)
+        self.save()
+
+    def complete(self, key: str):
+        self.completed.add(key)
+        self.offsets.pop(key, None)
+        self.save()
+
+    def save(self):
+        if not self.path:
+            return
+        data = {
+            "offsets": self.offsets,
+            "completed": sorted(self.completed),
+            "failed": sorted(self.failed),
+        }
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+
+class ThroughputStats:
+    """Collect processed item count and time spent in each migration stage."""
+
+    def __init__(self):
+        self.start = time.monotonic()
+        self.items = 0
+        self.timings = Counter()
+
+    @contextmanager
+    def timer(self, stage: str):
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.timings[stage] += time.monotonic() - start
+
+    def report(self, item_name="items") -> str:
+        elapsed = time.monotonic() - self.start
+        rate = self.items / elapsed if elapsed > 0 else 0
+        report = f"Throughput: {rate:.2f} {item_name}/s ({self.items} in {elapsed:.1f}s)"
+        if self.timings:
+            stages = ", ".join(
+                f"{stage} {seconds:.1f}s" for stage, seconds in self.timings.items()
+            )
+            report += f"\n- time spent: {stages}"
+        return report
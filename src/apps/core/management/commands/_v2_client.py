@@ -1,7 +1,10 @@
 import getpass
 import logging
+import threading
 from argparse import ArgumentParser
-from typing import Any, Iterator
+from collections import deque
+from concurrent.futures import Executor
+from typing import Any, Iterator, List
 
 import requests
 from django.conf import settings
@@ -20,11 +23,22 @@ class MigrationV2Client:
         self.stdout = stdout
         self.stderr = stderr
         self.handle_metax_settings(options)
+        self.local = threading.local()
 
-        # Sessions automatically use HTTP keep-alive which
-        # avoids opening a new connection to Metax on each request.
-        self.session = requests.Session()
-        self.session.auth = self.metax_auth
+    @property
+    def session(self) -> requests.Session:
+        """Return session of current thread.
+
+        Sessions automatically use HTTP keep-alive which avoids opening a new
+        connection to Metax on each request. Sessions are not thread-safe,
+        so each thread gets its own session.
+        """
+        session = getattr(self.local, "session", None)
+        if session is None:
+            session = requests.Session()
+            session.auth = self.metax_auth
+            self.local.session = session
+        return session
 
     @property
     def metax_auth(self):
@@ -157,6 +171,49 @@ class MigrationV2Client:
         yield from self._fetch_files(params={**params, "removed": "false"}, batched=batched)
         yield from self._fetch_files(params={**params, "removed": "true"}, batched=batched)
 
+    def _fetch_file_pages_concurrently(
+        self, params: dict, executor: Executor, concurrency: int
+    ) -> Iterator[List[dict]]:
+        url = f"{self.metax_instance}/rest/v2/files"
+        params = {**params, "ordering": "id"}
+        limit = int(params.get("limit", 10000))
+
+        def fetch_page(offset: int) -> dict:
+            response = self.session.get(url, params={**params, "offset": offset})
+            response.raise_for_status()
+            return response.json()
+
+        first_page = fetch_page(0)
+        count = first_page.get("count", 0)
+        removed = params.get("removed", "false")
+        self.stdout.write(f"Found {count} files with removed={removed}")
+
+        # Keep up to `concurrency` requests in flight, yield pages in order
+        offsets = iter(range(limit, count, limit))
+        pending = deque()
+        for offset in offsets:
+            pending.append(executor.submit(fetch_page, offset))
+            if len(pending) >= concurrency:
+                break
+        yield first_page["results"]
+        while pending:
+            page = pending.popleft().result()
+            if (offset := next(offsets, None)) is not None:
+                pending.append(executor.submit(fetch_page, offset))
+            yield page["results"]
+
+    def fetch_file_pages_concurrently(
+        self, params: dict, executor: Executor, concurrency: int
+    ) -> Iterator[List[dict]]:
+        """Fetch pages of files using offsets, requesting multiple pages concurrently.
+
+        Yields the same pages as `fetch_files(params, batched=True)`.
+        """
+        for removed in ["false", "true"]:
+            yield from self._fetch_file_pages_concurrently(
+                {**params, "removed": removed}, executor=executor, concurrency=concurrency
+            )
+
     def _fetch_datasets(self, params={}, batched=False):
         metax_instance = self.metax_instance
         response = self.session.get(
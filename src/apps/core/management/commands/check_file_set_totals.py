@@ -0,0 +1,74 @@
+import logging
+
+from django.core.management.base import BaseCommand, CommandParser
+
+from apps.core.models import FileSet
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = "Compare stored file totals and file types of filesets with their files."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--fix", action="store_true", help="Update filesets that have incorrect values"
+        )
+        parser.add_argument(
+            "--batch-size", type=int, default=1000, help="Number of filesets per query"
+        )
+
+    def check_batch(self, file_sets, fix: bool) -> int:
+        """Report filesets with incorrect stored values, return their number."""
+        file_set_ids = [file_set.id for file_set in file_sets]
+        computed_totals = FileSet.get_computed_totals(file_set_ids)
+        computed_file_types = FileSet.get_computed_file_types(file_set_ids)
+        invalid = []
+        for file_set in file_sets:
+            totals = computed_totals.get(file_set.id, {})
+            expected = {field: totals.get(field, 0) for field in FileSet.totals_fields}
+            expected["file_types"] = computed_file_types.get(file_set.id, [])
+            differences = {
+                field: (getattr(file_set, field), value)
+                for field, value in expected.items()
+                if getattr(file_set, field) != value
+            }
+            if differences:
+                invalid.append(file_set)
+                self.stdout.write(
+                    f"FileSet {file_set.id}: "
+                    + ", ".join(
+                        f"{field} is {stored}, expected {value}"
+                        for field, (stored, value) in differences.items()
+                    )
+                )
+
+        if fix and invalid:
+            FileSet.refresh_totals([file_set.id for file_set in invalid])
+            for file_set in invalid:
+                file_set.update_file_types()
+        return len(invalid)
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        file_sets = FileSet.all_objects.order_by("id").only(
+            "id", *FileSet.totals_fields, "file_types"
+        )
+        checked = 0
+        invalid = 0
+        last_id = None
+        while True:
+            batch = file_sets
+            if last_id is not None:
+                batch = batch.filter(id__gt=last_id)
+            batch = list(batch[:batch_size])
+            if not batch:
+                break
+            invalid += self.check_batch(batch, fix=options["fix"])
+            checked += len(batch)
+            last_id = batch[-1].id
+
+        if invalid and options["fix"]:
+            self.stdout.write(f"Fixed {invalid}/{checked} filesets")
+        else:
+            self.stdout.write(f"Found {invalid}/{checked} filesets with incorrect values")
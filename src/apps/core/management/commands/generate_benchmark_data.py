@@ -0,0 +1,26 @@
+import logging
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+
+from apps.core.benchmark import BenchmarkDataGenerator, BenchmarkScale
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = "Generate a large synthetic storage project and datasets for benchmarks."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        defaults = BenchmarkScale()
+        for field, value in defaults.as_dict().items():
+            parser.add_argument(f"--{field.replace('_', '-')}", type=int, default=value)
+        parser.add_argument("--seed", type=int, default=0, help="Random seed")
+
+    def handle(self, *args, **options):
+        if settings.ENV == "production":
+            raise CommandError("This command can only be used in non-production environments")
+        scale = BenchmarkScale(**{field: options[field] for field in BenchmarkScale().as_dict()})
+        generator = BenchmarkDataGenerator(scale, seed=options["seed"], log=self.stdout.write)
+        summary = generator.generate()
+        self.stdout.write(f"Benchmark data generated: {summary}")
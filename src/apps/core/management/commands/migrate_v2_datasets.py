@@ -2,8 +2,11 @@ import copy
 import json
 import logging
 from argparse import ArgumentParser
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager
 from dataclasses import dataclass
-from typing import Callable, Dict, List, Optional, Union
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
 
 from cachalot.api import cachalot_disabled
 from django.core.management.base import BaseCommand
@@ -12,7 +15,9 @@ from isodate import parse_datetime
 
 from apps.common.helpers import is_valid_uuid, parse_iso_dates_in_nested_dict
 from apps.core.models import LegacyDataset
+from apps.core.models.legacy_compatibility import LegacyCompatibility, compare_legacy_versions
 
+from ._migration_pipeline import MigrationCheckpoint, ThroughputStats, prefetch
 from ._v2_client import MigrationV2Client
 
 logger = logging.getLogger(__name__)
@@ -43,6 +48,14 @@ class Command(BaseCommand):
         Migrate only specified V2 datasets
 
             $ python manage.py migrate_v2_datasets -ids c955e904-e3dd-4d7e-99f1-3fed446f96d1 c955e904-e3dd-4d7e-99f1-3fed446f96d3 -mi https://metax.fairdata.fi
+
+        Migrate all datasets with 8 workers, resume from checkpoint file if it exists
+
+            $ python manage.py migrate_v2_datasets -mi https://metax.fairdata.fi --workers 8 --checkpoint migration.json
+
+    With --workers, the next page of datasets and file lists of datasets are fetched
+    concurrently while the current page is written, and compatibility diffs are computed
+    in worker processes. Datasets are still converted and written in the main process.
     """
 
     allow_fail = False
@@ -55,11 +68,18 @@ class Command(BaseCommand):
     migration_limit = 0
     compatibility_errors = 0
     dataset_cache: Dict[str, LegacyDataset] = {}
+    workers = 1
+    diff_pool: Optional[ProcessPoolExecutor] = None
+    fetch_pool: Optional[ThreadPoolExecutor] = None
+    page_pool: Optional[ThreadPoolExecutor] = None
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.failed_datasets = []
         self.dataset_cache = {}
+        self.pending_checks = deque()
+        self.checkpoint = MigrationCheckpoint()
+        self.stats = ThroughputStats()
 
     def add_arguments(self, parser: ArgumentParser):
         MigrationV2Client.add_arguments(parser)
@@ -122,6 +142,23 @@ class Command(BaseCommand):
             default=0,
             help="Stop after updating this many datasets",
         )
+        parser.add_argument(
+            "--workers",
+            "-w",
+            type=int,
+            required=False,
+            default=1,
+            help="Number of concurrent requests and compatibility check processes",
+        )
+        parser.add_argument(
+            "--checkpoint",
+            type=str,
+            required=False,
+            help=(
+                "JSON file for storing migration progress. "
+                "If the file exists, migration continues from where it stopped."
+            ),
+        )
 
     @property
     def common_dataset_fetch_params(self):
@@ -252,10 +289,7 @@ class Command(BaseCommand):
     def update_legacy_dataset(self, data: MigrationData):
         identifier = data.identifier
         dataset_json = data.dataset_json
-        ignored = None
-        fixed = None
         created = False
-        errors = None
         legacy_dataset = self.dataset_cache.get(identifier)
         if not legacy_dataset:
             legacy_dataset, created = LegacyDataset.all_objects.get_or_create(
@@ -280,7 +314,21 @@ class Command(BaseCommand):
                 legacy_dataset.save()
 
             self.updated += 1
-            legacy_dataset.update_from_legacy(raise_serializer_errors=False)
+            legacy_dataset.update_from_legacy(
+                raise_serializer_errors=False, check_compatibility=self.diff_pool is None
+            )
+            if legacy_dataset.is_compatibility_check_pending:
+                self.submit_compatibility_check(legacy_dataset, update_reason)
+                return None
+
+        return self.report_update(legacy_dataset, update_reason)
+
+    def report_update(self, legacy_dataset: LegacyDataset, update_reason) -> Optional[dict]:
+        """Print update results and return migration errors."""
+        fixed = None
+        ignored = None
+        errors = None
+        if update_reason:
             fixed = legacy_dataset.fixed_legacy_values
             ignored = legacy_dataset.invalid_legacy_values
             errors = legacy_dataset.migration_errors
@@ -290,17 +338,43 @@ class Command(BaseCommand):
         self.print_status_line(legacy_dataset, update_reason)
         self.print_fixed(fixed)
         self.print_ignored(ignored)
-        self.print_errors(identifier, errors)
+        self.print_errors(str(legacy_dataset.id), errors)
         return errors
 
+    def submit_compatibility_check(self, legacy_dataset: LegacyDataset, update_reason):
+        """Start computing compatibility diff in a worker process."""
+        compat = LegacyCompatibility(legacy_dataset)
+        future = self.diff_pool.submit(compare_legacy_versions, *compat.get_diff_versions())
+        file_count_changes = compat.get_file_count_changes()
+        self.pending_checks.append((legacy_dataset, update_reason, future, file_count_changes))
+
+    def finish_compatibility_check(
+        self, legacy_dataset: LegacyDataset, update_reason, future, file_count_changes
+    ) -> Optional[dict]:
+        legacy_dataset.set_compatibility_diff({**future.result(), **file_count_changes})
+        legacy_dataset.save()
+        return self.report_update(legacy_dataset, update_reason)
+
+    def finish_compatibility_checks(self):
+        """Wait for pending compatibility checks and handle their results."""
+        with self.stats.timer("compatibility"):
+            while self.pending_checks:
+                check = self.pending_checks.popleft()
+                self.handle_dataset_errors(
+                    str(check[0].id), self.finish_compatibility_check, *check
+                )
+
     def migrate_dataset(self, data: MigrationData):
-        identifier = data.identifier
         if not self.pre_migrate_checks(data):
             return None
 
+        self.migrated += 1
+        self.handle_dataset_errors(data.identifier, self.update_legacy_dataset, data)
+
+    def handle_dataset_errors(self, identifier: str, func: Callable, *args):
+        """Call func that returns migration errors of dataset and handle errors."""
         try:
-            self.migrated += 1
-            if errors := self.update_legacy_dataset(data):
+            if errors := func(*args):
                 if not self.allow_fail:
                     raise ValueError(errors)
                 self.failed_datasets.append(identifier)
@@ -315,20 +389,31 @@ class Command(BaseCommand):
                 logger.error(f"Failed while processing {identifier}")
                 raise
 
-    def cache_existing_datasets(self, data_list: List[MigrationData]):
-        """Get datasets in bulk and assign to dataset_cache."""
+    def get_existing_datasets(self, data_list: List[MigrationData]) -> Dict[str, LegacyDataset]:
+        """Get datasets in bulk."""
         with cachalot_disabled():
             datasets = LegacyDataset.all_objects.defer("legacy_file_ids").in_bulk(
                 [ide for d in data_list if is_valid_uuid(ide := d.identifier)]
             )
-        self.dataset_cache = {str(k): v for k, v in datasets.items()}
+        return {str(k): v for k, v in datasets.items()}
 
-    def migrate_from_list(self, data_list: List[MigrationData]):
-        self.cache_existing_datasets(data_list)
+    @property
+    def update_limit_reached(self) -> bool:
+        return self.update_limit != 0 and self.updated >= self.update_limit
+
+    def migrate_from_list(
+        self,
+        data_list: List[MigrationData],
+        existing_datasets: Optional[Dict[str, LegacyDataset]] = None,
+    ):
+        if existing_datasets is None:
+            existing_datasets = self.get_existing_datasets(data_list)
+        self.dataset_cache = existing_datasets
         for data in data_list:
-            if self.update_limit != 0 and self.updated >= self.update_limit:
+            if self.update_limit_reached:
                 break
             self.migrate_dataset(data)
+        self.finish_compatibility_checks()
 
     def migrate_from_json_list(self, dataset_json_list: list, request_files=False):
         data_list = [self.dataset_json_to_data(dataset_json) for dataset_json in dataset_json_list]
@@ -382,6 +467,92 @@ class Command(BaseCommand):
                 ]
         self.migrate_from_list(datasets)
 
+    def migrate_identifiers(self, identifiers: Iterable[str]):
+        for identifier in identifiers:
+            dataset_json = self.client.fetch_dataset(
+                identifier, params=self.common_dataset_fetch_params
+            )
+            data = self.dataset_json_to_data(dataset_json)
+            self.add_dataset_files_callable(data)
+            self.migrate_dataset(data)
+        self.finish_compatibility_checks()
+
+    def should_prefetch_files(
+        self, data: MigrationData, existing_datasets: Dict[str, LegacyDataset]
+    ) -> bool:
+        """Determine if dataset files will be needed when the dataset is migrated."""
+        if not callable(data.file_ids) or not is_valid_uuid(data.identifier):
+            return False
+        if data.dataset_json.get("state") != "published":
+            return False
+        legacy_dataset = existing_datasets.get(data.identifier)
+        if not legacy_dataset:
+            return True
+        try:
+            return bool(self.get_update_reason(legacy_dataset, data.dataset_json, created=False))
+        except Exception:
+            return False  # Let migrate_dataset handle invalid data
+
+    def prepare_page(
+        self, dataset_json_list: list
+    ) -> Tuple[List[MigrationData], Dict[str, LegacyDataset]]:
+        """Start fetching file ids for datasets that will be updated."""
+        data_list = [self.dataset_json_to_data(dataset_json) for dataset_json in dataset_json_list]
+        existing_datasets = self.get_existing_datasets(data_list)
+        for data in data_list:
+            self.add_dataset_files_callable(data)
+            if self.should_prefetch_files(data, existing_datasets):
+                future = self.fetch_pool.submit(
+                    self.client.fetch_dataset_file_ids, data.identifier
+                )
+                data.file_ids = future.result
+        return data_list, existing_datasets
+
+    def migrate_pages(self, pages: Iterator[list]) -> Iterator[list]:
+        """Migrate pages of datasets and yield each page after it has been written.
+
+        When using workers, the next page is fetched and file ids of its datasets
+        are requested while the previous page is being written.
+        """
+        if not self.fetch_pool:
+            for page in pages:
+                with self.stats.timer("write"):
+                    self.migrate_from_json_list(page, request_files=True)
+                yield page
+            return
+
+        pages = prefetch(pages, self.page_pool)
+        prepared = deque()
+        while True:
+            with self.stats.timer("fetch"):
+                page = next(pages, None)
+            if page is not None:
+                with self.stats.timer("prepare"):
+                    prepared.append((page, *self.prepare_page(page)))
+            if prepared and (page is None or len(prepared) > 1):
+                written_page, data_list, existing_datasets = prepared.popleft()
+                with self.stats.timer("write"):
+                    self.migrate_from_list(data_list, existing_datasets)
+                yield written_page
+            if page is None and not prepared:
+                break
+
+    def migrate_query(self, params: dict, key: str):
+        """Migrate datasets from V2 dataset list, continuing from checkpoint."""
+        for removed in ["false", "true"]:
+            query_key = f"{key}:removed={removed}"
+            if query_key in self.checkpoint.completed:
+                continue
+            query_params = {**params, "removed": removed}
+            if offset := self.checkpoint.get_offset(query_key):
+                query_params["offset"] = offset
+            pages = self.client._fetch_datasets(query_params, batched=True)
+            for page in self.migrate_pages(pages):
+                self.checkpoint.advance(query_key, len(page), failed=self.failed_datasets)
+            if self.update_limit_reached:
+                return
+            self.checkpoint.complete(query_key)
+
     def migrate_from_metax(self, options):
         identifiers = options.get("identifiers")
         catalogs = options.get("catalogs")
@@ -392,19 +563,14 @@ class Command(BaseCommand):
         self.migration_limit = options.get("stop_after")
 
         if identifiers:
-            for identifier in identifiers:
-                dataset_json = self.client.fetch_dataset(
-                    identifier, params=self.common_dataset_fetch_params
-                )
-                data = self.dataset_json_to_data(dataset_json)
-                self.add_dataset_files_callable(data)
-                self.migrate_dataset(data)
+            self.migrate_identifiers(identifiers)
+        elif self.checkpoint.failed:
+            self.stdout.write(f"Retrying {len(self.checkpoint.failed)} failed datasets")
+            self.migrate_identifiers(sorted(self.checkpoint.failed))
 
         if migrate_all:
             params = {**self.common_dataset_fetch_params, "limit": limit}
-            dataset_batches = self.client.fetch_datasets(params, batched=True)
-            for batch in dataset_batches:
-                self.migrate_from_json_list(batch, request_files=True)
+            self.migrate_query(params, key="all")
 
         if catalogs:
             for catalog in catalogs:
@@ -422,15 +588,15 @@ class Command(BaseCommand):
                     "data_catalog": _catalog,
                     "limit": limit,
                 }
-                dataset_batches = self.client.fetch_datasets(params, batched=True)
-                for batch in dataset_batches:
-                    self.migrate_from_json_list(batch, request_files=True)
+                self.migrate_query(params, key=catalog)
 
     def print_summary(self):
         not_ok = self.updated - self.ok_after_update
         self.stdout.write(f"Processed {self.migrated} datasets")
         self.stdout.write(f"- {self.ok_after_update} datasets updated succesfully")
         self.stdout.write(f"- {not_ok} datasets failed")
+        self.stats.items = self.migrated
+        self.stdout.write(self.stats.report("datasets"))
 
     def dataset_may_have_files(self, dataset_json: dict):
         byte_size = None
@@ -448,6 +614,29 @@ class Command(BaseCommand):
             data.file_ids = []
         return data
 
+    @contextmanager
+    def executors(self):
+        """Create worker pools when using more than one worker."""
+        if self.workers <= 1:
+            yield
+            return
+
+        with ProcessPoolExecutor(max_workers=self.workers) as diff_pool:
+            # Start worker processes before any threads are started
+            diff_pool.submit(int).result()
+            with ThreadPoolExecutor(max_workers=self.workers) as fetch_pool, ThreadPoolExecutor(
+                max_workers=1
+            ) as page_pool:
+                self.diff_pool = diff_pool
+                self.fetch_pool = fetch_pool
+                self.page_pool = page_pool
+                try:
+                    yield
+                finally:
+                    self.diff_pool = None
+                    self.fetch_pool = None
+                    self.page_pool = None
+
     def handle(self, *args, **options):
         identifiers = options.get("identifiers")
         update = options.get("update")
@@ -457,6 +646,10 @@ class Command(BaseCommand):
         self.force = options.get("force")
         self.update_limit = options.get("stop_after")
         self.verbosity = options.get("verbosity")  # defaults to 1
+        self.workers = options.get("workers") or 1
+        self.checkpoint = MigrationCheckpoint(options.get("checkpoint"))
+        if self.checkpoint.is_resumed:
+            self.stdout.write(f"Resuming migration from checkpoint {self.checkpoint.path}")
 
         if bool(update) + bool(file) > 1:
             self.stderr.write("The --file and --update options are mutually exclusive.")
@@ -467,16 +660,19 @@ class Command(BaseCommand):
             return
 
         try:
-            if update:
-                self.update(options)
-            elif file:
-                self.migrate_from_file(options)
-            else:
-                self.client = MigrationV2Client(options, stdout=self.stdout, stderr=self.stderr)
-                if not self.client.ok:
-                    self.stderr.write("Missing Metax V2 configuration")
-                    return
-                self.migrate_from_metax(options)
+            with self.executors():
+                if update:
+                    self.update(options)
+                elif file:
+                    self.migrate_from_file(options)
+                else:
+                    self.client = MigrationV2Client(
+                        options, stdout=self.stdout, stderr=self.stderr
+                    )
+                    if not self.client.ok:
+                        self.stderr.write("Missing Metax V2 configuration")
+                        return
+                    self.migrate_from_metax(options)
         except KeyboardInterrupt:
             pass  # Print summary after Ctrl+C
 
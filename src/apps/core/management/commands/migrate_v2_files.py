@@ -1,17 +1,22 @@
 import logging
+import threading
 from argparse import ArgumentParser
+from concurrent.futures import ThreadPoolExecutor
 from typing import List
 
 import requests
 from cachalot.api import cachalot_disabled
 from django.core.management.base import BaseCommand
+from django.db import connection
 from django.utils import timezone
 
 from apps.files.serializers.legacy_files_serializer import (
     FileMigrationCounts,
+    LegacyFilesBulkLoader,
     LegacyFilesSerializer,
 )
 
+from ._migration_pipeline import ThroughputStats
 from ._v2_client import MigrationV2Client
 
 logger = logging.getLogger(__name__)
@@ -45,12 +50,20 @@ class Command(BaseCommand):
 
             $ python manage.py migrate_v2_datasets --use-env  \
               --datasets c955e904-e3dd-4d7e-99f1-3fed446f96d1 c955e904-e3dd-4d7e-99f1-3fed446f96d3
+
+        Migrate projects in parallel using PostgreSQL COPY for writing files
+
+            $ python manage.py migrate_v2_files --use-env --bulk-load --workers 4 \
+              --projects project_x project_y
     """
 
     allow_fail = False
     force = False
+    bulk_load = False
+    workers = 1
     created = 0
     updated = 0
+    unchanged = 0
     migrated = 0
     ok_after_update = 0
     migration_limit = 0
@@ -62,6 +75,9 @@ class Command(BaseCommand):
         self.metax_instance = None
         self.metax_user = None
         self.metax_password = None
+        self.lock = threading.Lock()
+        self.stats = ThroughputStats()
+        self.fetch_executor = None
 
     def add_arguments(self, parser: ArgumentParser):
         MigrationV2Client.add_arguments(parser)
@@ -108,6 +124,23 @@ class Command(BaseCommand):
             default=False,
             help="Allow individual datasets to fail without halting the migration",
         )
+        parser.add_argument(
+            "--bulk-load",
+            action="store_true",
+            required=False,
+            default=False,
+            help="Write files by copying them to a staging table and merging "
+            "them in a single query per batch. Faster for large migrations.",
+        )
+        parser.add_argument(
+            "--workers",
+            "-w",
+            type=int,
+            required=False,
+            default=1,
+            help="Number of pages of files fetched concurrently. "
+            "With --projects, also the number of projects migrated in parallel.",
+        )
 
     def print_status_line(self):
         created = self.created
@@ -116,22 +149,43 @@ class Command(BaseCommand):
         fps = processed / (timezone.now() - self.started).total_seconds()
         self.stdout.write(f"{processed=}, {created=:}, {updated=} ({fps:.1f}/s)")
 
+    def print_summary(self):
+        created = self.created
+        updated = self.updated
+        unchanged = self.unchanged
+        self.stdout.write(f"Migrated files: {created=}, {updated=}, {unchanged=}")
+        self.stats.items = self.migrated
+        self.stdout.write(self.stats.report("files"))
+
     def migrate_files(self, files: List[dict]):
         """Create or update list of legacy file dicts."""
         if not files:
             return
 
         def callback(counts: FileMigrationCounts):
-            self.created += counts.created
-            self.updated += counts.updated
-            self.migrated += counts.created + counts.updated + counts.unchanged
-            self.print_status_line()
-
-        serializer = LegacyFilesSerializer(data=files)
-        serializer.is_valid(raise_exception=True)
-        serializer.save(batch_callback=callback)
+            with self.lock:
+                self.created += counts.created
+                self.updated += counts.updated
+                self.unchanged += counts.unchanged
+                self.migrated += counts.created + counts.updated + counts.unchanged
+                self.print_status_line()
+
+        with self.stats.timer("write"):
+            if self.bulk_load:
+                LegacyFilesBulkLoader(batch_callback=callback).load(files)
+            else:
+                serializer = LegacyFilesSerializer(data=files)
+                serializer.is_valid(raise_exception=True)
+                serializer.save(batch_callback=callback)
         return None
 
+    def fetch_file_batches(self, params):
+        if self.fetch_executor:
+            return self.client.fetch_file_pages_concurrently(
+                params, executor=self.fetch_executor, concurrency=self.workers
+            )
+        return self.client.fetch_files(params, batched=True)
+
     def migrate_dataset_files(self, dataset_json: dict):
         identifier = dataset_json["identifier"]
         if self.dataset_may_have_files(dataset_json):
@@ -161,17 +215,37 @@ class Command(BaseCommand):
             for dataset_json in datasets:
                 self.migrate_dataset_files(dataset_json)
 
+    def migrate_project_files(self, project, params):
+        params = {**params, "project_identifier": project}
+        self.stdout.write(f"--- Migrating files for project {project} ---")
+        file_batches = self.fetch_file_batches(params)
+        for batch in file_batches:
+            self.migrate_files(batch)
+
+    def migrate_project_files_in_thread(self, project, params):
+        try:
+            with cachalot_disabled():
+                self.migrate_project_files(project, params)
+        finally:
+            connection.close()  # Each thread has its own database connection
+
     def migrate_projects_files(self, projects, params):
-        for project in self.projects:
-            params["project_identifier"] = project
-            self.stdout.write(f"--- Migrating files for project {project} ---")
-            file_batches = self.client.fetch_files(params=params, batched=True)
-            for batch in file_batches:
-                self.migrate_files(batch)
+        if self.workers > 1 and len(projects) > 1:
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                futures = [
+                    executor.submit(self.migrate_project_files_in_thread, project, params)
+                    for project in projects
+                ]
+                for future in futures:
+                    future.result()
+            return
+
+        for project in projects:
+            self.migrate_project_files(project, params)
 
     def migrate_all_files(self, params):
         self.stdout.write("--- Migrating all files ---")
-        file_batches = self.client.fetch_files(params, batched=True)
+        file_batches = self.fetch_file_batches(params)
         for batch in file_batches:
             self.migrate_files(batch)
 
@@ -229,6 +303,8 @@ class Command(BaseCommand):
         self.storages = [storage_shorthands.get(s) or s for s in (options.get("storages") or [])]
         self.allow_fail = options.get("allow_fail")
         self.force = options.get("force")
+        self.bulk_load = options.get("bulk_load")
+        self.workers = max(options.get("workers") or 1, 1)
         self.verbosity = options.get("verbosity")  # defaults to 1
 
         if (self.datasets or self.datasets_from_catalogs) and (self.projects or self.storages):
@@ -244,6 +320,14 @@ class Command(BaseCommand):
 
         try:
             with cachalot_disabled():
-                self.migrate_from_metax(options)
+                if self.workers > 1:
+                    with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                        self.fetch_executor = executor
+                        self.migrate_from_metax(options)
+                else:
+                    self.migrate_from_metax(options)
         except KeyboardInterrupt:
             pass
+        finally:
+            self.fetch_executor = None
+        self.print_summary()
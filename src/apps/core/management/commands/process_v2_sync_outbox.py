@@ -0,0 +1,36 @@
+import logging
+
+from django.core.management.base import BaseCommand, CommandParser
+
+from apps.core.services.v2_sync_outbox import V2SyncOutboxWorker
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = "Send changes stored in the V2 sync outbox to Metax V2."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Process due tasks and exit instead of running continuously",
+        )
+        parser.add_argument(
+            "--batch-size", type=int, default=None, help="Number of tasks claimed at a time"
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=5,
+            help="Seconds to wait before polling again when there are no tasks",
+        )
+
+    def handle(self, *args, **options):
+        worker = V2SyncOutboxWorker(batch_size=options["batch_size"])
+        if options["once"]:
+            count = worker.process_all()
+            self.stdout.write(f"Processed {count} V2 sync tasks")
+            return
+        self.stdout.write("Processing V2 sync tasks")
+        worker.run(interval=options["interval"])
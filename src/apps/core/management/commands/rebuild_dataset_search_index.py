@@ -0,0 +1,55 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandParser
+from django.db import connections
+
+from apps.core.models import Dataset, DatasetSearchIndex
+
+logger = logging.getLogger(__name__)
+
+
+def index_chunk(dataset_ids) -> int:
+    try:
+        return DatasetSearchIndex.objects.update_datasets(dataset_ids)
+    finally:
+        connections.close_all()  # Close connections of the worker thread
+
+
+class Command(BaseCommand):
+    help = "Rebuild full-text search index for datasets."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--chunk-size", type=int, default=1000, help="Number of datasets per chunk"
+        )
+        parser.add_argument(
+            "--workers", type=int, default=4, help="Number of chunks indexed in parallel"
+        )
+        parser.add_argument(
+            "--missing-only",
+            action="store_true",
+            help="Index only datasets that are not in the search index",
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = options["chunk_size"]
+        datasets = Dataset.all_objects.order_by("id")
+        if options["missing_only"]:
+            datasets = datasets.filter(search_index__isnull=True)
+        dataset_ids = list(datasets.values_list("id", flat=True))
+        chunks = [
+            dataset_ids[start : start + chunk_size]
+            for start in range(0, len(dataset_ids), chunk_size)
+        ]
+
+        count = 0
+        with ThreadPoolExecutor(max_workers=options["workers"]) as executor:
+            if options["workers"] > 1:
+                chunk_counts = executor.map(index_chunk, chunks)
+            else:
+                chunk_counts = map(DatasetSearchIndex.objects.update_datasets, chunks)
+            for chunk_count in chunk_counts:
+                count += chunk_count
+                self.stdout.write(f"Indexed {count}/{len(dataset_ids)} datasets")
+        self.stdout.write(f"Rebuilt search index for {count} datasets")
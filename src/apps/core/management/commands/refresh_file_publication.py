@@ -0,0 +1,38 @@
+import logging
+
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+from django.db import transaction
+
+from apps.core.models.catalog_record.file_publication import FilePublicationQueue
+from apps.files.models import File, FileStorage
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = "Recompute publication state of all files in a storage project."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("--storage-service", type=str, required=True)
+        parser.add_argument("--csc-project", type=str, default=None)
+        parser.add_argument(
+            "--batch-size", type=int, default=10000, help="Number of files per transaction"
+        )
+
+    def handle(self, *args, **options):
+        storage = FileStorage.objects.filter(
+            storage_service=options["storage_service"], csc_project=options["csc_project"]
+        ).first()
+        if not storage:
+            raise CommandError("Storage project not found")
+
+        count = 0
+        changed = 0
+        for batch in FilePublicationQueue.iter_storage_file_id_batches(
+            storage.id, batch_size=options["batch_size"]
+        ):
+            with transaction.atomic():
+                changed += FilePublicationQueue.update_files(File.all_objects.filter(id__in=batch))
+            count += len(batch)
+            self.stdout.write(f"Checked {count} files, {changed} changed")
+        self.stdout.write(f"Publication state updated for {changed}/{count} files")
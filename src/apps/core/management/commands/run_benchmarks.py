@@ -0,0 +1,57 @@
+import json
+import logging
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+
+from apps.core.benchmark import BenchmarkRunner, compare_reports
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = (
+        "Run benchmark scenarios against data created with generate_benchmark_data "
+        "and write latency percentiles and query counts to a JSON report."
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("--iterations", type=int, default=20)
+        parser.add_argument("--warmup", type=int, default=2)
+        parser.add_argument(
+            "--scenarios", nargs="+", type=str, help="Scenarios to run, default is all"
+        )
+        parser.add_argument("--output", type=str, help="Path of JSON report")
+        parser.add_argument("--compare", type=str, help="Path of previous report to compare to")
+
+    def handle(self, *args, **options):
+        if settings.ENV == "production":
+            raise CommandError("This command can only be used in non-production environments")
+        runner = BenchmarkRunner(
+            iterations=options["iterations"], warmup=options["warmup"], log=self.stdout.write
+        )
+        if unknown := set(options["scenarios"] or []) - set(runner.scenarios):
+            raise CommandError(f"Unknown scenarios: {sorted(unknown)}")
+
+        report = runner.run(options["scenarios"])
+        for name, result in report["scenarios"].items():
+            latency = result["latency_ms"]
+            self.stdout.write(
+                f"{name}: p50={latency['p50']:.1f}ms p95={latency['p95']:.1f}ms "
+                f"queries={result['queries']['mean']:.1f}"
+            )
+
+        if options["compare"]:
+            with open(options["compare"]) as f:
+                previous = json.load(f)
+            report["comparison"] = {
+                "git_commit": previous.get("git_commit"),
+                "ratios": compare_reports(previous, report),
+            }
+            for name, ratios in report["comparison"]["ratios"].items():
+                self.stdout.write(f"{name} compared to previous: {ratios}")
+
+        if options["output"]:
+            with open(options["output"], "w") as f:
+                json.dump(report, f, indent=2)
+            self.stdout.write(f"Wrote report to {options['output']}")
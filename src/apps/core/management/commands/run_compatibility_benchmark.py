@@ -0,0 +1,43 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandParser
+
+from apps.core.benchmark import CompatibilityDiffBenchmark
+from apps.core.models.legacy import LegacyDataset
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare legacy compatibility diff speed with and without pruning equal values "
+        "and check that both produce identical diffs and migration errors."
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("--limit", type=int, default=100, help="Number of legacy datasets")
+        parser.add_argument("--iterations", type=int, default=3)
+        parser.add_argument("--output", type=str, help="Path of JSON report")
+
+    def handle(self, *args, **options):
+        legacy_datasets = (
+            LegacyDataset.available_objects.filter(dataset__isnull=False)
+            .select_related("dataset")
+            .order_by("id")[: options["limit"]]
+        )
+        benchmark = CompatibilityDiffBenchmark(
+            iterations=options["iterations"], log=self.stdout.write
+        )
+        report = benchmark.run(legacy_datasets)
+        if report["datasets"]:
+            self.stdout.write(
+                f"deepdiff: p50={report['deepdiff_ms']['p50']:.1f}ms "
+                f"pruned: p50={report['pruned_ms']['p50']:.1f}ms "
+                f"speedup={report['speedup']}x"
+            )
+        self.stdout.write(
+            f"Compared {report['datasets']} datasets, {len(report['mismatches'])} mismatches"
+        )
+
+        if options["output"]:
+            with open(options["output"], "w") as f:
+                json.dump(report, f, indent=2)
+            self.stdout.write(f"Wrote report to {options['output']}")
@@ -0,0 +1,123 @@
+import json
+import logging
+import random
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from itertools import count
+
+from django.core.management.base import BaseCommand, CommandParser
+
+logger = logging.getLogger(__name__)
+
+
+class V2StubServer(ThreadingHTTPServer):
+    """Minimal in-memory stand-in for the Metax V2 endpoints used by V2 sync.
+
+    Useful for testing V2 integration locally with METAX_V2_HOST=http://localhost:<port>.
+    Requests are recorded in `requests` as (method, path) tuples. With fail_rate > 0,
+    a random share of requests fail with 503 to exercise retries.
+    """
+
+    def __init__(self, address, fail_rate=0.0):
+        super().__init__(address, V2StubRequestHandler)
+        self.fail_rate = fail_rate
+        self.datasets = {}
+        self.files = {}
+        self.requests = []
+        self.file_ids = count(1)
+        self.lock = threading.Lock()
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+class V2StubRequestHandler(BaseHTTPRequestHandler):
+    server: V2StubServer
+
+    dataset_path = re.compile(r"^/rest/v2/datasets/(?P<id>[^/]+)$")
+    dataset_files_path = re.compile(r"^/rest/v2/datasets/(?P<id>[^/]+)/files_from_v3$")
+
+    def log_message(self, format, *args):
+        logger.info(format % args)
+
+    def read_json(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or "null")
+
+    def respond(self, status, data=None):
+        body = json.dumps(data).encode() if data is not None else b""
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def handle_request(self):
+        path = self.path.split("?")[0]
+        with self.server.lock:
+            self.server.requests.append((self.command, path))
+            if random.random() < self.server.fail_rate:
+                return self.respond(503, {"detail": "Stub failure"})
+
+            if self.command == "POST" and path == "/rest/v2/files/sync_from_v3":
+                files = self.read_json()
+                for file in files:
+                    if file.get("id") is None:
+                        file["id"] = next(self.server.file_ids)
+                    self.server.files[file["id"]] = file
+                return self.respond(200, files)
+            if self.command == "POST" and path == "/rest/v2/datasets":
+                dataset = self.read_json()
+                self.server.datasets[dataset["identifier"]] = dataset
+                return self.respond(201, dataset)
+            if self.command == "POST" and self.dataset_files_path.match(path):
+                return self.respond(200, self.read_json())
+            if match := self.dataset_path.match(path):
+                identifier = match["id"]
+                if self.command == "GET":
+                    if dataset := self.server.datasets.get(identifier):
+                        return self.respond(200, dataset)
+                    return self.respond(404, {"detail": "Not found"})
+                if self.command == "PUT":
+                    self.server.datasets[identifier] = self.read_json()
+                    return self.respond(200, self.server.datasets[identifier])
+                if self.command == "DELETE":
+                    self.server.datasets.pop(identifier, None)
+                    return self.respond(204)
+            return self.respond(404, {"detail": "Unknown endpoint"})
+
+    def do_GET(self):  # noqa: N802
+        self.handle_request()
+
+    def do_POST(self):  # noqa: N802
+        self.handle_request()
+
+    def do_PUT(self):  # noqa: N802
+        self.handle_request()
+
+    def do_DELETE(self):  # noqa: N802
+        self.handle_request()
+
+
+class Command(BaseCommand):
+    help = "Run a local stub of the Metax V2 API for testing V2 synchronization."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("--host", type=str, default="localhost")
+        parser.add_argument("--port", type=int, default=8010)
+        parser.add_argument(
+            "--fail-rate", type=float, default=0.0, help="Share of requests that fail with 503"
+        )
+
+    def handle(self, *args, **options):
+        server = V2StubServer((options["host"], options["port"]), fail_rate=options["fail_rate"])
+        self.stdout.write(f"Metax V2 stub running at {server.url}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
@@ -0,0 +1,37 @@
+# Generated by Django 4.2.15 on 2026-10-18 19:06
+
+from django.db import migrations, models
+import django.utils.timezone
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0022_merge_20240924_1032'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='V2SyncTask',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('kind', models.CharField(choices=[('dataset', 'Dataset'), ('dataset_delete', 'Dataset Delete'), ('file', 'File')], max_length=32)),
+                ('key', models.CharField(max_length=64)),
+                ('payload', models.JSONField(blank=True, default=dict)),
+                ('token', models.UUIDField(default=uuid.uuid4)),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('attempts', models.IntegerField(default=0)),
+                ('next_attempt_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('last_error', models.TextField(blank=True, null=True)),
+            ],
+            options={
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['next_attempt_at'], name='core_v2sync_next_at_8875a4_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='v2synctask',
+            constraint=models.UniqueConstraint(fields=('kind', 'key'), name='unique_v2_sync_task'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 4.2.15 on 2026-10-18 19:23
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0023_v2synctask'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DatasetSearchIndex',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('document', models.JSONField(default=dict)),
+                ('search_vector', django.contrib.postgres.search.SearchVectorField(null=True)),
+                ('updated', models.DateTimeField(default=django.utils.timezone.now)),
+                ('dataset', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='search_index', to='core.dataset')),
+            ],
+            options={
+                'ordering': ['id'],
+                'indexes': [django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='dataset_search_vector_idx')],
+            },
+        ),
+    ]
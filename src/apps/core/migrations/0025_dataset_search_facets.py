@@ -0,0 +1,78 @@
+# Generated by Django 4.2.15 on 2026-10-18 21:29
+
+import django.contrib.postgres.fields
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0024_datasetsearchindex'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='datasetsearchindex',
+            name='access_types',
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.TextField(), default=list, size=None),
+        ),
+        migrations.AddField(
+            model_name='datasetsearchindex',
+            name='creators',
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.TextField(), default=list, size=None),
+        ),
+        migrations.AddField(
+            model_name='datasetsearchindex',
+            name='fields_of_science',
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.TextField(), default=list, size=None),
+        ),
+        migrations.AddField(
+            model_name='datasetsearchindex',
+            name='file_types',
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.TextField(), default=list, size=None),
+        ),
+        migrations.AddField(
+            model_name='datasetsearchindex',
+            name='infrastructures',
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.TextField(), default=list, size=None),
+        ),
+        migrations.AddField(
+            model_name='datasetsearchindex',
+            name='organizations',
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.TextField(), default=list, size=None),
+        ),
+        migrations.AddField(
+            model_name='datasetsearchindex',
+            name='project_titles',
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.TextField(), default=list, size=None),
+        ),
+        migrations.AddIndex(
+            model_name='datasetsearchindex',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['access_types'], name='dataset_facet_access_type_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='datasetsearchindex',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['organizations'], name='dataset_facet_organization_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='datasetsearchindex',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['creators'], name='dataset_facet_creator_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='datasetsearchindex',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['fields_of_science'], name='dataset_facet_fos_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='datasetsearchindex',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['infrastructures'], name='dataset_facet_infra_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='datasetsearchindex',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['file_types'], name='dataset_facet_file_type_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='datasetsearchindex',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['project_titles'], name='dataset_facet_project_idx'),
+        ),
+    ]
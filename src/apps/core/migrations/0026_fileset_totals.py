@@ -0,0 +1,72 @@
+# Generated by Django 4.2.15 on 2026-10-18 21:38
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import Coalesce
+
+
+def populate_file_set_totals(apps, schema_editor):
+    """Store file totals and file types of existing filesets."""
+    file_set_model = apps.get_model("core", "FileSet")
+    file_metadata_model = apps.get_model("core", "FileSetFileMetadata")
+    totals = {
+        t.pop("fileset_id"): t
+        for t in file_set_model.files.through.objects.order_by()
+        .values("fileset_id")
+        .annotate(
+            total_files_count=Count("*"),
+            total_files_size=Coalesce(Sum("file__size"), 0),
+            published_files_count=Count("file__published"),
+        )
+    }
+    file_types = {}
+    for file_set_id, url, pref_label in (
+        file_metadata_model.objects.filter(file_type__isnull=False)
+        .values_list("file_set_id", "file_type__url", "file_type__pref_label")
+        .distinct()
+        .order_by("file_set_id", "file_type__url")
+    ):
+        file_types.setdefault(file_set_id, []).append(pref_label)
+
+    file_sets = list(file_set_model.objects.filter(id__in={*totals, *file_types}))
+    for file_set in file_sets:
+        for field, value in totals.get(file_set.id, {}).items():
+            setattr(file_set, field, value)
+        file_set.file_types = file_types.get(file_set.id, [])
+    file_set_model.objects.bulk_update(
+        file_sets,
+        fields=["total_files_count", "total_files_size", "published_files_count", "file_types"],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0025_dataset_search_facets'),
+        ('files', '0006_directory'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='fileset',
+            name='file_types',
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.AddField(
+            model_name='fileset',
+            name='published_files_count',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='fileset',
+            name='total_files_count',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='fileset',
+            name='total_files_size',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.RunPython(populate_file_set_totals, migrations.RunPython.noop),
+    ]
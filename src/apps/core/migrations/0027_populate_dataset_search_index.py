@@ -0,0 +1,29 @@
+# Generated by Django 4.2.15 on 2026-10-18 22:10
+
+import apps.core.models.catalog_record.dataset_search
+from django.db import migrations
+
+
+def populate_dataset_search_index(apps, schema_editor):
+    """Index existing datasets so search and facet filters find them."""
+    dataset_model = apps.get_model("core", "Dataset")
+    index_model = apps.get_model("core", "DatasetSearchIndex")
+    dataset_ids = dataset_model._base_manager.order_by("id").values_list("id", flat=True)
+    index_model.objects.update_datasets(dataset_ids)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0026_fileset_totals'),
+    ]
+
+    operations = [
+        migrations.AlterModelManagers(
+            name='datasetsearchindex',
+            managers=[
+                ('objects', apps.core.models.catalog_record.dataset_search.DatasetSearchIndexManager()),
+            ],
+        ),
+        migrations.RunPython(populate_dataset_search_index, migrations.RunPython.noop),
+    ]
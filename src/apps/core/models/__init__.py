@@ -5,6 +5,7 @@ from .catalog_record import (
     DatasetActor,
     DatasetMetrics,
     DatasetProject,
+    DatasetSearchIndex,
     EntityRelation,
     FileSet,
     Funder,
@@ -38,6 +39,7 @@ from .file_metadata import FileSetDirectoryMetadata, FileSetFileMetadata
 from .legacy import LegacyDataset
 from .preservation import Contract, Preservation
 from .provenance import Provenance, ProvenanceVariable
+from .v2_sync import V2SyncTask
 
 __all__ = [
     "AccessRights",
@@ -82,4 +84,6 @@ __all__ = [
     "Provenance",
     "ProvenanceVariable",
     "DatasetMetrics",
+    "DatasetSearchIndex",
+    "V2SyncTask",
 ]
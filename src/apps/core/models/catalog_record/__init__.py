@@ -1,6 +1,7 @@
 from .dataset import Dataset
 from .dataset_metrics import DatasetMetrics
 from .dataset_permissions import DatasetPermissions
+from .dataset_search import DatasetSearchIndex
 from .meta import CatalogRecord, MetadataProvider, OtherIdentifier
 from .related import (
     DatasetActor,
@@ -28,4 +29,5 @@ __all__ = [
     "Temporal",
     "DatasetMetrics",
     "DatasetPermissions",
+    "DatasetSearchIndex",
 ]
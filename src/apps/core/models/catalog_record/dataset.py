@@ -1,4 +1,5 @@
 import logging
+from typing import Iterable, Optional
 
 from django.contrib.postgres.fields import ArrayField, HStoreField
 from django.core.validators import MinLengthValidator
@@ -16,7 +17,9 @@ from apps.common.copier import ModelCopier
 from apps.common.exceptions import TopLevelValidationError
 from apps.common.helpers import datetime_to_date
 from apps.common.history import SnapshotHistoricalRecords
+from apps.common.json_prefetch import JSONPrefetcher
 from apps.common.models import AbstractBaseModel
+from apps.core.cache import dataset_response_cache
 from apps.core.models.access_rights import AccessRights, AccessTypeChoices
 from apps.core.models.catalog_record.dataset_permissions import DatasetPermissions
 from apps.core.models.concepts import FieldOfScience, Language, ResearchInfra, Theme
@@ -255,6 +258,31 @@ class Dataset(V2DatasetMixin, CatalogRecord):
         "theme",
     )
 
+    # Top-level relations prefetched by named prefetch profiles, None means all relations
+    prefetch_profiles = {
+        "full": None,
+        # Relations used by as_v2_dataset
+        "v2-sync": (
+            "access_rights",
+            "actors",
+            "data_catalog",
+            "field_of_science",
+            "file_set",
+            "infrastructure",
+            "language",
+            "metadata_owner",
+            "other_identifiers",
+            "preservation",
+            "projects",
+            "provenance",
+            "relation",
+            "remote_resources",
+            "spatial",
+            "temporal",
+            "theme",
+        ),
+    }
+
     dataset_versions_prefetch_fields = (
         "draft_of",
         "next_draft",
@@ -385,6 +413,10 @@ class Dataset(V2DatasetMixin, CatalogRecord):
         )
         new_values.update(kwargs)
         copy = self.copier.copy(self, new_values=new_values)
+        if file_set := getattr(copy, "file_set", None):
+            # Copied files are added without m2m_changed, so totals are recomputed
+            file_set.refresh_totals([file_set.id])
+            file_set.refresh_from_db(fields=file_set.totals_fields)
         return copy
 
     def create_new_version(self) -> Self:
@@ -454,6 +486,7 @@ class Dataset(V2DatasetMixin, CatalogRecord):
             "legacydataset",
             "preservation",
             "draft_revision",
+            "search_index",
         ]
 
         for field in self._meta.get_fields():
@@ -492,6 +525,7 @@ class Dataset(V2DatasetMixin, CatalogRecord):
         self.next_draft = None  # Remove cached related object
         dft.delete(soft=False)
         self.create_snapshot()
+        dataset_response_cache.invalidate_dataset(self)
 
     def delete(self, *args, **kwargs):
         # Drafts are always hard deleted
@@ -502,6 +536,8 @@ class Dataset(V2DatasetMixin, CatalogRecord):
             self.access_rights.delete(*args, **kwargs)
 
         _deleted = super().delete(*args, **kwargs)
+        dataset_response_cache.invalidate_dataset(self)
+        self.update_file_publication()
         if "soft" in kwargs and kwargs["soft"] is True:
             post_delete.send(Dataset, instance=self, soft=True)
         return _deleted
@@ -768,11 +804,31 @@ class Dataset(V2DatasetMixin, CatalogRecord):
         if fileset := getattr(self, "file_set", None):
             self.validate_allow_storage_service(fileset.storage_service)
 
-    def ensure_prefetch(self):
-        """Ensure related fields have been prefetched."""
+    @classmethod
+    def get_prefetch_fields(cls, relations: Optional[Iterable[str]] = None) -> tuple:
+        """Return prefetch paths of common_prefetch_fields needed for top-level relations.
+
+        All paths are returned when relations is None."""
+        if relations is None:
+            return cls.common_prefetch_fields
+        relations = set(relations)
+        return tuple(
+            path for path in cls.common_prefetch_fields if path.split("__", 1)[0] in relations
+        )
+
+    def ensure_prefetch(self, relations: Optional[Iterable[str]] = None):
+        """Ensure related fields have been prefetched.
+
+        If relations is set, only paths needed for the listed top-level relations are prefetched.
+        Already prefetched paths are not fetched again.
+        """
         if not self.is_prefetched:
-            models.prefetch_related_objects([self], *self.common_prefetch_fields)
-            self.is_prefetched = True
+            if JSONPrefetcher.load(self):  # queryset was annotated with related objects
+                self.is_prefetched = True
+                return
+            models.prefetch_related_objects([self], *self.get_prefetch_fields(relations))
+            if relations is None:
+                self.is_prefetched = True
 
     def save(self, *args, **kwargs):
         """Saves the dataset and increments the draft or published revision number as needed."""
@@ -801,13 +857,33 @@ class Dataset(V2DatasetMixin, CatalogRecord):
         self.set_update_reason(f"{self.state}-{self.published_revision}.{self.draft_revision}")
         super().save(*args, **kwargs)
         self.is_prefetched = False  # Prefetch again after save
+        dataset_response_cache.invalidate_dataset(self)
+        self.update_search_index()
         if hasattr(self, "file_set"):
             self.file_set.update_published()
 
+    def update_file_publication(self):
+        """Apply pending publication state updates of files, e.g. after dataset is removed."""
+        from .file_publication import FilePublicationQueue
+
+        FilePublicationQueue.flush()
+
+    def update_search_index(self, immediate=False):
+        """Update search index of the dataset, by default after the transaction is committed."""
+        from .dataset_search import DatasetSearchIndex
+
+        if immediate:
+            DatasetSearchIndex.objects.update_now([self.id])
+        else:
+            DatasetSearchIndex.objects.schedule_update([self.id])
+
     def signal_update(self, created=False):
         """Send dataset_update or dataset_created signal."""
         from apps.core.signals import dataset_created, dataset_updated
 
+        # Related objects may have been updated after dataset was saved
+        dataset_response_cache.invalidate_dataset(self)
+        self.update_search_index(immediate=True)
         if created:
             return dataset_created.send(sender=self.__class__, data=self)
         return dataset_updated.send(sender=self.__class__, data=self)
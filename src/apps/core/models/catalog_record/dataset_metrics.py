@@ -1,11 +1,11 @@
 import logging
 
-import requests
 from django.db import models
 from django.db.models.functions import Cast
 from django.utils import timezone
 
 from apps.common.helpers import is_valid_uuid
+from apps.common.http_client import get_integration_client
 from apps.common.models import AbstractBaseModel
 from apps.core.models.catalog_record import Dataset
 
@@ -58,7 +58,7 @@ class DatasetMetrics(AbstractBaseModel):
 
         Returns:
             int: Number of created or updated objects."""
-        resp = requests.get(url)
+        resp = get_integration_client("metrics").get(url)
         resp.raise_for_status()
         data = resp.json()
 
@@ -0,0 +1,336 @@
+import logging
+import re
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+from functools import reduce
+from typing import Dict, Iterable, List, Optional
+
+from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector, SearchVectorField
+from django.db import models, transaction
+from django.db.models import F, QuerySet
+from django.db.models.fields.json import KeyTextTransform, KeyTransform
+from django.utils import timezone
+
+from .dataset import Dataset
+
+logger = logging.getLogger(__name__)
+
+# Postgres text search configurations for dataset languages, other languages use "simple"
+SEARCH_CONFIGS = {"fi": "finnish", "en": "english", "sv": "swedish"}
+SIMPLE_CONFIG = "simple"
+ALL_CONFIGS = [*SEARCH_CONFIGS.values(), SIMPLE_CONFIG]
+
+# Weights of indexed values, A is the most important
+WEIGHTS = ["A", "B", "C", "D"]
+
+# Facet columns and the related values they contain, used for filtering dataset listings
+FACET_VALUES = {
+    "access_types": "access_rights__access_type__pref_label",
+    "organizations": "actors__organization__pref_label",
+    "fields_of_science": "field_of_science__pref_label",
+    "infrastructures": "infrastructure__pref_label",
+    "file_types": "file_set__file_metadata__file_type__pref_label",
+    "project_titles": "projects__title",
+}
+FACETS = [*FACET_VALUES, "creators"]
+
+# Related values in the index that change when reference data or organizations are indexed
+INDEXED_LABELS = [*FACET_VALUES.values(), "theme__pref_label"]
+
+_local = threading.local()
+
+
+@contextmanager
+def skip_search_index_update():
+    """Don't update search index of saved datasets inside the context."""
+    previous = getattr(_local, "skip", False)
+    _local.skip = True
+    try:
+        yield
+    finally:
+        _local.skip = previous
+
+
+class SearchDocument:
+    """Collects texts to index by weight and text search configuration."""
+
+    def __init__(self):
+        self.texts: Dict[str, Dict[str, List[str]]] = defaultdict(lambda: defaultdict(list))
+
+    def add(self, weight: str, value, config=SIMPLE_CONFIG):
+        if value:
+            self.texts[weight][config].append(str(value))
+
+    def add_translations(self, weight: str, value: Optional[dict]):
+        """Add multilanguage dict values, e.g. {"en": "title", "fi": "otsikko"}."""
+        for lang, text in (value or {}).items():
+            self.add(weight, text, config=SEARCH_CONFIGS.get(lang, SIMPLE_CONFIG))
+
+    def as_dict(self) -> dict:
+        return {
+            weight: {config: " ".join(texts) for config, texts in configs.items()}
+            for weight, configs in self.texts.items()
+        }
+
+
+class DatasetSearchIndexManager(models.Manager):
+    # Used also in migrations to populate the index of existing datasets
+    use_in_migrations = True
+
+    @property
+    def datasets(self) -> QuerySet:
+        """Return all datasets, using historical dataset model in migrations."""
+        return self.model._meta.get_field("dataset").related_model._base_manager.all()
+
+    def get_documents(self, dataset_ids: List) -> Dict[str, SearchDocument]:
+        """Collect searchable text of datasets with one query per related field."""
+        datasets = self.datasets.filter(id__in=dataset_ids)
+        documents = defaultdict(SearchDocument)
+
+        for dataset in datasets.values(
+            "id", "persistent_identifier", "title", "description", "keyword"
+        ):
+            document = documents[dataset["id"]]
+            document.add("A", dataset["persistent_identifier"])
+            document.add_translations("A", dataset["title"])
+            for keyword in dataset["keyword"]:
+                document.add("B", keyword)
+            document.add_translations("C", dataset["description"])
+
+        for row in datasets.filter(theme__isnull=False).values("id", value=F("theme__pref_label")):
+            documents[row["id"]].add_translations("B", row["value"])
+
+        for row in datasets.filter(
+            actors__person__isnull=False, actors__removed__isnull=True
+        ).values(
+            "id",
+            name=F("actors__person__name"),
+            external_identifier=F("actors__person__external_identifier"),
+        ):
+            documents[row["id"]].add("B", row["name"])
+            documents[row["id"]].add("B", row["external_identifier"])
+
+        for row in datasets.filter(relation__entity__entity_identifier__isnull=False).values(
+            "id", value=F("relation__entity__entity_identifier")
+        ):
+            documents[row["id"]].add("D", row["value"])
+
+        for row in datasets.filter(other_identifiers__notation__isnull=False).values(
+            "id", value=F("other_identifiers__notation")
+        ):
+            documents[row["id"]].add("D", row["value"])
+        return documents
+
+    def get_facets(self, dataset_ids: List) -> Dict[str, Dict[str, set]]:
+        """Collect facet values of datasets with one query per facet.
+
+        Multilanguage values are flattened, so e.g. {"en": "Open", "fi": "Avoin"}
+        adds both "Open" and "Avoin" to the facet."""
+        datasets = self.datasets.filter(id__in=dataset_ids)
+        facets = defaultdict(lambda: {facet: set() for facet in FACETS})
+
+        for facet, path in FACET_VALUES.items():
+            for row in datasets.filter(**{f"{path}__isnull": False}).values("id", value=F(path)):
+                facets[row["id"]][facet].update(filter(None, row["value"].values()))
+
+        for row in datasets.filter(actors__roles__contains=["creator"]).values(
+            "id",
+            organization=F("actors__organization__pref_label"),
+            name=F("actors__person__name"),
+        ):
+            creators = facets[row["id"]]["creators"]
+            creators.update(filter(None, (row["organization"] or {}).values()))
+            if row["name"]:
+                creators.add(row["name"])
+        return facets
+
+    def get_search_vector(self) -> SearchVector:
+        """Return expression that computes search vector from index document."""
+        vectors = [
+            SearchVector(
+                KeyTextTransform(config, KeyTransform(weight, "document")),
+                config=config,
+                weight=weight,
+            )
+            for weight in WEIGHTS
+            for config in ALL_CONFIGS
+        ]
+        return reduce(lambda a, b: a + b, vectors)
+
+    def update_datasets(self, dataset_ids: Iterable, batch_size=1000) -> int:
+        """Update search index of datasets in batches. Returns number of indexed datasets."""
+        dataset_ids = list(dataset_ids)
+        count = 0
+        for start in range(0, len(dataset_ids), batch_size):
+            batch_ids = dataset_ids[start : start + batch_size]
+            documents = self.get_documents(batch_ids)
+            facets = self.get_facets(batch_ids)
+            now = timezone.now()
+            self.bulk_create(
+                [
+                    self.model(
+                        dataset_id=dataset_id,
+                        document=document.as_dict(),
+                        updated=now,
+                        **{facet: sorted(values) for facet, values in facets[dataset_id].items()},
+                    )
+                    for dataset_id, document in documents.items()
+                ],
+                update_conflicts=True,
+                unique_fields=["dataset"],
+                update_fields=["document", "updated", *FACETS],
+            )
+            self.filter(dataset_id__in=documents.keys()).update(
+                search_vector=self.get_search_vector()
+            )
+            count += len(documents)
+        return count
+
+    def get_datasets_with_labels(self, models: Iterable) -> set:
+        """Return ids of datasets whose index contains labels of any of the models."""
+        concrete_models = {model._meta.concrete_model for model in models}
+        dataset_ids = set()
+        for path in INDEXED_LABELS:
+            relation = path.rsplit("__", 1)[0]
+            model = self.datasets.model
+            for name in relation.split("__"):
+                model = model._meta.get_field(name).related_model
+            if model._meta.concrete_model in concrete_models:
+                dataset_ids.update(
+                    self.datasets.filter(**{f"{relation}__isnull": False}).values_list(
+                        "id", flat=True
+                    )
+                )
+        return dataset_ids
+
+    def update_datasets_with_labels(self, models: Iterable) -> int:
+        """Update search index of datasets after labels of the models have been reindexed."""
+        return self.update_datasets(self.get_datasets_with_labels(models))
+
+    def _get_pending(self) -> set:
+        """Return ids of datasets waiting for the current transaction to be committed."""
+        connection = transaction.get_connection()
+        if not hasattr(connection, "_dataset_search_index_pending"):
+            connection._dataset_search_index_pending = set()
+        return connection._dataset_search_index_pending
+
+    def _update_pending(self):
+        pending = self._get_pending()
+        dataset_ids = list(pending)
+        pending.clear()
+        self.update_datasets(dataset_ids)
+
+    def schedule_update(self, dataset_ids: Iterable):
+        """Update search index of datasets when the current transaction is committed.
+
+        Datasets scheduled in the same transaction are indexed as one batch."""
+        if getattr(_local, "skip", False):
+            return
+        self._get_pending().update(dataset_ids)
+        transaction.on_commit(self._update_pending)
+
+    def update_now(self, dataset_ids: Iterable):
+        """Update search index of datasets immediately instead of on commit."""
+        dataset_ids = list(dataset_ids)
+        self._get_pending().difference_update(dataset_ids)
+        self.update_datasets(dataset_ids)
+
+    def get_search_query(self, text: str) -> Optional[SearchQuery]:
+        """Convert search text into a query matching any of the search configurations.
+
+        Quoted parts of the text are searched as phrases, other words as prefixes.
+        All words and phrases need to match."""
+        phrases = re.findall(r'"([^"]*)"', text)
+        words = re.findall(r"[^\W_]+", re.sub(r'"[^"]*"', " ", text))
+        if not (words or any(p.strip() for p in phrases)):
+            return None
+
+        queries = []
+        for config in ALL_CONFIGS:
+            parts = [
+                SearchQuery(phrase, search_type="phrase", config=config)
+                for phrase in phrases
+                if phrase.strip()
+            ]
+            if words:
+                prefix_query = " & ".join(f"{word}:*" for word in words)
+                parts.append(SearchQuery(prefix_query, search_type="raw", config=config))
+            queries.append(reduce(lambda a, b: a & b, parts))
+        return reduce(lambda a, b: a | b, queries)
+
+    def search(self, queryset: QuerySet, text: str, ranking=True) -> QuerySet:
+        """Filter dataset queryset by search text, optionally ordering by relevance."""
+        query = self.get_search_query(text)
+        if query is None:
+            return queryset.none()
+        queryset = queryset.filter(search_index__search_vector=query)
+        if ranking:
+            rank = SearchRank(F("search_index__search_vector"), query)
+            queryset = queryset.annotate(search_rank=rank).order_by("-search_rank", "-modified")
+        return queryset
+
+    def filter_facet(self, queryset: QuerySet, facet: str, groups: List[List[str]]) -> QuerySet:
+        """Filter dataset queryset by facet values.
+
+        Datasets need to match all groups and any value in a group.
+        Each group is a single array overlap check that can use the facet index."""
+        for group in groups:
+            if group:
+                queryset = queryset.filter(**{f"search_index__{facet}__overlap": list(group)})
+        return queryset
+
+
+class DatasetSearchIndex(models.Model):
+    """Full-text search index for datasets.
+
+    The document contains searchable texts of the dataset grouped by weight and
+    text search configuration, e.g. {"A": {"finnish": "otsikko", "simple": "pid"}}.
+    The search vector is computed from the document in the database.
+
+    Facet columns contain denormalized values of related objects, so listings can be
+    filtered by them without joining the related tables.
+
+    Attributes:
+        dataset (models.OneToOneField): Indexed dataset
+        document (models.JSONField): Searchable texts
+        search_vector (SearchVectorField): Weighted search vector
+        updated (models.DateTimeField): When the index was updated
+        access_types (ArrayField): Access type labels
+        organizations (ArrayField): Actor organization names
+        creators (ArrayField): Creator organization and person names
+        fields_of_science (ArrayField): Field of science labels
+        infrastructures (ArrayField): Research infrastructure labels
+        file_types (ArrayField): File type labels
+        project_titles (ArrayField): Project titles
+    """
+
+    id = models.BigAutoField(primary_key=True)
+    dataset = models.OneToOneField(Dataset, on_delete=models.CASCADE, related_name="search_index")
+    document = models.JSONField(default=dict)
+    search_vector = SearchVectorField(null=True)
+    updated = models.DateTimeField(default=timezone.now)
+    access_types = ArrayField(models.TextField(), default=list)
+    organizations = ArrayField(models.TextField(), default=list)
+    creators = ArrayField(models.TextField(), default=list)
+    fields_of_science = ArrayField(models.TextField(), default=list)
+    infrastructures = ArrayField(models.TextField(), default=list)
+    file_types = ArrayField(models.TextField(), default=list)
+    project_titles = ArrayField(models.TextField(), default=list)
+
+    objects = DatasetSearchIndexManager()
+
+    class Meta:
+        ordering = ["id"]
+        indexes = [
+            GinIndex(fields=["search_vector"], name="dataset_search_vector_idx"),
+            GinIndex(fields=["access_types"], name="dataset_facet_access_type_idx"),
+            GinIndex(fields=["organizations"], name="dataset_facet_organization_idx"),
+            GinIndex(fields=["creators"], name="dataset_facet_creator_idx"),
+            GinIndex(fields=["fields_of_science"], name="dataset_facet_fos_idx"),
+            GinIndex(fields=["infrastructures"], name="dataset_facet_infra_idx"),
+            GinIndex(fields=["file_types"], name="dataset_facet_file_type_idx"),
+            GinIndex(fields=["project_titles"], name="dataset_facet_project_idx"),
+        ]
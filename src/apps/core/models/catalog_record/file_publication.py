@@ -0,0 +1,166 @@
+import logging
+from typing import Iterable, List, Optional
+
+from django.core.exceptions import EmptyResultSet
+from django.db import connections, transaction
+from django.db.models import Exists, OuterRef, Q, QuerySet
+from django.utils import timezone
+
+from apps.files.models import Directory, File
+
+from .related import FileSet
+
+logger = logging.getLogger(__name__)
+
+
+class PendingFilePublication:
+    """Files waiting for publication state update in the current transaction."""
+
+    def __init__(self):
+        self.file_set_ids = set()
+        self.file_ids = set()
+        self.file_querysets: List[QuerySet] = []
+
+
+class FilePublicationQueue:
+    """Deduplicated queue for recomputing publication state of files.
+
+    A file is published when it belongs to a fileset of a published dataset that
+    is not deprecated or removed. Changes to filesets and datasets schedule the affected
+    filesets (or files that are being removed from a fileset) and the state is recomputed
+    once per transaction with set-based updates, either when the transaction is committed
+    or when the queue is flushed explicitly at the end of an operation.
+    """
+
+    # Maximum number of file ids in one update query
+    batch_size = 10000
+
+    @classmethod
+    def _get_pending(cls) -> PendingFilePublication:
+        connection = transaction.get_connection()
+        if not hasattr(connection, "_file_publication_pending"):
+            connection._file_publication_pending = PendingFilePublication()
+        return connection._file_publication_pending
+
+    @classmethod
+    def schedule(
+        cls, file_set_ids: Iterable = (), file_ids: Iterable = (), files: Optional[QuerySet] = None
+    ):
+        """Schedule publication state update for all files in filesets and individual files.
+
+        Files removed from a fileset need to be scheduled by file id, or with a
+        files queryset that still matches them after the removal.
+        """
+        pending = cls._get_pending()
+        pending.file_set_ids.update(file_set_ids)
+        pending.file_ids.update(file_ids)
+        if files is not None:
+            pending.file_querysets.append(files)
+        transaction.on_commit(cls.flush)
+
+    @classmethod
+    def flush(cls) -> int:
+        """Apply pending publication state updates. Returns number of changed files."""
+        pending = cls._get_pending()
+        file_set_ids = list(pending.file_set_ids)
+        file_ids = list(pending.file_ids)
+        file_querysets = pending.file_querysets
+        pending.file_set_ids.clear()
+        pending.file_ids.clear()
+        pending.file_querysets = []
+
+        count = 0
+        if file_set_ids:
+            file_set_files = FileSet.files.through.objects.filter(fileset_id__in=file_set_ids)
+            count += cls.update_files(
+                File.all_objects.filter(id__in=file_set_files.values("file_id"))
+            )
+        for start in range(0, len(file_ids), cls.batch_size):
+            batch = file_ids[start : start + cls.batch_size]
+            count += cls.update_files(File.all_objects.filter(id__in=batch))
+        for files in file_querysets:
+            count += cls.update_files(files)
+        return count
+
+    @classmethod
+    def get_published_file_sets(cls) -> QuerySet:
+        return FileSet.objects.filter(
+            dataset__state="published",
+            dataset__deprecated__isnull=True,
+            dataset__removed__isnull=True,
+        )
+
+    @classmethod
+    def update_files(cls, files: QuerySet) -> int:
+        """Recompute publication state of files with one update per direction.
+
+        Returns number of changed files."""
+        in_published_file_set = Exists(
+            FileSet.files.through.objects.filter(
+                file_id=OuterRef("id"),
+                fileset__in=cls.get_published_file_sets(),
+            )
+        )
+        files = files.order_by()
+        files_to_unpublish = files.filter(Q(published__isnull=False) & ~in_published_file_set)
+        files_to_publish = files.filter(Q(published__isnull=True) & in_published_file_set)
+
+        directory_keys = Directory.objects.get_keys(files_to_unpublish)
+        count = cls.set_published(files_to_unpublish, None)
+        directory_keys.update(Directory.objects.get_keys(files_to_publish))
+        count += cls.set_published(files_to_publish, timezone.now())
+        Directory.objects.refresh(directory_keys)
+        return count
+
+    @classmethod
+    def set_published(cls, files: QuerySet, published) -> int:
+        """Set publication timestamp of files that have a different publication state.
+
+        Published file counts of filesets containing the files are updated in the
+        same query and cached responses of their datasets are invalidated.
+        Returns number of changed files."""
+        through = FileSet.files.through
+        try:
+            files_sql, files_params = files.order_by().values("id").query.sql_with_params()
+        except EmptyResultSet:
+            return 0
+        sign = "-" if published is None else "+"
+        sql = (
+            'WITH "changed" AS ('
+            f'UPDATE "{File._meta.db_table}" SET "published" = %s '
+            f'WHERE "id" IN ({files_sql}) RETURNING "id"'
+            '), "counts" AS ('
+            'SELECT "through"."fileset_id", COUNT(*) AS "count" '
+            f'FROM "{through._meta.db_table}" AS "through" '
+            'JOIN "changed" ON "changed"."id" = "through"."file_id" '
+            'GROUP BY "through"."fileset_id"'
+            '), "updated" AS ('
+            f'UPDATE "{FileSet._meta.db_table}" AS "file_set" SET "published_files_count" = '
+            f'"file_set"."published_files_count" {sign} "counts"."count" '
+            'FROM "counts" WHERE "file_set"."id" = "counts"."fileset_id" '
+            'RETURNING "file_set"."id"'
+            ') SELECT (SELECT COUNT(*) FROM "changed"), ARRAY(SELECT "id" FROM "updated")'
+        )
+        with connections[files.db].cursor() as cursor:
+            cursor.execute(sql, [published, *files_params])
+            count, file_set_ids = cursor.fetchone()
+        FileSet.invalidate_dataset_cache(file_set_ids)
+        return count
+
+    @classmethod
+    def iter_storage_file_id_batches(
+        cls, storage_id, batch_size: Optional[int] = None
+    ) -> Iterable[List]:
+        """Iterate over ids of files in storage in batches ordered by id."""
+        batch_size = batch_size or cls.batch_size
+        files = File.all_objects.filter(storage_id=storage_id).order_by("id")
+        last_id = None
+        while True:
+            batch_files = files
+            if last_id is not None:
+                batch_files = batch_files.filter(id__gt=last_id)
+            batch = list(batch_files.values_list("id", flat=True)[:batch_size])
+            if not batch:
+                return
+            yield batch
+            last_id = batch[-1]
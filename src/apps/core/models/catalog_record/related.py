@@ -1,18 +1,19 @@
 import logging
 import uuid
-from typing import Optional
+from typing import Dict, Iterable, List, Optional
 
 from django.contrib.postgres.fields import ArrayField, HStoreField
-from django.db import models
-from django.db.models import Count, Sum
+from django.core.exceptions import EmptyResultSet
+from django.db import connections, models, transaction
+from django.db.models import Count, F, QuerySet, Sum
 from django.db.models.functions import Coalesce
 from django.utils import timezone
-from django.utils.functional import cached_property
 from django.utils.translation import gettext as _
 
 from apps.actors.models import Actor, Organization
 from apps.common.copier import ModelCopier
 from apps.common.models import AbstractBaseModel, MediaTypeValidator
+from apps.core.cache import dataset_response_cache
 from apps.core.models.concepts import FileType, RelationType, UseCategory
 from apps.core.models.file_metadata import FileSetDirectoryMetadata, FileSetFileMetadata
 from apps.files.models import File, FileStorage
@@ -198,6 +199,13 @@ class FileSet(AbstractBaseModel):
         dataset(models.OneToOneField): Dataset associated with the fileset
         files(models.ManyToManyField): Files associated with the fileset
         storage(models.ForeignKey): FileStorage of the fileset
+        total_files_count(models.BigIntegerField): Number of files in the fileset
+        total_files_size(models.BigIntegerField): Total size of files in bytes
+        published_files_count(models.BigIntegerField): Number of published files
+        file_types(models.JSONField): Distinct file types from file metadata
+
+    The totals are maintained when files are added or removed and when file sizes
+    or publication states change. Use `check_file_set_totals` command to verify them.
 
     """
 
@@ -210,30 +218,20 @@ class FileSet(AbstractBaseModel):
     dataset = models.OneToOneField(Dataset, related_name="file_set", on_delete=models.CASCADE)
     files = models.ManyToManyField(File, related_name="file_sets")
 
+    # Stored totals of files in the fileset, including removed files
+    total_files_count = models.BigIntegerField(default=0)
+    total_files_size = models.BigIntegerField(default=0)
+    published_files_count = models.BigIntegerField(default=0)
+    file_types = models.JSONField(default=list, blank=True)  # pref_labels of distinct file types
+
+    totals_fields = ["total_files_count", "total_files_size", "published_files_count"]
+
     added_files_count: Optional[int] = None  # files added in request
 
     removed_files_count: Optional[int] = None  # files removed in request
 
     skip_files_m2m_changed = False  # enable to skip signal handler on file changes
 
-    @cached_property
-    def total_files_aggregates(self) -> dict:
-        return self.files(manager="all_objects").aggregate(
-            total_files_count=Count("*"), total_files_size=Coalesce(Sum("size"), 0)
-        )
-
-    @cached_property
-    def file_types(self):
-        return self.file_metadata.values_list("file_type__pref_label", flat=True)
-
-    @property
-    def total_files_size(self) -> int:
-        return self.total_files_aggregates["total_files_size"]
-
-    @property
-    def total_files_count(self) -> int:
-        return self.total_files_aggregates["total_files_count"]
-
     @property
     def csc_project(self) -> str:
         return self.storage.csc_project
@@ -242,55 +240,221 @@ class FileSet(AbstractBaseModel):
     def storage_service(self) -> str:
         return self.storage.storage_service
 
-    def clear_cached_file_properties(self):
-        """Clear cached file properties after changes to FileSet files."""
-        for prop in ["total_files_aggregates", "file_types"]:
-            try:
-                delattr(self, prop)
-            except AttributeError:
-                pass
-
-    def update_published(self, queryset=None, exclude_self=False):
-        """Update publication timestamps of files."""
-        if not queryset:
-            queryset = self.files.all()
-
-        if (
-            not exclude_self
-            and self.dataset
-            and self.dataset.state == "published"
-            and self.dataset.deprecated is None
-            and self.dataset.removed is None
-        ):
-            # Current dataset is public, all files should be published
-            files_to_publish = queryset.filter(published__isnull=True)
-            files_to_publish.update(published=timezone.now())
-            return
-
-        # Current dataset is non-public, so we have to check if files
-        # are in any public dataset to find their publication state
-        published_filesets = FileSet.objects.filter(
-            dataset__state="published",
-            dataset__deprecated__isnull=True,
-            dataset__removed__isnull=True,
+    def refresh_file_properties(self):
+        """Load stored file totals and file types after changes to FileSet files."""
+        self.refresh_from_db(fields=[*self.totals_fields, "file_types"])
+
+    @classmethod
+    def get_totals_sql(cls, files_cte: str) -> str:
+        """Return CTE that aggregates totals of files whose ids are returned by files_cte."""
+        return (
+            'SELECT COUNT(*) AS "count", COALESCE(SUM("file"."size"), 0) AS "size", '
+            'COUNT("file"."published") AS "published" '
+            f'FROM "{files_cte}" JOIN "{File._meta.db_table}" AS "file" '
+            f'ON "file"."id" = "{files_cte}"."file_id"'
         )
 
-        if exclude_self:
-            # Count current fileset as non-published. Use when
-            # files will be removed from fileset or dataset will be removed.
-            published_filesets = published_filesets.exclude(id=self.id)
+    @classmethod
+    def get_update_totals_sql(cls, sign: str) -> str:
+        """Return SET clause that adds (sign="+") or subtracts (sign="-") "totals" CTE."""
+        return (
+            f'SET "total_files_count" = "total_files_count" {sign} "totals"."count", '
+            f'"total_files_size" = "total_files_size" {sign} "totals"."size", '
+            f'"published_files_count" = "published_files_count" {sign} "totals"."published"'
+        )
+
+    @classmethod
+    def invalidate_dataset_cache(cls, file_set_ids: Iterable):
+        """Invalidate cached responses of datasets whose fileset totals changed."""
+        dataset_response_cache.invalidate_datasets(
+            Dataset.all_objects.filter(file_set__in=file_set_ids).only("id", "dataset_versions_id")
+        )
 
-        # Published files that should be marked non-published
-        files_to_unpublish = queryset.filter(published__isnull=False).exclude(
-            file_sets__in=published_filesets
+    def add_to_totals(self, files: QuerySet, sign=1):
+        """Add totals of files to stored totals of fileset, or subtract them with sign=-1."""
+        totals = files.order_by().aggregate(
+            count=Count("*"), size=Coalesce(Sum("size"), 0), published=Count("published")
         )
-        files_to_unpublish.update(published=None)
+        FileSet.all_objects.filter(id=self.id).update(
+            total_files_count=F("total_files_count") + sign * totals["count"],
+            total_files_size=F("total_files_size") + sign * totals["size"],
+            published_files_count=F("published_files_count") + sign * totals["published"],
+        )
+        self.refresh_from_db(fields=self.totals_fields)
+        self.invalidate_dataset_cache([self.id])
+
+    def clear_totals(self):
+        FileSet.all_objects.filter(id=self.id).update(**{field: 0 for field in self.totals_fields})
+        self.refresh_from_db(fields=self.totals_fields)
+        self.invalidate_dataset_cache([self.id])
+
+    @classmethod
+    def add_file_changes_to_totals(cls, file: File, size_change: int, published_change: int):
+        """Update totals of filesets containing file after size or publication of file changed."""
+        if size_change or published_change:
+            cls.all_objects.filter(files=file).update(
+                total_files_size=F("total_files_size") + size_change,
+                published_files_count=F("published_files_count") + published_change,
+            )
+            cls.invalidate_dataset_cache(cls.all_objects.filter(files=file).values("id"))
+
+    @classmethod
+    def get_computed_totals(cls, file_set_ids: Iterable) -> Dict[uuid.UUID, dict]:
+        """Aggregate totals of filesets from their files, return totals by fileset id."""
+        totals = (
+            cls.files.through.objects.filter(fileset_id__in=file_set_ids)
+            .order_by()
+            .values("fileset_id")
+            .annotate(
+                total_files_count=Count("*"),
+                total_files_size=Coalesce(Sum("file__size"), 0),
+                published_files_count=Count("file__published"),
+            )
+        )
+        return {t.pop("fileset_id"): t for t in totals}
+
+    @classmethod
+    @transaction.atomic
+    def refresh_totals(cls, file_set_ids: Iterable) -> List["FileSet"]:
+        """Recompute stored totals of filesets. Returns filesets whose totals were wrong."""
+        file_sets = list(
+            cls.all_objects.filter(id__in=list(file_set_ids))
+            .select_for_update()
+            .order_by("id")
+            .only("id", *cls.totals_fields)
+        )
+        computed_totals = cls.get_computed_totals([file_set.id for file_set in file_sets])
+        changed = []
+        for file_set in file_sets:
+            totals = computed_totals.get(file_set.id, {})
+            values = {field: totals.get(field, 0) for field in cls.totals_fields}
+            if any(getattr(file_set, field) != value for field, value in values.items()):
+                for field, value in values.items():
+                    setattr(file_set, field, value)
+                changed.append(file_set)
+        cls.all_objects.bulk_update(changed, fields=cls.totals_fields)
+        cls.invalidate_dataset_cache([file_set.id for file_set in changed])
+        return changed
+
+    @classmethod
+    def refresh_totals_for_files(cls, files: QuerySet):
+        """Recompute stored totals of filesets containing any of the files."""
+        file_set_ids = (
+            cls.files.through.objects.filter(file_id__in=files.order_by().values("id"))
+            .values_list("fileset_id", flat=True)
+            .distinct()
+        )
+        cls.refresh_totals(file_set_ids)
+
+    @classmethod
+    def get_computed_file_types(cls, file_set_ids: Iterable) -> Dict[uuid.UUID, list]:
+        """Return pref_labels of distinct file types in file metadata by fileset id.
+
+        File types of each fileset are ordered by url."""
+        file_types = {}
+        for file_set_id, url, pref_label in (
+            FileSetFileMetadata.objects.filter(
+                file_set_id__in=file_set_ids, file_type__isnull=False
+            )
+            .values_list("file_set_id", "file_type__url", "file_type__pref_label")
+            .distinct()
+            .order_by("file_set_id", "file_type__url")
+        ):
+            file_types.setdefault(file_set_id, []).append(pref_label)
+        return file_types
+
+    def update_file_types(self):
+        self.file_types = self.get_computed_file_types([self.id]).get(self.id, [])
+        FileSet.all_objects.filter(id=self.id).update(file_types=self.file_types)
+
+    def update_published(self, file_ids=None, removing_all=False):
+        """Schedule update of publication timestamps of files.
+
+        By default all files in the fileset are updated. Files that are
+        about to be removed from the fileset need to be given in file_ids.
+        When all files are about to be removed, use removing_all instead.
+        The membership rows no longer exist when the queue is flushed, so ids
+        of the files are read before removal. Only published files can change
+        state when they are removed, so unpublished files are not included.
+        """
+        from .file_publication import FilePublicationQueue
+
+        if removing_all:
+            FilePublicationQueue.schedule(
+                file_ids=File.all_objects.filter(
+                    file_sets=self, published__isnull=False
+                ).values_list("id", flat=True)
+            )
+        elif file_ids is None:
+            FilePublicationQueue.schedule(file_set_ids=[self.id])
+        else:
+            FilePublicationQueue.schedule(file_ids=file_ids)
 
-        # Non-published files that should be marked published
-        files_to_publish = queryset.filter(published__isnull=True).filter(
-            file_sets__in=published_filesets
+    def add_files_from_queryset(self, files: QuerySet) -> int:
+        """Add files matching queryset to fileset with a single INSERT ... SELECT.
+
+        Files are not loaded to Python and m2m_changed is not sent. Totals of the
+        added files are added to the fileset totals in the same query. Publication
+        update of the fileset is scheduled. Returns number of added files.
+        """
+        through = FileSet.files.through
+        files = files.exclude(file_sets=self.id).order_by().values("id")
+        try:
+            files_sql, files_params = files.query.sql_with_params()
+        except EmptyResultSet:
+            return 0
+        sql = (
+            'WITH "added" AS ('
+            f'INSERT INTO "{through._meta.db_table}" ("fileset_id", "file_id") '
+            f'SELECT %s, "files"."id" FROM ({files_sql}) AS "files" '
+            'ON CONFLICT DO NOTHING RETURNING "file_id"'
+            f'), "totals" AS ({self.get_totals_sql("added")}) '
+            f'UPDATE "{FileSet._meta.db_table}" {self.get_update_totals_sql("+")} '
+            f'FROM "totals" WHERE "id" = %s RETURNING "totals"."count"'
+        )
+        with connections[files.db].cursor() as cursor:
+            cursor.execute(sql, [self.id, *files_params, self.id])
+            count = cursor.fetchone()[0]
+        self.refresh_from_db(fields=self.totals_fields)
+        if count:
+            self.update_published()
+            self.invalidate_dataset_cache([self.id])
+        return count
+
+    def remove_files_from_queryset(self, files: QuerySet) -> int:
+        """Remove files matching queryset from fileset with a single DELETE ... USING.
+
+        Files are not loaded to Python and m2m_changed is not sent. Totals of the
+        removed files are subtracted from the fileset totals in the same query.
+        Publication update of the files matching queryset is scheduled.
+        Returns number of removed files.
+        """
+        from .file_publication import FilePublicationQueue
+
+        through = FileSet.files.through
+        file_ids = files.order_by().values("id")
+        try:
+            files_sql, files_params = file_ids.query.sql_with_params()
+        except EmptyResultSet:
+            return 0
+        sql = (
+            'WITH "removed" AS ('
+            f'DELETE FROM "{through._meta.db_table}" AS "through" '
+            f'USING ({files_sql}) AS "files" '
+            'WHERE "through"."fileset_id" = %s AND "through"."file_id" = "files"."id" '
+            'RETURNING "through"."file_id"'
+            f'), "totals" AS ({self.get_totals_sql("removed")}) '
+            f'UPDATE "{FileSet._meta.db_table}" {self.get_update_totals_sql("-")} '
+            f'FROM "totals" WHERE "id" = %s RETURNING "totals"."count"'
         )
-        files_to_publish.update(published=timezone.now())
+        with connections[files.db].cursor() as cursor:
+            cursor.execute(sql, [*files_params, self.id, self.id])
+            count = cursor.fetchone()[0]
+        self.refresh_from_db(fields=self.totals_fields)
+        if count:
+            FilePublicationQueue.schedule(files=files)
+            self.invalidate_dataset_cache([self.id])
+        return count
 
     def deprecate_dataset(self):
         """Files are removed, deprecate dataset if needed."""
@@ -300,7 +464,9 @@ class FileSet(AbstractBaseModel):
                 dataset.save()
 
     def remove_unused_file_metadata(self):
-        """Remove file and directory metadata for files and directories not in FileSet."""
+        """Remove file and directory metadata for files and directories not in FileSet.
+
+        Stored file types are updated to match the remaining file metadata."""
 
         # remove metadata for files not in FileSet
         unused_file_metadata = FileSetFileMetadata.objects.filter(file_set=self).exclude(
@@ -320,6 +486,8 @@ class FileSet(AbstractBaseModel):
             ).exclude(pathname__in=dataset_pathnames)
             unused_directory_metadata.delete()
 
+        self.update_file_types()
+
     def save(self, *args, **kwargs):
         # Verify that dataset is allowed to have files in the storage_service.
         # When _updating is set, dataset is responsible for the check.
@@ -327,7 +495,10 @@ class FileSet(AbstractBaseModel):
             dataset, "_updating", False
         ):
             dataset.validate_allow_storage_service(self.storage_service)
-        return super().save(*args, **kwargs)
+        saved = super().save(*args, **kwargs)
+        if dataset:
+            dataset_response_cache.invalidate_dataset(dataset)
+        return saved
 
 
 class RemoteResource(AbstractBaseModel):
@@ -8,6 +8,7 @@ from django.db import models
 from simple_history.models import HistoricalRecords
 
 from apps.common.models import AbstractBaseModel, AbstractDatasetProperty
+from apps.core.cache import dataset_response_cache
 from apps.core.models.concepts import Language
 
 STORAGE_SERVICE_CHOICES = [(s, s) for s in settings.STORAGE_SERVICE_FILE_STORAGES]
@@ -82,6 +83,10 @@ class DataCatalog(AbstractBaseModel):
     def __str__(self):
         return self.id
 
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        dataset_response_cache.invalidate_all()  # Datasets may include expanded catalog
+
 
 class CatalogHomePage(AbstractDatasetProperty):
     """A homepage of the catalog (a public Web document usually available in HTML).
@@ -78,6 +78,9 @@ class LegacyDataset(AbstractBaseModel):
 
     tracker = FieldTracker()
 
+    # Migration errors of a dataset that has been updated but not compared with the legacy data
+    compatibility_check_pending_errors = {"compatibility_check": ["Compatibility not checked"]}
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.created_objects = Counter()
@@ -182,7 +185,7 @@ class LegacyDataset(AbstractBaseModel):
 
             logger.info(f"Assigning {len(found_files)} files to dataset {self.dataset.id}")
             fileset.files(manager="all_objects").set(found_files)
-            fileset.clear_cached_file_properties()
+            fileset.refresh_file_properties()
 
         if fileset:
             self.attach_file_metadata(fileset)
@@ -253,6 +256,7 @@ class LegacyDataset(AbstractBaseModel):
         fileset.file_metadata.filter(
             id__in=[m.id for m in existing_metadata.values() if not getattr(m, "_found", False)]
         ).delete()
+        fileset.update_file_types()
 
     def attach_directory_metadata(self, fileset: FileSet):
         directories_metadata = copy.deepcopy(self.legacy_research_dataset.get("directories")) or []
@@ -354,8 +358,18 @@ class LegacyDataset(AbstractBaseModel):
             perms.editors.remove(*MetaxUser.available_objects.filter(username__in=removed))
         return perms_id
 
-    def update_from_legacy(self, context=None, raise_serializer_errors=True, create_files=False):
-        """Update dataset fields from legacy data dictionaries."""
+    def update_from_legacy(
+        self,
+        context=None,
+        raise_serializer_errors=True,
+        create_files=False,
+        check_compatibility=True,
+    ):
+        """Update dataset fields from legacy data dictionaries.
+
+        With check_compatibility=False, the compatibility diff is not computed and
+        the caller is expected to call set_compatibility_diff after the update.
+        """
         if self._state.adding:
             raise ValueError("LegacyDataset needs to be saved before using update_from_legacy.")
 
@@ -410,20 +424,32 @@ class LegacyDataset(AbstractBaseModel):
             if raise_serializer_errors:
                 raise
         if updated:
-            from apps.core.models.legacy_compatibility import LegacyCompatibility
+            if check_compatibility:
+                from apps.core.models.legacy_compatibility import LegacyCompatibility
 
-            compat = LegacyCompatibility(self)
-            diff = compat.get_compatibility_diff()
-            self.v2_dataset_compatibility_diff = diff
-            if migration_errors := compat.get_migration_errors_from_diff(diff):
-                self.migration_errors = migration_errors
+                self.set_compatibility_diff(LegacyCompatibility(self).get_compatibility_diff())
             else:
-                self.migration_errors = None
-                self.last_successful_migration = timezone.now()
+                # Keep dataset marked as failed until compatibility has been checked
+                self.migration_errors = self.compatibility_check_pending_errors
 
         self.save()
         return self
 
+    @property
+    def is_compatibility_check_pending(self) -> bool:
+        return self.migration_errors == self.compatibility_check_pending_errors
+
+    def set_compatibility_diff(self, diff: dict):
+        """Assign compatibility diff and determine migration errors from it."""
+        from apps.core.models.legacy_compatibility import LegacyCompatibility
+
+        self.v2_dataset_compatibility_diff = diff
+        if migration_errors := LegacyCompatibility(self).get_migration_errors_from_diff(diff):
+            self.migration_errors = migration_errors
+        else:
+            self.migration_errors = None
+            self.last_successful_migration = timezone.now()
+
     def save(self, *args, **kwargs):
         self.validate_identifiers()
 
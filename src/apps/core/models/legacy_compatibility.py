@@ -1,8 +1,9 @@
 import copy
+import functools
 import json
 import logging
 import re
-from typing import Dict
+from typing import Dict, List, Optional, Tuple, Union
 
 import shapely
 from deepdiff import DeepDiff, extract
@@ -24,6 +25,31 @@ def regex(path: str):
     return re.compile(add_escapes(path))
 
 
+class PathMatcher:
+    """Match deepdiff paths against a list of exact paths and regexes.
+
+    Regexes are combined into a single precompiled regex, so matching a path
+    does not need to loop over all patterns.
+    """
+
+    def __init__(self, patterns: List[Union[str, re.Pattern]]):
+        self.exact = {pattern for pattern in patterns if isinstance(pattern, str)}
+        regexes = [pattern.pattern for pattern in patterns if isinstance(pattern, re.Pattern)]
+        self.regex = re.compile("|".join(f"(?:{r})" for r in regexes)) if regexes else None
+
+    def match(self, path: str) -> bool:
+        return path in self.exact or bool(self.regex and self.regex.match(path))
+
+
+wkt_path_regex = re.compile(r".*as_wkt\[\d+\]$")
+
+
+@functools.lru_cache(maxsize=10000)
+def normalize_wkt(value: str) -> str:
+    """Normalize WKT value. Same locations appear in many datasets, so results are cached."""
+    return shapely.wkt.dumps(shapely.wkt.loads(value), rounding_precision=4)
+
+
 class LegacyCompatibility:
     """Helper class for legacy dataset compatibility checks."""
 
@@ -91,13 +117,9 @@ class LegacyCompatibility:
         ],
     }
 
-    def match_ignore(self, value, ignored: list):
-        for ign in ignored:
-            if (isinstance(ign, str) and value == ign) or (
-                isinstance(ign, re.Pattern) and ign.match(value)
-            ):
-                return True
-        return False
+    ignored_migration_matchers = {
+        diff_type: PathMatcher(ignored) for diff_type, ignored in ignored_migration_errors.items()
+    }
 
     def should_ignore_removed(self, path) -> bool:
         """Allow removing None or [] dictionary values."""
@@ -144,11 +166,11 @@ class LegacyCompatibility:
 
     def get_migration_errors_from_diff(self, diff) -> dict:
         errors = {}
-        fixed_paths = self.get_fixed_deepdiff_paths()
+        fixed_paths = set(self.get_fixed_deepdiff_paths())
         for diff_type, diff in diff.items():
-            ignored = self.ignored_migration_errors.get(diff_type, [])
+            matcher = self.ignored_migration_matchers.get(diff_type)
             for value in diff:
-                if self.match_ignore(value, ignored):
+                if matcher and matcher.match(value):
                     continue
 
                 if diff_type == "dictionary_item_removed" and self.should_ignore_removed(value):
@@ -181,8 +203,6 @@ class LegacyCompatibility:
 
         invalid = self.legacy_dataset.invalid_legacy_values or {}
 
-        wkt_re = re.compile(r".*as_wkt\[\d+\]$")
-
         data["state"] = str(data["state"])  # Convert Dataset.StateChoices to str
 
         def pre_handler(value, path):
@@ -196,9 +216,8 @@ class LegacyCompatibility:
                     return None  # Remove entire object
             if isinstance(value, str):
                 value = value.strip()
-                if wkt_re.match(path):
-                    # Normalize wkt
-                    value = shapely.wkt.dumps(shapely.wkt.loads(value), rounding_precision=4)
+                if wkt_path_regex.match(path):
+                    value = normalize_wkt(value)
                 elif path.endswith(".alt"):
                     # Normalize altitude values
                     value = self.normalize_float_str(value)
@@ -222,25 +241,17 @@ class LegacyCompatibility:
 
             return value
 
-        data = copy.deepcopy(data)
+        # process_nested returns copies of research_dataset dicts and lists, so only
+        # the other values need to be copied before parsing dates in-place
+        data = {
+            key: value if key == "research_dataset" else copy.deepcopy(value)
+            for key, value in data.items()
+        }
         data["research_dataset"] = process_nested(
             data.get("research_dataset"), pre_handler, post_handler, path="research_dataset"
         )
         return parse_iso_dates_in_nested_dict(data)
 
-    def exclude_from_diff(self, obj, path: str):
-        if isinstance(obj, dict):
-            identifier = obj.get("identifier") or ""
-            if identifier.startswith(settings.ORGANIZATION_BASE_URI):
-                # Assume object is a reference data organization
-                return True
-            if path.endswith("['definition']"):
-                # Ignore silly definition values
-                en = obj.get("en", "")
-                return "statement or formal explanation of the meaning of a concept" in en
-
-        return False
-
     def get_fixed_deepdiff_paths(self) -> list:
         """Get deepdiff paths to values that have been fixed in the migration conversion."""
         fixed = self.legacy_dataset.fixed_legacy_values or {}
@@ -286,41 +297,128 @@ class LegacyCompatibility:
             }
         return ret
 
-    def get_compatibility_diff(self) -> Dict:
+    def get_diff_versions(self) -> Tuple[dict, dict]:
+        """Return normalized V2 and V3 versions of the dataset for comparison."""
         v2_version = self.normalize_dataset(self.legacy_dataset.dataset_json)
         v3_version = self.normalize_dataset(self.legacy_dataset.dataset.as_v2_dataset())
+        return v2_version, v3_version
 
-        diff = DeepDiff(
-            v2_version,
-            v3_version,
-            ignore_order=True,
-            cutoff_intersection_for_pairs=1.0,
-            cutoff_distance_for_pairs=1.0,
-            exclude_paths=[
-                "id",
-                "service_modified",
-                "service_created",
-                "use_doi_for_published",  # Should be `null` in V2 for published datasets but isn't always
-                "root['data_catalog']['id']",
-                "root['research_dataset']['metadata_version_identifier']",
-                "root['dataset_version_set']",  # not directly writable
-                "root['alternate_record_set']",  # list of records sharing same preferred_identifier
-                "date_modified",  # modification date is always set in V3
-            ],
-            exclude_regex_paths=[
-                # old_notation is related to a SYKE migration in 2020, not relevant anymore
-                add_escapes("^root['research_dataset']['other_identifier'][\\d+]['old_notation']"),
-                # reference data labels may have differences
-                add_escapes("['pref_label']$"),
-                add_escapes("^root['research_dataset']['language'][\\d+]['title']"),
-                add_escapes(
-                    "^root['research_dataset']['access_rights']['license'][\\d+]['title']['und']"
-                ),
-            ],
-            truncate_datetime="day",
-            exclude_obj_callback=self.exclude_from_diff,
-        )
-        json_diff = diff.to_json()
-        output = json.loads(json_diff)
+    def get_compatibility_diff(self) -> Dict:
+        output = compare_legacy_versions(*self.get_diff_versions())
         output.update(self.get_file_count_changes())
         return output
+
+
+def exclude_from_diff(obj, path: str):
+    if isinstance(obj, dict):
+        identifier = obj.get("identifier") or ""
+        if identifier.startswith(settings.ORGANIZATION_BASE_URI):
+            # Assume object is a reference data organization
+            return True
+        if path.endswith("['definition']"):
+            # Ignore silly definition values
+            en = obj.get("en", "")
+            return "statement or formal explanation of the meaning of a concept" in en
+
+    return False
+
+
+def strict_equal(a, b) -> bool:
+    """Return True if values and their nested values are equal and have the same types.
+
+    Unlike ==, e.g. 1 and 1.0 are not equal because deepdiff reports a type change for them.
+    """
+    if type(a) is not type(b):
+        return False
+    if isinstance(a, dict):
+        return a.keys() == b.keys() and all(strict_equal(v, b[k]) for k, v in a.items())
+    if isinstance(a, list):
+        return len(a) == len(b) and all(strict_equal(x, y) for x, y in zip(a, b))
+    return a == b
+
+
+def prune_equal_values(v2: dict, v3: dict) -> Optional[Tuple[dict, dict]]:
+    """Return copies of dicts without keys that have equal values in both dicts.
+
+    Equal values have no differences, so removing them does not change the diff
+    but deepdiff has less to compare. Nested dicts are pruned recursively. List items
+    are not removed because their indices are part of the diff paths.
+
+    Returns None if the dicts are equal.
+    """
+    pruned = {}  # pruned (v2, v3) values by key, None for removed keys
+    equal = v2.keys() == v3.keys()
+    for key, value in v2.items():
+        if key not in v3:
+            continue
+        other = v3[key]
+        # exclude_from_diff checks the whole definition object
+        if isinstance(value, dict) and isinstance(other, dict) and key != "definition":
+            pruned[key] = prune_equal_values(value, other)
+            if pruned[key] is not None:
+                equal = False
+        elif strict_equal(value, other):
+            # Keep identifier, exclude_from_diff uses it to exclude organization objects
+            if key != "identifier":
+                pruned[key] = None
+        else:
+            equal = False
+
+    if equal:
+        return None
+
+    def get_pruned(data: dict, index: int) -> dict:
+        return {
+            key: pruned[key][index] if key in pruned else value
+            for key, value in data.items()
+            if key not in pruned or pruned[key] is not None
+        }
+
+    return get_pruned(v2, 0), get_pruned(v3, 1)
+
+
+def compare_legacy_versions(v2_version: dict, v3_version: dict, prune=True) -> Dict:
+    """Return differences between normalized V2 and V3 dataset versions.
+
+    With `prune` enabled, values that are equal in both versions are removed before
+    comparison, which makes the comparison faster without changing the result.
+
+    Does not use the database, so it can also be run in a worker process.
+    """
+    if prune:
+        pruned = prune_equal_values(v2_version, v3_version)
+        if pruned is None:
+            return {}  # versions are equal
+        v2_version, v3_version = pruned
+    diff = DeepDiff(
+        v2_version,
+        v3_version,
+        ignore_order=True,
+        cutoff_intersection_for_pairs=1.0,
+        cutoff_distance_for_pairs=1.0,
+        exclude_paths=[
+            "id",
+            "service_modified",
+            "service_created",
+            "use_doi_for_published",  # Should be `null` in V2 for published datasets but isn't always
+            "root['data_catalog']['id']",
+            "root['research_dataset']['metadata_version_identifier']",
+            "root['dataset_version_set']",  # not directly writable
+            "root['alternate_record_set']",  # list of records sharing same preferred_identifier
+            "date_modified",  # modification date is always set in V3
+        ],
+        exclude_regex_paths=[
+            # old_notation is related to a SYKE migration in 2020, not relevant anymore
+            add_escapes("^root['research_dataset']['other_identifier'][\\d+]['old_notation']"),
+            # reference data labels may have differences
+            add_escapes("['pref_label']$"),
+            add_escapes("^root['research_dataset']['language'][\\d+]['title']"),
+            add_escapes(
+                "^root['research_dataset']['access_rights']['license'][\\d+]['title']['und']"
+            ),
+        ],
+        truncate_datetime="day",
+        exclude_obj_callback=exclude_from_diff,
+    )
+    json_diff = diff.to_json()
+    return json.loads(json_diff)
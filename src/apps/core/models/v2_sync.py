@@ -0,0 +1,82 @@
+import logging
+import uuid
+from typing import Iterable, List
+
+from django.db import models
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+class V2SyncTaskQuerySet(models.QuerySet):
+    def due(self):
+        return self.filter(next_attempt_at__lte=timezone.now()).order_by("next_attempt_at", "id")
+
+
+class V2SyncTaskManager(models.Manager.from_queryset(V2SyncTaskQuerySet)):
+    def enqueue(self, tasks: Iterable["V2SyncTask"]) -> List["V2SyncTask"]:
+        """Add tasks to the outbox, coalescing with pending tasks that have the same kind and key.
+
+        A coalesced task gets the newest payload and a new token, so a worker that is
+        processing the old payload will not remove the task when it finishes.
+        """
+        now = timezone.now()
+        tasks = list(tasks)
+        for task in tasks:
+            task.token = uuid.uuid4()
+            task.attempts = 0
+            task.next_attempt_at = now
+            task.last_error = None
+        return self.bulk_create(
+            tasks,
+            update_conflicts=True,
+            unique_fields=["kind", "key"],
+            update_fields=["payload", "token", "attempts", "next_attempt_at", "last_error"],
+            batch_size=1000,
+        )
+
+
+class V2SyncTask(models.Model):
+    """Pending change that needs to be synchronized to Metax V2.
+
+    Tasks are written in the same transaction as the change itself and
+    processed later by the process_v2_sync_outbox management command.
+    There is at most one pending task per (kind, key), e.g. multiple updates
+    to a dataset before the worker gets to it are sent to V2 only once.
+
+    Attributes:
+        kind (models.CharField): Type of synchronization
+        key (models.CharField): Identifier of the synchronized object, e.g. dataset id
+        payload (models.JSONField): Data needed for synchronization
+        token (models.UUIDField): Changes when the task is coalesced with a newer change
+        attempts (models.IntegerField): Number of failed attempts
+        next_attempt_at (models.DateTimeField): Time when task can be processed next
+        last_error (models.TextField): Error message from latest failed attempt
+    """
+
+    class KindChoices(models.TextChoices):
+        DATASET = "dataset"
+        DATASET_DELETE = "dataset_delete"
+        FILE = "file"
+
+    id = models.BigAutoField(primary_key=True)
+    kind = models.CharField(max_length=32, choices=KindChoices.choices)
+    key = models.CharField(max_length=64)
+    payload = models.JSONField(default=dict, blank=True)
+    token = models.UUIDField(default=uuid.uuid4)
+    created = models.DateTimeField(auto_now_add=True)
+    attempts = models.IntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(null=True, blank=True)
+
+    objects = V2SyncTaskManager()
+
+    class Meta:
+        ordering = ["id"]
+        constraints = [
+            models.UniqueConstraint(fields=["kind", "key"], name="unique_v2_sync_task"),
+        ]
+        indexes = [models.Index(fields=["next_attempt_at"])]
+
+    def __str__(self):
+        return f"{self.kind}:{self.key}"
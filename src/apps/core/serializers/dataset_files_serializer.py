@@ -23,6 +23,7 @@ from apps.core.serializers.file_metadata_serializer import (
     DirectoryMetadataSerializer,
     FileMetadataSerializer,
 )
+from apps.files.cache import file_storage_cache
 from apps.files.models import FileStorage
 from apps.files.serializers.fields import DirectoryPathField, StorageServiceField
 
@@ -217,7 +218,7 @@ class FileSetSerializer(StrictSerializer):
         storage_params = value.pop("storage", {})
         FileStorage.validate_object(storage_params)
         try:
-            storage = FileStorage.available_objects.get(
+            storage = file_storage_cache.get(
                 csc_project=storage_params.get("csc_project"),
                 storage_service=storage_params.get("storage_service"),
             )
@@ -233,7 +234,7 @@ class FileSetSerializer(StrictSerializer):
                 user = self.context["request"].user
                 try:
                     # User needs access to csc_project to create a matching FileStorage
-                    storage.check_user_can_access(user)
+                    file_storage_cache.check_user_can_access(storage, user)
                     storage.save()
                 except serializers.ValidationError:
                     storage = None
@@ -528,7 +529,7 @@ class FileSetSerializer(StrictSerializer):
             )
         except FileSet.DoesNotExist:
             # Creating new fileset only allowed if user has access to the csc_project
-            storage.check_user_can_access(user)
+            file_storage_cache.check_user_can_access(storage, user)
             return FileSet.available_objects.create(
                 dataset=dataset,
                 storage=storage,
@@ -546,7 +547,7 @@ class FileSetSerializer(StrictSerializer):
     def check_file_changes_allowed(self, instance: FileSet):
         try:
             user = self.context["request"].user
-            instance.storage.check_user_can_access(user)
+            file_storage_cache.check_user_can_access(instance.storage, user)
         except serializers.ValidationError:
             raise serializers.ValidationError(
                 {"action": "Project membership is required for adding or removing files."}
@@ -584,36 +585,21 @@ class FileSetSerializer(StrictSerializer):
         file_set.added_files_count = 0
 
         with cachalot_disabled():
-            # remove files
+            # Files are added and removed with set-based queries without loading file ids
             if filters["remove"]:
-                files_to_remove = (
-                    file_set.files.filter(filters["remove"])
-                    .order_by()
-                    .values_list("id", flat=True)
-                )
-                file_set.removed_files_count = len(files_to_remove)
-                if file_set.removed_files_count > 0:
+                files_to_remove = storage.files.filter(filters["remove"])
+                if files_to_remove.filter(file_sets=file_set.id).exists():
                     self.check_allow_removing_files(instance)
+                file_set.removed_files_count = file_set.remove_files_from_queryset(files_to_remove)
 
-                file_set.files.remove(*files_to_remove)
-
-            # add files
             if filters["add"]:
-                files_to_add = (
-                    storage.files.exclude(file_sets=file_set.id)
-                    .filter(filters["add"])
-                    .order_by()
-                    .values_list("id", flat=True)
-                )
-                file_set.added_files_count = len(files_to_add)
-                if file_set.added_files_count > 0:
+                files_to_add = storage.files.filter(filters["add"])
+                if files_to_add.exclude(file_sets=file_set.id).exists():
                     self.check_allow_adding_files(instance)
-
-                file_set.files.add(*files_to_add)
-                file_set.update_published()
+                file_set.added_files_count = file_set.add_files_from_queryset(files_to_add)
 
         # file counts and dataset storage project may have changed, clear cached values
-        file_set.clear_cached_file_properties()
+        file_set.refresh_file_properties()
 
         # update dataset-specific metadata
         self.update_file_metadata(file_actions, file_set)
@@ -10,7 +10,6 @@ from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from rest_framework import serializers
 from rest_framework.settings import api_settings
-from watson.search import skip_index_update
 
 from apps.common.serializers import (
     CommonListSerializer,
@@ -20,6 +19,7 @@ from apps.common.serializers import (
 )
 from apps.common.serializers.fields import ConstantField
 from apps.core.models import DataCatalog, Dataset
+from apps.core.models.catalog_record.dataset_search import skip_search_index_update
 from apps.core.models.concepts import FieldOfScience, Language, ResearchInfra, Theme
 from apps.core.serializers.common_serializers import (
     AccessRightsModelSerializer,
@@ -39,6 +39,8 @@ from apps.core.serializers.project_serializer import ProjectModelSerializer
 
 # for preventing circular import, using submodule instead of apps.core.serializers
 from apps.core.serializers.provenance_serializers import ProvenanceModelSerializer
+from apps.files.helpers import remove_hidden_fields
+from apps.files.serializers.fields import CommaSeparatedListField
 
 from .dataset_files_serializer import FileSetSerializer
 
@@ -132,6 +134,32 @@ class DatasetSerializer(CommonNestedModelSerializer):
                 context=self.context,
             ).data
 
+    # Named sets of rendered fields, selectable with the `profile` query parameter
+    profiles = {
+        "full": None,
+        "listing": (
+            "id",
+            "access_rights",
+            "created",
+            "cumulative_state",
+            "data_catalog",
+            "deprecated",
+            "description",
+            "issued",
+            "keyword",
+            "metadata_owner",
+            "modified",
+            "persistent_identifier",
+            "removed",
+            "state",
+            "title",
+            "version",
+        ),
+    }
+
+    # Fields that are only rendered when explicitly requested with a query parameter
+    optional_fields = {"allowed_actions", "metrics"}
+
     # Fields that should be left unchanged when omitted from PUT
     no_put_default_fields = {
         "id",
@@ -141,13 +169,32 @@ class DatasetSerializer(CommonNestedModelSerializer):
         "cumulative_state",
     }
 
+    def get_visible_fields(self):
+        """Return names of fields to render based on `fields` and `profile` query parameters.
+
+        Returns None if all fields are visible."""
+        query_params = self.context["view"].query_params
+        visible = query_params.get("fields") or self.profiles[query_params.get("profile", "full")]
+        if visible is None:
+            return None
+        return {*visible, *self.optional_fields}
+
     def get_fields(self):
         fields = super().get_fields()
         if not self.context["view"].query_params.get("include_allowed_actions"):
             fields.pop("allowed_actions", None)
         if not self.context["view"].query_params.get("include_metrics"):
             fields.pop("metrics", None)
-        return fields
+        return remove_hidden_fields(fields, self.get_visible_fields())
+
+    def get_prefetch_relations(self):
+        """Return top-level relations used by rendered fields, None if all fields are rendered."""
+        if self.get_visible_fields() is None:
+            return None
+        return {
+            name if field.source == "*" else field.source.split(".")[0]
+            for name, field in self.fields.items()
+        }
 
     def save(self, **kwargs):
         if self.instance:
@@ -168,7 +215,7 @@ class DatasetSerializer(CommonNestedModelSerializer):
         return super().save(**kwargs)
 
     def to_representation(self, instance: Dataset):
-        instance.ensure_prefetch()
+        instance.ensure_prefetch(relations=self.get_prefetch_relations())
         request = self.context["request"]
         self.context["show_emails"] = instance.has_permission_to_edit(request.user)
         ret = super().to_representation(instance)
@@ -180,7 +227,7 @@ class DatasetSerializer(CommonNestedModelSerializer):
             ret.pop("draft_of", None)
 
         view = self.context["view"]
-        if view.query_params.get("expand_catalog"):
+        if view.query_params.get("expand_catalog") and "data_catalog" in ret:
             ret["data_catalog"] = DataCatalogModelSerializer(
                 instance.data_catalog, context={"request": request}
             ).data
@@ -368,7 +415,7 @@ class DatasetSerializer(CommonNestedModelSerializer):
         state = validated_data.pop("state", None)
         instance: Dataset
         if state == Dataset.StateChoices.PUBLISHED:
-            with skip_index_update():  # Don't add draft to search index if publish fails
+            with skip_search_index_update():  # Don't add draft to search index if publish fails
                 instance = super().create(validated_data=validated_data)
             # Now reverse and many-to-many relations have been assigned, try to publish
             instance.publish()
@@ -406,6 +453,28 @@ class ExpandCatalogQueryParamsSerializer(serializers.Serializer):
     )
 
 
+class DatasetFieldsQueryParamsSerializer(serializers.Serializer):
+    profile = serializers.ChoiceField(
+        choices=list(DatasetSerializer.profiles),
+        default="full",
+        help_text=_(
+            "Set of fields to include in response. "
+            "The listing profile omits e.g. actors, provenance and spatial coverage."
+        ),
+    )
+    fields = CommaSeparatedListField(
+        default=None,
+        child=serializers.ChoiceField(
+            choices=[
+                field
+                for field in DatasetSerializer.Meta.fields
+                if field not in DatasetSerializer.optional_fields
+            ]
+        ),
+        help_text=_("Comma-separated list of fields to include in response. Overrides profile."),
+    )
+
+
 class LatestVersionQueryParamsSerializer(serializers.Serializer):
     latest_versions = serializers.BooleanField(
         default=False,
@@ -1,11 +1,12 @@
 import logging
 import uuid
 
-import requests
 from django.conf import settings
 from django.utils.module_loading import import_string
 from rest_framework.exceptions import APIException
 
+from apps.common.http_client import get_integration_client
+
 _logger = logging.getLogger(__name__)
 
 
@@ -35,7 +36,9 @@ class _PIDMSClient:
         }
         headers = {"apikey": self.pid_ms_apikey}
         try:
-            response = requests.post(self.pid_ms_url + "/v1/pid", json=payload, headers=headers)
+            response = get_integration_client("pid_ms").post(
+                self.pid_ms_url + "/v1/pid", json=payload, headers=headers
+            )
             response.raise_for_status()
             return response.text
         except Exception as e:
@@ -0,0 +1,139 @@
+import logging
+import time
+from datetime import timedelta
+from typing import Dict, List, Optional
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from apps.core.models import Dataset, V2SyncTask
+from apps.core.signals import (
+    delete_dataset_in_v2,
+    update_dataset_files_in_v2,
+    update_dataset_in_v2,
+)
+from apps.files.models import File
+from apps.files.signals import assign_legacy_ids, post_files_to_v2
+
+logger = logging.getLogger(__name__)
+
+
+class V2SyncOutboxWorker:
+    """Send pending V2SyncTask changes to Metax V2.
+
+    Tasks are claimed in batches with SKIP LOCKED, so multiple workers can run
+    concurrently. A claimed task is leased by moving its next_attempt_at forward.
+    Failed tasks are retried with exponential backoff until max_attempts is reached.
+    Files are synced before datasets because dataset file sync requires files
+    to have V2 identifiers.
+    """
+
+    lease_seconds = 5 * 60
+
+    def __init__(self, batch_size: Optional[int] = None, max_attempts: Optional[int] = None):
+        self.batch_size = batch_size or settings.METAX_V2_SYNC_BATCH_SIZE
+        self.max_attempts = max_attempts or settings.METAX_V2_SYNC_MAX_ATTEMPTS
+
+    def get_backoff(self, attempts: int) -> timedelta:
+        seconds = settings.METAX_V2_SYNC_BACKOFF_SECONDS * 2 ** max(attempts - 1, 0)
+        return timedelta(seconds=min(seconds, settings.METAX_V2_SYNC_MAX_BACKOFF_SECONDS))
+
+    def claim_tasks(self, kind: str) -> List[V2SyncTask]:
+        with transaction.atomic():
+            tasks = list(
+                V2SyncTask.objects.due()
+                .filter(kind=kind, attempts__lt=self.max_attempts)
+                .select_for_update(skip_locked=True)[: self.batch_size]
+            )
+            V2SyncTask.objects.filter(id__in=[task.id for task in tasks]).update(
+                next_attempt_at=timezone.now() + timedelta(seconds=self.lease_seconds)
+            )
+        return tasks
+
+    def complete(self, tasks: List[V2SyncTask]):
+        """Remove completed tasks unless they have been coalesced with a newer change."""
+        for task in tasks:
+            V2SyncTask.objects.filter(id=task.id, token=task.token).delete()
+
+    def fail(self, tasks: List[V2SyncTask], error: Exception):
+        for task in tasks:
+            attempts = task.attempts + 1
+            if attempts >= self.max_attempts:
+                logger.error(f"V2 sync of {task} failed permanently after {attempts} attempts")
+            V2SyncTask.objects.filter(id=task.id, token=task.token).update(
+                attempts=attempts,
+                next_attempt_at=timezone.now() + self.get_backoff(attempts),
+                last_error=str(error),
+            )
+
+    def process_files(self, tasks: List[V2SyncTask]):
+        files: Dict[str, File] = {
+            str(file.id): file for file in File.all_objects.filter(id__in=[t.key for t in tasks])
+        }
+        to_legacy = []
+        files_without_legacy_ids = {}
+        for task in tasks:
+            payload = task.payload
+            if file := files.get(task.key):
+                # File may have received a legacy_id after the task was created
+                payload = {**payload, "id": file.legacy_id}
+                if file.legacy_id is None:
+                    key = (file.storage_service, file.storage_identifier)
+                    files_without_legacy_ids[key] = file
+            to_legacy.append(payload)
+
+        v2_files = post_files_to_v2(to_legacy)
+        assign_legacy_ids(files_without_legacy_ids, v2_files)
+
+    def process_dataset(self, task: V2SyncTask):
+        dataset = Dataset.all_objects.filter(id=task.key).first()
+        if not dataset:
+            return  # Deletion is synced by a separate task
+        created = task.payload.get("created", False)
+        update_dataset_in_v2(dataset, created=created)
+        update_dataset_files_in_v2(dataset, created=created)
+
+    def process_dataset_delete(self, task: V2SyncTask):
+        if not delete_dataset_in_v2(task.key, soft=task.payload.get("soft", False)):
+            raise ValueError(f"Failed to delete dataset {task.key} from Metax V2")
+
+    def process_batch(self) -> int:
+        """Process one batch of each task kind. Returns number of processed tasks."""
+        count = 0
+        if file_tasks := self.claim_tasks(V2SyncTask.KindChoices.FILE):
+            try:
+                self.process_files(file_tasks)
+                self.complete(file_tasks)
+            except Exception as error:
+                logger.warning(f"Syncing {len(file_tasks)} files to V2 failed: {error}")
+                self.fail(file_tasks, error)
+            count += len(file_tasks)
+
+        handlers = {
+            V2SyncTask.KindChoices.DATASET: self.process_dataset,
+            V2SyncTask.KindChoices.DATASET_DELETE: self.process_dataset_delete,
+        }
+        for kind, handler in handlers.items():
+            for task in self.claim_tasks(kind):
+                try:
+                    handler(task)
+                    self.complete([task])
+                except Exception as error:
+                    logger.warning(f"V2 sync of {task} failed: {error}")
+                    self.fail([task], error)
+                count += 1
+        return count
+
+    def process_all(self) -> int:
+        """Process tasks until there are no due tasks left."""
+        total = 0
+        while count := self.process_batch():
+            total += count
+        return total
+
+    def run(self, interval: float = 5):
+        """Process tasks continuously, polling for new tasks every `interval` seconds."""
+        while True:
+            if not self.process_batch():
+                time.sleep(interval)
@@ -1,18 +1,25 @@
 import json
 import logging
 from datetime import date, datetime
+from typing import List
 
 import requests
 import urllib3
 from django.conf import settings
 from django.core.serializers.json import DjangoJSONEncoder
-from django.db.models.signals import m2m_changed, post_delete, pre_delete
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
 from django.dispatch import Signal, receiver
 from rest_framework import exceptions, status
 
-from apps.core.models import Dataset, FileSet
+from apps.actors.models import Organization
+from apps.actors.signals import organizations_indexed
+from apps.common.http_client import get_integration_client
+from apps.core.cache import dataset_response_cache
+from apps.core.models import Dataset, DatasetSearchIndex, FileSet, V2SyncTask
+from apps.core.models.catalog_record.file_publication import FilePublicationQueue
 from apps.files.models import File
-from apps.files.signals import pre_files_deleted
+from apps.files.signals import files_updated, pre_files_deleted, sync_files
+from apps.refdata.signals import reference_data_indexed
 
 logger = logging.getLogger(__name__)
 
@@ -26,23 +33,66 @@ class LegacyUpdateFailed(exceptions.APIException):
 
 @receiver(m2m_changed, sender=FileSet.files.through)
 def handle_fileset_files_changed(sender, instance: FileSet, action, pk_set, **kwargs):
+    update_file_set_totals(instance, action, pk_set)
     if instance.skip_files_m2m_changed:  # allow skipping handler
         return
     if action == "post_add":
         instance.update_published()
     elif action == "pre_clear":
-        instance.update_published(exclude_self=True)
+        instance.update_published(removing_all=True)
     elif action == "pre_remove":
-        instance.update_published(queryset=instance.files.filter(id__in=pk_set), exclude_self=True)
+        instance.update_published(file_ids=pk_set)
     elif action in ("post_remove", "post_clear"):
         instance.remove_unused_file_metadata()
 
 
+def update_file_set_totals(file_set: FileSet, action, pk_set):
+    """Update stored file totals of fileset before or after its files are changed."""
+    if pk_set is None and action in ("post_add", "post_remove"):
+        # Changed files are unknown, recompute totals from the current files
+        FileSet.refresh_totals([file_set.id])
+        file_set.refresh_from_db(fields=FileSet.totals_fields)
+    elif action == "post_add":  # pk_set only contains newly added files
+        file_set.add_to_totals(File.all_objects.filter(id__in=pk_set))
+    elif action == "pre_remove" and pk_set is not None:
+        file_set.add_to_totals(
+            File.all_objects.filter(id__in=pk_set, file_sets=file_set.id), sign=-1
+        )
+    elif action == "post_clear":
+        file_set.clear_totals()
+
+
 @receiver(pre_files_deleted, sender=File)
-def handle_files_deleted(sender, queryset, **kwargs):
+def handle_files_deleted(sender, queryset, flush=False, **kwargs):
     fileset_ids = queryset.values_list("file_sets").order_by().distinct()
     for fileset in FileSet.all_objects.filter(id__in=fileset_ids):
         fileset.deprecate_dataset()
+        if flush:
+            # Remove files from fileset before they are deleted to keep fileset totals correct
+            fileset.remove_files_from_queryset(queryset)
+            fileset.remove_unused_file_metadata()
+    FilePublicationQueue.flush()
+
+
+@receiver(files_updated, sender=File)
+def handle_files_updated(sender, queryset, **kwargs):
+    FileSet.refresh_totals_for_files(queryset)
+
+
+@receiver(post_save, sender=File)
+def handle_file_saved(sender, instance: File, created, **kwargs):
+    if created:  # new files are not in filesets yet
+        return
+    tracker = instance.tracker
+    size_change = 0
+    published_change = 0
+    if tracker.has_changed("size"):
+        size_change = (instance.size or 0) - (tracker.previous("size") or 0)
+    if tracker.has_changed("published"):
+        published_change = int(instance.published is not None) - int(
+            tracker.previous("published") is not None
+        )
+    FileSet.add_file_changes_to_totals(instance, size_change, published_change)
 
 
 @receiver(post_delete, sender=Dataset)
@@ -51,24 +101,64 @@ def delete_dataset_from_v2(sender, instance: Dataset, **kwargs):
     if not settings.METAX_V2_INTEGRATION_ENABLED:
         return
 
+    soft = kwargs.get("soft") is True
+    if is_v2_sync_outbox_enabled():
+        V2SyncTask.objects.enqueue(
+            [
+                V2SyncTask(
+                    kind=V2SyncTask.KindChoices.DATASET_DELETE,
+                    key=str(instance.id),
+                    payload={"soft": soft},
+                )
+            ]
+        )
+        return
+    delete_dataset_in_v2(instance.id, soft=soft)
+
+
+def delete_dataset_in_v2(dataset_id, soft=False) -> bool:
     params = {"removed": "true", "hard": "true"}
 
-    if "soft" in kwargs and kwargs["soft"] is True:
+    if soft:
         params["hard"] = None
 
     host, headers = get_v2_request_settings()
-    res = requests.delete(url=f"{host}/datasets/{instance.id}", headers=headers, params=params)
+    res = get_v2_client().delete(
+        url=f"{host}/datasets/{dataset_id}", headers=headers, params=params
+    )
 
     if res.status_code <= 204:
         logger.info(f"response form metax v2: {res}")
-        return
+        return True
 
     logger.warning(f"Syncing data with Metax v2 did not work properly: {res.content=}")
+    return False
+
+
+def is_v2_sync_outbox_enabled() -> bool:
+    """Return True if changes are synced to V2 asynchronously using V2SyncTask."""
+    return settings.METAX_V2_INTEGRATION_ENABLED and settings.METAX_V2_SYNC_MODE == "outbox"
+
+
+def enqueue_dataset_v2_sync(dataset: Dataset, created=False):
+    V2SyncTask.objects.enqueue(
+        [
+            V2SyncTask(
+                kind=V2SyncTask.KindChoices.DATASET,
+                key=str(dataset.id),
+                payload={"created": created},
+            )
+        ]
+    )
 
 
 def fetch_dataset_from_v2(pid: str):
     host, headers = get_v2_request_settings()
-    return requests.get(url=f"{host}/datasets?preferred_identifier={pid}", headers=headers)
+    return get_v2_client().get(url=f"{host}/datasets?preferred_identifier={pid}", headers=headers)
+
+
+def get_v2_client():
+    return get_integration_client("metax_v2")
 
 
 def get_v2_request_settings():
@@ -102,17 +192,19 @@ def update_dataset_in_v2(dataset: Dataset, created=False):
 
     found = False
     if not created:
-        response = requests.get(url=f"{host}/datasets/{identifier}", headers=headers)
+        response = get_v2_client().get(url=f"{host}/datasets/{identifier}", headers=headers)
         found = response.status_code == 200
 
     res: requests.Response
     body = json.dumps(v2_dataset, cls=DjangoJSONEncoder)
     if found:
-        res = requests.put(
+        res = get_v2_client().put(
             url=f"{host}/datasets/{identifier}?migration_override", data=body, headers=headers
         )
     else:
-        res = requests.post(url=f"{host}/datasets?migration_override", data=body, headers=headers)
+        res = get_v2_client().post(
+            url=f"{host}/datasets?migration_override", data=body, headers=headers
+        )
     if res.status_code in {200, 201}:
         logger.info(f"Sync {identifier} to V2: {res.status_code=}")
     else:
@@ -152,7 +244,7 @@ def update_dataset_files_in_v2(dataset: Dataset, created=False):
 
     data = {"file_ids": legacy_ids, "user_metadata": metadata}
 
-    res = requests.post(
+    res = get_v2_client().post(
         url=f"{host}/datasets/{identifier}/files_from_v3", json=data, headers=headers
     )
     if res.status_code == 200:
@@ -170,6 +262,10 @@ def handle_dataset_updated(sender, data: Dataset, **kwargs):
         fileset := getattr(data, "file_set", None)
     ):
         fileset.update_published()
+    FilePublicationQueue.flush()
+    if is_v2_sync_outbox_enabled():
+        enqueue_dataset_v2_sync(data)
+        return
     update_dataset_in_v2(data)
     update_dataset_files_in_v2(data)
 
@@ -180,6 +276,10 @@ def handle_dataset_created(sender, data: Dataset, **kwargs):
         fileset := getattr(data, "file_set", None)
     ):
         fileset.update_published()
+    FilePublicationQueue.flush()
+    if is_v2_sync_outbox_enabled():
+        enqueue_dataset_v2_sync(data, created=True)
+        return
     update_dataset_in_v2(data, created=True)
     update_dataset_files_in_v2(data, created=True)
 
@@ -189,4 +289,35 @@ def handle_dataset_pre_delete(sender, instance: Dataset, **kwargs):
     if instance.state == Dataset.StateChoices.PUBLISHED and (
         fileset := getattr(instance, "file_set", None)
     ):
-        fileset.update_published(exclude_self=True)
+        fileset.update_published(removing_all=True)
+
+
+@receiver(sync_files)
+def enqueue_files_v2_sync(sender, actions: List[dict], **kwargs):
+    """Add changed files to V2 sync outbox. Synchronous file sync is in apps.files.signals."""
+    if not is_v2_sync_outbox_enabled():
+        return
+
+    tasks = []
+    for file_action in actions:
+        file: File = file_action["object"]
+        # Store file in sync format, flushed files are no longer in the DB when synced
+        payload = json.loads(json.dumps(file.to_legacy_sync(), cls=DjangoJSONEncoder))
+        tasks.append(
+            V2SyncTask(kind=V2SyncTask.KindChoices.FILE, key=str(file.id), payload=payload)
+        )
+    V2SyncTask.objects.enqueue(tasks)
+
+
+@receiver(reference_data_indexed)
+def handle_reference_data_indexed(sender, models=(), **kwargs):
+    # Dataset representations and search index include reference data labels
+    dataset_response_cache.invalidate_all()
+    DatasetSearchIndex.objects.update_datasets_with_labels(models)
+
+
+@receiver(organizations_indexed)
+def handle_organizations_indexed(sender, **kwargs):
+    # Dataset representations and search index include organization names
+    dataset_response_cache.invalidate_all()
+    DatasetSearchIndex.objects.update_datasets_with_labels([Organization])
@@ -1,6 +1,10 @@
+import json
 import logging
+from collections import defaultdict
+from typing import Dict, List
 
-from django.db.models import Count, F, Func, Q
+from django.db.models import Count, F, Func, JSONField, Q, QuerySet, Value
+from django.db.models.functions import JSONObject
 
 from apps.actors.models import Organization
 from apps.core.models import (
@@ -16,272 +20,221 @@ from apps.refdata.models import FileType
 
 logger = logging.getLogger(__name__)
 
+# Query parameter used for filtering datasets by value of each aggregated facet
+facet_query_parameters = {
+    "data_catalog": "data_catalog__title",
+    "access_type": "access_rights__access_type__pref_label",
+    "organization": "actors__organization__pref_label",
+    "creator": "actors__roles__creator",
+    "field_of_science": "field_of_science__pref_label",
+    "keyword": "keyword",
+    "infrastructure": "infrastructure__pref_label",
+    "file_type": "file_type",
+    "project": "projects__title",
+}
+
+
+class FacetPart:
+    """Query returning aggregated values for (part of) a facet.
+
+    The query returns `value` as a JSON object, e.g. {"fi": "arvo"},
+    and `count` of matching items for each value.
+    """
 
-def aggregate_queryset(queryset):
-    dataset_ids = list(queryset.values_list("id", flat=True))
-
-    return {
-        "data_catalog": _wrap_into_aggregation_object(
-            query_parameter="data_catalog__title",
-            hits=_aggregate_data_catalog(dataset_ids),
-        ),
-        "access_type": _wrap_into_aggregation_object(
-            query_parameter="access_rights__access_type__pref_label",
-            hits=_aggregate_access_type(dataset_ids),
-        ),
-        "organization": _wrap_into_aggregation_object(
-            query_parameter="actors__organization__pref_label",
-            hits=_aggregate_organizations(dataset_ids=dataset_ids),
-        ),
-        "creator": _wrap_into_aggregation_object(
-            query_parameter="actors__roles__creator",
-            hits=_aggregate_creator(dataset_ids),
-        ),
-        "field_of_science": _wrap_into_aggregation_object(
-            query_parameter="field_of_science__pref_label",
-            hits=_aggregate_field_of_science(dataset_ids),
-        ),
-        "keyword": _wrap_into_aggregation_object(
-            query_parameter="keyword", hits=_aggregate_keyword(dataset_ids)
-        ),
-        "infrastructure": _wrap_into_aggregation_object(
-            query_parameter="infrastructure__pref_label",
-            hits=_aggregate_infrastructure(dataset_ids),
-        ),
-        "file_type": _wrap_into_aggregation_object(
-            query_parameter="file_type", hits=_aggregate_file_type(dataset_ids)
-        ),
-        "project": _wrap_into_aggregation_object(
-            query_parameter="projects__title", hits=_aggregate_project(dataset_ids)
-        ),
-    }
-
-
-def _wrap_into_aggregation_object(query_parameter, hits):
-    return {"query_parameter": query_parameter, "hits": hits}
-
-
-def _aggregate_ref_data(dataset_ids, model, field_name, dataset_access, languages):
-    if languages is None:
-        return _aggregate_ref_data_by_field_name(
-            dataset_ids=dataset_ids,
-            model=model,
-            field_name=field_name,
-            dataset_access=dataset_access,
+    def __init__(
+        self, facet: str, queryset: QuerySet, value, count, limit: int, ordering="-count"
+    ):
+        self.facet = facet
+        self.queryset = queryset
+        self.value = value
+        self.count = count
+        self.limit = limit
+        self.ordering = ordering
+
+    def get_queryset(self, index: int) -> QuerySet:
+        """Return aggregation queryset. Index is used to identify part in combined results."""
+        return (
+            self.queryset.values(value=self.value)
+            .annotate(count=self.count, part=Value(index))
+            .filter(count__gt=0)
+            .order_by(*self.get_ordering())[: self.limit]
         )
 
-    items_by_lang = [
-        _aggregate_ref_data_by_lang(
-            dataset_ids=dataset_ids,
-            model=model,
-            field_name=field_name,
-            dataset_access=dataset_access,
-            lang=lang,
-        )
-        for lang in languages
-    ]
-    return [item for items in items_by_lang for item in items]
+    def get_ordering(self) -> List[str]:
+        """Return ordering, values with equal counts are ordered by value."""
+        if self.ordering == "value":
+            return ["value"]
+        return [self.ordering, "value"]
 
+    def sort_hits(self, hits: List[dict]):
+        """Sort hits to same order as in query, order of the combined query is not defined."""
+        if self.ordering == "-count":
+            # Values may contain nulls, compare ties as JSON
+            hits.sort(key=lambda hit: (-hit["count"], json.dumps(hit["value"], sort_keys=True)))
+        elif self.ordering == "value":
+            hits.sort(key=lambda hit: list(hit["value"].values()))
 
-def _aggregate_ref_data_by_field_name(dataset_ids, model, field_name, dataset_access):
-    filter_args = {f"{dataset_access}__in": dataset_ids}
 
-    items_und = (
-        model.available_objects.filter(**filter_args)
-        .values(value=F(f"{field_name}"), count=Count("*"))
-        .order_by("-count")[:20]
-    )
+def aggregate_queryset(queryset) -> dict:
+    """Aggregate facet values for datasets in queryset.
 
-    return [{"value": item["value"], "count": item["count"]} for item in items_und]
+    Dataset queryset is used as a subquery and all facet
+    parts are combined with UNION ALL, so the aggregation
+    is done in a single database query."""
+    dataset_ids = queryset.order_by().values("id")
+    parts = _get_facet_parts(dataset_ids)
 
+    querysets = [part.get_queryset(index) for index, part in enumerate(parts)]
+    combined = querysets[0].union(*querysets[1:], all=True)
 
-def _aggregate_ref_data_by_lang(dataset_ids, model, field_name, dataset_access, lang):
-    filter_args = {f"{dataset_access}__in": dataset_ids}
+    hits_by_part: Dict[int, List[dict]] = defaultdict(list)
+    for row in combined:
+        hits_by_part[row["part"]].append({"value": row["value"], "count": row["count"]})
 
-    items = (
-        model.available_objects.filter(**filter_args)
-        .values(value=F(f"{field_name}__{lang}"), count=Count("*"))
-        .filter(value__isnull=False, count__gt=0)
-        .order_by("-count")[:20]
-    )
+    hits_by_facet: Dict[str, List[dict]] = {facet: [] for facet in facet_query_parameters}
+    for index, part in enumerate(parts):
+        hits = hits_by_part[index]
+        part.sort_hits(hits)
+        hits_by_facet[part.facet].extend(hits)
 
-    return [{"value": {f"{lang}": item["value"]}, "count": item["count"]} for item in items]
+    # Organizations are primarily listed by Finnish names
+    hits_by_facet["organization"] = hits_by_facet["organization"][:40]
+    hits_by_facet["creator"] = sorted(hits_by_facet["creator"], key=lambda c: -c["count"])[:40]
 
+    return {
+        facet: _wrap_into_aggregation_object(query_parameter, hits_by_facet[facet])
+        for facet, query_parameter in facet_query_parameters.items()
+    }
 
-def _aggregate_data_catalog(dataset_ids):
-    return _aggregate_ref_data(
-        dataset_ids=dataset_ids,
-        model=DataCatalog,
-        field_name="title",
-        dataset_access="datasets",
-        languages=None,
-    )
 
+def _wrap_into_aggregation_object(query_parameter, hits):
+    return {"query_parameter": query_parameter, "hits": hits}
 
-def _aggregate_access_type(dataset_ids):
-    return _aggregate_ref_data(
-        dataset_ids=dataset_ids,
-        model=AccessType,
-        field_name="pref_label",
-        dataset_access="access_rights__dataset",
-        languages=["fi", "en"],
-    )
 
+def _get_facet_parts(dataset_ids) -> List[FacetPart]:
+    return [
+        *_data_catalog_parts(dataset_ids),
+        *_ref_data_parts(
+            "access_type",
+            dataset_ids,
+            model=AccessType,
+            dataset_access="access_rights__dataset",
+        ),
+        *_organization_parts("organization", dataset_ids),
+        *_organization_parts(
+            "creator",
+            dataset_ids,
+            filters={"actor_organizations__datasetactor__roles__icontains": "creator"},
+        ),
+        *_creator_person_parts(dataset_ids),
+        *_ref_data_parts(
+            "field_of_science", dataset_ids, model=FieldOfScience, dataset_access="datasets"
+        ),
+        *_keyword_parts(dataset_ids),
+        *_ref_data_parts(
+            "infrastructure", dataset_ids, model=ResearchInfra, dataset_access="datasets"
+        ),
+        *_ref_data_parts(
+            "file_type",
+            dataset_ids,
+            model=FileType,
+            dataset_access="filesetfilemetadata__file_set__dataset",
+        ),
+        *_project_parts(dataset_ids),
+    ]
 
-def _aggregate_field_of_science(dataset_ids):
-    return _aggregate_ref_data(
-        dataset_ids=dataset_ids,
-        model=FieldOfScience,
-        field_name="pref_label",
-        dataset_access="datasets",
-        languages=["fi", "en"],
-    )
 
+def _data_catalog_parts(dataset_ids):
+    return [
+        FacetPart(
+            "data_catalog",
+            DataCatalog.available_objects.filter(datasets__in=dataset_ids),
+            value=Func(F("title"), function="hstore_to_jsonb", output_field=JSONField()),
+            count=Count("*"),
+            limit=20,
+        )
+    ]
 
-def _aggregate_infrastructure(dataset_ids):
-    return _aggregate_ref_data(
-        dataset_ids=dataset_ids,
-        model=ResearchInfra,
-        field_name="pref_label",
-        dataset_access="datasets",
-        languages=["fi", "en"],
-    )
+
+def _ref_data_parts(facet, dataset_ids, model, dataset_access, field_name="pref_label"):
+    return [
+        FacetPart(
+            facet,
+            model.available_objects.filter(
+                **{
+                    f"{dataset_access}__in": dataset_ids,
+                    f"{field_name}__{lang}__isnull": False,
+                }
+            ),
+            value=JSONObject(**{lang: F(f"{field_name}__{lang}")}),
+            count=Count("*"),
+            limit=20,
+        )
+        for lang in ["fi", "en"]
+    ]
 
 
-def _aggregate_organizations(dataset_ids):
+def _organization_parts(facet, dataset_ids, filters={}):
     """
-    Aggragate hits and names for organizations (top level only) per dataset.
+    Aggregate hits and names for organizations per dataset.
     Organization can appear multiple times in different roles per dataset.
     """
-
-    return _get_organizations(dataset_ids=dataset_ids, get_root_orgs=False)[:40]
-
-
-def _aggregate_creator(dataset_ids):
-    orgs = _get_organizations(
-        dataset_ids=dataset_ids,
-        filters={"actor_organizations__datasetactor__roles__icontains": "creator"},
-    )
-
-    persons = (
-        DatasetActor.available_objects.filter(
-            Q(roles__icontains="creator") & Q(person__isnull=False),
-            dataset__in=dataset_ids,
+    return [
+        FacetPart(
+            facet,
+            Organization.all_objects.filter(
+                **filters,
+                actor_organizations__datasetactor__dataset__in=dataset_ids,
+                **{f"pref_label__{lang}__isnull": False},
+            ),
+            value=JSONObject(**{lang: F(f"pref_label__{lang}")}),
+            count=Count("actor_organizations__datasetactor__dataset", distinct=True),
+            limit=40,
         )
-        .annotate(_dataset=F("dataset"))
-        .values(translated=F("person__name"))
-        .order_by("translated")
-        .annotate(count=Count("_dataset", distinct=True))
-        .filter(count__gt=0, translated__isnull=False)
-    )
-    persons = sorted(persons, key=lambda p: p["translated"])[:40]
-    persons = [
-        {"value": {"und": person["translated"]}, "count": person["count"]} for person in persons
+        for lang in ["fi", "en"]
     ]
 
-    creators = orgs + persons
-    return sorted(creators, key=lambda c: -c["count"])[:40]
-
-
-def _aggregate_keyword(dataset_ids):
-    keywords = (
-        Dataset.available_objects.filter(id__in=dataset_ids)
-        .annotate(name=Func(F("keyword"), function="unnest"))
-        .values_list("name")
-        .order_by("name")
-        .values("name", count=Count("*"))
-        .order_by("-count")[:20]
-    )
-
-    return [{"value": {"und": keyword["name"]}, "count": keyword["count"]} for keyword in keywords]
-
-
-def _aggregate_file_type(dataset_ids):
-    return _aggregate_ref_data(
-        dataset_ids=dataset_ids,
-        model=FileType,
-        field_name="pref_label",
-        dataset_access="filesetfilemetadata__file_set__dataset",
-        languages=["fi", "en"],
-    )
-
-
-def _aggregate_project(dataset_ids):
-    projects_en = _get_project_by_language(dataset_ids, "en")[:40]
-    projects_fi = _get_project_by_language(dataset_ids, "fi")[:40]
-    projects_und = _get_project_by_language(dataset_ids, "und")[:40]
-
-    return projects_fi + projects_en + projects_und
-
-
-def _get_project_by_language(dataset_ids, language):
-    projects = (
-        DatasetProject.available_objects.values(
-            pref_label=F(f"title__{language}"),
-        )
-        .order_by()
-        .distinct()
-        .annotate(count=Count("dataset", filter=Q(dataset__id__in=dataset_ids), distinct=True))
-        .filter(count__gt=0, pref_label__isnull=False)
-        .order_by("-count")
-    )
 
+def _creator_person_parts(dataset_ids):
     return [
-        {"value": {language: project["pref_label"]}, "count": project["count"]}
-        for project in projects
+        FacetPart(
+            "creator",
+            DatasetActor.available_objects.filter(
+                Q(roles__icontains="creator") & Q(person__name__isnull=False),
+                dataset__in=dataset_ids,
+            ),
+            value=JSONObject(und=F("person__name")),
+            count=Count("dataset", distinct=True),
+            limit=40,
+            ordering="value",
+        )
     ]
 
 
-def _get_organizations(dataset_ids, filters={}, get_root_orgs=False):
-    orgs = Organization.all_objects.filter(
-        **filters, actor_organizations__datasetactor__dataset__in=dataset_ids
-    )
-
-    if get_root_orgs:
-        orgs = _get_root_level_orgs(orgs)
-
-    orgs_fi = sorted(
-        _get_organizations_by_lang(orgs=orgs, lang="fi"),
-        key=lambda o: -o["count"],
-    )[:40]
-
-    orgs_en = sorted(
-        _get_organizations_by_lang(orgs=orgs, lang="en"),
-        key=lambda o: -o["count"],
-    )[:40]
-
-    orgs = orgs_fi + orgs_en
-    return orgs
-
-
-def _get_organizations_by_lang(orgs, lang):
-    lang_filtered_orgs = (
-        orgs.annotate(
-            dataset=F("actor_organizations__datasetactor__dataset"),
-        )
-        .values(
-            translated=F(f"pref_label__{lang}"),
-        )
-        .filter(translated__isnull=False)
-        .order_by("translated")
-        .annotate(count=Count("dataset", distinct=True))
-        .filter(count__gt=0, translated__isnull=False)
-    )
-
+def _keyword_parts(dataset_ids):
     return [
-        {"value": {lang: org["translated"]}, "count": org["count"]} for org in lang_filtered_orgs
+        FacetPart(
+            "keyword",
+            Dataset.available_objects.filter(id__in=dataset_ids).annotate(
+                name=Func(F("keyword"), function="unnest")
+            ),
+            value=JSONObject(und=F("name")),
+            count=Count("*"),
+            limit=20,
+        )
     ]
 
 
-def _get_root_level_orgs(orgs):
-    """Get root level of the orgs"""
-    root_level_orgs = orgs.filter(parent__isnull=True)
-    orgs_with_parent = orgs.filter(parent__isnull=False)
-
-    while len(orgs_with_parent):
-        parent_ids = list(orgs_with_parent.values_list("parent", flat=True))
-        sub_level_orgs = Organization.available_objects.filter(id__in=parent_ids)
-        root_level_orgs = root_level_orgs | sub_level_orgs
-        orgs_with_parent = sub_level_orgs.filter(parent__isnull=False)
-
-    return root_level_orgs
+def _project_parts(dataset_ids):
+    return [
+        FacetPart(
+            "project",
+            DatasetProject.available_objects.filter(
+                **{"dataset__in": dataset_ids, f"title__{lang}__isnull": False}
+            ),
+            value=JSONObject(**{lang: F(f"title__{lang}")}),
+            count=Count("dataset", distinct=True),
+            limit=40,
+        )
+        for lang in ["fi", "en", "und"]
+    ]
@@ -7,8 +7,10 @@
 
 import logging
 
+from django.conf import settings
+from django.core.cache import cache
 from django.db import transaction
-from django.db.models import Prefetch, Q, QuerySet, Value
+from django.db.models import Prefetch, QuerySet, Value
 from django.http import Http404
 from django.utils.decorators import method_decorator
 from django_filters import rest_framework as filters
@@ -20,16 +22,17 @@ from rest_framework.decorators import action
 from rest_framework.exceptions import NotAuthenticated
 from rest_framework.renderers import JSONRenderer
 from rest_framework.reverse import reverse
-from watson import search
 
 from apps.common.filters import MultipleCharFilter
 from apps.common.helpers import ensure_dict, omit_empty
+from apps.common.json_prefetch import JSONPrefetcher
 from apps.common.serializers.serializers import (
     FlushQueryParamsSerializer,
     IncludeRemovedQueryParamsSerializer,
 )
 from apps.common.views import CommonModelViewSet
-from apps.core.models.catalog_record import Dataset, FileSet
+from apps.core.cache import dataset_response_cache
+from apps.core.models.catalog_record import Dataset, DatasetActor, DatasetSearchIndex, FileSet
 from apps.core.models.data_catalog import DataCatalog
 from apps.core.models.legacy_converter import LegacyDatasetConverter
 from apps.core.models.preservation import Preservation
@@ -46,6 +49,7 @@ from apps.core.serializers.dataset_allowed_actions import (
 )
 from apps.core.serializers.dataset_metrics_serializer import DatasetMetricsQueryParamsSerializer
 from apps.core.serializers.dataset_serializer import (
+    DatasetFieldsQueryParamsSerializer,
     DatasetRevisionsQueryParamsSerializer,
     ExpandCatalogQueryParamsSerializer,
     LatestVersionQueryParamsSerializer,
@@ -135,6 +139,11 @@ class DatasetFilter(filters.FilterSet):
         label="organization name",
     )
 
+    organization_subtree = filters.UUIDFilter(
+        method="filter_organization_subtree",
+        label="organization id, also matches suborganizations",
+    )
+
     actors__roles__creator = MultipleCharFilter(method="filter_creator", max_length=255)
 
     field_of_science__pref_label = MultipleCharFilter(
@@ -173,69 +182,37 @@ class DatasetFilter(filters.FilterSet):
     def search_dataset(self, queryset, name, value):
         if value is None or value == "":
             return queryset
-        if self.form.cleaned_data.get("ordering") is None:
-            return search.filter(queryset=queryset, search_text=value, ranking=True)
-        return search.filter(queryset=queryset, search_text=value, ranking=False)
+        ranking = self.form.cleaned_data.get("ordering") is None
+        return DatasetSearchIndex.objects.search(queryset, value, ranking=ranking)
 
     def filter_access_type(self, queryset, name, value):
-        return self._filter_list(
-            queryset,
-            value,
-            filter_param="access_rights__access_type__pref_label__values__contains",
-        )
+        return DatasetSearchIndex.objects.filter_facet(queryset, "access_types", value)
 
     def filter_organization(self, queryset, name, value):
-        return self._filter_list(
-            queryset, value, filter_param="actors__organization__pref_label__values__contains"
-        )
+        return DatasetSearchIndex.objects.filter_facet(queryset, "organizations", value)
+
+    def filter_organization_subtree(self, queryset, name, value):
+        """Filter datasets having an actor in organization or any of its suborganizations."""
+        actors = DatasetActor.available_objects.filter(organization__tree_path__contains=[value])
+        return queryset.filter(id__in=actors.values("dataset_id"))
 
     def filter_keyword(self, queryset, name, value):
         return self._filter_list(queryset, value, filter_param="keyword__contains")
 
     def filter_creator(self, queryset, name, value):
-        result = queryset
-        for group in value:
-            union = None
-            for val in group:
-                if union is not None:
-                    union = union | queryset.filter(
-                        Q(actors__roles__contains=["creator"])
-                        & (
-                            Q(actors__organization__pref_label__values__contains=[val])
-                            | Q(actors__person__name__exact=val)
-                        )
-                    )
-                else:
-                    union = queryset.filter(
-                        Q(actors__roles__contains=["creator"])
-                        & (
-                            Q(actors__organization__pref_label__values__contains=[val])
-                            | Q(actors__person__name__exact=val)
-                        )
-                    )
-            if union is not None:
-                result = result & union
-        return result.distinct()
+        return DatasetSearchIndex.objects.filter_facet(queryset, "creators", value)
 
     def filter_field_of_science(self, queryset, name, value):
-        return self._filter_list(
-            queryset, value, filter_param="field_of_science__pref_label__values__contains"
-        )
+        return DatasetSearchIndex.objects.filter_facet(queryset, "fields_of_science", value)
 
     def filter_infrastructure(self, queryset, name, value):
-        return self._filter_list(
-            queryset, value, filter_param="infrastructure__pref_label__values__contains"
-        )
+        return DatasetSearchIndex.objects.filter_facet(queryset, "infrastructures", value)
 
     def filter_file_type(self, queryset, name, value):
-        return self._filter_list(
-            queryset,
-            value,
-            filter_param="file_set__file_metadata__file_type__pref_label__values__contains",
-        )
+        return DatasetSearchIndex.objects.filter_facet(queryset, "file_types", value)
 
     def filter_project(self, queryset, name, value):
-        return self._filter_list(queryset, value, filter_param="projects__title__values__contains")
+        return DatasetSearchIndex.objects.filter_facet(queryset, "project_titles", value)
 
     def _filter_list(self, queryset, value, filter_param):
         result = queryset
@@ -300,6 +277,7 @@ class DatasetViewSet(CommonModelViewSet):
             "class": IncludeRemovedQueryParamsSerializer,
             "actions": ["list", "retrieve", "update", "partial_update"],
         },
+        {"class": DatasetFieldsQueryParamsSerializer, "actions": ["list", "retrieve"]},
         {
             "class": FlushQueryParamsSerializer,
             "actions": ["destroy"],
@@ -308,15 +286,13 @@ class DatasetViewSet(CommonModelViewSet):
     access_policy = DatasetAccessPolicy
     serializer_class = DatasetSerializer
 
-    queryset = Dataset.available_objects.prefetch_related(
-        *Dataset.common_prefetch_fields
-    ).annotate(is_prefetched=Value(True))
-    queryset_include_removed = Dataset.all_objects.prefetch_related(
-        *Dataset.common_prefetch_fields
-    ).annotate(is_prefetched=Value(True))
+    queryset = Dataset.available_objects.all()
+    queryset_include_removed = Dataset.all_objects.all()
 
     filterset_class = DatasetFilter
     http_method_names = ["get", "post", "put", "patch", "delete", "options"]
+    aggregates_cache_key = "dataset-aggregates"
+    query_budgets = {"list": 80, "retrieve": 70}  # see RequestProfilingMiddleware
 
     def filter_queryset(self, queryset):
         queryset = super().filter_queryset(queryset)
@@ -383,22 +359,78 @@ class DatasetViewSet(CommonModelViewSet):
         else:
             qs = self.queryset
 
-        if self.request.method == "GET":
-            # Prefetch Dataset.dataset_versions.datasets to DatasetVersions._datasets
-            # but only for read-only requests to avoid having to invalidate the cached value
-            qs = qs.prefetch_related(
-                Prefetch(
-                    "dataset_versions__datasets",
-                    queryset=Dataset.all_objects.order_by("-version").prefetch_related(
-                        *Dataset.dataset_versions_prefetch_fields
-                    ),
-                    to_attr="_datasets",
+        # Serializer prefetches related objects only if response is not already cached
+        if not self.use_response_cache():
+            relations = None
+            if self.request.method == "GET":
+                # Prefetch only relations of fields that are rendered
+                relations = self.get_serializer().get_prefetch_relations()
+            lookups = list(Dataset.get_prefetch_fields(relations))
+            if self.request.method == "GET" and (
+                relations is None or "dataset_versions" in relations
+            ):
+                # Prefetch Dataset.dataset_versions.datasets to DatasetVersions._datasets
+                # but only for read-only requests to avoid having to invalidate the cached value
+                lookups.append(
+                    Prefetch(
+                        "dataset_versions__datasets",
+                        queryset=Dataset.all_objects.order_by("-version").prefetch_related(
+                            *Dataset.dataset_versions_prefetch_fields
+                        ),
+                        to_attr="_datasets",
+                    )
                 )
-            )
+
+            if self.use_json_prefetch():
+                qs = JSONPrefetcher(Dataset, lookups).apply(qs)
+            else:
+                qs = qs.prefetch_related(*lookups).annotate(is_prefetched=Value(True))
 
         qs = self.access_policy.scope_queryset(self.request, qs)
         return qs
 
+    def use_json_prefetch(self) -> bool:
+        """Return True if related objects should be loaded as JSON in the main query.
+
+        Enabled for anonymous read-only requests, see JSONPrefetcher."""
+        return (
+            settings.DATASET_JSON_PREFETCH_ENABLED
+            and self.request.method == "GET"
+            and self.action in ("list", "retrieve")
+            and not self.request.user.is_authenticated
+        )
+
+    def use_response_cache(self) -> bool:
+        """Return True if dataset representation can be read from cache.
+
+        Allowed actions and metrics depend on more than the dataset revision
+        and whether the user can edit the dataset, so they are not cached."""
+        return (
+            dataset_response_cache.enabled
+            and self.action == "retrieve"
+            and not self.query_params.get("include_allowed_actions")
+            and not self.query_params.get("include_metrics")
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        if not self.use_response_cache():
+            return super().retrieve(request, *args, **kwargs)
+
+        instance: Dataset = self.get_object()
+        variant = "expand_catalog={}&include_nulls={}&profile={}&fields={}".format(
+            bool(self.query_params.get("expand_catalog")),
+            self.include_nulls,
+            self.query_params.get("profile"),
+            ",".join(sorted(self.query_params.get("fields") or [])),
+        )
+        data = dataset_response_cache.get_or_render(
+            instance,
+            user=request.user,
+            render=lambda: self.get_serializer(instance).data,
+            variant=variant,
+        )
+        return response.Response(data)
+
     @action(detail=True, methods=["post"], url_path="new-version")
     def new_version(self, request, pk=None):
         """Create a new version of a published dataset."""
@@ -533,10 +565,33 @@ class DatasetViewSet(CommonModelViewSet):
         dataset: Dataset = serializer.save()
         dataset.signal_update()
 
+    def use_aggregates_cache(self) -> bool:
+        """Aggregates are cached only for anonymous requests without filters.
+
+        All anonymous users see the same datasets, so the unfiltered
+        aggregates are identical for them and can be shared."""
+        if not settings.DATASET_AGGREGATES_CACHE_TIMEOUT:
+            return False
+        if not self.request.user.is_anonymous:
+            return False
+        return set(self.request.query_params).issubset(settings.COMMON_QUERY_PARAMS)
+
     @action(detail=False)
     def aggregates(self, request):
+        use_cache = self.use_aggregates_cache()
+        if use_cache:
+            aggregates = cache.get(self.aggregates_cache_key)
+            if aggregates is not None:
+                return response.Response(aggregates, status=status.HTTP_200_OK)
+
         queryset = self.filter_queryset(self.get_queryset())
         aggregates = aggregate_queryset(queryset)
+        if use_cache:
+            cache.set(
+                self.aggregates_cache_key,
+                aggregates,
+                timeout=settings.DATASET_AGGREGATES_CACHE_TIMEOUT,
+            )
         return response.Response(aggregates, status=status.HTTP_200_OK)
 
     def perform_destroy(self, instance):
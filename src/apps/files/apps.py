@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class FilesConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.files"
+
+    def ready(self):
+        # Connect signal handlers
+        from apps.files import signals  # noqa: F401
@@ -0,0 +1,155 @@
+# This file is part of the Metax API service
+#
+# Copyright 2017-2024 Ministry of Education and Culture, Finland
+#
+# :author: CSC - IT Center for Science Ltd., Espoo Finland <servicedesk@csc.fi>
+# :license: MIT
+
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Callable, Optional
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.serializers import ValidationError
+
+from apps.common.cache import get_generation_token, invalidate_generation
+from apps.files.models import FileStorage
+
+logger = logging.getLogger(__name__)
+
+
+class FileStorageCache:
+    """Cache for resolving FileStorage instances by id or by key.
+
+    Field values of available (not removed) storages are cached both in a
+    process-local dict and in the shared Django cache. Cache keys contain a
+    generation token (see apps.common.cache) that is replaced when any
+    FileStorage is modified or deleted.
+    Storages that are not found are not cached, so creating a storage
+    does not need invalidation.
+
+    Inside `request_scope`, resolved storages and access checks are also
+    memoized for the duration of the request.
+
+    The cache is enabled by default only when Memcached is used as the shared cache.
+    """
+
+    key_prefix = "file-storage"
+    generation_key = f"{key_prefix}:generation"
+
+    def __init__(self):
+        self.local = {}  # field values by cache key
+        self._scope = threading.local()
+
+    @property
+    def cache(self):
+        return caches[settings.FILE_STORAGE_CACHE_ALIAS]
+
+    @property
+    def enabled(self) -> bool:
+        return settings.FILE_STORAGE_CACHE_ENABLED
+
+    @property
+    def memo(self) -> Optional[dict]:
+        """Values memoized in the current request scope, None outside request scope."""
+        return getattr(self._scope, "memo", None)
+
+    @contextmanager
+    def request_scope(self):
+        """Memoize storages and access checks inside the context."""
+        previous = self.memo
+        self._scope.memo = {}
+        try:
+            yield
+        finally:
+            self._scope.memo = previous
+
+    def memoize(self, key: tuple, func: Callable):
+        """Return value of func, memoized by key in the current request scope."""
+        memo = self.memo
+        if memo is None:
+            return func()
+        if key not in memo:
+            memo[key] = func()
+        return memo[key]
+
+    def _get_generation(self) -> Optional[str]:
+        if not self.enabled:
+            return None
+        return get_generation_token(self.cache, self.generation_key)
+
+    def get_generation(self) -> Optional[str]:
+        return self.memoize(("generation",), self._get_generation)
+
+    def _to_values(self, storage: FileStorage) -> dict:
+        return {
+            field.attname: getattr(storage, field.attname)
+            for field in FileStorage._meta.concrete_fields
+        }
+
+    def _from_values(self, values: dict) -> FileStorage:
+        model = FileStorage.get_proxy_model(values["storage_service"])
+        return model.from_db("default", list(values), list(values.values()))
+
+    def _get_values(self, key: str, lookup: dict) -> dict:
+        """Get storage field values from local cache, shared cache or database."""
+        if values := self.local.get(key):
+            return values
+        if (values := self.cache.get(key)) is None:
+            storage = FileStorage.available_objects.get(**lookup)  # not found is not cached
+            values = self._to_values(storage)
+            self.cache.set(key, values, timeout=settings.FILE_STORAGE_CACHE_TIMEOUT)
+        if len(self.local) >= settings.FILE_STORAGE_LOCAL_CACHE_SIZE:
+            self.local.clear()
+        self.local[key] = values
+        return values
+
+    def _get(self, lookup: dict) -> FileStorage:
+        generation = self.get_generation()
+        if generation is None:
+            return FileStorage.available_objects.get(**lookup)
+        key = ":".join(
+            [self.key_prefix, generation, *(f"{k}={v}" for k, v in sorted(lookup.items()))]
+        )
+        return self._from_values(self._get_values(key, lookup))
+
+    def get(self, id=None, storage_service=None, csc_project=None) -> FileStorage:
+        """Return available FileStorage by id or by storage_service and csc_project.
+
+        Raises FileStorage.DoesNotExist if storage is not found.
+        A new instance is returned for each call outside request scope.
+        """
+        if id is not None:
+            lookup = {"id": id}
+        else:
+            lookup = {"storage_service": storage_service, "csc_project": csc_project}
+        storage = self.memoize(("storage", *map(str, lookup.values())), lambda: self._get(lookup))
+        if (memo := self.memo) is not None:
+            memo.setdefault(("storage", str(storage.id)), storage)  # same storage by id
+        return storage
+
+    def check_user_can_access(self, storage: FileStorage, user):
+        """Call storage.check_user_can_access, memoized in the current request scope."""
+
+        def check() -> Optional[ValidationError]:
+            try:
+                storage.check_user_can_access(user)
+            except ValidationError as error:
+                return error
+            return None
+
+        if error := self.memoize(("access", storage.key, user.pk), check):
+            raise ValidationError(error.detail)
+
+    def invalidate(self):
+        """Invalidate all cached storages."""
+        if not self.enabled:
+            return
+        if memo := self.memo:
+            memo.clear()
+        invalidate_generation(self.cache, self.generation_key, on_change=self.local.clear)
+
+
+file_storage_cache = FileStorageCache()
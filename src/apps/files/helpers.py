@@ -30,8 +30,8 @@ def replace_query_param(url, param, value):
 
 
 def replace_query_path(url, path):
-    """Replace path query paremeter, clear pagination offset"""
-    url = remove_query_param(url, "offset")
+    """Replace path query paremeter, clear pagination offset and cursor"""
+    url = remove_query_param(url, "offset", "cursor")
     return replace_query_param(url, param="path", value=path)
 
 
@@ -0,0 +1,15 @@
+from apps.files.cache import file_storage_cache
+
+
+class FileStorageCacheMiddleware:
+    """Resolve file storages and storage access checks once per request.
+
+    See FileStorageCache.request_scope.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with file_storage_cache.request_scope():
+            return self.get_response(request)
@@ -0,0 +1,108 @@
+# Generated by Django 4.2.15 on 2026-10-18 18:30
+
+from django.db import migrations, models
+from django.db.models import Count, Max, Min, Sum
+import django.db.models.deletion
+
+
+def parent_path(path):
+    if path == "/":
+        return None
+    return path[: path.rstrip("/").rindex("/") + 1]
+
+
+def populate_directories(apps, schema_editor):
+    """Create directories with aggregated file statistics for existing files."""
+    file_model = apps.get_model("files", "File")
+    directory_model = apps.get_model("files", "Directory")
+    storage_ids = file_model.objects.values_list("storage_id", flat=True).order_by().distinct()
+    for storage_id in storage_ids:
+        direct_stats = (
+            file_model.objects.filter(storage_id=storage_id, removed__isnull=True)
+            .order_by()
+            .values("directory_path")
+            .annotate(
+                file_count=Count("*"),
+                published_file_count=Count("published"),
+                size=Sum("size"),
+                created=Min("modified"),
+                modified=Max("modified"),
+            )
+        )
+        directories = {}
+        for stats in direct_stats:
+            path = stats.pop("directory_path")
+            stats["size"] = stats["size"] or 0
+            ancestor = path
+            while ancestor is not None:
+                directories.setdefault(
+                    ancestor,
+                    directory_model(
+                        storage_id=storage_id,
+                        pathname=ancestor,
+                        parent_path=parent_path(ancestor),
+                        name=ancestor.rstrip("/").rsplit("/", 1)[-1],
+                    ),
+                )
+                ancestor = parent_path(ancestor)
+            directory = directories[path]
+            for key, value in stats.items():
+                setattr(directory, f"direct_{key}", value)
+
+        # Sum totals bottom-up
+        for path in sorted(directories, key=lambda p: p.count("/"), reverse=True):
+            directory = directories[path]
+            directory.file_count += directory.direct_file_count
+            directory.published_file_count += directory.direct_published_file_count
+            directory.size += directory.direct_size
+            for field, func in [("created", min), ("modified", max)]:
+                values = [v for v in [getattr(directory, field), getattr(directory, f"direct_{field}")] if v]
+                setattr(directory, field, func(values, default=None))
+            if directory.parent_path is not None:
+                parent = directories[directory.parent_path]
+                parent.file_count += directory.file_count
+                parent.published_file_count += directory.published_file_count
+                parent.size += directory.size
+                for field, func in [("created", min), ("modified", max)]:
+                    values = [v for v in [getattr(parent, field), getattr(directory, field)] if v]
+                    setattr(parent, field, func(values, default=None))
+        directory_model.objects.bulk_create(directories.values(), batch_size=5000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('files', '0005_file_legacy_id'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Directory',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('pathname', models.TextField()),
+                ('parent_path', models.TextField(blank=True, null=True)),
+                ('name', models.TextField()),
+                ('file_count', models.BigIntegerField(default=0)),
+                ('published_file_count', models.BigIntegerField(default=0)),
+                ('size', models.BigIntegerField(default=0)),
+                ('created', models.DateTimeField(blank=True, null=True)),
+                ('modified', models.DateTimeField(blank=True, null=True)),
+                ('direct_file_count', models.BigIntegerField(default=0)),
+                ('direct_published_file_count', models.BigIntegerField(default=0)),
+                ('direct_size', models.BigIntegerField(default=0)),
+                ('direct_created', models.DateTimeField(blank=True, null=True)),
+                ('direct_modified', models.DateTimeField(blank=True, null=True)),
+                ('storage', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='directories', to='files.filestorage')),
+            ],
+            options={
+                'ordering': ['storage', 'pathname'],
+                'indexes': [models.Index(fields=['storage', 'parent_path', 'name'], name='files_direc_storage_3bf35f_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='directory',
+            constraint=models.UniqueConstraint(fields=('storage', 'pathname'), name='files_directory_unique_pathname'),
+        ),
+        migrations.RunPython(populate_directories, migrations.RunPython.noop),
+    ]
@@ -1,4 +1,12 @@
+from .directory import Directory
 from .file import File
 from .file_storage import BasicFileStorage, FileStorage, IDAFileStorage, ProjectFileStorage
 
-__all__ = ["File", "BasicFileStorage", "FileStorage", "IDAFileStorage", "ProjectFileStorage"]
+__all__ = [
+    "Directory",
+    "File",
+    "BasicFileStorage",
+    "FileStorage",
+    "IDAFileStorage",
+    "ProjectFileStorage",
+]
@@ -0,0 +1,279 @@
+# This file is part of the Metax API service
+#
+# Copyright 2017-2024 Ministry of Education and Culture, Finland
+#
+# :author: CSC - IT Center for Science Ltd., Espoo Finland <servicedesk@csc.fi>
+# :license: MIT
+
+from collections import defaultdict
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+from django.db import models, transaction
+from django.db.models import Count, Max, Min, Sum
+from django.db.models.functions import Coalesce
+
+from .file_storage import FileStorage
+
+# Directory is identified by (storage_id, pathname)
+DirectoryKey = Tuple[object, str]
+
+
+def get_parent_path(pathname: str) -> Optional[str]:
+    """Return parent of directory path, e.g. `/dir/` for `/dir/sub/`. Root has no parent."""
+    if pathname == "/":
+        return None
+    return pathname[: pathname.rstrip("/").rindex("/") + 1]
+
+
+def get_directory_name(pathname: str) -> str:
+    """Return last part of directory path, e.g. `sub` for `/dir/sub/`."""
+    return pathname.rstrip("/").rsplit("/", 1)[-1]
+
+
+def get_ancestor_paths(pathname: str) -> Set[str]:
+    """Return directory path and all its parent directory paths."""
+    paths = set()
+    path = pathname
+    while path is not None:
+        paths.add(path)
+        path = get_parent_path(path)
+    return paths
+
+
+def get_path_depth(pathname: str) -> int:
+    return pathname.count("/")
+
+
+class DirectoryManager(models.Manager):
+    def get_keys(self, files) -> Set[DirectoryKey]:
+        """Return directory keys for File instances or a File queryset.
+
+        When directory statistics need to be updated after a queryset is modified,
+        determine the keys before modifying it, e.g.
+
+        ```
+        keys = Directory.objects.get_keys(queryset)
+        queryset.update(...)
+        Directory.objects.refresh(keys)
+        ```
+        """
+        if isinstance(files, models.QuerySet):
+            return set(files.order_by().values_list("storage_id", "directory_path").distinct())
+        return {(f.storage_id, f.directory_path) for f in files}
+
+    def refresh_for_files(self, files):
+        """Update directories containing files."""
+        self.refresh(self.get_keys(files))
+
+    def refresh(self, keys: Iterable[DirectoryKey]):
+        """Update statistics of directories and their parents after their files have changed."""
+        paths_by_storage: Dict[object, Set[str]] = defaultdict(set)
+        for storage_id, pathname in keys:
+            paths_by_storage[storage_id].add(pathname)
+        for storage_id, paths in paths_by_storage.items():
+            self._refresh_storage_paths(storage_id, paths)
+
+    def _get_direct_stats(self, storage_id, paths: Optional[Set[str]] = None) -> Dict[str, dict]:
+        """Aggregate files that are directly in directories, return stats by directory path."""
+        from .file import File
+
+        files = File.available_objects.filter(storage_id=storage_id)
+        if paths is not None:
+            files = files.filter(directory_path__in=paths)
+        stats = (
+            files.order_by()
+            .values("directory_path")
+            .annotate(
+                file_count=Count("*"),
+                published_file_count=Count("published"),
+                size=Coalesce(Sum("size"), 0),
+                created=Min("modified"),
+                modified=Max("modified"),
+            )
+        )
+        return {s.pop("directory_path"): s for s in stats}
+
+    def _get_child_totals(self, storage_id, parent_paths: Set[str], exclude_paths: Set[str]):
+        """Aggregate stored totals of child directories by parent directory path."""
+        totals = (
+            self.filter(storage_id=storage_id, parent_path__in=parent_paths)
+            .exclude(pathname__in=exclude_paths)
+            .order_by()
+            .values("parent_path")
+            .annotate(
+                file_count=Sum("file_count"),
+                published_file_count=Sum("published_file_count"),
+                size=Sum("size"),
+                created=Min("created"),
+                modified=Max("modified"),
+            )
+        )
+        return {t.pop("parent_path"): t for t in totals}
+
+    @transaction.atomic
+    def _refresh_storage_paths(self, storage_id, paths: Set[str]):
+        all_paths = set()
+        for path in paths:
+            all_paths.update(get_ancestor_paths(path))
+
+        # Make sure rows exist and lock them to avoid lost updates from concurrent requests
+        self.bulk_create(
+            [
+                Directory(
+                    storage_id=storage_id,
+                    pathname=path,
+                    parent_path=get_parent_path(path),
+                    name=get_directory_name(path),
+                )
+                for path in all_paths
+            ],
+            ignore_conflicts=True,
+        )
+        directories = {
+            d.pathname: d
+            for d in self.filter(storage_id=storage_id, pathname__in=all_paths)
+            .select_for_update()
+            .order_by("pathname")
+        }
+
+        direct_stats = self._get_direct_stats(storage_id, paths)
+        for path in paths:
+            directories[path].set_direct_stats(direct_stats.get(path))
+
+        # Children that are not being updated already have correct totals
+        child_totals = self._get_child_totals(
+            storage_id, parent_paths=all_paths, exclude_paths=all_paths
+        )
+
+        # Compute totals bottom-up so child directories are ready before their parents
+        updated = []
+        removed = []
+        for path in sorted(all_paths, key=get_path_depth, reverse=True):
+            directory = directories[path]
+            directory.set_totals(child_totals.get(path))
+            if directory.file_count > 0:
+                updated.append(directory)
+            else:
+                removed.append(directory.id)
+            if directory.parent_path is not None:
+                parent_totals = child_totals.setdefault(directory.parent_path, {})
+                directory.add_to_totals(parent_totals)
+
+        self.bulk_update(
+            updated,
+            fields=[
+                *Directory.aggregated_fields,
+                *(f"direct_{field}" for field in Directory.aggregated_fields),
+            ],
+        )
+        self.filter(id__in=removed).delete()
+
+    @transaction.atomic
+    def rebuild(self, storage: FileStorage):
+        """Recreate all directories of a FileStorage from its files."""
+        self.filter(storage=storage).delete()
+        direct_stats = self._get_direct_stats(storage.id)
+        directories: Dict[str, Directory] = {}
+        for path in direct_stats:
+            for ancestor in get_ancestor_paths(path):
+                if ancestor not in directories:
+                    directories[ancestor] = Directory(
+                        storage=storage,
+                        pathname=ancestor,
+                        parent_path=get_parent_path(ancestor),
+                        name=get_directory_name(ancestor),
+                    )
+            directories[path].set_direct_stats(direct_stats[path])
+
+        child_totals = {}
+        for path in sorted(directories, key=get_path_depth, reverse=True):
+            directory = directories[path]
+            directory.set_totals(child_totals.get(path))
+            if directory.parent_path is not None:
+                directory.add_to_totals(child_totals.setdefault(directory.parent_path, {}))
+        self.bulk_create(directories.values(), batch_size=5000)
+
+
+class Directory(models.Model):
+    """Directory in a FileStorage with aggregated statistics of the files it contains.
+
+    Directories are derived from the directory_path values of non-removed files.
+    Values without prefix include files in subdirectories, while values prefixed
+    with `direct_` only include files directly in the directory. The statistics are
+    updated from code that modifies files using Directory.objects.refresh.
+    """
+
+    id = models.BigAutoField(primary_key=True)
+    storage = models.ForeignKey(FileStorage, related_name="directories", on_delete=models.CASCADE)
+    pathname = models.TextField()
+    parent_path = models.TextField(null=True, blank=True)
+    name = models.TextField()
+
+    file_count = models.BigIntegerField(default=0)
+    published_file_count = models.BigIntegerField(default=0)
+    size = models.BigIntegerField(default=0)
+    created = models.DateTimeField(null=True, blank=True)  # oldest file modification
+    modified = models.DateTimeField(null=True, blank=True)  # most recent file modification
+
+    direct_file_count = models.BigIntegerField(default=0)
+    direct_published_file_count = models.BigIntegerField(default=0)
+    direct_size = models.BigIntegerField(default=0)
+    direct_created = models.DateTimeField(null=True, blank=True)
+    direct_modified = models.DateTimeField(null=True, blank=True)
+
+    objects = DirectoryManager()
+
+    # Fields that have both a total and a direct_ value
+    aggregated_fields = ["file_count", "published_file_count", "size", "created", "modified"]
+
+    def set_direct_stats(self, stats: Optional[dict]):
+        """Assign aggregated values of files directly in directory."""
+        stats = stats or {}
+        self.direct_file_count = stats.get("file_count", 0)
+        self.direct_published_file_count = stats.get("published_file_count", 0)
+        self.direct_size = stats.get("size", 0)
+        self.direct_created = stats.get("created")
+        self.direct_modified = stats.get("modified")
+
+    def set_totals(self, child_totals: Optional[dict]):
+        """Assign totals from direct values and aggregated values of child directories."""
+        child_totals = child_totals or {}
+        self.file_count = self.direct_file_count + (child_totals.get("file_count") or 0)
+        self.published_file_count = self.direct_published_file_count + (
+            child_totals.get("published_file_count") or 0
+        )
+        self.size = self.direct_size + (child_totals.get("size") or 0)
+        self.created = min(
+            (v for v in [self.direct_created, child_totals.get("created")] if v), default=None
+        )
+        self.modified = max(
+            (v for v in [self.direct_modified, child_totals.get("modified")] if v), default=None
+        )
+
+    def add_to_totals(self, totals: dict):
+        """Add directory totals to aggregated values dict of parent directory."""
+        if self.file_count == 0:
+            return
+        for field in ["file_count", "published_file_count", "size"]:
+            totals[field] = (totals.get(field) or 0) + getattr(self, field)
+        totals["created"] = min(
+            (v for v in [totals.get("created"), self.created] if v), default=None
+        )
+        totals["modified"] = max(
+            (v for v in [totals.get("modified"), self.modified] if v), default=None
+        )
+
+    def __str__(self):
+        return self.pathname
+
+    class Meta:
+        ordering = ["storage", "pathname"]
+        indexes = [
+            models.Index(fields=("storage", "parent_path", "name")),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["storage", "pathname"],
+                name="%(app_label)s_%(class)s_unique_pathname",
+            ),
+        ]
@@ -12,12 +12,14 @@ from django.conf import settings
 from django.db import models
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
+from model_utils import FieldTracker
 from model_utils.fields import AutoCreatedField, AutoLastModifiedField
 
 from apps.common.models import CustomSoftDeletableModel, SystemCreatorBaseModel
 from apps.common.serializers.fields import ChecksumField
 from apps.files.helpers import convert_checksum_v2_to_v3, convert_checksum_v3_to_v2
 
+from .directory import Directory
 from .file_storage import FileStorage
 
 
@@ -57,6 +59,8 @@ class File(SystemCreatorBaseModel, CustomSoftDeletableModel):
     user = models.CharField(max_length=200, null=True, blank=True)
     legacy_id = models.BigIntegerField(unique=True, null=True, blank=True)
 
+    tracker = FieldTracker(fields=["directory_path", "storage", "size", "published"])
+
     @classmethod
     def values_from_legacy(cls, legacy_file: dict, storage: FileStorage):
         removed = None
@@ -113,6 +117,29 @@ class File(SystemCreatorBaseModel, CustomSoftDeletableModel):
             "checksum_value": v2_checksum.get("checksum_value"),
         }
 
+    def get_directory_keys(self) -> set:
+        """Return keys of directories affected by saving the file."""
+        keys = {(self.storage_id, self.directory_path)}
+        if not self._state.adding:
+            previous_storage_id = self.tracker.previous("storage")
+            previous_path = self.tracker.previous("directory_path")
+            if previous_storage_id and previous_path:
+                keys.add((previous_storage_id, previous_path))
+        return keys
+
+    def save(self, *args, **kwargs):
+        directory_keys = self.get_directory_keys()
+        super().save(*args, **kwargs)
+        Directory.objects.refresh(directory_keys)
+
+    def delete(self, *args, soft=True, **kwargs):
+        if soft:  # soft delete is handled in save
+            return super().delete(*args, soft=soft, **kwargs)
+        directory_keys = self.get_directory_keys()
+        deleted = super().delete(*args, soft=soft, **kwargs)
+        Directory.objects.refresh(directory_keys)
+        return deleted
+
     @property
     def pathname(self) -> str:
         return f"{self.directory_path}{self.filename}"
@@ -11,7 +11,7 @@ import operator
 import re
 import uuid
 from collections import namedtuple
-from typing import Dict, List, Set, Tuple, Union
+from typing import Dict, List, Optional, Set, Tuple, Union
 
 from django.conf import settings
 from django.db import models
@@ -109,6 +109,7 @@ class FileStorageManagerMixin(ProxyBasePolymorphicManager):
         allow_create=False,
         raise_exception=True,
         remove_filestorage_fields=False,
+        storages_by_key: Optional[dict] = None,
     ) -> List[dict]:
         """
         Retrieve FileStorage instances and assign to file data.
@@ -128,19 +129,28 @@ class FileStorageManagerMixin(ProxyBasePolymorphicManager):
             raise_exception: Raise exception on error. Otherwise add errors to dict.
             remove_filestorage_fields: When enabled, remove storage_service and
                 other FileStorage fields from the files.
+            storages_by_key: Optional dict of already known FileStorage instances by key.
+                Only missing keys are queried from the database and the found or
+                created instances are added to the dict, so it can be shared
+                between calls, e.g. when handling files in chunks.
 
         Returns:
             files: Modified file data.
         """
 
         files_by_key = self._group_files_by_key(files, raise_exception=raise_exception)
-        storages_by_key = self._get_existing_filestorages_by_key(files_by_key)
-        storages_by_key, errors_by_key = self._create_missing_filestorages(
-            files_by_key,
-            storages_by_key,
+        known_storages = storages_by_key if storages_by_key is not None else {}
+        unknown_files_by_key = {
+            key: key_files for key, key_files in files_by_key.items() if key not in known_storages
+        }
+        found_storages = self._get_existing_filestorages_by_key(unknown_files_by_key)
+        found_storages, errors_by_key = self._create_missing_filestorages(
+            unknown_files_by_key,
+            found_storages,
             allow_create=allow_create,
             raise_exception=raise_exception,
         )
+        known_storages.update(found_storages)
 
         # Assign FileStorage instances to data
         for key, key_files in files_by_key.items():
@@ -152,7 +162,7 @@ class FileStorageManagerMixin(ProxyBasePolymorphicManager):
                     f.pop("storage_service", None)
                     for field in self.model.all_extra_fields:
                         f.pop(field, None)
-                f["storage"] = storages_by_key.get(key)
+                f["storage"] = known_storages.get(key)
                 if errors := errors_by_key.get(key):
                     f.setdefault("errors", {}).update(errors)
         return files
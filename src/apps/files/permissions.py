@@ -1,6 +1,7 @@
 from django.conf import settings
 
 from apps.common.permissions import BaseAccessPolicy
+from apps.files.cache import file_storage_cache
 
 
 class BaseFilesAccessPolicy(BaseAccessPolicy):
@@ -14,11 +15,23 @@ class BaseFilesAccessPolicy(BaseAccessPolicy):
         from apps.core.models import Dataset
         from apps.core.permissions import DatasetAccessPolicy
 
-        datasets = Dataset.available_objects.all()
-        return (
-            DatasetAccessPolicy.scope_queryset(request, queryset=datasets)
-            .filter(id=dataset_id)
-            .exists()
+        def check():
+            datasets = Dataset.available_objects.all()
+            return (
+                DatasetAccessPolicy.scope_queryset(request, queryset=datasets)
+                .filter(id=dataset_id)
+                .exists()
+            )
+
+        key = ("view_dataset", request.user.pk, str(dataset_id))
+        return file_storage_cache.memoize(key, check)
+
+    @classmethod
+    def is_service_group_user(cls, request) -> bool:
+        service_groups = settings.PROJECT_STORAGE_SERVICE_USER_GROUPS
+        return file_storage_cache.memoize(
+            ("service_group", request.user.pk),
+            lambda: request.user.groups.filter(name__in=service_groups).exists(),
         )
 
 
@@ -38,10 +51,9 @@ class FilesAccessPolicy(BaseFilesAccessPolicy):
 
     @classmethod
     def scope_queryset(cls, request, queryset, dataset_id=None):
-        service_groups = settings.PROJECT_STORAGE_SERVICE_USER_GROUPS
         if (q := super().scope_queryset(request, queryset)) is not None:
             return q
-        elif request.user.groups.filter(name__in=service_groups).exists():
+        elif cls.is_service_group_user(request):
             return queryset
         elif dataset_id:
             if cls.can_view_dataset(request, dataset_id):
@@ -5,9 +5,10 @@
 # :author: CSC - IT Center for Science Ltd., Espoo Finland <servicedesk@csc.fi>
 # :license: MIT
 
+import json
 from dataclasses import asdict, dataclass
 from enum import Enum
-from typing import Dict, List, Optional
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 
 from django.db.models import F, prefetch_related_objects
 from django.utils import timezone
@@ -16,9 +17,11 @@ from rest_framework import serializers
 
 from apps.common.helpers import get_technical_metax_user
 from apps.common.serializers import StrictSerializer
+from apps.files.models.directory import Directory
 from apps.files.models.file import File
 from apps.files.models.file_storage import FileStorage
 from apps.files.serializers.file_serializer import FileSerializer
+from apps.files.signals import files_updated
 
 
 class PartialFileSerializer(FileSerializer, StrictSerializer):
@@ -71,6 +74,38 @@ class FileBulkReturnValueSerializer(serializers.Serializer):
     failed = FileBulkFailSerializer(many=True)
 
 
+def iter_ndjson_chunks(
+    lines: Iterable[bytes], chunk_size: int
+) -> Iterator[Tuple[List[dict], List[BulkFileFail]]]:
+    """Parse newline-delimited JSON lazily in chunks.
+
+    Yields tuples of (objects, failed) for each chunk of at most
+    chunk_size non-empty lines. Lines that are not valid JSON objects
+    are returned as BulkFileFail items."""
+    objects = []
+    failed = []
+    for line_number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            value = json.loads(line)
+            if not isinstance(value, dict):
+                raise ValueError("Expected a JSON object.")
+            objects.append(value)
+        except ValueError as e:
+            failed.append(
+                BulkFileFail(
+                    object={"line": line_number},
+                    errors={"json": _("Invalid JSON: {error}").format(error=e)},
+                )
+            )
+        if len(objects) + len(failed) >= chunk_size:
+            yield objects, failed
+            objects, failed = [], []
+    if objects or failed:
+        yield objects, failed
+
+
 class FileBulkSerializer(serializers.ListSerializer):
     """Serializer for bulk file creation.
 
@@ -109,10 +144,18 @@ class FileBulkSerializer(serializers.ListSerializer):
     BULK_UPDATE_ACTIONS = {BulkAction.UPDATE, BulkAction.UPSERT}
     BULK_DELETE_ACTIONS = {BulkAction.DELETE}
 
-    def __init__(self, *args, action: BulkAction, ignore_errors=False, **kwargs):
+    def __init__(
+        self,
+        *args,
+        action: BulkAction,
+        ignore_errors=False,
+        storages_by_key: Optional[dict] = None,
+        **kwargs,
+    ):
         self.action: BulkAction = action
         self.child = PartialFileSerializer(patch=action not in self.BULK_INSERT_ACTIONS)
         self.ignore_errors = ignore_errors
+        self.storages_by_key = storages_by_key  # FileStorage lookups shared between serializers
         super().__init__(*args, **kwargs)
         self.failed: List[BulkFileFail] = []
 
@@ -272,7 +315,10 @@ class FileBulkSerializer(serializers.ListSerializer):
 
         allow_create = self.action in self.BULK_INSERT_ACTIONS
         files = FileStorage.objects.assign_to_file_data(
-            files, allow_create=allow_create, raise_exception=False
+            files,
+            allow_create=allow_create,
+            raise_exception=False,
+            storages_by_key=self.storages_by_key,
         )
         return files
 
@@ -389,6 +435,9 @@ class FileBulkSerializer(serializers.ListSerializer):
         )
         # Related objects need to be fetched again from DB after save
         prefetch_related_objects(files, "storage")
+        Directory.objects.refresh_for_files(files)
+        if updated_ids := [f.id for f in files if f.id not in being_created]:
+            files_updated.send(sender=File, queryset=File.all_objects.filter(id__in=updated_ids))
 
         def file_action(file):
             if file.id in being_created:
@@ -413,6 +462,7 @@ class FileBulkSerializer(serializers.ListSerializer):
         # Update all files in db at once
         file_ids = [f.id for f in files]
         File.objects.filter(id__in=file_ids).update(removed=now)
+        Directory.objects.refresh_for_files(files)
 
         return [
             {
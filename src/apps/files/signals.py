@@ -1,26 +1,43 @@
 import json
 import logging
-from typing import List
+from typing import Dict, List
 
-import requests
 import urllib3
 from django.conf import settings
 from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import Signal, receiver
 from rest_framework import exceptions, status
 
-from apps.files.models import File
+from apps.common.http_client import get_integration_client
+from apps.files.cache import file_storage_cache
+from apps.files.models import File, FileStorage
 
 logger = logging.getLogger(__name__)
 
 # Sent when files are deleted using the API, list of deleted files provided in `queryset` argument
+# and `flush` is True when files are deleted from the database instead of marking them removed
 pre_files_deleted = Signal()
 
+# Sent after existing files have been updated in bulk, updated files provided in `queryset`
+files_updated = Signal()
+
 # Send when files are created, modified or deleted. Used for triggering file synchronization to V2.
 # Expects list of {"object": File, "action": "insert"/"update"/"delete"}
 sync_files = Signal()
 
 
+def invalidate_file_storage_cache(sender, instance: FileStorage, created=False, **kwargs):
+    if not created:  # new storages are not in cache
+        file_storage_cache.invalidate()
+
+
+# Signals are sent with the proxy model as sender
+for model in [FileStorage, *FileStorage.get_proxy_subclasses()]:
+    post_save.connect(invalidate_file_storage_cache, sender=model)
+    post_delete.connect(invalidate_file_storage_cache, sender=model)
+
+
 class LegacyFileUpdateFailed(exceptions.APIException):
     status_code = status.HTTP_409_CONFLICT
 
@@ -35,22 +52,13 @@ def get_v2_request_settings():
     return host, headers
 
 
-@receiver(sync_files)
-def handle_sync_files(sender, actions: List[dict], **kwargs):
-    if not settings.METAX_V2_INTEGRATION_ENABLED:
-        return
-
-    to_legacy = []
-    files_without_legacy_ids = {}
-    for file_action in actions:
-        file: File = file_action["object"]
-        if file.legacy_id is None:
-            files_without_legacy_ids[(file.storage_service, file.storage_identifier)] = file
-        to_legacy.append(file.to_legacy_sync())
-
+def post_files_to_v2(to_legacy: List[dict]) -> List[dict]:
+    """Send files in legacy sync format to V2. Returns synced V2 files."""
     host, headers = get_v2_request_settings()
     body = json.dumps(to_legacy, cls=DjangoJSONEncoder)
-    res = requests.post(url=f"{host}/files/sync_from_v3", data=body, headers=headers)
+    res = get_integration_client("metax_v2").post(
+        url=f"{host}/files/sync_from_v3", data=body, headers=headers
+    )
     if res.status_code in {200, 201}:
         logger.info(f"Synced {len(to_legacy)} files to V2")
     else:
@@ -58,9 +66,16 @@ def handle_sync_files(sender, actions: List[dict], **kwargs):
             f"Syncing files to V2 failed: {res.status_code=}:\n  {res.content=}, \n  {res.headers=}"
         )
         raise LegacyFileUpdateFailed("Failed to sync files to Metax V2")
+    return res.json()
+
+
+def assign_legacy_ids(files_without_legacy_ids: Dict[tuple, File], v2_files: List[dict]):
+    """Update legacy_id of files from synced V2 files.
 
+    The `files_without_legacy_ids` dict is keyed by (storage_service, storage_identifier).
+    """
     # Fill in missing legacy_ids from response data
-    for v2_file in res.json():
+    for v2_file in v2_files:
         v3_storage = settings.LEGACY_FILE_STORAGE_TO_V3_STORAGE_SERVICE[v2_file["file_storage"]]
         if file := files_without_legacy_ids.get((v3_storage, v2_file["identifier"])):
             file.legacy_id = v2_file["id"]
@@ -72,3 +87,22 @@ def handle_sync_files(sender, actions: List[dict], **kwargs):
     # Update legacy_id values for files that didn't have one yet
     files_with_new_legacy_ids = [f for f in files_without_legacy_ids.values() if f.legacy_id]
     File.all_objects.bulk_update(files_with_new_legacy_ids, fields=["legacy_id"], batch_size=2000)
+
+
+@receiver(sync_files)
+def handle_sync_files(sender, actions: List[dict], **kwargs):
+    if not settings.METAX_V2_INTEGRATION_ENABLED:
+        return
+    if settings.METAX_V2_SYNC_MODE == "outbox":
+        return  # Files are added to the V2 sync outbox in apps.core.signals
+
+    to_legacy = []
+    files_without_legacy_ids = {}
+    for file_action in actions:
+        file: File = file_action["object"]
+        if file.legacy_id is None:
+            files_without_legacy_ids[(file.storage_service, file.storage_identifier)] = file
+        to_legacy.append(file.to_legacy_sync())
+
+    v2_files = post_files_to_v2(to_legacy)
+    assign_legacy_ids(files_without_legacy_ids, v2_files)
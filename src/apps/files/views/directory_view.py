@@ -10,11 +10,18 @@ from django.db.models import CharField, Count, F, Max, Min, Sum, Value
 from django.db.models.functions import Concat
 from drf_yasg.utils import swagger_auto_schema
 from rest_access_policy import AccessViewSetMixin
-from rest_framework import fields, serializers, viewsets
+from rest_framework import exceptions, fields, serializers, viewsets
 from rest_framework.response import Response
 
 from apps.common.helpers import cachalot_toggle, get_attr_or_item
+from apps.common.pagination import (
+    decode_cursor,
+    encode_cursor,
+    estimate_count,
+    filter_after_keyset,
+)
 from apps.common.views import QueryParamsMixin
+from apps.files.cache import file_storage_cache
 from apps.files.functions import SplitPart
 from apps.files.helpers import (
     get_directory_metadata_model,
@@ -22,7 +29,7 @@ from apps.files.helpers import (
     remove_query_param,
     replace_query_param,
 )
-from apps.files.models.file import File, FileStorage
+from apps.files.models import Directory, File, FileStorage
 from apps.files.permissions import DirectoriesAccessPolicy
 from apps.files.serializers.directory_serializer import (
     DirectoryFileSerializer,
@@ -83,6 +90,31 @@ class DirectoryCommonQueryParams(serializers.Serializer):
     pagination = fields.BooleanField(default=True)
     offset = fields.IntegerField(default=0)
     limit = fields.IntegerField(default=100)
+    cursor_pagination = fields.BooleanField(
+        default=False,
+        help_text=(
+            "Use cursor pagination. Directories are ordered by name and files by filename. "
+            "Offset and custom orderings are not supported."
+        ),
+    )
+    cursor = fields.CharField(default=None, help_text="Cursor value for cursor pagination.")
+    count = fields.ChoiceField(
+        choices=["none", "estimate", "exact"],
+        default="none",
+        help_text="Count mode for cursor pagination.",
+    )
+
+    def validate(self, data):
+        data = super().validate(data)
+        if data["cursor_pagination"]:
+            for field in ["directory_ordering", "file_ordering"]:
+                if data[field]:
+                    raise serializers.ValidationError(
+                        {field: "Custom ordering is not supported with cursor pagination."}
+                    )
+            if data["cursor"]:
+                data["cursor"] = decode_cursor(data["cursor"])
+        return data
 
 
 class DirectoryQueryParams(DirectoryCommonQueryParams):
@@ -106,6 +138,7 @@ class DirectoryQueryParams(DirectoryCommonQueryParams):
     )
 
     def validate(self, data):
+        data = super().validate(data)
         if data["include_all"] and data["exclude_dataset"]:
             raise serializers.ValidationError(
                 {
@@ -122,16 +155,23 @@ class DirectoryQueryParams(DirectoryCommonQueryParams):
 
     def to_internal_value(self, data):
         value = super().to_internal_value(data)
-        value["storage_id"] = FileStorage.objects.get_for_object(value).id
+        FileStorage.validate_object(value)
+        try:
+            storage = file_storage_cache.get(
+                storage_service=value["storage_service"], csc_project=value["csc_project"]
+            )
+        except FileStorage.DoesNotExist:
+            raise exceptions.NotFound()
+        value["storage_id"] = storage.id
         return value
 
 
 class DirectoryViewSet(QueryParamsMixin, AccessViewSetMixin, viewsets.ViewSet):
     """API for browsing directories of a storage project.
 
-    Directories are transient and do not have a model of their own.
-    Instead, they are generated dynamically from files that match
-    the requested path."""
+    Directory statistics for a storage project are read from the Directory model.
+    When the listing is limited to files of a dataset, directories are instead
+    generated dynamically from files that match the requested path."""
 
     access_policy = DirectoriesAccessPolicy
 
@@ -141,6 +181,7 @@ class DirectoryViewSet(QueryParamsMixin, AccessViewSetMixin, viewsets.ViewSet):
             "class": DirectoryQueryParams,
         }
     ]
+    query_budgets = {"list": 20}  # see RequestProfilingMiddleware
 
     def get_project_files(self, params):
         """Get relevant project files."""
@@ -190,9 +231,38 @@ class DirectoryViewSet(QueryParamsMixin, AccessViewSetMixin, viewsets.ViewSet):
         # retrieve only requested fields
         files = self.annotate_file_property_fields(params, files)
         if file_fields := params["file_fields"]:
-            files = files.values(*file_fields, "id", storage_service=F("storage__storage_service"))
+            # id and filename are needed for pagination, serializer hides fields not in file_fields
+            files = files.values(
+                *file_fields, "id", "filename", storage_service=F("storage__storage_service")
+            )
+
+        return files.order_by(*params["file_ordering"], "filename", "id")
 
-        return files.order_by(*params["file_ordering"], "filename")
+    def use_stored_directories(self, params) -> bool:
+        """Return True if directory statistics are not limited by dataset.
+
+        Stored Directory objects have statistics for all files in the
+        storage project, so they can be used only when the files are not
+        filtered by dataset."""
+        if params["dataset"]:
+            return params["include_all"] and not params["exclude_dataset"]
+        return True
+
+    def get_stored_directories(self, params):
+        """Get subdirectory data for path from stored Directory objects."""
+        return (
+            Directory.objects.filter(storage_id=params["storage_id"], parent_path=params["path"])
+            .values("name", "pathname", *Directory.aggregated_fields)
+            .order_by(*params["directory_ordering"], "name")
+        )
+
+    def get_stored_directory(self, params):
+        """Get data for directory being viewed from stored Directory objects."""
+        return (
+            Directory.objects.filter(storage_id=params["storage_id"], pathname=params["path"])
+            .values(*Directory.aggregated_fields)
+            .first()
+        )
 
     def get_directories(self, params):
         """Get directory and subdirectory data for path.
@@ -269,6 +339,70 @@ class DirectoryViewSet(QueryParamsMixin, AccessViewSetMixin, viewsets.ViewSet):
             "has_more": has_more,
         }
 
+    def paginate_cursor(self, params, subdirectories, files):
+        """Paginate directories and files together using keyset pagination.
+
+        Cursor values are ["d", name] when the previous page ended with a directory,
+        ["f", filename, id] when it ended with a file, and ["f"] when there are no
+        more directories and files should be listed from the beginning.
+        """
+        limit = params["limit"]
+        phase, *key = params["cursor"] or ["d"]
+        if (phase, len(key)) not in {("d", 0), ("d", 1), ("f", 0), ("f", 2)}:
+            raise serializers.ValidationError({"cursor": "Invalid cursor."})
+
+        count = None
+        if params["count"] == "exact":
+            count = subdirectories.count() + files.count()
+        elif params["count"] == "estimate":
+            count = estimate_count(subdirectories) + estimate_count(files)
+
+        # Fetch one extra item to determine if there is a next page
+        paginated_dirs = []
+        if phase == "d":
+            if key:
+                subdirectories = subdirectories.filter(name__gt=key[0])
+            paginated_dirs = list(subdirectories[: limit + 1])
+            if len(paginated_dirs) > limit:
+                paginated_dirs = paginated_dirs[:limit]
+                return {
+                    "count": count,
+                    "directories": paginated_dirs,
+                    "files": [],
+                    "next_cursor": ["d", paginated_dirs[-1]["name"]],
+                }
+        elif key:
+            files = filter_after_keyset(files, ["filename", "id"], key)
+
+        file_limit = limit - len(paginated_dirs)
+        paginated_files = list(files[: file_limit + 1])
+        next_cursor = None
+        if len(paginated_files) > file_limit:
+            paginated_files = paginated_files[:file_limit]
+            next_cursor = ["f"]
+            if paginated_files:
+                last_file = paginated_files[-1]
+                next_cursor += [
+                    get_attr_or_item(last_file, "filename"),
+                    get_attr_or_item(last_file, "id"),
+                ]
+        return {
+            "count": count,
+            "directories": paginated_dirs,
+            "files": paginated_files,
+            "next_cursor": next_cursor,
+        }
+
+    def get_cursor_pagination_data(self, request, params, paginated):
+        """Get pagination links and optional count for cursor pagination response."""
+        data = {"next": None, "previous": None}
+        if paginated["count"] is not None:
+            data = {"count": paginated["count"], **data}
+        if next_cursor := paginated["next_cursor"]:
+            uri = remove_query_param(request.build_absolute_uri(), "offset")
+            data["next"] = replace_query_param(uri, "cursor", encode_cursor(next_cursor))
+        return data
+
     def get_pagination_data(self, request, params, paginated):
         """Get pagination count and links for the response."""
         data = {"count": paginated["count"], "next": None, "previous": None}
@@ -297,28 +431,34 @@ class DirectoryViewSet(QueryParamsMixin, AccessViewSetMixin, viewsets.ViewSet):
             subdirs = subdirs.exclude(file_count=F("published_file_count"))
         return subdirs
 
-    def get_parent_data(self, params, directories):
-        """Aggregate totals for parent directory."""
-        file_count = sum(d.get("file_count", 0) for d in directories)
-        published_file_count = sum(d.get("published_file_count", 0) for d in directories)
-        size = sum(d.get("size", 0) for d in directories)
-        created = min((d.get("created") for d in directories), default=None)
-        modified = max((d.get("modified") for d in directories), default=None)
+    def get_directory_totals(self, params, directories) -> dict:
+        """Aggregate totals for directory being viewed from its subdirectories and files."""
+        return {
+            "file_count": sum(d.get("file_count", 0) for d in directories),
+            "published_file_count": sum(d.get("published_file_count", 0) for d in directories),
+            "size": sum(d.get("size", 0) for d in directories),
+            "created": min((d.get("created") for d in directories), default=None),
+            "modified": max((d.get("modified") for d in directories), default=None),
+        }
+
+    def get_parent_data(self, params, totals: dict):
+        """Return data for directory being viewed."""
         return {
             "directory": {
                 "name": params["path"].split("/")[-2],
                 "pathname": params["path"],
-                "file_count": file_count,
-                "published_file_count": published_file_count,
-                "size": size,
-                "created": created,
-                "modified": modified,
+                "file_count": 0,
+                "published_file_count": 0,
+                "size": 0,
+                "created": None,
+                "modified": None,
+                **(totals or {}),
             }
         }
 
     def get_storage(self, params):
         """Return storage project common for all subdirectories and files."""
-        return FileStorage.objects.get(id=params.get("storage_id"))
+        return file_storage_cache.get(id=params.get("storage_id"))
 
     def get_dataset_metadata(self, params, matching_subdirs, files):
         """Fetch dataset-specific file/directory metadata as key-value pairs."""
@@ -356,22 +496,39 @@ class DirectoryViewSet(QueryParamsMixin, AccessViewSetMixin, viewsets.ViewSet):
         """Directory content view."""
         params = self.query_params
         with cachalot_toggle(enabled=params["pagination"]):
-            directories = self.get_directories(params)
+            if self.use_stored_directories(params):
+                directories = self.get_stored_directories(params)
+                directory_totals = self.get_stored_directory(params)
+                directory_exists = directory_totals is not None
+            else:
+                directories = self.get_directories(params)
+                directory_totals = None
+                if params.get("include_parent"):
+                    directory_totals = self.get_directory_totals(params, directories)
+                directory_exists = None  # determined later only if needed
+
             parent_data = {}
             if params.get("include_parent"):
-                parent_data = self.get_parent_data(params, directories)
+                parent_data = self.get_parent_data(params, directory_totals)
 
-            # Evaluate all subdirectories into a list so they can be
-            # counted and sliced in a single DB query.
-            matching_subdirs = list(self.get_matching_subdirectories(params, directories))
+            matching_subdirs = self.get_matching_subdirectories(params, directories)
             files = self.get_directory_files(params)
 
             pagination_data = {}
-            if params.get("pagination"):
-                paginated = self.paginate(params, matching_subdirs, files)
+            if params.get("pagination") and params["cursor_pagination"]:
+                paginated = self.paginate_cursor(params, matching_subdirs, files)
+                matching_subdirs = paginated["directories"]
+                files = paginated["files"]
+                pagination_data = self.get_cursor_pagination_data(request, params, paginated)
+            elif params.get("pagination"):
+                # Evaluate all subdirectories into a list so they can be
+                # counted and sliced in a single DB query.
+                paginated = self.paginate(params, list(matching_subdirs), files)
                 matching_subdirs = paginated["directories"]
                 files = paginated["files"]
                 pagination_data = self.get_pagination_data(request, params, paginated)
+            else:
+                matching_subdirs = list(matching_subdirs)
 
             dataset_metadata = self.get_dataset_metadata(params, matching_subdirs, files)
 
@@ -404,7 +561,9 @@ class DirectoryViewSet(QueryParamsMixin, AccessViewSetMixin, viewsets.ViewSet):
                 "directory" in results
                 and not serialized_data["directories"]
                 and not serialized_data["files"]
-                and not directories.exists()
             ):
-                del results["directory"]
+                if directory_exists is None:
+                    directory_exists = directories.exists()
+                if not directory_exists:
+                    del results["directory"]
             return Response({**pagination_data, **results})
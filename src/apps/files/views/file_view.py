@@ -10,23 +10,27 @@ from django import forms
 from django.conf import settings
 from django.contrib.postgres.aggregates import ArrayAgg
 from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import transaction
 from django.db.models import F, Q, QuerySet, Value
 from django.db.models.functions import Concat
+from django.http import StreamingHttpResponse
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from django_filters import rest_framework as filters
 from drf_yasg.utils import swagger_auto_schema
 from rest_framework import serializers
 from rest_framework.decorators import action
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
 
 from apps.common.filters import VerboseChoiceFilter
 from apps.common.helpers import cachalot_toggle, get_filter_openapi_parameters
+from apps.common.pagination import KeysetOffsetPagination
 from apps.common.serializers import DeleteListReturnValueSerializer, FlushQueryParamsSerializer
 from apps.common.serializers.serializers import IncludeRemovedQueryParamsSerializer
 from apps.common.views import CommonModelViewSet
 from apps.files.helpers import get_file_metadata_model
-from apps.files.models.file import File
+from apps.files.models import Directory, File
 from apps.files.permissions import FilesAccessPolicy
 from apps.files.serializers import FileSerializer
 from apps.files.serializers.fields import StorageServiceField
@@ -34,6 +38,7 @@ from apps.files.serializers.file_bulk_serializer import (
     BulkAction,
     FileBulkReturnValueSerializer,
     FileBulkSerializer,
+    iter_ndjson_chunks,
 )
 from apps.files.serializers.legacy_files_serializer import LegacyFilesSerializer
 from apps.files.signals import pre_files_deleted, sync_files
@@ -105,11 +110,16 @@ class FilesDatasetsBodySerializer(serializers.ListSerializer):
     child = serializers.CharField()
 
 
+class FilePagination(KeysetOffsetPagination):
+    keyset_fields = ["directory_path", "filename", "id"]
+
+
 class BaseFileViewSet(CommonModelViewSet):
     """Basic read-only files view."""
 
     serializer_class = FileSerializer
     filterset_class = FileFilterSet
+    pagination_class = FilePagination
     http_method_names = ["get"]
     queryset = File.available_objects.prefetch_related("storage")
     queryset_include_removed = File.all_objects.prefetch_related("storage")
@@ -185,6 +195,18 @@ class FileBulkQuerySerializer(serializers.Serializer):
     )
 
 
+class FileBulkStreamQuerySerializer(FileBulkQuerySerializer):
+    action = serializers.ChoiceField(
+        choices=[a.value for a in BulkAction], help_text=_("Action performed on files.")
+    )
+    chunk_size = serializers.IntegerField(
+        default=1000,
+        min_value=1,
+        max_value=10000,
+        help_text=_("Number of lines validated and committed at a time."),
+    )
+
+
 bulk_response_schemas = {
     200: FileBulkReturnValueSerializer(),
     207: FileBulkReturnValueSerializer(),
@@ -206,8 +228,10 @@ class FileViewSet(BaseFileViewSet):
             "class": FileBulkQuerySerializer,
             "actions": ["post_many", "patch_many", "put_many", "delete_many"],
         },
+        {"class": FileBulkStreamQuerySerializer, "actions": ["bulk_stream"]},
         {"class": FlushQueryParamsSerializer, "actions": ["destroy_list"]},
     ]
+    query_budgets = {"list": 15, "retrieve": 10}  # see RequestProfilingMiddleware
 
     @property
     def filterset_class(self):
@@ -335,6 +359,46 @@ class FileViewSet(BaseFileViewSet):
     def delete_many(self, request):
         return self.bulk_action(request.data, action=BulkAction.DELETE)
 
+    @swagger_auto_schema(responses={200: FileBulkReturnValueSerializer()})
+    @action(detail=False, methods=["post"], url_path="bulk-stream")
+    def bulk_stream(self, request):
+        """Insert, update, upsert or delete files from newline-delimited JSON.
+
+        The request body should contain one file object per line. The lines are
+        read, validated and committed in chunks of `chunk_size` files, so the
+        number of files in a request is not limited by memory.
+
+        The response is newline-delimited JSON with one object per chunk
+        in the same format as in `post-many`, with the chunk index in `chunk`.
+        Invalid JSON lines are reported in `failed` by their line number.
+        A chunk with errors is not committed unless `ignore_errors` is enabled,
+        but the remaining chunks are still processed.
+        """
+        params = self.query_params
+        chunks = iter_ndjson_chunks(request._request, chunk_size=params["chunk_size"])
+        results = self.stream_bulk_chunks(
+            chunks, action=BulkAction(params["action"]), ignore_errors=params["ignore_errors"]
+        )
+        return StreamingHttpResponse(results, content_type="application/x-ndjson")
+
+    def stream_bulk_chunks(self, chunks, action: BulkAction, ignore_errors: bool):
+        storages_by_key = {}  # FileStorage lookups are shared by all chunks
+        for index, (files, invalid_lines) in enumerate(chunks):
+            with transaction.atomic():
+                serializer = FileBulkSerializer(
+                    data=files,
+                    action=action,
+                    ignore_errors=ignore_errors,
+                    storages_by_key=storages_by_key,
+                )
+                serializer.failed.extend(invalid_lines)
+                serializer.is_valid(raise_exception=True)
+                serializer.save()
+                if serializer.instance:
+                    sync_files.send(sender=File, actions=serializer.instance)
+                data = {"chunk": index, **serializer.data}
+            yield JSONRenderer().render(data) + b"\n"
+
     @swagger_auto_schema(
         operation_id="v3_files_delete_list",
         manual_parameters=get_filter_openapi_parameters(FileDeleteListFilterSet),
@@ -360,13 +424,15 @@ class FileViewSet(BaseFileViewSet):
 
         count = queryset.count()
         if count > 0:
-            pre_files_deleted.send(sender=File, queryset=queryset)
+            pre_files_deleted.send(sender=File, queryset=queryset, flush=flush)
             files_to_sync = None
             if not request.user.is_v2_migration:
                 # Collect files before they are potentially deleted from DB
                 files_to_sync = list(queryset.all())
 
+            directory_keys = Directory.objects.get_keys(queryset)
             queryset.delete()
+            Directory.objects.refresh(directory_keys)
             if files_to_sync:
                 # Sync removals to V2.
                 # Flush is not currently implemented in sync,
@@ -1,7 +1,19 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_delete, post_save
 
 
 class ReferenceDataConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.refdata"
     verbose_name = "reference data"
+
+    def ready(self):
+        # Connect signal handlers
+        from apps.refdata.models import AbstractConcept
+        from apps.refdata.signals import invalidate_concept_cache
+
+        # Signals are sent with the proxy model as sender, e.g. by proxies in apps.core
+        for model in self.apps.get_models():
+            if issubclass(model, AbstractConcept):
+                post_save.connect(invalidate_concept_cache, sender=model)
+                post_delete.connect(invalidate_concept_cache, sender=model)
@@ -0,0 +1,147 @@
+# This file is part of the Metax API service
+#
+# Copyright 2017-2024 Ministry of Education and Culture, Finland
+#
+# :author: CSC - IT Center for Science Ltd., Espoo Finland <servicedesk@csc.fi>
+# :license: MIT
+
+import logging
+import time
+from typing import Callable, Dict, Iterable, Optional, Type
+
+from django.conf import settings
+from django.core.cache import caches
+
+from apps.common.cache import get_generation_token, invalidate_generation
+
+logger = logging.getLogger(__name__)
+
+
+class ConceptCache:
+    """Process-wide cache of reference data concepts.
+
+    Field values of available (not removed) concepts are cached in process
+    memory by (model, url), and serialized representations by (serializer, id).
+    Reference data changes only when it is imported or edited, so instead of
+    invalidating individual entries all processes share a version stamp, which
+    is a generation token in the shared Django cache (see apps.common.cache).
+    The stamp is replaced on changes and the local caches are cleared when a
+    process notices the stamp has changed. The stamp is read from the shared
+    cache at most once per REFERENCE_DATA_CACHE_VERSION_CHECK_INTERVAL seconds.
+    Local caches are also cleared every REFERENCE_DATA_LOCAL_CACHE_TIMEOUT
+    seconds, which limits how long changes made without invalidation are missed.
+
+    Concepts that are not found are not cached, so creating concepts
+    does not require a new version.
+
+    The cache is enabled by default only when Memcached is used as the shared cache.
+    """
+
+    version_key = "reference-data:version"
+
+    def __init__(self):
+        self.local = {}  # field values by (model label, url)
+        self.representations = {}  # representations by (serializer class, options, id)
+        self._version: Optional[str] = None
+        self._version_checked = 0.0
+        self._local_cleared = 0.0
+
+    @property
+    def cache(self):
+        return caches[settings.REFERENCE_DATA_CACHE_ALIAS]
+
+    @property
+    def enabled(self) -> bool:
+        return settings.REFERENCE_DATA_CACHE_ENABLED
+
+    def _clear_local(self):
+        self.local.clear()
+        self.representations.clear()
+        self._local_cleared = time.monotonic()
+
+    def _reset(self):
+        self._version = None
+        self._clear_local()
+
+    def get_version(self) -> Optional[str]:
+        """Return current version stamp, or None if caching is not available."""
+        if not self.enabled:
+            return None
+        now = time.monotonic()
+        if now - self._local_cleared >= settings.REFERENCE_DATA_LOCAL_CACHE_TIMEOUT:
+            self._clear_local()
+        interval = settings.REFERENCE_DATA_CACHE_VERSION_CHECK_INTERVAL
+        if self._version is not None and now - self._version_checked < interval:
+            return self._version
+
+        version = get_generation_token(self.cache, self.version_key)
+        if version != self._version:
+            self._clear_local()
+        self._version = version
+        self._version_checked = now
+        return version
+
+    def _to_values(self, instance) -> dict:
+        return {
+            field.attname: getattr(instance, field.attname)
+            for field in instance._meta.concrete_fields
+        }
+
+    def _from_values(self, model, values: dict):
+        return model.from_db("default", list(values), list(values.values()))
+
+    def get_many(self, model: Type, urls: Iterable[str]) -> Dict[str, object]:
+        """Return available concepts of model by url. Missing urls are omitted.
+
+        A new instance is returned for each concept so callers may modify them.
+        """
+        urls = set(urls)
+        if self.get_version() is None:
+            return {entry.url: entry for entry in model.available_objects.filter(url__in=urls)}
+
+        label = model._meta.label
+        found = {}
+        missing = []
+        for url in urls:
+            if values := self.local.get((label, url)):
+                found[url] = self._from_values(model, values)
+            else:
+                missing.append(url)
+
+        if missing:
+            if len(self.local) + len(missing) > settings.REFERENCE_DATA_LOCAL_CACHE_SIZE:
+                self.local.clear()
+            for entry in model.available_objects.filter(url__in=missing):
+                self.local[(label, entry.url)] = self._to_values(entry)
+                found[entry.url] = entry
+        return found
+
+    def get_representation(self, serializer, instance, render: Callable[[], dict]) -> dict:
+        """Return memoized representation of a concept, or render it with `render`.
+
+        Representations may only depend on the concept fields and the `include_nulls`
+        context option, so they should not contain any related objects.
+        """
+        if getattr(instance, "pk", None) is None or instance._state.adding:
+            return render()  # not a saved concept
+        if self.get_version() is None:
+            return render()
+
+        key = (type(serializer), bool(serializer.context.get("include_nulls")), instance.pk)
+        rep = self.representations.get(key)
+        if rep is None:
+            if len(self.representations) >= settings.REFERENCE_DATA_LOCAL_CACHE_SIZE:
+                self.representations.clear()
+            rep = render()
+            self.representations[key] = rep
+        # Copy nested values so modifying the result does not change the cached value
+        return {k: v.copy() if isinstance(v, (dict, list)) else v for k, v in rep.items()}
+
+    def invalidate(self):
+        """Replace version stamp so all processes discard their cached concepts."""
+        if not self.enabled:
+            return
+        invalidate_generation(self.cache, self.version_key, on_change=self._reset)
+
+
+concept_cache = ConceptCache()
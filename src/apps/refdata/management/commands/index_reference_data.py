@@ -15,6 +15,11 @@ class Command(BaseCommand):
             nargs="*",
             help=f"List of reference data types to index. If omitted, index all types. Available: {self.type_choices}",
         )
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Import remote reference data even if it has not changed since last import",
+        )
 
     def handle(self, *args, **options):
         types = options["types"] or self.type_choices
@@ -26,4 +31,4 @@ class Command(BaseCommand):
         if len(unknown) != 0:
             raise CommandError(f"Unknown types: {sorted(unknown)}, available: {self.type_choices}")
 
-        return indexer.index(types=types)
+        return indexer.index(types=types, force=options["force"])
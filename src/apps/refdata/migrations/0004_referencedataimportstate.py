@@ -0,0 +1,28 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("refdata", "0003_remove_fieldofscience_is_essential_choice_and_more"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ReferenceDataImportState",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+                    ),
+                ),
+                ("data_type", models.CharField(max_length=255, unique=True)),
+                ("source", models.URLField(max_length=512)),
+                ("etag", models.CharField(blank=True, default="", max_length=512)),
+                ("last_modified", models.CharField(blank=True, default="", max_length=64)),
+                ("content_hash", models.CharField(blank=True, default="", max_length=64)),
+                ("imported", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -198,3 +198,20 @@ reference_data_models = [
     RestrictionGrounds,
     UseCategory,
 ]
+
+
+class ReferenceDataImportState(models.Model):
+    """Validators of the last successfully imported remote reference data source.
+
+    Used for conditional requests so unchanged sources are not imported again.
+    """
+
+    data_type = models.CharField(max_length=255, unique=True)
+    source = models.URLField(max_length=512)
+    etag = models.CharField(max_length=512, blank=True, default="")
+    last_modified = models.CharField(max_length=64, blank=True, default="")
+    content_hash = models.CharField(max_length=64, blank=True, default="")
+    imported = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.data_type}: {self.source}"
@@ -1,6 +1,7 @@
 from django.utils.translation import gettext as _
 
 from apps.common.serializers.serializers import CommonModelSerializer
+from apps.refdata.cache import concept_cache
 
 
 class BaseRefdataSerializer(CommonModelSerializer):
@@ -17,6 +18,14 @@ class BaseRefdataSerializer(CommonModelSerializer):
         return fields
 
     def to_representation(self, instance):
+        if self.omit_related:
+            # Without related concepts the representation only depends on the concept itself
+            return concept_cache.get_representation(
+                self, instance, lambda: self._to_representation(instance)
+            )
+        return self._to_representation(instance)
+
+    def _to_representation(self, instance):
         rep = super().to_representation(instance)
         if len(rep["pref_label"].keys()) > 4:
             rep["pref_label"] = {
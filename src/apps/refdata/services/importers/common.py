@@ -4,9 +4,11 @@ from typing import Protocol
 
 from django.conf import settings
 from django.db import transaction
+from django.db.models import Q
 from django.utils import timezone
 
 from apps.common.helpers import cachalot_toggle
+from apps.refdata.cache import concept_cache
 
 _logger = logging.getLogger(__name__)
 
@@ -142,36 +144,58 @@ class BaseDataImporter(ReferenceDataImporterInterface):
         }
 
     def create_relationships(self, data, objects_by_url):
-        """Create hierarchical relationships between objects."""
-        # Clear any previously existing parent and child relations for data.
+        """Create hierarchical relationships between objects.
+
+        Only relations that have changed are deleted or created.
+        """
         # Use auto-created through model to change relations directly in bulk.
-        objs = [objects_by_url.get(data_item["url"]) for data_item in data]
         through_model = self.model.broader.through
         from_field = self.model.broader.field.m2m_field_name()
         to_field = self.model.broader.field.m2m_reverse_field_name()
-        through_model.objects.filter(**{f"{to_field}__in": objs}).delete()
-        through_model.objects.filter(**{f"{from_field}__in": objs}).delete()
+        from_attname = f"{from_field}_id"
+        to_attname = f"{to_field}_id"
 
-        # Set parent relations, which will also assign parents' children
-        relations = []  # Collect and update m2m relations in bulk
+        # Parent relations in data, which will also assign parents' children
+        new_relations = set()
         for data_item in data:
             obj = objects_by_url.get(data_item["url"])
-            broader = [
-                objects_by_url[parent_url]
+            new_relations.update(
+                (obj.id, objects_by_url[parent_url].id)
                 for parent_url in data_item.get("broader", [])
                 if parent_url in objects_by_url
-            ]
-            if len(broader) > 0:
-                relations.extend(
-                    (through_model(**{from_field: obj, to_field: parent}) for parent in broader)
-                )
-        through_model.objects.bulk_create(relations, batch_size=1000)
+            )
+
+        # Existing parent and child relations of objects in data
+        ids = [objects_by_url[data_item["url"]].id for data_item in data]
+        existing = through_model.objects.filter(
+            Q(**{f"{from_attname}__in": ids}) | Q(**{f"{to_attname}__in": ids})
+        ).values_list("id", from_attname, to_attname)
+        removed_ids = []
+        for relation_id, from_id, to_id in existing:
+            relation = (from_id, to_id)
+            if relation in new_relations:
+                new_relations.remove(relation)  # already exists
+            else:
+                removed_ids.append(relation_id)
+
+        through_model.objects.filter(id__in=removed_ids).delete()
+        through_model.objects.bulk_create(
+            [
+                through_model(**{from_attname: from_id, to_attname: to_id})
+                for from_id, to_id in new_relations
+            ],
+            batch_size=1000,
+        )
+        _logger.info(
+            f"Removed {len(removed_ids)} and added {len(new_relations)} hierarchy relations"
+        )
 
     @transaction.atomic
     def save(self, data):
         objects_by_url = self.get_existing_objects_by_url()
         counts = self.create_or_update_objects(data, objects_by_url)
         self.create_relationships(data, objects_by_url)
+        concept_cache.invalidate()
         _logger.info(f"Created {counts['new']} new objects")
         _logger.info(f"Updated {counts['updated']} existing objects")
         _logger.info(f"Left {counts['unchanged']} existing objects unchanged")
@@ -1,20 +1,45 @@
+import hashlib
 import logging
 from time import sleep
+from typing import Optional
 
-import requests
+from django.db import transaction
 from django.utils import timezone
 from rdflib import RDF, Graph
 from rdflib.namespace import OWL, SKOS, Namespace
 
+from apps.common.http_client import get_integration_client
+from apps.refdata.models import ReferenceDataImportState
 from apps.refdata.services.importers.common import BaseDataImporter
 
 _logger = logging.getLogger(__name__)
 
 
 class RemoteRDFReferenceDataImporter(BaseDataImporter):
-    """Generic class for importing reference data from remote url."""
-
-    def fetch(self, sleep_time=1, num_retries=7, exp_backoff_multiplier=1.5):
+    """Generic class for importing reference data from remote url.
+
+    Validators (ETag, Last-Modified, content hash) of the last imported data are stored
+    in ReferenceDataImportState and used to skip importing data that has not changed.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.new_import_state: Optional[dict] = None  # stored after data is saved
+
+    def get_import_state(self) -> Optional[ReferenceDataImportState]:
+        return ReferenceDataImportState.objects.filter(
+            data_type=self.data_type, source=self.source
+        ).first()
+
+    def get_conditional_headers(self, state: Optional[ReferenceDataImportState]) -> dict:
+        headers = {}
+        if state and state.etag:
+            headers["If-None-Match"] = state.etag
+        if state and state.last_modified:
+            headers["If-Modified-Since"] = state.last_modified
+        return headers
+
+    def fetch(self, sleep_time=1, num_retries=7, exp_backoff_multiplier=1.5, headers=None):
         error = None
         for _ in range(num_retries):
             if error:
@@ -23,7 +48,10 @@ class RemoteRDFReferenceDataImporter(BaseDataImporter):
 
             try:
                 _logger.info(f"Fetching data from url {self.source}")
-                response = requests.get(self.source)
+                # Retries are handled here with a longer backoff
+                response = get_integration_client("refdata", max_retries=0).get(
+                    self.source, headers=headers
+                )
                 response.raise_for_status()
                 return response
             except Exception as e:
@@ -59,7 +87,26 @@ class RemoteRDFReferenceDataImporter(BaseDataImporter):
         return item
 
     def get_data(self):
-        response = self.fetch()
+        state = self.get_import_state()
+        response = self.fetch(headers=self.get_conditional_headers(state))
+        if response is None:
+            return []
+        if response.status_code == 304:
+            _logger.info(f"{self.data_type} data has not been modified, skipping")
+            return []
+
+        self.new_import_state = {
+            "source": self.source,
+            "etag": response.headers.get("etag", ""),
+            "last_modified": response.headers.get("last-modified", ""),
+            "content_hash": hashlib.sha256(response.content).hexdigest(),
+        }
+        if state and state.content_hash == self.new_import_state["content_hash"]:
+            # Source does not support conditional requests or validators have changed
+            _logger.info(f"{self.data_type} data is unchanged, skipping")
+            self.store_import_state()
+            return []
+
         graph = self.parse(response)
 
         data = []
@@ -67,6 +114,17 @@ class RemoteRDFReferenceDataImporter(BaseDataImporter):
             data.append(self.data_item_from_graph_concept(graph, concept))
         return data
 
+    def store_import_state(self):
+        if self.new_import_state:
+            ReferenceDataImportState.objects.update_or_create(
+                data_type=self.data_type, defaults=self.new_import_state
+            )
+
+    @transaction.atomic
+    def save(self, data):
+        super().save(data)
+        self.store_import_state()
+
 
 class FintoImporter(RemoteRDFReferenceDataImporter):
     """Service for retrieving reference data from Finto."""
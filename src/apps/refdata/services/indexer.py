@@ -1,16 +1,32 @@
+from concurrent.futures import ThreadPoolExecutor
+
 from django.apps import apps
 from django.conf import settings
+from django.db import connections
 
+from apps.refdata.models import ReferenceDataImportState
 from apps.refdata.services.importers.local import (
     LocalJSONFileFormatVersionImporter,
     LocalJSONImporter,
     LocalJSONLicenseImporter,
 )
 from apps.refdata.services.importers.rdf import FintoImporter, FintoLocationImporter
+from apps.refdata.signals import reference_data_indexed
+
+
+def load_in_thread(importer):
+    try:
+        importer.load()
+    finally:
+        connections.close_all()  # Close connections of the worker thread
+
 
+def index(types=None, force=False):
+    """Import reference data to db.
 
-def index(types=None):
-    """Import reference data to db."""
+    Importers of different types are independent and run in parallel.
+    Remote sources that have not changed since last import are skipped unless `force` is set.
+    """
     importers = {
         "Finto": FintoImporter,
         "FintoLocation": FintoLocationImporter,
@@ -32,5 +48,20 @@ def index(types=None):
         scheme = conf.get("scheme")
         reference_data_sources[typ] = importer(model=model, source=source, scheme=scheme)
 
-    for typ in types:
-        reference_data_sources[typ].load()
+    if force:
+        ReferenceDataImportState.objects.filter(
+            data_type__in=[source.data_type for source in reference_data_sources.values()]
+        ).delete()
+
+    workers = settings.REFERENCE_DATA_IMPORT_WORKERS
+    if workers > 1:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            # list() raises exceptions from workers
+            list(executor.map(load_in_thread, reference_data_sources.values()))
+    else:
+        for importer in reference_data_sources.values():
+            importer.load()
+
+    reference_data_indexed.send(
+        sender=index, models=[source.model for source in reference_data_sources.values()]
+    )
@@ -0,0 +1,11 @@
+from django.dispatch import Signal
+
+from apps.refdata.cache import concept_cache
+
+# Sent after reference data has been imported, imported models provided in `models` argument
+reference_data_indexed = Signal()
+
+
+def invalidate_concept_cache(sender, instance, created=False, **kwargs):
+    if not created:  # new concepts are not in cache
+        concept_cache.invalidate()
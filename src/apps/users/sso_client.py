@@ -1,10 +1,10 @@
 import logging
 from typing import Tuple
 
-import requests
 from django.conf import settings
 from django.utils import timezone
 
+from apps.common.http_client import get_integration_client
 from apps.users.models import MetaxUser
 
 _logger = logging.getLogger(__name__)
@@ -32,7 +32,8 @@ class SSOClient:
             "token": self.trusted_service_token,
         }
         url = f"{self.host}/user_status"
-        res = requests.post(url, payload)
+        # Fetching user status does not modify anything, so it can be retried
+        res = get_integration_client("sso").post(url, payload, idempotent=True)
         if res.status_code != 200:
             _logger.warning(f"Failed to get user data from {url}: {res.text} ")
             return None
@@ -82,7 +82,6 @@ THIRD_PARTY_APPS = [
     "watchman",
     "polymorphic",
     "corsheaders",
-    "watson",
     "cachalot",
     "hijack",
     "hijack.contrib.admin",
@@ -104,6 +103,8 @@ INSTALLED_APPS = LOCAL_APPS + DEFAULT_APPS + THIRD_PARTY_APPS
 
 
 MIDDLEWARE = [
+    "apps.common.middleware.RequestProfilingMiddleware",
+    "apps.files.middleware.FileStorageCacheMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "apps.users.middleware.SameOriginCookiesMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -115,7 +116,6 @@ MIDDLEWARE = [
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
     "simple_history.middleware.HistoryRequestMiddleware",
     "django.middleware.locale.LocaleMiddleware",
-    "watson.middleware.SearchContextMiddleware",
     "hijack.middleware.HijackUserMiddleware",
 ]
 
@@ -313,10 +313,19 @@ STORAGE_SERVICE_FILE_STORAGES = {
 # User groups that can see all projects in storage service
 PROJECT_STORAGE_SERVICE_USER_GROUPS = {"ida", "pas"}
 
+# Load related objects of datasets as JSON in the main query for anonymous read requests
+DATASET_JSON_PREFETCH_ENABLED = env.bool("DATASET_JSON_PREFETCH_ENABLED", True)
+
 
 # Profiling
 ENABLE_DEBUG_TOOLBAR = env.bool("ENABLE_DEBUG_TOOLBAR", True)
 ENABLE_SILK_PROFILER = env.bool("ENABLE_SILK_PROFILER", False)
+# Query count and timing of requests, exposed in Server-Timing headers and /v3/request-metrics
+ENABLE_REQUEST_PROFILING = env.bool("ENABLE_REQUEST_PROFILING", True)
+# Raise error instead of logging a warning when a view exceeds its query budget
+QUERY_BUDGETS_ENFORCED = env.bool("QUERY_BUDGETS_ENFORCED", False)
+# Bearer token for reading request metrics, if not set only superusers can read them
+REQUEST_METRICS_TOKEN = env.str("REQUEST_METRICS_TOKEN", None)
 
 # Languages
 
@@ -388,6 +397,24 @@ METAX_V2_INTEGRATION_ENABLED = env.bool("METAX_V2_INTEGRATION_ENABLED", False)
 METAX_V2_HOST = env.str("METAX_V2_HOST", None)
 METAX_V2_USER = env.str("METAX_V2_USER", None)
 METAX_V2_PASSWORD = env.str("METAX_V2_PASSWORD", None)
+# "sync" sends changes to V2 during the request, "outbox" stores them in V2SyncTask
+# to be sent by the process_v2_sync_outbox command
+METAX_V2_SYNC_MODE = env.str("METAX_V2_SYNC_MODE", "sync")
+METAX_V2_SYNC_BATCH_SIZE = env.int("METAX_V2_SYNC_BATCH_SIZE", 100)
+METAX_V2_SYNC_MAX_ATTEMPTS = env.int("METAX_V2_SYNC_MAX_ATTEMPTS", 10)
+METAX_V2_SYNC_BACKOFF_SECONDS = env.int("METAX_V2_SYNC_BACKOFF_SECONDS", 10)
+METAX_V2_SYNC_MAX_BACKOFF_SECONDS = env.int("METAX_V2_SYNC_MAX_BACKOFF_SECONDS", 60 * 60)
+
+# Outbound HTTP integrations, see apps.common.http_client
+INTEGRATION_CONNECT_TIMEOUT = env.float("INTEGRATION_CONNECT_TIMEOUT", 5)
+INTEGRATION_READ_TIMEOUT = env.float("INTEGRATION_READ_TIMEOUT", 30)
+INTEGRATION_MAX_RETRIES = env.int("INTEGRATION_MAX_RETRIES", 2)
+INTEGRATION_RETRY_BACKOFF_SECONDS = env.float("INTEGRATION_RETRY_BACKOFF_SECONDS", 0.5)
+# Retries are limited to a ratio of requests with a minimum reserve of retries
+INTEGRATION_RETRY_BUDGET_RATIO = env.float("INTEGRATION_RETRY_BUDGET_RATIO", 0.2)
+INTEGRATION_RETRY_BUDGET_MIN = env.float("INTEGRATION_RETRY_BUDGET_MIN", 10)
+INTEGRATION_CIRCUIT_FAILURE_THRESHOLD = env.int("INTEGRATION_CIRCUIT_FAILURE_THRESHOLD", 5)
+INTEGRATION_CIRCUIT_RESET_SECONDS = env.float("INTEGRATION_CIRCUIT_RESET_SECONDS", 30)
 
 # Ensure redirect v1/v2 -> v3
 USE_X_FORWARDED_HOST = True
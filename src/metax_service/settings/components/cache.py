@@ -26,3 +26,29 @@ else:
         }
     }
     CACHALOT_ENABLED = False
+
+# Cache for rendered dataset responses, see apps.core.cache
+# Invalidation needs a cache shared by processes, so it is enabled by default only with Memcached
+DATASET_RESPONSE_CACHE_ENABLED = env.bool("DATASET_RESPONSE_CACHE_ENABLED", ENABLE_MEMCACHED)
+DATASET_RESPONSE_CACHE_ALIAS = "default"
+DATASET_RESPONSE_CACHE_TIMEOUT = env.int("DATASET_RESPONSE_CACHE_TIMEOUT", 24 * 60 * 60)
+
+# Time in seconds to cache dataset aggregates for anonymous unfiltered requests, 0 disables
+DATASET_AGGREGATES_CACHE_TIMEOUT = env.int("DATASET_AGGREGATES_CACHE_TIMEOUT", 5 * 60)
+
+# Cache for FileStorage lookups, see apps.files.cache
+FILE_STORAGE_CACHE_ENABLED = env.bool("FILE_STORAGE_CACHE_ENABLED", ENABLE_MEMCACHED)
+FILE_STORAGE_CACHE_ALIAS = "default"
+FILE_STORAGE_CACHE_TIMEOUT = env.int("FILE_STORAGE_CACHE_TIMEOUT", 24 * 60 * 60)
+FILE_STORAGE_LOCAL_CACHE_SIZE = 10000  # max number of storages cached in process memory
+
+# Process-wide cache for reference data concepts, see apps.refdata.cache
+REFERENCE_DATA_CACHE_ENABLED = env.bool("REFERENCE_DATA_CACHE_ENABLED", ENABLE_MEMCACHED)
+REFERENCE_DATA_CACHE_ALIAS = "default"
+# Max time in seconds before a process notices reference data has changed in another process
+REFERENCE_DATA_CACHE_VERSION_CHECK_INTERVAL = env.int(
+    "REFERENCE_DATA_CACHE_VERSION_CHECK_INTERVAL", 10
+)
+REFERENCE_DATA_LOCAL_CACHE_SIZE = 50000  # max number of concepts cached in process memory
+# Max time in seconds concepts are kept in process memory
+REFERENCE_DATA_LOCAL_CACHE_TIMEOUT = env.int("REFERENCE_DATA_LOCAL_CACHE_TIMEOUT", 15 * 60)
@@ -131,3 +131,4 @@ REFERENCE_DATA_SOURCES = {
     **LOCAL_REFERENCE_DATA_SOURCES,
 }
 REFDATA_LANGUAGES = {"en", "fi", "sv", "und"}  # Languages to use from reference data
+REFERENCE_DATA_IMPORT_WORKERS = 4  # Number of reference data types imported in parallel
@@ -24,6 +24,7 @@ from rest_framework import permissions
 from rest_framework.authtoken import views
 from rest_framework.schemas import get_schema_view as drf_schema_view
 
+from apps.common.views import RequestMetricsView
 from apps.core.views import IndexView
 from apps.router.urls import urlpatterns as router_urls
 
@@ -58,6 +59,7 @@ urlpatterns = [
     path("v3/admin/", admin.site.urls),
     path("v3/", include(router_urls)),
     path("v3/auth/", include("users.urls")),
+    path("v3/request-metrics", RequestMetricsView.as_view(), name="request-metrics"),
     path("v3/hijack/", include("hijack.urls")),
 ]
 if settings.ENABLE_DEBUG_TOOLBAR:
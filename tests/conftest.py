@@ -23,6 +23,7 @@ from django.dispatch import receiver
 from django.test.client import Client
 from rest_framework.test import APIClient, RequestsClient
 
+from apps.common.http_client import reset_integration_clients
 from apps.core import factories
 from apps.core.models.data_catalog import DataCatalog
 from apps.core.signals import dataset_created, dataset_updated
@@ -696,6 +697,8 @@ def tweaked_settings(settings):
         "django.contrib.auth.hashers.MD5PasswordHasher",
     ]
     settings.MIDDLEWARE = [
+        "apps.common.middleware.RequestProfilingMiddleware",
+        "apps.files.middleware.FileStorageCacheMiddleware",
         "django.contrib.sessions.middleware.SessionMiddleware",
         "django.middleware.csrf.CsrfViewMiddleware",
         "django.contrib.auth.middleware.AuthenticationMiddleware",
@@ -704,11 +707,15 @@ def tweaked_settings(settings):
     ]
     settings.ENABLE_DEBUG_TOOLBAR = False
     settings.ENABLE_SILK_PROFILER = False
+    settings.ENABLE_REQUEST_PROFILING = True
+    settings.QUERY_BUDGETS_ENFORCED = True
     settings.TEMPLATE_DEBUG = False
     settings.METAX_V2_INTEGRATION_ENABLED = False
     settings.METAX_V2_HOST = "metaxv2host"
     settings.ENABLE_SSO_AUTH = False
     settings.METRICS_REPORT_URL = "https://example.com/metrics/reports/datasets.json"
+    settings.INTEGRATION_RETRY_BACKOFF_SECONDS = 0
+    reset_integration_clients()
 
 
 @pytest.fixture
@@ -102,3 +102,17 @@ def test_get_org_list_include_suborganizations(organization_tree, client):
     )
     assert resp.status_code == 200
     assert len(resp.data) == 6
+
+
+@pytest.mark.django_db
+def test_get_org_subtree(organization_tree, django_assert_max_num_queries):
+    org_1_2_3 = Organization.available_objects.get(code="1-2-3")
+    OrganizationFactory.create(parent=org_1_2_3)  # fourth level
+    org_id = Organization.available_objects.get(code="1").id
+    client = APIClient()
+    with django_assert_max_num_queries(2):
+        resp = client.get(reverse("organization-subtree", args=[org_id]))
+    assert resp.status_code == 200
+    assert get_code_trees([resp.data]) == {
+        "1": {"1-2": {"1-2-3": {"1-2-3-6": {}}, "1-2-4": {}}, "1-5": {}}
+    }
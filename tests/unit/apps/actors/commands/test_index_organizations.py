@@ -3,9 +3,12 @@ from urllib.parse import quote
 
 import pytest
 from django.core.management import call_command
+from django.db import connection
 from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
 
 from apps.actors.models import Organization
+from apps.actors.services.organization_indexer import OrganizationIndexer
 
 test_settings = {
     "ORGANIZATION_DATA_FILE": "tests/unit/apps/actors/commands/testdata/test_orgs.csv",
@@ -149,3 +152,53 @@ def test_index_organizations_deprecation():
 
     undep.refresh_from_db()
     assert undep.deprecated is None
+
+
+@pytest.mark.django_db
+@override_settings(**test_settings)
+def test_index_organizations_bulk():
+    fields = ["pref_label__en", "parent__pref_label__en", "code", "url", "in_scheme", "deprecated"]
+    call_command("index_organizations", "--cached")
+    expected_orgs = list(Organization.available_objects.order_by("code").values(*fields))
+    Organization.all_objects.all().delete()
+
+    call_command("index_organizations", "--cached", "--bulk")
+    assert list(Organization.available_objects.order_by("code").values(*fields)) == expected_orgs
+
+    # Unchanged organizations are not written again
+    aalto = Organization.available_objects.get(code="10076")
+    aalto.pref_label = {"en": "Changed"}
+    aalto.deprecated = "2022-01-02T11:22:33Z"
+    aalto.save()
+    with CaptureQueriesContext(connection) as ctx:
+        call_command("index_organizations", "--cached", "--bulk")
+    updates = [
+        q for q in ctx.captured_queries if q["sql"].startswith('UPDATE "actors_organization"')
+    ]
+    inserts = [q for q in ctx.captured_queries if q["sql"].startswith('INSERT INTO "actors_org')]
+    assert len(updates) == 1
+    assert len(inserts) == 0
+    assert list(Organization.available_objects.order_by("code").values(*fields)) == expected_orgs
+
+
+@pytest.mark.django_db
+@override_settings(**test_settings)
+def test_index_organizations_bulk_missing_parent():
+    base = test_settings["ORGANIZATION_BASE_URI"]
+    orgs_dict = {
+        f"{base}1": {"url": f"{base}1", "code": "1", "pref_label": {"en": "Main"}},
+        f"{base}1-2": {
+            "url": f"{base}1-2",
+            "code": "1-2",
+            "pref_label": {"en": "Sub"},
+            "parent": f"{base}1",
+        },
+        f"{base}3-4": {
+            "url": f"{base}3-4",
+            "code": "3-4",
+            "pref_label": {"en": "Orphan"},
+            "parent": f"{base}3",
+        },
+    }
+    OrganizationIndexer().update_orgs_bulk(orgs_dict)
+    assert sorted(Organization.available_objects.values_list("code", flat=True)) == ["1", "1-2"]
@@ -2,6 +2,7 @@ import pytest
 from django.db import IntegrityError
 
 from apps.actors.factories import OrganizationFactory
+from apps.actors.models import Organization
 
 
 def test_create_missing_organization_url():
@@ -29,3 +30,35 @@ def test_create_duplicate_organization_code():
 def test_create_organization_without_scheme():
     with pytest.raises(IntegrityError):
         OrganizationFactory.create(in_scheme="")
+
+
+def get_tree_path(org) -> list:
+    org = Organization.all_objects.get(id=org.id)
+    return [str(path_id) for path_id in org.tree_path]
+
+
+@pytest.mark.django_db
+def test_organization_tree_path():
+    root = OrganizationFactory.create()
+    child = OrganizationFactory.create(parent=root)
+    grandchild = OrganizationFactory.create(parent=child)
+    assert get_tree_path(grandchild) == [root.id, child.id, grandchild.id]
+
+    # Moving organization updates paths of its descendants
+    other_root = OrganizationFactory.create()
+    child.parent = other_root
+    child.save()
+    assert get_tree_path(grandchild) == [other_root.id, child.id, grandchild.id]
+
+    subtree = Organization.all_objects.filter(tree_path__contains=[other_root.id])
+    assert {str(org.id) for org in subtree} == {other_root.id, child.id, grandchild.id}
+
+
+@pytest.mark.django_db
+def test_organization_refresh_tree_paths():
+    root = OrganizationFactory.create()
+    child = OrganizationFactory.create(parent=root)
+    Organization.all_objects.update(tree_path=[])
+    assert Organization.refresh_tree_paths() == 2
+    assert get_tree_path(child) == [root.id, child.id]
+    assert Organization.refresh_tree_paths() == 0
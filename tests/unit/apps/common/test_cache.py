@@ -0,0 +1,33 @@
+import pytest
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+
+from apps.common.cache import get_generation_token, get_generation_tokens, invalidate_generation
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def cache():
+    cache = LocMemCache("generation-tests", {})
+    yield cache
+    cache.clear()
+
+
+def test_generation_tokens(cache):
+    first, second = get_generation_tokens(cache, ["first", "second"])
+    assert first != second
+    assert get_generation_token(cache, "first") == first
+    assert get_generation_token(DummyCache("dummy", {}), "first") is None
+
+
+def test_invalidate_generation(cache, django_capture_on_commit_callbacks):
+    token = get_generation_token(cache, "key")
+    changes = []
+    with django_capture_on_commit_callbacks(execute=True):
+        invalidate_generation(cache, "key", on_change=lambda: changes.append(cache.get("key")))
+        assert changes == [get_generation_token(cache, "key")]
+        assert changes[0] != token
+    # Replaced again on commit
+    assert len(changes) == 2
+    assert changes[1] == get_generation_token(cache, "key") != changes[0]
@@ -0,0 +1,82 @@
+import pytest
+import requests
+
+from apps.common.http_client import (
+    CircuitOpenError,
+    IntegrationClient,
+    get_integration_client,
+    integration_metrics,
+)
+
+url = "https://integration.example.com/resource"
+
+
+def test_integration_client_shared():
+    client = get_integration_client("test")
+    assert get_integration_client("test") is client
+    assert client.timeout == (5, 30)
+    assert client.session is client.session
+
+
+def test_integration_client_retry(requests_mock):
+    requests_mock.get(url, [{"status_code": 503}, {"status_code": 200, "json": {"ok": True}}])
+    res = get_integration_client("test").get(url)
+    assert res.json() == {"ok": True}
+    assert requests_mock.call_count == 2
+    assert requests_mock.last_request.timeout == (5, 30)
+    metrics = integration_metrics.render()
+    assert 'metax_integration_requests_total{integration="test",outcome="5xx"} 1' in metrics
+    assert 'metax_integration_requests_total{integration="test",outcome="2xx"} 1' in metrics
+    assert 'metax_integration_retries_total{integration="test"} 1' in metrics
+
+
+def test_integration_client_retry_connection_error(requests_mock):
+    requests_mock.put(url, exc=requests.exceptions.ConnectTimeout)
+    with pytest.raises(requests.exceptions.ConnectTimeout):
+        get_integration_client("test").put(url, data="x")
+    assert requests_mock.call_count == 3  # 2 retries
+
+
+def test_integration_client_no_retry_post(requests_mock):
+    requests_mock.post(url, status_code=503)
+    client = get_integration_client("test")
+    assert client.post(url, json={}).status_code == 503
+    assert requests_mock.call_count == 1
+    assert client.post(url, json={}, idempotent=True).status_code == 503
+    assert requests_mock.call_count == 4
+
+
+def test_integration_client_retry_budget(settings, requests_mock):
+    settings.INTEGRATION_RETRY_BUDGET_MIN = 1
+    settings.INTEGRATION_RETRY_BUDGET_RATIO = 0
+    settings.INTEGRATION_CIRCUIT_FAILURE_THRESHOLD = 100
+    requests_mock.get(url, status_code=502)
+    client = IntegrationClient("budget")
+    client.get(url)
+    assert requests_mock.call_count == 2  # budget allows only one retry
+    client.get(url)
+    assert requests_mock.call_count == 3
+
+
+def test_integration_client_circuit_breaker(settings, requests_mock):
+    settings.INTEGRATION_CIRCUIT_FAILURE_THRESHOLD = 2
+    settings.INTEGRATION_CIRCUIT_RESET_SECONDS = 10
+    requests_mock.get(url, status_code=500)
+    client = IntegrationClient("circuit")
+    client.get(url)
+    client.get(url)
+    with pytest.raises(CircuitOpenError):
+        client.get(url)
+    assert requests_mock.call_count == 2
+    assert 'metax_integration_circuit_open{integration="circuit"} 1' in (
+        integration_metrics.render()
+    )
+
+    # Allow one trial request after reset period
+    client.circuit_breaker.opened_at -= 11
+    requests_mock.get(url, status_code=200)
+    assert client.get(url).status_code == 200
+    assert not client.circuit_breaker.is_open
+    assert 'metax_integration_circuit_open{integration="circuit"} 0' in (
+        integration_metrics.render()
+    )
@@ -1,10 +1,20 @@
 import logging
+import re
 from collections import Counter
 
+import pytest
 
-from apps.common.profiling import count_queries
+from apps.common.profiling import (
+    QueryBudgetExceededError,
+    RequestProfile,
+    count_queries,
+    get_request_profile,
+    profile_section,
+    request_metrics,
+)
 from apps.core import factories
 from apps.core.models import Dataset, Provenance, Spatial
+from apps.core.views.dataset_view import DatasetViewSet
 
 
 def test_count_queries():
@@ -30,3 +40,59 @@ def test_count_queries_log(caplog):
         Dataset.objects.count()
     assert len(caplog.messages) == 1
     assert "{'total': 1, 'SQLCompiler': Counter({'total': 1, 'Dataset': 1})}" in caplog.messages[0]
+
+
+@pytest.mark.django_db
+def test_request_profile_sections():
+    profile = RequestProfile()
+    with profile.activate():
+        with profile_section("serializer"):
+            with profile_section("serializer"):  # nested sections are timed once
+                Dataset.objects.count()
+    assert profile.query_count == 1
+    assert 0 < profile.timings["db"] <= profile.timings["serializer"]
+    assert get_request_profile() is None
+
+
+@pytest.mark.django_db
+def test_request_profiling_server_timing(admin_client):
+    res = admin_client.get("/v3/datasets")
+    assert res.status_code == 200
+    timing = res.headers["Server-Timing"]
+    assert re.match(r'db;dur=[\d.]+;desc="\d+ queries", serializer;dur=[\d.]+', timing)
+    assert re.search(r"render;dur=[\d.]+, total;dur=[\d.]+$", timing)
+
+
+@pytest.mark.django_db
+def test_request_metrics(admin_client, client, settings):
+    request_metrics.clear()
+    admin_client.get("/v3/datasets")
+    res = admin_client.get("/v3/request-metrics")
+    assert res.status_code == 200
+    assert res["Content-Type"].startswith("text/plain")
+    content = res.content.decode()
+    assert 'metax_http_requests_total{view="dataset-list",method="GET",status="200"} 1' in content
+    assert 'metax_http_request_db_queries_sum{view="dataset-list"' in content
+
+    res = client.get("/v3/request-metrics")
+    assert res.status_code == 403
+
+    settings.REQUEST_METRICS_TOKEN = "secret"
+    res = client.get("/v3/request-metrics", HTTP_AUTHORIZATION="Bearer secret")
+    assert res.status_code == 200
+    res = client.get("/v3/request-metrics", HTTP_AUTHORIZATION="Bearer wrong")
+    assert res.status_code == 403
+
+
+@pytest.mark.django_db
+def test_query_budget_exceeded(admin_client, settings, monkeypatch):
+    request_metrics.clear()
+    monkeypatch.setattr(DatasetViewSet, "query_budgets", {"list": 0})
+    with pytest.raises(QueryBudgetExceededError):
+        admin_client.get("/v3/datasets")
+
+    # Only log warning when budgets are not enforced
+    settings.QUERY_BUDGETS_ENFORCED = False
+    res = admin_client.get("/v3/datasets")
+    assert res.status_code == 200
+    assert request_metrics.budget_exceeded == {("dataset-list", "GET"): 2}
@@ -3,14 +3,16 @@ from unittest.mock import ANY
 
 import pytest
 from django.contrib.auth.models import Group
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from rest_framework.reverse import reverse
 from tests.utils import assert_nested_subdict, matchers
-from watson.models import SearchEntry
 
 from apps.core import factories
 from apps.core.factories import DatasetFactory, MetadataProviderFactory
-from apps.core.models import OtherIdentifier
+from apps.core.models import DatasetSearchIndex, OtherIdentifier
 from apps.core.models.catalog_record.dataset import Dataset
+from apps.core.views.dataset_aggregation import aggregate_queryset
 from apps.files.factories import FileStorageFactory
 
 logger = logging.getLogger(__name__)
@@ -114,6 +116,44 @@ def test_aggregation_and_filters(
             assert res.data["count"] == count
 
 
+def test_aggregation_single_query(
+    admin_client,
+    dataset_a_json,
+    dataset_b_json,
+    data_catalog,
+    reference_data,
+    django_assert_num_queries,
+):
+    admin_client.post("/v3/datasets", dataset_a_json, content_type="application/json")
+    admin_client.post("/v3/datasets", dataset_b_json, content_type="application/json")
+    with django_assert_num_queries(1):
+        aggregates = aggregate_queryset(Dataset.objects.all())
+    assert aggregates["data_catalog"]["hits"] == [{"value": ANY, "count": 2}]
+    assert aggregates["keyword"]["hits"]
+
+
+def test_aggregation_cache(client, admin_client, data_catalog, reference_data, settings):
+    settings.CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+    factories.PublishedDatasetFactory(data_catalog=data_catalog)
+    res = client.get("/v3/datasets/aggregates")
+    assert res.data["data_catalog"]["hits"][0]["count"] == 1
+
+    # Anonymous unfiltered aggregates are cached
+    factories.PublishedDatasetFactory(data_catalog=data_catalog)
+    res = client.get("/v3/datasets/aggregates")
+    assert res.data["data_catalog"]["hits"][0]["count"] == 1
+
+    # Filtered and authenticated requests are not cached
+    res = client.get(f"/v3/datasets/aggregates?data_catalog__id={data_catalog.id}")
+    assert res.data["data_catalog"]["hits"][0]["count"] == 2
+    res = admin_client.get("/v3/datasets/aggregates")
+    assert res.data["data_catalog"]["hits"][0]["count"] == 2
+
+    settings.DATASET_AGGREGATES_CACHE_TIMEOUT = 0
+    res = client.get("/v3/datasets/aggregates")
+    assert res.data["data_catalog"]["hits"][0]["count"] == 2
+
+
 def test_create_dataset_invalid_catalog(admin_client, dataset_a_json):
     dataset_a_json["data_catalog"] = "urn:nbn:fi:att:data-catalog-does-not-exist"
     response = admin_client.post("/v3/datasets", dataset_a_json, content_type="application/json")
@@ -732,6 +772,41 @@ def test_dataset_expanded_catalog(admin_client, dataset_a_json, data_catalog, re
     assert isinstance(res3.data["data_catalog"], dict)
 
 
+def test_dataset_fields(admin_client, dataset_a_json, data_catalog, reference_data):
+    res = admin_client.post("/v3/datasets", dataset_a_json, content_type="application/json")
+    assert res.status_code == 201
+
+    res = admin_client.get(f"/v3/datasets/{res.data['id']}?fields=id,title,actors")
+    assert res.status_code == 200
+    assert set(res.data) == {"id", "title", "actors"}
+
+    res = admin_client.get("/v3/datasets?fields=id,title,nonexistent")
+    assert res.status_code == 400
+
+
+def test_dataset_listing_profile(admin_client, dataset_a_json, data_catalog, reference_data):
+    for _ in range(3):
+        res = admin_client.post("/v3/datasets", dataset_a_json, content_type="application/json")
+        assert res.status_code == 201
+
+    with CaptureQueriesContext(connection) as full_ctx:
+        res = admin_client.get("/v3/datasets")
+    assert res.status_code == 200
+    assert "actors" in res.data["results"][0]
+
+    with CaptureQueriesContext(connection) as listing_ctx:
+        res = admin_client.get("/v3/datasets?profile=listing")
+    assert res.status_code == 200
+    dataset = res.data["results"][0]
+    assert dataset["title"] == dataset_a_json["title"]
+    assert "actors" not in dataset
+    assert "provenance" not in dataset
+    assert len(listing_ctx.captured_queries) < len(full_ctx.captured_queries) / 2
+
+    res = admin_client.get("/v3/datasets?profile=listing&expand_catalog=true")
+    assert isinstance(res.data["results"][0]["data_catalog"], dict)
+
+
 def test_many_actors(admin_client, dataset_a_json, data_catalog, reference_data):
     org = {"organization": {"pref_label": {"en": "organization"}}}
     dataset_a_json["actors"] = [
@@ -749,13 +824,13 @@ def test_dataset_search_entry(admin_client, dataset_a_json, data_catalog, refere
     assert res.status_code == 201
     dataset_id = res.data["id"]
 
-    entry = SearchEntry.objects.get(object_id=dataset_id)
-    assert res.data["persistent_identifier"] in entry.title  # pid
-    assert "Test dataset" in entry.title  # title
-    assert "test subjects (persons)" in entry.title  # theme
-    assert "Test dataset desc" in entry.description  # description
-    assert "keyword another_keyword" in entry.description  # keywords
-    assert "doi:other_identifier" in entry.content  # entity.notation
+    document = DatasetSearchIndex.objects.get(dataset_id=dataset_id).document
+    assert res.data["persistent_identifier"] in document["A"]["simple"]  # pid
+    assert "Test dataset" in document["A"]["english"]  # title
+    assert "test subjects (persons)" in document["B"]["english"]  # theme
+    assert "Test dataset desc" in document["C"]["english"]  # description
+    assert "keyword another_keyword" in document["B"]["simple"]  # keywords
+    assert "doi:other_identifier" in document["D"]["simple"]  # entity.notation
 
 
 def test_create_dataset_with_extra_fields(
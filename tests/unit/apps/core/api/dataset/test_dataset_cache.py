@@ -0,0 +1,113 @@
+import pytest
+from django.core.cache import caches
+
+from apps.core import factories
+from apps.core.models import Dataset
+from apps.files.factories import create_project_with_files
+from apps.refdata.signals import reference_data_indexed
+
+pytestmark = [pytest.mark.django_db, pytest.mark.dataset]
+
+
+@pytest.fixture
+def locmem_cache(settings):
+    settings.CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "dataset-cache-tests",
+        }
+    }
+    settings.DATASET_RESPONSE_CACHE_ENABLED = True
+    caches["default"].clear()
+    yield caches["default"]
+    caches["default"].clear()
+
+
+@pytest.fixture
+def dataset(data_catalog, reference_data):
+    return factories.PublishedDatasetFactory(
+        data_catalog=data_catalog, title={"en": "Original title"}
+    )
+
+
+def get_title(client, dataset_id, **params):
+    res = client.get(f"/v3/datasets/{dataset_id}", params, content_type="application/json")
+    assert res.status_code == 200
+    return res.json()["title"]["en"]
+
+
+def test_dataset_cache(admin_client, dataset, locmem_cache):
+    assert get_title(admin_client, dataset.id) == "Original title"
+
+    # Update without Dataset.save does not invalidate cache
+    Dataset.objects.filter(id=dataset.id).update(title={"en": "Changed title"})
+    assert get_title(admin_client, dataset.id) == "Original title"
+
+    # Cache is not used when there are non-cacheable parameters
+    assert get_title(admin_client, dataset.id, include_metrics=True) == "Changed title"
+
+    dataset.refresh_from_db()
+    dataset.save()
+    assert get_title(admin_client, dataset.id) == "Changed title"
+
+
+def test_dataset_cache_fields(admin_client, dataset, locmem_cache):
+    res = admin_client.get(f"/v3/datasets/{dataset.id}", {"fields": "id,title"})
+    assert set(res.json()) == {"id", "title"}
+
+    # Responses with different fields are cached separately
+    res = admin_client.get(f"/v3/datasets/{dataset.id}")
+    assert "data_catalog" in res.json()
+    res = admin_client.get(f"/v3/datasets/{dataset.id}", {"profile": "listing"})
+    assert "actors" not in res.json()
+    assert "data_catalog" in res.json()
+
+
+def test_dataset_cache_disabled(admin_client, dataset, locmem_cache, settings):
+    settings.DATASET_RESPONSE_CACHE_ENABLED = False
+    assert get_title(admin_client, dataset.id) == "Original title"
+    Dataset.objects.filter(id=dataset.id).update(title={"en": "Changed title"})
+    assert get_title(admin_client, dataset.id) == "Changed title"
+
+
+def test_dataset_cache_visibility(admin_client, client, dataset, locmem_cache):
+    draft = dataset.create_new_draft()
+    res = admin_client.get(f"/v3/datasets/{dataset.id}", content_type="application/json")
+    assert res.json()["next_draft"]["id"] == str(draft.id)
+
+    # Anonymous user should not get the cached representation for editors
+    res = client.get(f"/v3/datasets/{dataset.id}", content_type="application/json")
+    assert res.status_code == 200
+    assert "next_draft" not in res.json()
+
+
+def test_dataset_cache_invalidate_versions(admin_client, dataset, locmem_cache):
+    res = admin_client.get(f"/v3/datasets/{dataset.id}", content_type="application/json")
+    assert len(res.json()["dataset_versions"]) == 1
+
+    # New version is listed in versions of the original dataset
+    dataset.create_new_version()
+    res = admin_client.get(f"/v3/datasets/{dataset.id}", content_type="application/json")
+    assert len(res.json()["dataset_versions"]) == 2
+
+
+def test_dataset_cache_invalidate_reference_data(admin_client, dataset, locmem_cache):
+    assert get_title(admin_client, dataset.id) == "Original title"
+    Dataset.objects.filter(id=dataset.id).update(title={"en": "Changed title"})
+    reference_data_indexed.send(sender=None, models=[])
+    assert get_title(admin_client, dataset.id) == "Changed title"
+
+
+def test_dataset_cache_invalidate_file_totals(admin_client, dataset, locmem_cache):
+    project = create_project_with_files(
+        file_paths=["/dir/a.txt"], file_args={"/dir/a.txt": {"size": 1}}, storage_service="ida"
+    )
+    file = project["files"]["/dir/a.txt"]
+    factories.FileSetFactory(dataset=dataset, storage=project["storage"], files=[file])
+    res = admin_client.get(f"/v3/datasets/{dataset.id}", content_type="application/json")
+    assert res.json()["fileset"]["total_files_size"] == 1
+
+    file.size = 10
+    file.save()
+    res = admin_client.get(f"/v3/datasets/{dataset.id}", content_type="application/json")
+    assert res.json()["fileset"]["total_files_size"] == 10
@@ -1,8 +1,8 @@
 import logging
 
 import pytest
-from watson.models import SearchEntry
-from watson.search import search_context_manager
+
+from apps.core.models import DatasetSearchIndex
 
 logger = logging.getLogger(__name__)
 
@@ -19,19 +19,15 @@ def test_dataset_indexing(
     service_user,
     update_request_client_auth_token,
 ):
-    """Ensure dataset that fails publish validation does not create a SearchEntry."""
+    """Ensure dataset that fails publish validation is not added to search index."""
     update_request_client_auth_token(requests_client, service_user.token)
 
     dataset_license = dataset_a_json["access_rights"].pop("license")
-    search_context_manager.start()  # emulate watson middleware
     res = requests_client.post(f"{live_server.url}/v3/datasets", json=dataset_a_json)
     assert res.status_code == 400
-    search_context_manager.end()
-    assert SearchEntry.objects.count() == 0
+    assert DatasetSearchIndex.objects.count() == 0
 
     dataset_a_json["access_rights"]["license"] = dataset_license
-    search_context_manager.start()
     res = requests_client.post(f"{live_server.url}/v3/datasets", json=dataset_a_json)
     assert res.status_code == 201
-    search_context_manager.end()
-    assert SearchEntry.objects.count() == 1
+    assert DatasetSearchIndex.objects.count() == 1
@@ -0,0 +1,61 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+pytestmark = [
+    pytest.mark.django_db,
+    pytest.mark.dataset,
+    pytest.mark.usefixtures("data_catalog", "reference_data"),
+]
+
+
+@pytest.fixture
+def maximal_dataset_id(admin_client, dataset_maximal_json, settings):
+    settings.DATASET_RESPONSE_CACHE_ENABLED = False
+    dataset_maximal_json["state"] = "published"
+    dataset_maximal_json["pid_type"] = "URN"
+    res = admin_client.post("/v3/datasets", dataset_maximal_json, content_type="application/json")
+    assert res.status_code == 201
+    dataset_id = res.data["id"]
+    res = admin_client.post(f"/v3/datasets/{dataset_id}/new-version")
+    assert res.status_code == 201
+    res = admin_client.post(
+        f"/v3/datasets/{res.data['id']}/publish", content_type="application/json"
+    )
+    assert res.status_code == 200
+    return dataset_id
+
+
+def get_with_and_without_json_prefetch(client, url, settings):
+    settings.DATASET_JSON_PREFETCH_ENABLED = False
+    with CaptureQueriesContext(connection) as prefetch_ctx:
+        expected = client.get(url)
+    assert expected.status_code == 200
+
+    settings.DATASET_JSON_PREFETCH_ENABLED = True
+    with CaptureQueriesContext(connection) as json_ctx:
+        res = client.get(url)
+    assert res.status_code == 200
+    assert res.content == expected.content
+    return len(prefetch_ctx.captured_queries), len(json_ctx.captured_queries)
+
+
+def test_dataset_json_prefetch_retrieve(client, maximal_dataset_id, settings):
+    prefetch_queries, json_queries = get_with_and_without_json_prefetch(
+        client, f"/v3/datasets/{maximal_dataset_id}", settings
+    )
+    assert json_queries < prefetch_queries / 5
+
+
+def test_dataset_json_prefetch_list(client, maximal_dataset_id, settings):
+    prefetch_queries, json_queries = get_with_and_without_json_prefetch(
+        client, "/v3/datasets", settings
+    )
+    assert json_queries < prefetch_queries / 5
+
+
+def test_dataset_json_prefetch_authenticated(admin_client, maximal_dataset_id):
+    # Authenticated users use normal prefetching
+    res = admin_client.get(f"/v3/datasets/{maximal_dataset_id}")
+    assert res.status_code == 200
+    assert "prefetch_json" not in res.data
@@ -0,0 +1,157 @@
+import pytest
+from django.core.management import call_command
+
+from apps.actors.factories import OrganizationFactory
+from apps.actors.models import Organization
+from apps.actors.signals import organizations_indexed
+from apps.core import factories
+from apps.core.models import DatasetSearchIndex
+from apps.refdata import models as refdata
+from apps.refdata.signals import reference_data_indexed
+
+pytestmark = [pytest.mark.django_db, pytest.mark.dataset]
+
+
+@pytest.fixture
+def datasets(data_catalog, reference_data, django_capture_on_commit_callbacks):
+    with django_capture_on_commit_callbacks(execute=True):
+        return {
+            "climate": factories.PublishedDatasetFactory(
+                data_catalog=data_catalog,
+                title={"en": "Climate change impacts"},
+                description={"en": "Effects on forests"},
+            ),
+            "forest": factories.PublishedDatasetFactory(
+                data_catalog=data_catalog,
+                title={"en": "Forest growth", "fi": "Metsien kasvu"},
+                description={"en": "Impacts of change in climate"},
+                keyword=["trees"],
+            ),
+        }
+
+
+def search(client, text, **params):
+    res = client.get("/v3/datasets", {"search": text, "pagination": False, **params})
+    assert res.status_code == 200
+    return [dataset["id"] for dataset in res.json()]
+
+
+def test_dataset_search_ranking(admin_client, datasets):
+    # Title match is ranked higher than description match
+    ids = search(admin_client, "climate")
+    assert ids == [str(datasets["climate"].id), str(datasets["forest"].id)]
+    ids = search(admin_client, "forest")
+    assert ids == [str(datasets["forest"].id), str(datasets["climate"].id)]
+
+
+def test_dataset_search_prefix_and_stemming(admin_client, datasets):
+    assert search(admin_client, "clim chang") == [
+        str(datasets["climate"].id),
+        str(datasets["forest"].id),
+    ]
+    assert search(admin_client, "tree") == [str(datasets["forest"].id)]
+    assert search(admin_client, "metsien") == [str(datasets["forest"].id)]
+    assert search(admin_client, "nonexistent") == []
+
+
+def test_dataset_search_phrase(admin_client, datasets):
+    assert search(admin_client, '"change impacts"') == [str(datasets["climate"].id)]
+    assert search(admin_client, '"impacts of change" forest') == [str(datasets["forest"].id)]
+
+
+def test_dataset_search_ordering(admin_client, datasets):
+    ids = search(admin_client, "climate", ordering="created")
+    assert ids == [str(datasets["climate"].id), str(datasets["forest"].id)]
+
+
+def test_dataset_search_index_rebuild(admin_client, datasets):
+    DatasetSearchIndex.objects.all().delete()
+    assert search(admin_client, "climate") == []
+    call_command("rebuild_dataset_search_index", chunk_size=1, workers=1)
+    assert DatasetSearchIndex.objects.count() == 2
+    assert len(search(admin_client, "climate")) == 2
+
+
+def test_dataset_search_index_batched_on_commit(
+    data_catalog, reference_data, django_capture_on_commit_callbacks, mocker
+):
+    update = mocker.spy(DatasetSearchIndex.objects, "update_datasets")
+    with django_capture_on_commit_callbacks(execute=True):
+        dataset = factories.PublishedDatasetFactory(data_catalog=data_catalog)
+        dataset.save()
+        assert DatasetSearchIndex.objects.count() == 0
+
+    # Pending datasets are indexed once when transaction is committed
+    assert DatasetSearchIndex.objects.count() == 1
+    assert [call.args[0] for call in update.call_args_list if call.args[0]] == [[dataset.id]]
+
+
+@pytest.fixture
+def api_datasets(admin_client, dataset_a_json, dataset_b_json, data_catalog, reference_data):
+    ids = []
+    for dataset_json in [dataset_a_json, dataset_b_json]:
+        res = admin_client.post("/v3/datasets", dataset_json, content_type="application/json")
+        assert res.status_code == 201
+        ids.append(res.data["id"])
+    return ids
+
+
+def test_dataset_search_index_facets(admin_client, api_datasets):
+    index = DatasetSearchIndex.objects.get(dataset_id=api_datasets[1])
+    assert index.access_types == ["Restricted use", "Saatavuutta rajoitettu"]
+    assert index.organizations == ["creator org", "publisher org"]
+    assert index.creators == ["creator org"]
+    assert "Statistics and probability" in index.fields_of_science
+
+    def filter_ids(params):
+        res = admin_client.get("/v3/datasets", {"pagination": False, **params})
+        assert res.status_code == 200
+        return sorted(dataset["id"] for dataset in res.json())
+
+    # Values in a group are combined with OR, repeated groups with AND
+    assert filter_ids({"access_rights__access_type__pref_label": "Avoin,Restricted use"}) == (
+        sorted(api_datasets)
+    )
+    assert filter_ids({"actors__organization__pref_label": ["test org", "creator org"]}) == []
+    assert filter_ids({"actors__organization__pref_label": ["creator org", "publisher org"]}) == [
+        api_datasets[1]
+    ]
+    assert filter_ids({"actors__roles__creator": "publisher org"}) == []
+    assert filter_ids({"field_of_science__pref_label": "Matematiikka"}) == [api_datasets[0]]
+
+
+def test_dataset_search_index_reindexed_labels(admin_client, api_datasets):
+    index = DatasetSearchIndex.objects.get(dataset_id=api_datasets[1])
+    access_type = refdata.AccessType.all_objects.get(pref_label__en="Restricted use")
+    refdata.AccessType.all_objects.filter(id=access_type.id).update(
+        pref_label={"en": "Restricted"}
+    )
+    Organization.all_objects.filter(pref_label__en="creator org").update(
+        pref_label={"en": "Creator organization"}
+    )
+
+    reference_data_indexed.send(sender=None, models=[refdata.AccessType])
+    index.refresh_from_db()
+    assert index.access_types == ["Restricted"]
+    assert index.organizations == ["creator org", "publisher org"]
+
+    organizations_indexed.send(sender=None)
+    index.refresh_from_db()
+    assert index.organizations == ["Creator organization", "publisher org"]
+
+
+def test_dataset_filter_organization_subtree(admin_client, datasets):
+    org = OrganizationFactory(is_reference_data=True)
+    suborg = OrganizationFactory(is_reference_data=True, parent=org)
+    factories.DatasetActorFactory(dataset=datasets["forest"], organization=suborg)
+
+    def filter_ids(org_id):
+        res = admin_client.get(
+            "/v3/datasets", {"pagination": False, "organization_subtree": str(org_id)}
+        )
+        assert res.status_code == 200
+        return [dataset["id"] for dataset in res.json()]
+
+    assert filter_ids(org.id) == [str(datasets["forest"].id)]
+    assert filter_ids(suborg.id) == [str(datasets["forest"].id)]
+    assert filter_ids(OrganizationFactory().id) == []
@@ -0,0 +1,95 @@
+import json
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from apps.core.benchmark import BenchmarkDataGenerator, BenchmarkScale, compare_reports
+from apps.core.benchmark.runner import percentile
+from apps.core.models import Dataset
+from apps.files.models import Directory, File
+
+pytestmark = [pytest.mark.django_db, pytest.mark.management]
+
+small_scale = {
+    "files": 60,
+    "files_per_directory": 5,
+    "directory_branching": 3,
+    "datasets": 12,
+    "actors_per_dataset": 2,
+    "file_sets": 2,
+    "file_set_files": 20,
+    "batch_size": 7,
+}
+
+
+def test_benchmark_directory_path():
+    generator = BenchmarkDataGenerator(BenchmarkScale(directory_branching=3))
+    assert [generator.get_directory_path(i) for i in [0, 2, 3, 5, 12]] == [
+        "/data/dir0/",
+        "/data/dir2/",
+        "/data/dir0/dir0/",
+        "/data/dir0/dir2/",
+        "/data/dir0/dir0/dir0/",
+    ]
+
+
+def test_percentile():
+    values = [5, 1, 4, 2, 3, 6, 7, 8, 9, 10]
+    assert percentile(values, 50) == 5
+    assert percentile(values, 95) == 10
+    assert percentile([3], 99) == 3
+
+
+def test_generate_and_run_benchmarks(tmp_path):
+    out = StringIO()
+    call_command("generate_benchmark_data", stdout=out, seed=1, **small_scale)
+    assert File.objects.filter(storage__csc_project="benchmark").count() == 60
+    assert Directory.objects.filter(storage__csc_project="benchmark").exists()
+    datasets = Dataset.objects.filter(data_catalog_id=BenchmarkDataGenerator.data_catalog_id)
+    assert datasets.count() == 12
+    assert datasets.filter(file_set__isnull=False).count() == 2
+    assert File.objects.filter(published__isnull=False).count() > 0
+
+    # Generating again continues from existing data
+    call_command("generate_benchmark_data", stdout=out, **small_scale)
+    assert datasets.count() == 12
+
+    report_path = tmp_path / "report.json"
+    call_command(
+        "run_benchmarks",
+        stdout=out,
+        iterations=2,
+        warmup=0,
+        output=str(report_path),
+    )
+    with open(report_path) as f:
+        report = json.load(f)
+    assert set(report["scenarios"]) == {
+        "directory_root",
+        "directory_deep",
+        "directory_dataset",
+        "dataset_list",
+        "dataset_search",
+        "dataset_aggregates",
+        "dataset_retrieve",
+        "file_bulk_upsert",
+        "dataset_publish",
+        "dataset_new_version",
+    }
+    for result in report["scenarios"].values():
+        assert result["iterations"] == 2
+        assert result["latency_ms"]["p50"] <= result["latency_ms"]["max"]
+        assert result["queries"]["min"] > 0
+
+    # Write scenarios are rolled back
+    assert datasets.count() == 12
+    assert File.objects.filter(storage__csc_project="benchmark").count() == 60
+
+    comparison = compare_reports(report, report)
+    assert comparison["dataset_list"] == {"p50": 1.0, "p95": 1.0, "queries": 1.0}
+
+
+def test_run_benchmarks_unknown_scenario():
+    with pytest.raises(Exception, match="Unknown scenarios"):
+        call_command("run_benchmarks", scenarios=["nonexistent"], stdout=StringIO())
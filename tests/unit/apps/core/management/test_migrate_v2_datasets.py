@@ -447,3 +447,73 @@ def test_migrate_prompt_credentials(requests_mock):
     assert mock.call_count == 2
     auth = mock.last_request.headers["authorization"]
     assert b64decode(auth.replace("Basic ", "")) == b"username:password"
+
+
+def test_migrate_command_workers(mock_response, reference_data, tmp_path):
+    checkpoint = tmp_path / "checkpoint.json"
+    out = StringIO()
+    err = StringIO()
+    call_command(
+        "migrate_v2_datasets",
+        stdout=out,
+        stderr=err,
+        use_env=True,
+        allow_fail=True,
+        workers=2,
+        checkpoint=str(checkpoint),
+    )
+    output = out.getvalue()
+    assert "10 datasets updated succesfully" in output
+    assert "Throughput:" in output
+    assert not LegacyDataset.objects.filter(migration_errors__isnull=False).exists()
+    with open(checkpoint) as f:
+        assert json.load(f) == {
+            "offsets": {},
+            "completed": ["all:removed=false", "all:removed=true"],
+            "failed": [],
+        }
+
+    # Completed checkpoint has nothing left to migrate
+    out = StringIO()
+    call_command(
+        "migrate_v2_datasets", stdout=out, use_env=True, workers=2, checkpoint=str(checkpoint)
+    )
+    assert "Resuming migration from checkpoint" in out.getvalue()
+    assert "Processed 0 datasets" in out.getvalue()
+
+
+def test_migrate_command_resume_checkpoint(
+    requests_mock, mock_response_single, reference_data, legacy_files, tmp_path
+):
+    dataset_json = mock_response_single["dataset"]._responses[0]._params["json"]
+    page_request = requests_mock.get(
+        url="https://metax-v2-test/rest/v2/datasets?removed=false",
+        json={"count": 1, "next": None, "results": [dataset_json]},
+    )
+    requests_mock.get(
+        url="https://metax-v2-test/rest/v2/datasets?removed=true", json={"results": []}
+    )
+    checkpoint = tmp_path / "checkpoint.json"
+    with open(checkpoint, "w") as f:
+        json.dump(
+            {
+                "offsets": {"all:removed=false": 200},
+                "failed": ["c955e904-e3dd-4d7e-99f1-3fed446f96d1"],
+            },
+            f,
+        )
+
+    out = StringIO()
+    call_command(
+        "migrate_v2_datasets",
+        stdout=out,
+        use_env=True,
+        checkpoint=str(checkpoint),
+        force=True,
+    )
+    output = out.getvalue()
+    assert "Retrying 1 failed datasets" in output
+    assert "Processed 2 datasets" in output
+    assert page_request.last_request.qs["offset"] == ["200"]
+    with open(checkpoint) as f:
+        assert json.load(f)["failed"] == []
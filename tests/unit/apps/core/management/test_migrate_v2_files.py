@@ -4,7 +4,7 @@ import pytest
 from django.core.management import call_command
 
 from apps.files.factories import create_v2_file_data
-from apps.files.models import File
+from apps.files.models import Directory, File
 
 pytestmark = [
     pytest.mark.django_db,
@@ -133,6 +133,39 @@ def test_migrate_command_update(mock_response, mock_endpoint_files):
     ]
 
 
+def test_migrate_command_update_bulk_load(mock_response, mock_endpoint_files):
+    out = StringIO()
+    call_command("migrate_v2_files", use_env=True, bulk_load=True, stdout=out)
+    assert File.all_objects.count() == 9
+    assert "processed=9, created=9, updated=0" in out.getvalue()
+
+    File.all_objects.get(filename="file1").delete(soft=False)  # hard delete
+    File.objects.get(filename="readme.md").delete()  # soft delete
+    assert File.all_objects.filter(directory_path="/dir1/").update(size=123) == 3
+
+    out = StringIO()
+    call_command("migrate_v2_files", use_env=True, bulk_load=True, stdout=out)
+    assert "processed=9, created=1, updated=4" in out.getvalue()
+    assert "Migrated files: created=1, updated=4, unchanged=4" in out.getvalue()
+    assert [
+        (f.storage.storage_service, f.storage.csc_project, f.pathname, bool(f.removed), f.size)
+        for f in File.all_objects.order_by("legacy_id").all()
+    ] == [
+        ("ida", "project_x", "/data/file1", False, 1000),
+        ("ida", "project_x", "/data/file2", False, 1000),
+        ("ida", "project_x", "/data/file3", False, 1000),
+        ("pas", "project_y", "/readme.md", False, 1000),
+        ("pas", "project_y", "/license.txt", False, 1000),
+        ("pas", "project_z", "/dir1/y1.txt", False, 1000),
+        ("pas", "project_z", "/dir1/y2.txt", False, 1000),
+        ("pas", "project_z", "/dir1/y3.txt", True, 1000),
+        ("pas", "project_z", "/dir2/z.txt", False, 1000),
+    ]
+    directory = Directory.objects.get(storage__csc_project="project_z", pathname="/dir1/")
+    assert directory.file_count == 2
+    assert directory.size == 2000
+
+
 def test_migrate_command_paginated(mock_response, mock_endpoint_files):
     out = StringIO()
     err = StringIO()
@@ -157,6 +190,30 @@ def test_migrate_command_paginated(mock_response, mock_endpoint_files):
     assert mock_endpoint_files.call_count == 4  # 3x not removed + 1x removed
 
 
+def test_migrate_command_paginated_workers(mock_response, mock_endpoint_files):
+    out = StringIO()
+    call_command(
+        "migrate_v2_files",
+        stdout=out,
+        use_env=True,
+        pagination_size=2,
+        workers=3,
+    )
+    assert [f.pathname for f in File.all_objects.order_by("legacy_id").all()] == [
+        "/data/file1",
+        "/data/file2",
+        "/data/file3",
+        "/readme.md",
+        "/license.txt",
+        "/dir1/y1.txt",
+        "/dir1/y2.txt",
+        "/dir1/y3.txt",
+        "/dir2/z.txt",
+    ]
+    assert mock_endpoint_files.call_count == 5  # 4x not removed + 1x removed
+    assert "Throughput:" in out.getvalue()
+
+
 def test_migrate_dataset_files(mock_response_single, mock_response_dataset_files):
     out = StringIO()
     err = StringIO()
@@ -222,6 +279,32 @@ def test_migrate_projects(mock_endpoint_files):
     ]
 
 
+@pytest.mark.django_db(transaction=True)
+def test_migrate_projects_workers(mock_endpoint_files):
+    out = StringIO()
+    call_command(
+        "migrate_v2_files",
+        projects=["project_x", "project_z"],
+        use_env=True,
+        bulk_load=True,
+        workers=2,
+        stdout=out,
+    )
+    assert [
+        (f.storage.storage_service, f.storage.csc_project, f.pathname, bool(f.removed))
+        for f in File.all_objects.order_by("legacy_id").all()
+    ] == [
+        ("ida", "project_x", "/data/file1", False),
+        ("ida", "project_x", "/data/file2", False),
+        ("ida", "project_x", "/data/file3", False),
+        ("pas", "project_z", "/dir1/y1.txt", False),
+        ("pas", "project_z", "/dir1/y2.txt", False),
+        ("pas", "project_z", "/dir1/y3.txt", True),
+        ("pas", "project_z", "/dir2/z.txt", False),
+    ]
+    assert "Migrated files: created=7, updated=0, unchanged=0" in out.getvalue()
+
+
 def test_migrate_missing_config():
     err = StringIO()
     call_command("migrate_v2_files", stderr=err)
@@ -0,0 +1,152 @@
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from apps.core import factories
+from apps.core.models.catalog_record.file_publication import FilePublicationQueue
+from apps.files.factories import create_project_with_files
+from apps.files.models import File
+
+pytestmark = [pytest.mark.django_db, pytest.mark.file]
+
+
+@pytest.fixture
+def project():
+    return create_project_with_files(
+        file_paths=["/dir/a.txt", "/dir/b.txt", "/dir/sub/c.txt", "/other/d.txt"],
+        csc_project="project",
+        storage_service="ida",
+    )
+
+
+def published_paths(storage):
+    return sorted(
+        f.pathname for f in File.all_objects.filter(storage=storage, published__isnull=False)
+    )
+
+
+def test_file_publication_queue_deduplicated(project):
+    dataset = factories.PublishedDatasetFactory()
+    file_set = factories.FileSetFactory(dataset=dataset, storage=project["storage"])
+    files = project["files"]
+    file_set.files.add(files["/dir/a.txt"], files["/dir/b.txt"])
+    dataset.save()
+    file_set.update_published()
+    assert published_paths(project["storage"]) == []
+
+    # Multiple changes in the same transaction are applied with a single update
+    with CaptureQueriesContext(connection) as ctx:
+        assert FilePublicationQueue.flush() == 2
+    updates = [q for q in ctx.captured_queries if q["sql"].startswith('UPDATE "files_file"')]
+    assert len(updates) == 2  # unpublish and publish
+    assert published_paths(project["storage"]) == ["/dir/a.txt", "/dir/b.txt"]
+
+    # Nothing pending
+    assert FilePublicationQueue.flush() == 0
+
+
+def test_file_publication_queue_on_commit(project, django_capture_on_commit_callbacks):
+    with django_capture_on_commit_callbacks(execute=True):
+        dataset = factories.PublishedDatasetFactory()
+        file_set = factories.FileSetFactory(dataset=dataset, storage=project["storage"])
+        file_set.files.add(*project["files"].values())
+        assert published_paths(project["storage"]) == []
+    assert len(published_paths(project["storage"])) == 4
+
+
+def test_file_publication_queue_removed_files(project):
+    files = project["files"]
+    dataset = factories.PublishedDatasetFactory()
+    file_set = factories.FileSetFactory(
+        dataset=dataset, storage=project["storage"], files=[files["/dir/a.txt"]]
+    )
+    other_dataset = factories.PublishedDatasetFactory()
+    factories.FileSetFactory(
+        dataset=other_dataset,
+        storage=project["storage"],
+        files=[files["/dir/a.txt"], files["/dir/b.txt"]],
+    )
+    assert published_paths(project["storage"]) == ["/dir/a.txt", "/dir/b.txt"]
+
+    # File is still in another published dataset
+    file_set.files.remove(files["/dir/a.txt"])
+    FilePublicationQueue.flush()
+    assert published_paths(project["storage"]) == ["/dir/a.txt", "/dir/b.txt"]
+
+    other_dataset.delete()
+    assert published_paths(project["storage"]) == []
+
+
+def test_file_publication_queue_cleared_files(project):
+    files = project["files"]
+    dataset = factories.PublishedDatasetFactory()
+    file_set = factories.FileSetFactory(
+        dataset=dataset, storage=project["storage"], files=[files["/dir/a.txt"]]
+    )
+    factories.FileSetFactory(
+        dataset=factories.PublishedDatasetFactory(),
+        storage=project["storage"],
+        files=[files["/dir/b.txt"]],
+    )
+    FilePublicationQueue.flush()
+
+    # Only files of the cleared fileset are updated
+    File.all_objects.filter(id=files["/other/d.txt"].id).update(published=timezone.now())
+    file_set.files.clear()
+    FilePublicationQueue.flush()
+    assert published_paths(project["storage"]) == ["/dir/b.txt", "/other/d.txt"]
+
+
+def test_refresh_file_publication_command(project):
+    files = project["files"]
+    dataset = factories.PublishedDatasetFactory()
+    factories.FileSetFactory(
+        dataset=dataset, storage=project["storage"], files=[files["/dir/a.txt"]]
+    )
+    File.all_objects.filter(id=files["/dir/a.txt"].id).update(published=None)
+    File.all_objects.filter(id=files["/other/d.txt"].id).update(published=timezone.now())
+
+    call_command(
+        "refresh_file_publication",
+        storage_service="ida",
+        csc_project="project",
+        batch_size=3,
+    )
+    assert published_paths(project["storage"]) == ["/dir/a.txt"]
+
+
+def test_fileset_add_and_remove_files_from_queryset(project):
+    storage = project["storage"]
+    dataset = factories.PublishedDatasetFactory()
+    file_set = factories.FileSetFactory(
+        dataset=dataset, storage=storage, files=[project["files"]["/dir/a.txt"]]
+    )
+
+    with CaptureQueriesContext(connection) as ctx:
+        added = file_set.add_files_from_queryset(
+            storage.files.filter(directory_path__startswith="/dir/")
+        )
+    assert added == 2  # a.txt was already in fileset
+    assert len(ctx.captured_queries) == 1
+    assert file_set.files.count() == 3
+    FilePublicationQueue.flush()
+    assert published_paths(storage) == ["/dir/a.txt", "/dir/b.txt", "/dir/sub/c.txt"]
+
+    # Adding again does nothing
+    assert file_set.add_files_from_queryset(storage.files.filter(id__in=[])) == 0
+    assert (
+        file_set.add_files_from_queryset(storage.files.filter(directory_path__startswith="/dir/"))
+        == 0
+    )
+
+    with CaptureQueriesContext(connection) as ctx:
+        removed = file_set.remove_files_from_queryset(
+            storage.files.filter(directory_path__startswith="/dir/sub/")
+            | storage.files.filter(directory_path__startswith="/other/")
+        )
+    assert removed == 1  # d.txt was not in fileset
+    assert len(ctx.captured_queries) == 1
+    FilePublicationQueue.flush()
+    assert published_paths(storage) == ["/dir/a.txt", "/dir/b.txt"]
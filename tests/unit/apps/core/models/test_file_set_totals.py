@@ -0,0 +1,145 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db.models.signals import m2m_changed
+
+from apps.core import factories
+from apps.core.models import FileSet
+from apps.core.models.catalog_record.file_publication import FilePublicationQueue
+from apps.files.factories import create_project_with_files
+from apps.files.models import File
+
+pytestmark = [pytest.mark.django_db, pytest.mark.file]
+
+
+@pytest.fixture
+def project():
+    return create_project_with_files(
+        file_paths=["/dir/a.txt", "/dir/b.txt", "/dir/sub/c.txt", "/other/d.txt"],
+        file_args={
+            "/dir/a.txt": {"size": 1},
+            "/dir/b.txt": {"size": 10},
+            "/dir/sub/c.txt": {"size": 100},
+            "/other/d.txt": {"size": 1000},
+        },
+        csc_project="project",
+        storage_service="ida",
+    )
+
+
+@pytest.fixture
+def file_set(project):
+    dataset = factories.DatasetFactory()
+    return factories.FileSetFactory(dataset=dataset, storage=project["storage"])
+
+
+def stored_totals(file_set):
+    file_set = FileSet.all_objects.get(id=file_set.id)
+    return {field: getattr(file_set, field) for field in FileSet.totals_fields}
+
+
+def test_file_set_totals_m2m(project, file_set):
+    files = project["files"]
+    file_set.files.add(files["/dir/a.txt"], files["/dir/b.txt"])
+    file_set.files.add(files["/dir/b.txt"], files["/other/d.txt"])  # b.txt already added
+    assert stored_totals(file_set) == {
+        "total_files_count": 3,
+        "total_files_size": 1011,
+        "published_files_count": 0,
+    }
+
+    file_set.files.remove(files["/dir/a.txt"], files["/dir/sub/c.txt"])  # c.txt not in set
+    assert stored_totals(file_set)["total_files_size"] == 1010
+
+    file_set.files.clear()
+    assert stored_totals(file_set)["total_files_count"] == 0
+
+
+def test_file_set_totals_from_queryset(project, file_set):
+    storage = project["storage"]
+    files = storage.files.filter(pathname__startswith="/dir/")
+    assert file_set.add_files_from_queryset(files) == 3
+    assert file_set.total_files_count == 3
+    assert file_set.total_files_size == 111
+
+    assert file_set.remove_files_from_queryset(storage.files.filter(pathname="/dir/b.txt")) == 1
+    assert file_set.total_files_count == 2
+    assert file_set.total_files_size == 101
+    assert stored_totals(file_set)["total_files_size"] == 101
+
+
+def test_file_set_totals_file_changes(project, file_set):
+    files = project["files"]
+    file_set.files.add(files["/dir/a.txt"], files["/dir/b.txt"])
+    other_file_set = factories.FileSetFactory(
+        dataset=factories.DatasetFactory(), storage=project["storage"]
+    )
+    other_file_set.files.add(files["/dir/a.txt"])
+
+    file = files["/dir/a.txt"]
+    file.size = 5
+    file.save()
+    assert stored_totals(file_set)["total_files_size"] == 15
+    assert stored_totals(other_file_set)["total_files_size"] == 5
+
+    file.delete()  # soft deleted files are still counted
+    assert stored_totals(file_set)["total_files_count"] == 2
+
+
+def test_file_set_totals_published(project):
+    files = project["files"]
+    dataset = factories.PublishedDatasetFactory()
+    file_set = factories.FileSetFactory(dataset=dataset, storage=project["storage"])
+    file_set.files.add(files["/dir/a.txt"], files["/dir/b.txt"])
+    dataset.save()
+    file_set.update_published()
+    FilePublicationQueue.flush()
+    assert stored_totals(file_set)["published_files_count"] == 2
+
+    file_set.remove_files_from_queryset(project["storage"].files.filter(pathname="/dir/a.txt"))
+    FilePublicationQueue.flush()
+    assert stored_totals(file_set)["published_files_count"] == 1
+
+
+def test_file_set_totals_copy(project, file_set):
+    file_set.files.add(*project["files"].values())
+    copy = file_set.dataset.create_copy()
+    expected = {"total_files_count": 4, "total_files_size": 1111, "published_files_count": 0}
+    assert stored_totals(copy.file_set) == expected
+    assert stored_totals(file_set) == expected
+
+    # Unknown changes are recomputed instead of added to the existing totals
+    m2m_changed.send(
+        sender=FileSet.files.through,
+        action="post_add",
+        instance=copy.file_set,
+        reverse=False,
+        model=File,
+        pk_set=None,
+        using="default",
+    )
+    assert stored_totals(copy.file_set) == expected
+
+
+def test_check_file_set_totals_command(project, file_set):
+    file_set.files.add(*project["files"].values())
+    FileSet.all_objects.filter(id=file_set.id).update(total_files_count=1, total_files_size=0)
+
+    out = StringIO()
+    call_command("check_file_set_totals", stdout=out)
+    assert f"FileSet {file_set.id}: total_files_count is 1, expected 4" in out.getvalue()
+    assert "Found 1/1 filesets with incorrect values" in out.getvalue()
+
+    out = StringIO()
+    call_command("check_file_set_totals", "--fix", stdout=out)
+    assert "Fixed 1/1 filesets" in out.getvalue()
+    assert stored_totals(file_set) == {
+        "total_files_count": 4,
+        "total_files_size": 1111,
+        "published_files_count": 0,
+    }
+
+    out = StringIO()
+    call_command("check_file_set_totals", stdout=out)
+    assert "Found 0/1 filesets with incorrect values" in out.getvalue()
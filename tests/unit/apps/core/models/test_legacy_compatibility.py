@@ -0,0 +1,100 @@
+import pytest
+from django.conf import settings
+
+from apps.core.models.legacy_compatibility import (
+    LegacyCompatibility,
+    PathMatcher,
+    compare_legacy_versions,
+    prune_equal_values,
+    regex,
+)
+
+
+@pytest.fixture
+def versions():
+    org = f"{settings.ORGANIZATION_BASE_URI}10076"
+    v2 = {
+        "identifier": "dataset",
+        "state": "published",
+        "cumulative_state": 0,
+        "research_dataset": {
+            "title": {"en": "Title"},
+            "total_files_byte_size": 1,
+            "creator": [{"@type": "Person", "name": "Person"}],
+            "publisher": {"identifier": org, "name": {"en": "Org"}},
+            "keyword": ["a", "b"],
+            "theme": [{"identifier": "theme", "definition": {"en": "Theme"}}],
+            "spatial": [{"geographic_name": "Place", "as_wkt": ["POINT (1 2)"]}],
+            "access_rights": {
+                "access_type": {"identifier": "open", "pref_label": {"en": "Open"}},
+                "description": {"en": "Access"},
+            },
+            "removed_value": "",
+        },
+    }
+    v3 = {
+        "identifier": "dataset",
+        "state": "published",
+        "cumulative_state": 0.0,
+        "research_dataset": {
+            "title": {"en": "Title"},
+            "total_files_byte_size": 1,
+            "creator": [{"@type": "Person", "name": "Changed person"}],
+            "publisher": {"identifier": org, "name": {"en": "Changed org"}},
+            "keyword": ["b", "a"],
+            "theme": [{"identifier": "theme", "definition": {"en": "Theme"}}],
+            "spatial": [{"geographic_name": "Place", "as_wkt": ["POINT (1 3)"]}],
+            "access_rights": {
+                "access_type": {"identifier": "open", "pref_label": {"en": "Avoin"}},
+                "description": {"en": "Changed access"},
+                "available": "2024-01-01",
+            },
+        },
+    }
+    return v2, v3
+
+
+def test_prune_equal_values(versions):
+    v2, v3 = prune_equal_values(*versions)
+    assert set(v2) == {"identifier", "cumulative_state", "research_dataset"}
+    assert v2["research_dataset"]["access_rights"] == {
+        "access_type": {"identifier": "open", "pref_label": {"en": "Open"}},
+        "description": {"en": "Access"},
+    }
+    # Identifier is kept for excluding organizations from diff
+    assert v3["research_dataset"]["publisher"] == {
+        "identifier": f"{settings.ORGANIZATION_BASE_URI}10076",
+        "name": {"en": "Changed org"},
+    }
+    assert "title" not in v3["research_dataset"]
+    assert "theme" not in v3["research_dataset"]
+    assert prune_equal_values(versions[0], versions[0]) is None
+
+
+def test_compare_legacy_versions_pruned(versions):
+    diff = compare_legacy_versions(*versions, prune=False)
+    assert diff == compare_legacy_versions(*versions)
+    assert "type_changes" in diff  # cumulative_state 0 -> 0.0
+    assert "root['research_dataset']['publisher']" not in str(diff)  # excluded organization
+    assert compare_legacy_versions(versions[0], versions[0]) == {}
+
+
+def test_path_matcher():
+    ignored = LegacyCompatibility.ignored_migration_errors["dictionary_item_removed"]
+    matcher = PathMatcher(ignored)
+    paths = [
+        "root['next_draft']",
+        "root['next_draft']['id']",
+        "root['research_dataset']['remote_resources'][3]['identifier']",
+        "root['research_dataset']['remote_resources']['identifier']",
+        "root['research_dataset']['creator'][0]['telephone']",
+        "root['research_dataset']['creator'][0]['telephone']['x']",
+        "root['research_dataset']['title']",
+    ]
+    for path in paths:
+        expected = any(
+            path == ign if isinstance(ign, str) else bool(ign.match(path)) for ign in ignored
+        )
+        assert matcher.match(path) == expected
+    assert PathMatcher([regex("root['a'][\\d+]")]).match("root['a'][1]['b']")
+    assert not PathMatcher([]).match("root['a']")
@@ -0,0 +1,99 @@
+import re
+import threading
+
+import pytest
+from django.utils import timezone
+
+from apps.core.management.commands.run_v2_stub import V2StubServer
+from apps.core.models import V2SyncTask
+from apps.core.services.v2_sync_outbox import V2SyncOutboxWorker
+from apps.core.signals import dataset_created, dataset_updated
+from apps.files import factories as file_factories
+from apps.files.models import File
+from apps.files.signals import sync_files
+
+pytestmark = [pytest.mark.django_db, pytest.mark.dataset]
+
+
+@pytest.fixture
+def outbox_settings(v2_integration_settings):
+    v2_integration_settings.METAX_V2_SYNC_MODE = "outbox"
+    return v2_integration_settings
+
+
+@pytest.fixture
+def v2_stub(outbox_settings):
+    server = V2StubServer(("localhost", 0))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    outbox_settings.METAX_V2_HOST = server.url
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_v2_sync_outbox_coalesce(mock_v2_integration, outbox_settings, dataset_with_foreign_keys):
+    dataset_created.send(sender=None, data=dataset_with_foreign_keys)
+    dataset_updated.send(sender=None, data=dataset_with_foreign_keys)
+    assert mock_v2_integration.call_count == 0
+    task = V2SyncTask.objects.get()
+    assert task.kind == "dataset"
+    assert task.key == str(dataset_with_foreign_keys.id)
+
+    assert V2SyncOutboxWorker().process_all() == 1
+    assert V2SyncTask.objects.count() == 0
+    assert [call.method for call in mock_v2_integration.request_history] == ["GET", "PUT"]
+
+
+def test_v2_sync_outbox_retry(
+    mock_v2_integration, outbox_settings, requests_mock, dataset_with_foreign_keys
+):
+    matcher = re.compile(outbox_settings.METAX_V2_HOST)
+    requests_mock.register_uri("GET", matcher, status_code=404)
+    requests_mock.register_uri("POST", matcher, status_code=503)
+    dataset_updated.send(sender=None, data=dataset_with_foreign_keys)
+
+    worker = V2SyncOutboxWorker()
+    assert worker.process_all() == 1
+    task = V2SyncTask.objects.get()
+    assert task.attempts == 1
+    assert task.next_attempt_at > timezone.now()
+    assert "Failed to sync dataset" in task.last_error
+
+    # Task is not due before backoff has passed
+    assert worker.process_all() == 0
+    requests_mock.register_uri("POST", matcher, status_code=201)
+    V2SyncTask.objects.update(next_attempt_at=timezone.now())
+    assert worker.process_all() == 1
+    assert V2SyncTask.objects.count() == 0
+
+
+def test_v2_sync_outbox_coalesced_during_processing(outbox_settings, dataset_with_foreign_keys):
+    dataset_updated.send(sender=None, data=dataset_with_foreign_keys)
+    worker = V2SyncOutboxWorker()
+    tasks = worker.claim_tasks(V2SyncTask.KindChoices.DATASET)
+
+    # New change while the task is being processed keeps the task in the outbox
+    dataset_updated.send(sender=None, data=dataset_with_foreign_keys)
+    worker.complete(tasks)
+    task = V2SyncTask.objects.get()
+    assert task.next_attempt_at <= timezone.now()
+
+
+def test_v2_sync_outbox_stub(v2_stub, dataset_with_foreign_keys):
+    files = file_factories.FileFactory.create_batch(3)
+    sync_files.send(sender=File, actions=[{"action": "insert", "object": f} for f in files])
+    dataset_created.send(sender=None, data=dataset_with_foreign_keys)
+    dataset_with_foreign_keys.delete(soft=True)
+    assert V2SyncTask.objects.count() == 5
+    assert v2_stub.requests == []
+
+    V2SyncOutboxWorker().process_all()
+    assert V2SyncTask.objects.count() == 0
+    assert sorted(File.objects.values_list("legacy_id", flat=True)) == [1, 2, 3]
+    # Dataset was removed before it was synced, so only the removal is sent
+    dataset_path = f"/rest/v2/datasets/{dataset_with_foreign_keys.id}"
+    assert v2_stub.requests == [
+        ("POST", "/rest/v2/files/sync_from_v3"),
+        ("DELETE", dataset_path),
+    ]
@@ -1,14 +1,22 @@
 import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 
+from apps.actors.factories import OrganizationFactory
 from apps.core.factories import (
     AccessRightsFactory,
     AccessTypeFactory,
     DatasetActorFactory,
+    DatasetFactory,
     DatasetLicenseFactory,
+    FileSetFactory,
     LanguageFactory,
     ProvenanceFactory,
+    RestrictionGroundsFactory,
+    SpatialFactory,
 )
-from apps.core.models import Dataset
+from apps.core.models import Dataset, FileSetFileMetadata
+from apps.files.factories import FileFactory, FileStorageFactory
 
 pytestmark = [pytest.mark.django_db, pytest.mark.dataset, pytest.mark.versioning]
 
@@ -244,8 +252,62 @@ def test_dataset_copied_fields():
         "dataset.projects.participating_organizations.children",
         "dataset.legacydataset",
         "dataset.metrics",
+        "dataset.search_index",
         "dataset.provenance.is_associated_with.organization.children",
         "dataset.actors.organization.children",
         "dataset.projects.funding.funder.organization.children",
         "dataset.next_draft",
     }
+
+
+def create_dataset_with_related(count):
+    dataset = DatasetFactory()
+    dataset.language.add(LanguageFactory())
+    dataset.access_rights = AccessRightsFactory(
+        license=DatasetLicenseFactory.create_batch(2),
+        restriction_grounds=[RestrictionGroundsFactory()],
+    )
+    dataset.save()
+    organization = OrganizationFactory(is_reference_data=False)
+    actors = DatasetActorFactory.create_batch(
+        count, dataset=dataset, roles=["creator"], organization=organization
+    )
+    for _ in range(count):
+        provenance = ProvenanceFactory(dataset=dataset)
+        provenance.is_associated_with.set(actors[:2])
+    SpatialFactory.create_batch(count, dataset=dataset)
+    storage = FileStorageFactory()
+    files = FileFactory.create_batch(count, storage=storage)
+    file_set = FileSetFactory(dataset=dataset, storage=storage, files=files)
+    for file in files:
+        FileSetFileMetadata.objects.create(file_set=file_set, file=file, title={"en": "x"})
+    return dataset
+
+
+def test_create_copy_bulk_queries():
+    """Number of queries does not depend on the number of copied objects of each type."""
+    counts = {}
+    for count in [2, 10]:
+        dataset = create_dataset_with_related(count)
+        with CaptureQueriesContext(connection) as ctx:
+            copy = dataset.create_copy()
+        counts[count] = len(ctx.captured_queries)
+
+        assert copy.actors.count() == count
+        assert copy.provenance.count() == count
+        assert copy.spatial.count() == count
+        assert copy.file_set.files.count() == count
+        assert copy.file_set.total_files_count == count
+        assert copy.file_set.file_metadata.count() == count
+        assert copy.language.count() == 1
+        assert copy.access_rights.license.count() == 2
+        assert copy.access_rights.restriction_grounds.count() == 1
+
+        # Relations between copies point to copies, which are only copied once
+        copy_actors = set(copy.actors.all())
+        for provenance in copy.provenance.all():
+            assert set(provenance.is_associated_with.all()) <= copy_actors
+        organizations = set(copy.actors.values_list("organization", flat=True))
+        assert len(organizations) == 1
+        assert organizations != set(dataset.actors.values_list("organization", flat=True))
+    assert counts[10] == counts[2]
@@ -250,7 +250,7 @@ def test_directory_count_and_filter_published(admin_client, file_tree_a, file_tr
 
 
 def test_directory_count_and_filter_unpublished(
-    admin_client, file_tree_a, file_tree_with_datasets
+    admin_client, file_tree_a, file_tree_with_datasets, django_capture_on_commit_callbacks
 ):
     res = admin_client.get(
         "/v3/directories",
@@ -281,9 +281,12 @@ def test_directory_count_and_filter_unpublished(
         "/dir/f.txt",
     ]
 
-    file_tree_with_datasets["dataset_a"].file_set.files.add(
-        file_tree_a["files"]["/dir/sub5/file1.csv"], file_tree_a["files"]["/dir/sub5/file2.csv"]
-    )
+    # File publication state is updated on commit
+    with django_capture_on_commit_callbacks(execute=True):
+        file_tree_with_datasets["dataset_a"].file_set.files.add(
+            file_tree_a["files"]["/dir/sub5/file1.csv"],
+            file_tree_a["files"]["/dir/sub5/file2.csv"],
+        )
     res = admin_client.get(
         "/v3/directories",
         {
@@ -154,3 +154,123 @@ def test_directory_pagination_with_name(admin_client, file_tree_a):
         res.data,
         check_list_length=True,
     )
+
+
+def test_directory_cursor_pagination(admin_client, file_tree_a):
+    res = admin_client.get(
+        "/v3/directories",
+        {
+            "path": "/dir",
+            "limit": 5,
+            "cursor_pagination": True,
+            **file_tree_a["params"],
+        },
+    )
+    assert res.status_code == 200
+    assert "count" not in res.data
+    assert_nested_subdict(
+        {
+            "previous": None,
+            "results": {
+                "directory": {"file_count": 15, "size": 15 * 1024},
+                "directories": [
+                    {"name": "sub1"},
+                    {"name": "sub2"},
+                    {"name": "sub3"},
+                    {"name": "sub4"},
+                    {"name": "sub5"},
+                ],
+                "files": [],
+            },
+        },
+        res.data,
+        check_list_length=True,
+    )
+
+    res = admin_client.get(res.data["next"])
+    assert res.status_code == 200
+    assert_nested_subdict(
+        {
+            "results": {
+                "directories": [{"name": "sub6"}],
+                "files": [
+                    {"filename": "a.txt"},
+                    {"filename": "b.txt"},
+                    {"filename": "c.txt"},
+                    {"filename": "d.txt"},
+                ],
+            },
+        },
+        res.data,
+        check_list_length=True,
+    )
+
+    res = admin_client.get(res.data["next"])
+    assert res.status_code == 200
+    assert_nested_subdict(
+        {
+            "next": None,
+            "results": {
+                "directories": [],
+                "files": [{"filename": "e.txt"}, {"filename": "f.txt"}],
+            },
+        },
+        res.data,
+        check_list_length=True,
+    )
+
+
+def test_directory_cursor_pagination_page_boundary(admin_client, file_tree_a):
+    """Page ends exactly after last directory, next page should start from files."""
+    res = admin_client.get(
+        "/v3/directories",
+        {
+            "path": "/dir",
+            "limit": 6,
+            "cursor_pagination": True,
+            "count": "exact",
+            "file_fields": "pathname",
+            **file_tree_a["params"],
+        },
+    )
+    assert res.status_code == 200
+    assert res.data["count"] == 12
+    assert len(res.data["results"]["directories"]) == 6
+    assert res.data["results"]["files"] == []
+
+    res = admin_client.get(res.data["next"])
+    assert res.status_code == 200
+    assert res.data["count"] == 12
+    assert res.data["next"] is None
+    assert res.data["results"]["directories"] == []
+    assert res.data["results"]["files"] == [
+        {"pathname": f"/dir/{name}.txt"} for name in ["a", "b", "c", "d", "e", "f"]
+    ]
+
+
+def test_directory_cursor_pagination_ordering(admin_client, file_tree_a):
+    res = admin_client.get(
+        "/v3/directories",
+        {
+            "path": "/dir",
+            "cursor_pagination": True,
+            "file_ordering": "-filename",
+            **file_tree_a["params"],
+        },
+    )
+    assert res.status_code == 400
+    assert "file_ordering" in res.data
+
+
+def test_directory_cursor_pagination_invalid_cursor(admin_client, file_tree_a):
+    res = admin_client.get(
+        "/v3/directories",
+        {
+            "path": "/dir",
+            "cursor_pagination": True,
+            "cursor": "invalid",
+            **file_tree_a["params"],
+        },
+    )
+    assert res.status_code == 400
+    assert "cursor" in res.data
@@ -1,3 +1,4 @@
+import json
 import uuid
 from typing import List
 
@@ -725,3 +726,52 @@ def test_files_bulk_delete_missing_storage_identifier(ida_client, csc_project, a
             "storage_identifier": "Either storage_identifier or id is required.",
         },
     }
+
+
+def post_ndjson(client, lines: List[str], **params):
+    res = client.post(
+        reverse("file-bulk-stream"),
+        data="\n".join(lines).encode(),
+        content_type="application/x-ndjson",
+        QUERY_STRING="&".join(f"{key}={value}" for key, value in params.items()),
+    )
+    assert res.status_code == 200
+    return [json.loads(line) for line in b"".join(res.streaming_content).splitlines()]
+
+
+def test_files_bulk_stream(ida_client):
+    files = build_files_json([{"id": None, "exists": False} for _ in range(5)])
+    lines = [json.dumps(f) for f in files]
+    chunks = post_ndjson(ida_client, lines, action="insert", chunk_size=2)
+    assert [chunk["chunk"] for chunk in chunks] == [0, 1, 2]
+    assert [len(chunk["success"]) for chunk in chunks] == [2, 2, 1]
+    assert all(chunk["failed"] == [] for chunk in chunks)
+    assert File.objects.count() == 5
+
+
+def test_files_bulk_stream_errors(ida_client):
+    files = build_files_json([{"id": None, "exists": False} for _ in range(3)])
+    lines = [json.dumps(files[0]), "not json", json.dumps(files[1]), json.dumps(files[2])]
+    chunks = post_ndjson(ida_client, lines, action="insert", chunk_size=2)
+
+    # Chunk with errors is not committed, other chunks are
+    assert chunks[0]["success"] == []
+    failed = chunks[0]["failed"]
+    assert [fail["object"] for fail in failed] == [{"line": 2}]
+    assert failed[0]["errors"]["json"].startswith("Invalid JSON")
+    assert len(chunks[1]["success"]) == 2
+    assert File.objects.count() == 2
+
+
+def test_files_bulk_stream_shared_storage_lookup(csc_project, django_assert_num_queries):
+    file = {"storage_service": "ida", "csc_project": "project_x"}
+    storages_by_key = {}
+    FileStorage.objects.assign_to_file_data([dict(file)], storages_by_key=storages_by_key)
+    assert list(storages_by_key.values()) == [csc_project]
+
+    # Known storages are not queried again
+    with django_assert_num_queries(0):
+        files = FileStorage.objects.assign_to_file_data(
+            [dict(file)], storages_by_key=storages_by_key
+        )
+    assert files[0]["storage"] == csc_project
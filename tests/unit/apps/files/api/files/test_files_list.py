@@ -263,3 +263,41 @@ def test_files_list_invalid_storage_service(admin_client, file_tree_a):
     assert "'doesnotexist' is not a valid choice. Valid choices are" in str(
         res.data["storage_service"]
     )
+
+
+def test_files_list_cursor_pagination(admin_client, file_tree_a):
+    params = {**file_tree_a["params"], "cursor_pagination": True, "limit": 6}
+    res = admin_client.get("/v3/files", params)
+    assert res.status_code == 200
+    assert "count" not in res.data
+    assert res.data["previous"] is None
+
+    pathnames = [f["pathname"] for f in res.data["results"]]
+    while res.data["next"]:
+        assert "cursor=" in res.data["next"]
+        res = admin_client.get(res.data["next"])
+        assert res.status_code == 200
+        pathnames.extend(f["pathname"] for f in res.data["results"])
+    files = sorted(file_tree_a["files"].values(), key=lambda f: (f.directory_path, f.filename))
+    assert pathnames == [f.pathname for f in files]
+
+
+def test_files_list_cursor_pagination_count(admin_client, file_tree_a):
+    params = {**file_tree_a["params"], "cursor_pagination": True, "limit": 6}
+    res = admin_client.get("/v3/files", {**params, "count": "exact"})
+    assert res.status_code == 200
+    assert res.data["count"] == 16
+
+    res = admin_client.get("/v3/files", {**params, "count": "estimate"})
+    assert res.status_code == 200
+    assert isinstance(res.data["count"], int)
+
+    res = admin_client.get("/v3/files", {**params, "count": "wrong"})
+    assert res.status_code == 400
+
+
+def test_files_list_cursor_pagination_invalid_cursor(admin_client, file_tree_a):
+    params = {**file_tree_a["params"], "cursor_pagination": True}
+    res = admin_client.get("/v3/files", {**params, "cursor": "eyJmb28iOiAxfQ=="})
+    assert res.status_code == 400
+    assert "cursor" in res.data
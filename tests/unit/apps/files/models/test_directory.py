@@ -0,0 +1,106 @@
+import pytest
+from django.utils import timezone
+
+from apps.files import factories
+from apps.files.models import Directory, File
+
+pytestmark = [pytest.mark.django_db, pytest.mark.file]
+
+
+@pytest.fixture
+def file_tree():
+    return factories.create_project_with_files(
+        file_paths=[
+            "/dir/sub1/file1.csv",
+            "/dir/sub1/file2.csv",
+            "/dir/sub1/deep/er/file.csv",
+            "/dir/sub2/file.csv",
+            "/dir/a.txt",
+            "/rootfile.txt",
+        ],
+        file_args={"*": {"size": 1024}},
+    )
+
+
+def get_directories(storage) -> dict:
+    return {d.pathname: d for d in Directory.objects.filter(storage=storage)}
+
+
+def test_directory_statistics(file_tree):
+    directories = get_directories(file_tree["storage"])
+    assert sorted(directories) == [
+        "/",
+        "/dir/",
+        "/dir/sub1/",
+        "/dir/sub1/deep/",
+        "/dir/sub1/deep/er/",
+        "/dir/sub2/",
+    ]
+    root = directories["/"]
+    assert root.file_count == 6
+    assert root.direct_file_count == 1
+    assert root.size == 6 * 1024
+    assert root.parent_path is None
+
+    sub1 = directories["/dir/sub1/"]
+    assert sub1.name == "sub1"
+    assert sub1.parent_path == "/dir/"
+    assert sub1.file_count == 3
+    assert sub1.direct_file_count == 2
+
+    deep = directories["/dir/sub1/deep/"]
+    assert deep.file_count == 1
+    assert deep.direct_file_count == 0
+
+    files = file_tree["files"].values()
+    assert root.created == min(f.modified for f in files)
+    assert root.modified == max(f.modified for f in files)
+
+
+def test_directory_statistics_delete_file(file_tree):
+    file_tree["files"]["/dir/sub1/deep/er/file.csv"].delete()
+    directories = get_directories(file_tree["storage"])
+    assert "/dir/sub1/deep/" not in directories
+    assert "/dir/sub1/deep/er/" not in directories
+    assert directories["/dir/sub1/"].file_count == 2
+    assert directories["/"].file_count == 5
+
+
+def test_directory_statistics_queryset_update(file_tree):
+    files = File.objects.filter(storage=file_tree["storage"], directory_path="/dir/sub1/")
+    keys = Directory.objects.get_keys(files)
+    files.update(published=timezone.now())
+    Directory.objects.refresh(keys)
+
+    directories = get_directories(file_tree["storage"])
+    assert directories["/dir/sub1/"].published_file_count == 2
+    assert directories["/dir/sub1/"].direct_published_file_count == 2
+    assert directories["/dir/"].published_file_count == 2
+    assert directories["/"].published_file_count == 2
+    assert directories["/dir/sub2/"].published_file_count == 0
+
+
+def test_directory_statistics_move_file(file_tree):
+    file = file_tree["files"]["/dir/sub2/file.csv"]
+    file.pathname = "/other/file.csv"
+    file.save()
+    directories = get_directories(file_tree["storage"])
+    assert "/dir/sub2/" not in directories
+    assert directories["/other/"].file_count == 1
+    assert directories["/dir/"].file_count == 4
+    assert directories["/"].file_count == 6
+
+
+def test_directory_rebuild(file_tree):
+    storage = file_tree["storage"]
+    expected = {
+        path: (d.file_count, d.size, d.direct_file_count)
+        for path, d in get_directories(storage).items()
+    }
+    Directory.objects.filter(storage=storage).update(file_count=0, size=0)
+    Directory.objects.rebuild(storage)
+    rebuilt = {
+        path: (d.file_count, d.size, d.direct_file_count)
+        for path, d in get_directories(storage).items()
+    }
+    assert rebuilt == expected
@@ -0,0 +1,80 @@
+import pytest
+from django.core.cache import caches
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.serializers import ValidationError
+
+from apps.files import factories
+from apps.files.cache import file_storage_cache
+from apps.files.models import FileStorage, IDAFileStorage
+
+pytestmark = [pytest.mark.django_db, pytest.mark.file]
+
+
+@pytest.fixture
+def locmem_cache(settings):
+    settings.CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "file-storage-cache-tests",
+        }
+    }
+    settings.FILE_STORAGE_CACHE_ENABLED = True
+    caches["default"].clear()
+    yield caches["default"]
+    caches["default"].clear()
+
+
+@pytest.fixture
+def storage():
+    return factories.FileStorageFactory(storage_service="ida", csc_project="project")
+
+
+def test_file_storage_cache(storage, locmem_cache):
+    cached = file_storage_cache.get(storage_service="ida", csc_project="project")
+    assert isinstance(cached, IDAFileStorage)
+    assert cached.id == storage.id
+
+    with CaptureQueriesContext(connection) as ctx:
+        assert file_storage_cache.get(storage_service="ida", csc_project="project") == storage
+        assert file_storage_cache.get(id=storage.id).csc_project == "project"
+        assert file_storage_cache.get(id=storage.id).csc_project == "project"
+    assert len(ctx.captured_queries) == 1  # by id was not cached yet
+
+    # Process-local cache is invalidated by shared generation token
+    file_storage_cache.local.clear()
+    with CaptureQueriesContext(connection) as ctx:
+        file_storage_cache.get(id=storage.id)
+    assert len(ctx.captured_queries) == 0
+
+
+def test_file_storage_cache_invalidate(storage, locmem_cache):
+    file_storage_cache.get(id=storage.id)
+    storage.delete()
+    with pytest.raises(FileStorage.DoesNotExist):
+        file_storage_cache.get(id=storage.id)
+
+
+def test_file_storage_cache_disabled(storage):
+    # DummyCache cannot store generation token, lookups go to database
+    with CaptureQueriesContext(connection) as ctx:
+        file_storage_cache.get(id=storage.id)
+        file_storage_cache.get(id=storage.id)
+    assert len(ctx.captured_queries) == 2
+
+
+def test_file_storage_cache_request_scope(storage, user):
+    with file_storage_cache.request_scope():
+        with CaptureQueriesContext(connection) as ctx:
+            fetched = file_storage_cache.get(storage_service="ida", csc_project="project")
+            assert file_storage_cache.get(id=storage.id) is fetched
+        assert len(ctx.captured_queries) == 1
+
+        user.csc_projects = []
+        with pytest.raises(ValidationError):
+            file_storage_cache.check_user_can_access(fetched, user)
+        user.csc_projects = ["project"]
+        with pytest.raises(ValidationError):
+            file_storage_cache.check_user_can_access(fetched, user)  # memoized result
+
+    file_storage_cache.check_user_can_access(fetched, user)
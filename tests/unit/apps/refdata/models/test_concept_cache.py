@@ -0,0 +1,100 @@
+import pytest
+from django.core.cache import caches
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from apps.common.copier import supports_bulk_create
+from apps.core.models import DatasetActor, FileSetFileMetadata, Language, Provenance, Spatial
+from apps.refdata.cache import concept_cache
+from apps.refdata.services.importers.common import BaseDataImporter
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def locmem_cache(settings):
+    settings.CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "concept-cache-tests",
+        }
+    }
+    settings.REFERENCE_DATA_CACHE_ENABLED = True
+    caches["default"].clear()
+    concept_cache._version = None
+    yield caches["default"]
+    caches["default"].clear()
+    concept_cache._version = None
+
+
+@pytest.fixture
+def language():
+    return Language.all_objects.create(
+        url="https://example.com/fin",
+        in_scheme="https://example.com",
+        pref_label={"en": "Finnish"},
+    )
+
+
+def test_concept_cache_get_many(language, locmem_cache):
+    urls = [language.url, "https://example.com/missing"]
+    assert list(concept_cache.get_many(Language, urls)) == [language.url]
+
+    with CaptureQueriesContext(connection) as ctx:
+        cached = concept_cache.get_many(Language, [language.url])[language.url]
+    assert len(ctx.captured_queries) == 0
+    assert isinstance(cached, Language)
+    assert cached.id == language.id
+    assert cached.pref_label == {"en": "Finnish"}
+
+    with CaptureQueriesContext(connection) as ctx:
+        assert concept_cache.get_many(Language, urls) == {language.url: cached}
+    assert len(ctx.captured_queries) == 1  # not found is not cached
+
+
+def test_concept_cache_representation(language, locmem_cache):
+    serializer = Language.get_serializer_class()()
+    rep = serializer.to_representation(language)
+    assert rep["pref_label"] == {"en": "Finnish"}
+    rep["pref_label"]["fi"] = "suomi"
+
+    language.pref_label = {"en": "Not used"}  # memoized by id
+    assert serializer.to_representation(language)["pref_label"] == {"en": "Finnish"}
+
+
+def test_concept_cache_invalidate_on_import(language, locmem_cache):
+    concept_cache.get_many(Language, [language.url])
+    importer = BaseDataImporter(model=Language, source=None, scheme="https://example.com")
+    importer.save([{"url": language.url, "pref_label": {"en": "Finnish language"}}])
+
+    entry = concept_cache.get_many(Language, [language.url])[language.url]
+    assert entry.pref_label == {"en": "Finnish language"}
+
+
+def test_concept_cache_invalidate_on_save(language, locmem_cache):
+    concept_cache.get_many(Language, [language.url])
+    language.delete()
+    assert concept_cache.get_many(Language, [language.url]) == {}
+
+
+def test_concept_cache_local_timeout(language, locmem_cache, settings):
+    concept_cache.get_many(Language, [language.url])
+    settings.REFERENCE_DATA_LOCAL_CACHE_TIMEOUT = 0
+    with CaptureQueriesContext(connection) as ctx:
+        concept_cache.get_many(Language, [language.url])
+    assert len(ctx.captured_queries) == 1
+
+
+def test_concept_cache_disabled(language):
+    # Disabled by default without a shared cache, lookups go to database
+    with CaptureQueriesContext(connection) as ctx:
+        concept_cache.get_many(Language, [language.url])
+        concept_cache.get_many(Language, [language.url])
+    assert len(ctx.captured_queries) == 2
+
+
+def test_concept_cache_signal_senders():
+    # Invalidation receivers are connected only for concept models
+    for model in [Spatial, Provenance, DatasetActor, FileSetFileMetadata]:
+        assert supports_bulk_create(model)
+    assert not supports_bulk_create(Language)
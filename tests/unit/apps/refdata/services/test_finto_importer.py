@@ -2,8 +2,9 @@ from os import path
 
 import pytest
 
-from apps.refdata.models import FieldOfScience, Location
+from apps.refdata.models import FieldOfScience, Location, ReferenceDataImportState, Theme
 from apps.refdata.services.importers import FintoImporter, FintoLocationImporter
+from apps.refdata.services.importers.common import BaseDataImporter
 
 data_sources = {
     "field_of_science": "testdata/field_of_science.ttl",
@@ -139,3 +140,62 @@ def test_import_finto_location(finto):
             "broader__pref_label__en": None,
         },
     ]
+
+
+def test_import_finto_not_modified(requests_mock, mock_finto_data):
+    url = "https://finto-mock/field_of_science.ttl"
+    requests_mock.get(
+        url,
+        content=mock_finto_data["field_of_science"],
+        headers={"content-type": "text/turtle", "etag": '"v1"'},
+    )
+    FintoImporter(model=FieldOfScience, source=url).load()
+    assert FieldOfScience.all_objects.count() == 6
+    assert ReferenceDataImportState.objects.get(data_type="FieldOfScience").etag == '"v1"'
+
+    FieldOfScience.all_objects.update(in_scheme="https://example.com/changed")
+    requests_mock.get(url, status_code=304)
+    FintoImporter(model=FieldOfScience, source=url).load()
+    assert requests_mock.last_request.headers["If-None-Match"] == '"v1"'
+    assert FieldOfScience.all_objects.filter(in_scheme="https://example.com/changed").count() == 6
+
+
+def test_import_finto_unchanged_content(finto):
+    url = "https://finto-mock/field_of_science.ttl"
+    FintoImporter(model=FieldOfScience, source=url).load()
+    FieldOfScience.all_objects.update(in_scheme="https://example.com/changed")
+
+    # No conditional request validators, content hash is the same
+    FintoImporter(model=FieldOfScience, source=url).load()
+    assert FieldOfScience.all_objects.filter(in_scheme="https://example.com/changed").count() == 6
+
+    # Import state is ignored for a different source
+    ReferenceDataImportState.objects.update(source="https://finto-mock/other.ttl")
+    FintoImporter(model=FieldOfScience, source=url).load()
+    assert FieldOfScience.all_objects.filter(in_scheme="https://example.com/changed").count() == 0
+
+
+def test_import_changed_relationships():
+    importer = BaseDataImporter(model=Theme, source=None, scheme="https://example.com")
+
+    def item(name, broader=()):
+        return {
+            "url": f"https://example.com/{name}",
+            "pref_label": {"en": name},
+            "broader": [f"https://example.com/{parent}" for parent in broader],
+        }
+
+    def get_relations():
+        return dict(
+            Theme.broader.through.objects.values_list(
+                "from_theme__pref_label__en", "to_theme__pref_label__en"
+            )
+        )
+
+    importer.save([item("a"), item("b", broader=["a"]), item("c", broader=["a"])])
+    assert get_relations() == {"b": "a", "c": "a"}
+    unchanged_relation = Theme.broader.through.objects.get(from_theme__pref_label__en="c")
+
+    importer.save([item("a"), item("b", broader=["c"]), item("c", broader=["a"])])
+    assert get_relations() == {"b": "c", "c": "a"}
+    assert Theme.broader.through.objects.filter(id=unchanged_relation.id).exists()